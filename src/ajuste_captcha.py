@@ -0,0 +1,226 @@
+"""
+Ajuste de los parámetros del preprocesamiento y del OCR del captcha.
+
+Busca sobre un corpus etiquetado (ver `corpus_captcha`) la combinación de
+parámetros de `orc.PARAMETROS_CAPTCHA` que más captchas resuelve en el primer
+intento: umbral fijo, cierre morfológico, filtro de mediana, umbral adaptativo,
+modo de segmentación de Tesseract y variantes que se votan. Los candidatos se
+evalúan en un pool de procesos (cada proceso carga el corpus una sola vez).
+
+Con la mejor combinación se elige también el umbral de confianza que maximiza
+los aciertos enviados menos los errores enviados, y la longitud aceptada se toma
+de las etiquetas del corpus. El resultado se escribe en `orc.RUTA_CONFIG_CAPTCHA`,
+que `orc` carga al importarse (y por tanto `resolver_captcha`).
+
+Uso:
+    python -m src.ajuste_captcha --corpus data/captchas --limite 300 --workers 4
+    python -m src.ajuste_captcha --corpus data/captchas --aleatorio 60 --semilla 1 --motor tesserocr
+
+Fecha: 2026-10-16
+"""
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from src.clasificador_captcha import leer_corpus, leer_gris
+import argparse
+import itertools
+import json
+import os
+import random
+import time
+
+
+# Valores candidatos de cada parámetro (las claves son las de `orc.PARAMETROS_CAPTCHA`)
+ESPACIO_BUSQUEDA = {
+    "umbral_fijo": [110, 130, 150, 170, 190],
+    "kernel_cierre": [1, 2, 3],
+    "mediana": [3, 5],
+    "bloque_adaptativo": [11, 15, 25],
+    "c_adaptativo": [4, 8, 12],
+    "psm": [7, 8, 13],
+    "variantes": [
+        ["fijo"],
+        ["otsu", "sin_ruido", "enderezada"],
+        ["fijo", "otsu", "adaptativo"],
+        ["fijo", "otsu", "adaptativo", "sin_ruido", "enderezada"],
+    ],
+}
+
+# Umbrales de confianza que se prueban con la mejor combinación
+UMBRALES_CONFIANZA = list(range(0, 100, 5))
+
+# Corpus cargado una sola vez en cada proceso del pool (ver `_iniciar_proceso`)
+_muestras = []
+
+
+def candidatos(espacio=None, aleatorio=None, semilla=None):
+    """
+    Genera las combinaciones de parámetros a evaluar.
+
+    Args:
+        espacio (dict, optional): Valores candidatos por parámetro. Por defecto `ESPACIO_BUSQUEDA`.
+        aleatorio (int, optional): Si se indica, se toman esa cantidad de combinaciones
+            al azar (sin repetir) en lugar de la rejilla completa.
+        semilla (int, optional): Semilla de la búsqueda aleatoria.
+
+    Returns:
+        list[dict]: Combinaciones de parámetros.
+    """
+    espacio = espacio or ESPACIO_BUSQUEDA
+    claves = list(espacio)
+    total = 1
+    for clave in claves:
+        total *= len(espacio[clave])
+    if aleatorio is None or aleatorio >= total:
+        return [dict(zip(claves, valores)) for valores in itertools.product(*(espacio[clave] for clave in claves))]
+
+    rng = random.Random(semilla)
+    indices = rng.sample(range(total), aleatorio)
+    combinaciones = []
+    for indice in indices:
+        combinacion = {}
+        for clave in reversed(claves):
+            indice, posicion = divmod(indice, len(espacio[clave]))
+            combinacion[clave] = espacio[clave][posicion]
+        combinaciones.append({clave: combinacion[clave] for clave in claves})
+    return combinaciones
+
+
+def _iniciar_proceso(corpus, limite):
+    global _muestras
+    _muestras = [(etiqueta, leer_gris(ruta))
+                 for i, (etiqueta, ruta) in enumerate(leer_corpus(corpus), start=1) if limite is None or i <= limite]
+
+
+def _evaluar_candidato(tarea):
+    """
+    Resuelve todo el corpus con una combinación de parámetros (se ejecuta en los procesos del pool).
+    """
+    parametros, motor = tarea
+    from src.orc import reconocer_captcha
+    inicio = time.perf_counter()
+    lecturas = []
+    for etiqueta, gris in _muestras:
+        try:
+            resultado = reconocer_captcha(gris, motor=motor, parametros=parametros)
+            lecturas.append((etiqueta, resultado["texto"], resultado["confianza"]))
+        except Exception as ex:
+            print(f"⚠️ Error evaluando {parametros}: {ex}")
+            lecturas.append((etiqueta, "", 0))
+    duracion = time.perf_counter() - inicio
+    aciertos = sum(1 for etiqueta, texto, _ in lecturas if texto == etiqueta)
+    return {
+        "parametros": parametros,
+        "precision": round(aciertos / len(lecturas), 4) if lecturas else 0.0,
+        "ms_por_captcha": round(duracion * 1000 / len(lecturas), 3) if lecturas else None,
+        "lecturas": lecturas,
+    }
+
+
+def elegir_umbral_confianza(lecturas, umbrales=None):
+    """
+    Elige el umbral de confianza que maximiza aciertos enviados menos errores enviados.
+
+    Un captcha por debajo del umbral se recarga en lugar de enviarse, así que cada
+    error enviado cuesta un viaje al servidor que se habría podido ahorrar.
+
+    Args:
+        lecturas (list[tuple[str, str, float]]): `(etiqueta, texto, confianza)` por captcha.
+        umbrales (Iterable[float], optional): Umbrales a probar. Por defecto `UMBRALES_CONFIANZA`.
+
+    Returns:
+        float: Umbral elegido (el menor en caso de empate).
+    """
+    def puntaje(umbral):
+        enviados = [(etiqueta, texto) for etiqueta, texto, confianza in lecturas if texto and confianza >= umbral]
+        aciertos = sum(1 for etiqueta, texto in enviados if texto == etiqueta)
+        return aciertos - (len(enviados) - aciertos)
+
+    return max(umbrales or UMBRALES_CONFIANZA, key=lambda umbral: (puntaje(umbral), -umbral))
+
+
+def ajustar(corpus, motor=None, espacio=None, aleatorio=None, semilla=None, workers=None, limite=None):
+    """
+    Evalúa las combinaciones de parámetros sobre el corpus en un pool de procesos.
+
+    Args:
+        corpus (str): Carpeta del corpus etiquetado.
+        motor (str, optional): Motor de OCR. Por defecto `orc.MOTOR_OCR`.
+        espacio (dict, optional): Valores candidatos. Por defecto `ESPACIO_BUSQUEDA`.
+        aleatorio (int, optional): Cantidad de combinaciones al azar (búsqueda aleatoria).
+        semilla (int, optional): Semilla de la búsqueda aleatoria.
+        workers (int, optional): Procesos del pool. Por defecto, uno por núcleo.
+        limite (int, optional): Máximo de imágenes del corpus a usar.
+
+    Returns:
+        dict: Configuración con los `parametros` elegidos, su precisión y el ranking de candidatos.
+    """
+    from src.orc import parametros_captcha, MOTOR_OCR
+    motor = motor or MOTOR_OCR
+    etiquetas = [etiqueta for i, (etiqueta, _) in enumerate(leer_corpus(corpus), start=1) if limite is None or i <= limite]
+    if not etiquetas:
+        raise ValueError(f"El corpus {corpus} no contiene imágenes etiquetadas.")
+    combinaciones = candidatos(espacio, aleatorio, semilla)
+    print(f"🔎 Evaluando {len(combinaciones)} combinaciones sobre {len(etiquetas)} captchas con {motor}...")
+
+    inicio = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_iniciar_proceso,
+                             initargs=(corpus, limite)) as executor:
+        resultados = list(executor.map(_evaluar_candidato, [(parametros, motor) for parametros in combinaciones]))
+    duracion_total = time.perf_counter() - inicio
+
+    # Mayor precisión primero; a igual precisión, el más rápido
+    resultados.sort(key=lambda r: (-r["precision"], r["ms_por_captcha"] or 0))
+    mejor = resultados[0]
+    parametros = {**parametros_captcha(), **mejor["parametros"],
+                  "longitud_minima": min(len(etiqueta) for etiqueta in etiquetas),
+                  "longitud_maxima": max(len(etiqueta) for etiqueta in etiquetas),
+                  "umbral_confianza": elegir_umbral_confianza(mejor["lecturas"])}
+
+    return {
+        "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "corpus": os.path.abspath(corpus),
+        "motor": motor,
+        "busqueda": "aleatoria" if aleatorio else "rejilla",
+        "captchas": len(etiquetas),
+        "combinaciones_evaluadas": len(resultados),
+        "tiempo_total_segundos": round(duracion_total, 2),
+        "precision": mejor["precision"],
+        "parametros": parametros,
+        "ranking": [{clave: r[clave] for clave in ("precision", "ms_por_captcha", "parametros")} for r in resultados[:10]],
+    }
+
+
+def guardar_configuracion(configuracion, ruta=None):
+    """
+    Escribe la configuración ajustada en el archivo que carga `orc`.
+
+    Args:
+        configuracion (dict): Resultado de `ajustar`.
+        ruta (str, optional): Archivo de salida. Por defecto `orc.RUTA_CONFIG_CAPTCHA`.
+
+    Returns:
+        str: Ruta del archivo escrito.
+    """
+    from src.orc import RUTA_CONFIG_CAPTCHA
+    ruta = ruta or RUTA_CONFIG_CAPTCHA
+    os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(configuracion, f, indent=4, ensure_ascii=False)
+    return ruta
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ajusta los parámetros del OCR del captcha sobre un corpus etiquetado.")
+    parser.add_argument("--corpus", required=True)
+    parser.add_argument("--motor", help="Motor de OCR (pytesseract o tesserocr).")
+    parser.add_argument("--aleatorio", type=int, help="Combinaciones al azar en lugar de la rejilla completa.")
+    parser.add_argument("--semilla", type=int)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--limite", type=int, help="Máximo de imágenes del corpus a usar.")
+    parser.add_argument("--salida", help="Archivo de configuración (por defecto el que carga orc).")
+    args = parser.parse_args()
+
+    configuracion = ajustar(args.corpus, args.motor, aleatorio=args.aleatorio, semilla=args.semilla,
+                            workers=args.workers, limite=args.limite)
+    print(f"\n🏆 Precisión {configuracion['precision']} con {configuracion['parametros']}")
+    print(f"🗂️ Configuración guardada en: {guardar_configuracion(configuracion, args.salida)}\n")
@@ -0,0 +1,383 @@
+"""
+Módulo de ejecución por lotes (modo no interactivo) de consultas de cédula.
+
+Este archivo permite procesar grandes volúmenes de cédulas sin intervención
+del usuario. Las filas se leen desde un archivo CSV o JSONL, se validan todas
+antes de iniciar cualquier navegador y luego se ejecutan en paralelo mediante
+`consultar_certificado_cedula`, con un número configurable de trabajadores.
+
+Los resultados se entregan en streaming a medida que cada consulta termina,
+de modo que el rendimiento crece con el número de trabajadores.
+
+Formato de entrada (columnas o claves aceptadas):
+    - cedula (o numero_cedula)
+    - dia
+    - mes  (nombre en español o número 1-12)
+    - año  (o anio / year)
+
+Uso:
+    python -m src.batch cedulas.csv --workers 4 --salida resultados.jsonl
+
+Fecha: 2026-10-16
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from functools import partial
+from src.scraping import consultar_certificado_cedula
+from src.configuration import crear_driver
+from src.driver_pool import PoolDrivers
+from src.cache_captcha import obtener_cache_captcha
+from src.cache_pdf import obtener_cache_pdf
+from src.servicio_ocr import ServicioOCR
+from src.cola_manual import ColaCaptchaManual, ServidorCaptchaManual, PLAZO_RESPUESTA_MANUAL, PUERTO_COLA_MANUAL
+from src.motor_http import consultar_certificado_cedula_http, CABECERAS_HTTP
+from src.motor_async import iterar_lote_async
+from src.storage import error_de_resultado
+from src import utils
+import argparse
+import csv
+import json
+import os
+import requests
+import sys
+import threading
+import time
+
+# Alias aceptados para cada columna del archivo de entrada
+ALIAS_COLUMNAS = {
+    "numero_cedula": ("cedula", "numero_cedula", "cédula"),
+    "dia_expedicion_cedula": ("dia", "día", "dia_expedicion_cedula"),
+    "mes_expedicion_cedula": ("mes", "mes_expedicion_cedula"),
+    "year_expedicion_cedula": ("año", "anio", "year", "year_expedicion_cedula"),
+}
+
+def leer_filas(ruta_archivo):
+    """
+    Lee de forma perezosa las filas de un archivo CSV o JSONL.
+
+    El formato se decide por la extensión del archivo (`.jsonl` / `.json` para
+    JSON por líneas, cualquier otra para CSV con encabezados).
+
+    Args:
+        ruta_archivo (str): Ruta del archivo de entrada.
+
+    Yields:
+        dict: Fila cruda tal como viene en el archivo.
+    """
+    extension = os.path.splitext(ruta_archivo)[1].lower()
+    with open(ruta_archivo, "r", encoding="utf-8-sig", newline="") as f:
+        if extension in (".jsonl", ".json"):
+            for linea in f:
+                if linea.strip():
+                    yield json.loads(linea)
+        else:
+            for fila in csv.DictReader(f):
+                yield fila
+
+def validar_fila(fila, fecha_referencia=None):
+    """
+    Valida y normaliza una fila de entrada con las mismas reglas del modo interactivo.
+
+    Reglas:
+        - Cédula: solo dígitos, máximo 10.
+        - Día: entre 1 y 31 (se normaliza a dos dígitos).
+        - Mes: nombre en español o número entre 1 y 12 (se normaliza al nombre en minúsculas).
+        - Año: cuatro dígitos, no mayor al actual.
+        - La fecha debe existir y no ser futura.
+
+    Args:
+        fila (dict): Fila cruda leída del archivo.
+        fecha_referencia (datetime, optional): Fecha contra la que se valida que
+            la expedición no sea futura. Por defecto, la fecha actual.
+
+    Returns:
+        tuple[dict | None, str | None]: `(datos, None)` si la fila es válida, con las
+        claves que espera `consultar_certificado_cedula`; o `(None, mensaje_error)`.
+    """
+    fecha_referencia = fecha_referencia or datetime.today()
+    fila_normalizada = {str(k).strip().lower(): str(v).strip() for k, v in fila.items() if k is not None and v is not None}
+
+    datos = {}
+    for campo, alias in ALIAS_COLUMNAS.items():
+        valor = next((fila_normalizada[a] for a in alias if fila_normalizada.get(a)), None)
+        if valor is None:
+            return None, f"Falta el campo '{alias[0]}'"
+        datos[campo] = valor.lower()
+
+    cedula = datos["numero_cedula"]
+    if not cedula.isdigit() or len(cedula) > 10:
+        return None, "Cédula inválida: solo se permiten números (máximo 10 dígitos)"
+
+    dia = datos["dia_expedicion_cedula"]
+    if not dia.isdigit() or not 1 <= int(dia) <= 31:
+        return None, "Día inválido: debe ser un número entre 01 y 31"
+    datos["dia_expedicion_cedula"] = f"{int(dia):02d}"
+
+    mes = datos["mes_expedicion_cedula"]
+    if mes.isdigit() and 1 <= int(mes) <= 12:
+        mes = utils.meses[int(mes) - 1]
+    if mes not in utils.meses:
+        return None, "Mes inválido"
+    datos["mes_expedicion_cedula"] = mes
+
+    year = datos["year_expedicion_cedula"]
+    if not year.isdigit() or len(year) != 4 or int(year) > fecha_referencia.year:
+        return None, "Año inválido: debe ser numérico de 4 dígitos y no mayor al actual"
+
+    try:
+        fecha = datetime(int(year), utils.meses.index(mes) + 1, int(dia))
+    except ValueError:
+        return None, "Fecha inexistente"
+    if fecha.date() > fecha_referencia.date():
+        return None, "La fecha de expedición no puede ser futura"
+
+    return datos, None
+
+def cargar_lote(ruta_archivo):
+    """
+    Lee y valida completamente un archivo de entrada antes de ejecutar consultas.
+
+    Args:
+        ruta_archivo (str): Ruta del archivo CSV o JSONL.
+
+    Returns:
+        tuple[list, list]: `(validas, invalidas)`, donde `validas` es una lista de
+        tuplas `(numero_fila, datos)` e `invalidas` una lista de dicts con
+        `fila`, `datos` y `error`.
+    """
+    validas, invalidas = [], []
+    for numero_fila, fila in enumerate(leer_filas(ruta_archivo), start=1):
+        datos, error = validar_fila(fila)
+        if error:
+            invalidas.append({"fila": numero_fila, "datos": fila, "error": error})
+        else:
+            validas.append((numero_fila, datos))
+    return validas, invalidas
+
+_sesiones_http = threading.local()
+
+def consultar_por_http(driver, archivar_pdf=False, servicio_ocr=None, **datos):
+    """
+    Adaptador del motor HTTP a la firma de `consultar_certificado_cedula`.
+
+    Cada hilo reutiliza su propia `requests.Session` (conexiones keep-alive).
+    El argumento `driver` se ignora. Si se indica `servicio_ocr`, el captcha se
+    resuelve en el servicio compartido.
+    """
+    sesion = getattr(_sesiones_http, "sesion", None)
+    if sesion is None:
+        sesion = _sesiones_http.sesion = requests.Session()
+        sesion.headers.update(CABECERAS_HTTP)
+    if servicio_ocr is not None:
+        datos["resolver"] = servicio_ocr.resolver_bytes
+    return consultar_certificado_cedula_http(**datos, sesion=sesion, archivar_pdf=archivar_pdf)
+
+def _ejecutar_consulta(numero_fila, datos, consulta, fabrica_driver, pool):
+    """
+    Ejecuta una consulta individual midiendo tiempo y resultado.
+    """
+    inicio = time.perf_counter()
+    try:
+        if pool is not None:
+            resultado = consulta(None, **datos, pool=pool)
+        else:
+            resultado = consulta(fabrica_driver(), **datos)
+        # Esperas y viajes al WebDriver de la consulta (motor selenium) van en la fila, no en las rutas
+        medidas = {}
+        if isinstance(resultado, dict):
+            resultado = dict(resultado)
+            medidas = {clave: resultado.pop(clave) for clave in ("esperas", "viajes") if clave in resultado}
+        if isinstance(resultado, dict) and resultado.get("reencolar"):
+            return {
+                "fila": numero_fila,
+                "cedula": datos["numero_cedula"],
+                "resultado": "reencolada",
+                "tiempo": round(time.perf_counter() - inicio, 2),
+                "motivo": resultado.get("motivo"),
+                **medidas,
+            }
+        # Un resultado con `error` (PDF sin parsear o sin guardar) no es una consulta exitosa
+        error = error_de_resultado(resultado)
+        fila = {
+            "fila": numero_fila,
+            "cedula": datos["numero_cedula"],
+            "resultado": "ok" if resultado and not error else "falló",
+            "tiempo": round(time.perf_counter() - inicio, 2),
+            "rutas": None if error else resultado or None,
+            **medidas,
+        }
+        if error:
+            fila["error"] = error
+        return fila
+    except Exception as ex:
+        return {
+            "fila": numero_fila,
+            "cedula": datos["numero_cedula"],
+            "resultado": "error",
+            "tiempo": round(time.perf_counter() - inicio, 2),
+            "error": str(ex),
+        }
+
+def ejecutar_lote(filas, workers=4, consulta=consultar_certificado_cedula, fabrica_driver=crear_driver, pool=None, max_reencolados=1):
+    """
+    Ejecuta un lote de consultas en paralelo y entrega los resultados en streaming.
+
+    Solo se mantienen en vuelo `2 * workers` consultas a la vez, por lo que
+    la memoria no crece con el tamaño del lote.
+
+    Args:
+        filas (Iterable[tuple[int, dict]]): Tuplas `(numero_fila, datos)` ya validadas.
+        workers (int, optional): Número de consultas simultáneas. Por defecto 4.
+        consulta (callable, optional): Función de consulta con la firma de
+            `consultar_certificado_cedula`.
+        fabrica_driver (callable, optional): Función que crea el driver de cada consulta.
+            Se ignora si se indica `pool`.
+        pool (PoolDrivers, optional): Pool de navegadores reutilizables del que cada
+            consulta toma prestado su driver.
+        max_reencolados (int, optional): Veces que se vuelve a encolar una consulta
+            que liberó su sesión (p. ej. captcha manual sin respuesta a tiempo).
+            Agotadas, se entrega con resultado "reencolada".
+
+    Yields:
+        dict: Resultado de cada consulta en el orden en que termina.
+    """
+    filas = iter(filas)
+    reencoladas = deque()
+    veces_reencolada = {}
+    en_vuelo = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            while len(en_vuelo) < 2 * workers:
+                siguiente = reencoladas.popleft() if reencoladas else next(filas, None)
+                if siguiente is None:
+                    break
+                numero_fila, datos = siguiente
+                en_vuelo[executor.submit(_ejecutar_consulta, numero_fila, datos, consulta, fabrica_driver, pool)] = siguiente
+            if not en_vuelo:
+                break
+            terminadas, _ = wait(en_vuelo, return_when=FIRST_COMPLETED)
+            for future in terminadas:
+                fila = en_vuelo.pop(future)
+                resultado = future.result()
+                if resultado["resultado"] == "reencolada" and veces_reencolada.get(fila[0], 0) < max_reencolados:
+                    veces_reencolada[fila[0]] = veces_reencolada.get(fila[0], 0) + 1
+                    print(f"🔁 Fila {fila[0]} reencolada ({resultado.get('motivo')}).", file=sys.stderr)
+                    reencoladas.append(fila)
+                    continue
+                yield resultado
+
+def iniciar_servidor_manual(cola_manual, puerto=PUERTO_COLA_MANUAL):
+    """
+    Inicia la página de captchas manuales; si el puerto está ocupado, usa uno libre.
+
+    Returns:
+        ServidorCaptchaManual: Servidor ya iniciado.
+    """
+    try:
+        return ServidorCaptchaManual(cola_manual, puerto=puerto).iniciar()
+    except OSError as ex:
+        print(f"⚠️ No se pudo usar el puerto {puerto} para la página de captchas manuales ({ex}); se usa uno libre.",
+              file=sys.stderr)
+        return ServidorCaptchaManual(cola_manual, puerto=0).iniciar()
+
+def main(argv=None):
+    """
+    Punto de entrada de línea de comandos del modo por lotes.
+
+    Args:
+        argv (list[str], optional): Argumentos de línea de comandos.
+
+    Returns:
+        int: Código de salida (0 si todas las filas fueron válidas y procesadas).
+    """
+    parser = argparse.ArgumentParser(description="Consulta por lotes de certificados de cédula.")
+    parser.add_argument("archivo", help="Archivo CSV o JSONL con cedula, dia, mes y año.")
+    parser.add_argument("--workers", type=int, default=4, help="Número de consultas simultáneas.")
+    parser.add_argument("--salida", help="Archivo JSONL de resultados (por defecto, salida estándar).")
+    parser.add_argument("--motor", choices=["selenium", "http", "async"], default="selenium",
+                        help="Motor de consulta (con 'async', --workers es el máximo de consultas en vuelo).")
+    parser.add_argument("--max-usos", type=int, default=25, help="Consultas por navegador antes de reciclarlo.")
+    parser.add_argument("--sin-pool", action="store_true", help="Crear un navegador nuevo por consulta.")
+    parser.add_argument("--headless", action="store_true", help="Navegadores sin interfaz y con bloqueo de recursos.")
+    parser.add_argument("--pdf-en-memoria", action="store_true", help="Capturar el PDF en memoria sin carpeta de descargas.")
+    parser.add_argument("--sin-archivar", action="store_true", help="No guardar copia del PDF en disco (con --pdf-en-memoria o --motor http/async).")
+    parser.add_argument("--sin-cache-captcha", action="store_true", help="No reutilizar respuestas de captchas ya aceptados.")
+    parser.add_argument("--formulario-rapido", action="store_true",
+                        help="Llenar el formulario con un solo script mientras el OCR lee el captcha (motor selenium).")
+    parser.add_argument("--sin-captcha-manual", action="store_true",
+                        help="Pedir por consola los captchas que el OCR no resuelve (bloquea el trabajador).")
+    parser.add_argument("--puerto-captcha-manual", type=int, default=PUERTO_COLA_MANUAL,
+                        help="Puerto local de la página de captchas pendientes.")
+    parser.add_argument("--plazo-captcha-manual", type=float, default=PLAZO_RESPUESTA_MANUAL,
+                        help="Segundos de espera de cada respuesta manual antes de reencolar la consulta.")
+    parser.add_argument("--sin-servicio-ocr", action="store_true",
+                        help="Resolver el captcha en cada hilo en lugar del servicio de OCR compartido (motores selenium y http).")
+    args = parser.parse_args(argv)
+
+    validas, invalidas = cargar_lote(args.archivo)
+    for invalida in invalidas:
+        print(f"⚠️ Fila {invalida['fila']} inválida: {invalida['error']}", file=sys.stderr)
+    print(f"🧪 {len(validas)} filas válidas, {len(invalidas)} inválidas. Iniciando con {args.workers} workers...", file=sys.stderr)
+
+    salida = open(args.salida, "a", encoding="utf-8") if args.salida else sys.stdout
+    pool = None
+    servidor_manual = None
+    servicio_ocr = None if args.sin_servicio_ocr or args.motor == "async" else ServicioOCR()
+    if args.motor == "async":
+        resultados = iterar_lote_async(validas, max_concurrencia=args.workers, archivar_pdf=not args.sin_archivar)
+    elif args.motor == "http":
+        consulta = partial(consultar_por_http, archivar_pdf=not args.sin_archivar, servicio_ocr=servicio_ocr)
+        resultados = ejecutar_lote(validas, workers=args.workers, consulta=consulta, fabrica_driver=lambda: None)
+    else:
+        # Con el PDF solo en memoria y sin archivar, los navegadores no necesitan carpeta de descargas
+        descargas = not (args.pdf_en_memoria and args.sin_archivar)
+        fabrica_driver = partial(crear_driver, headless=args.headless, descargas=descargas)
+        pool = None if args.sin_pool else PoolDrivers(tamano=args.workers, max_usos=args.max_usos, fabrica_driver=fabrica_driver,
+                                                      descargas=descargas)
+        cola_manual = None
+        if not args.sin_captcha_manual:
+            # Cada espera manual retiene un trabajador y su navegador: dejar al menos uno consultando
+            cola_manual = ColaCaptchaManual(plazo=args.plazo_captcha_manual, max_esperas=max(1, args.workers - 1))
+            servidor_manual = iniciar_servidor_manual(cola_manual, args.puerto_captcha_manual)
+            print(f"✍️ Captchas para resolver a mano en {servidor_manual.url}", file=sys.stderr)
+        consulta = partial(consultar_certificado_cedula, pdf_en_memoria=args.pdf_en_memoria, archivar_pdf=not args.sin_archivar,
+                           cache_captcha=not args.sin_cache_captcha, servicio_ocr=servicio_ocr, cola_manual=cola_manual,
+                           formulario_rapido=args.formulario_rapido)
+        resultados = ejecutar_lote(validas, workers=args.workers, consulta=consulta, fabrica_driver=fabrica_driver, pool=pool)
+    inicio_total = time.perf_counter()
+    exitos = 0
+    try:
+        for resultado in resultados:
+            exitos += resultado["resultado"] == "ok"
+            salida.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+            salida.flush()
+    finally:
+        if pool is not None:
+            pool.cerrar()
+        if servicio_ocr is not None:
+            servicio_ocr.cerrar()
+        if servidor_manual is not None:
+            servidor_manual.detener()
+        if salida is not sys.stdout:
+            salida.close()
+
+    duracion_total = round(time.perf_counter() - inicio_total, 2)
+    print(f"📊 Consultas exitosas: {exitos}/{len(validas)} en {duracion_total} segundos", file=sys.stderr)
+    if args.motor == "selenium" and not args.sin_cache_captcha:
+        metricas = obtener_cache_captcha().metricas()
+        print(f"🗃️ Caché de captchas: {metricas['aciertos']}/{metricas['consultas']} aciertos "
+              f"(tasa {metricas['tasa_aciertos']}), {metricas['entradas']} entradas", file=sys.stderr)
+    metricas = obtener_cache_pdf().metricas()
+    if metricas["consultas"]:
+        print(f"📄 Caché de PDFs: {metricas['aciertos']}/{metricas['consultas']} aciertos "
+              f"(tasa {metricas['tasa_aciertos']}), {metricas['invalidadas']} de otra versión del parser", file=sys.stderr)
+    if servicio_ocr is not None:
+        metricas = servicio_ocr.metricas()
+        print(f"🧠 Servicio de OCR: {metricas['imagenes']} captchas en {metricas['lotes']} lotes "
+              f"(medio {metricas['lote_medio']}, máximo {metricas['lote_maximo']})", file=sys.stderr)
+    return 0 if not invalidas and exitos == len(validas) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,266 @@
+"""
+Caché de captchas ya resueltos, indexada por huella perceptual de la imagen.
+
+Cuando el sitio vuelve a mostrar una imagen que ya se resolvió, no hace falta
+pagar el OCR ni arriesgar una respuesta incorrecta: se reutiliza la respuesta
+que el sitio aceptó la vez anterior.
+
+    - La huella es un dHash de 256 bits (gradientes horizontales de la imagen
+      reducida a 33x8), estable ante recompresión y pequeños cambios de brillo.
+      Con 64 bits (9x8) captchas distintos llegan a tener la misma huella,
+      porque la imagen es mucho más ancha que alta y casi todo es fondo.
+    - Solo se guardan respuestas aceptadas por el sitio (sin alerta tras pulsar
+      "Continuar"); si una respuesta de la caché es rechazada, se elimina.
+    - Las entradas viven en SQLite con desalojo LRU al superar la capacidad.
+    - Para buscar huellas parecidas sin recorrer la tabla, la huella se parte en
+      `BANDAS_HUELLA` bandas de 32 bits guardadas en columnas indexadas: dos
+      huellas a `DISTANCIA_MAXIMA` bits o menos comparten al menos una banda, así
+      que solo se calcula la distancia de las filas con alguna banda igual.
+    - `metricas()` expone consultas, aciertos y tasa de aciertos.
+
+Como la respuesta se confirma después de enviar el formulario, cada hilo
+recuerda la huella de su último captcha consultado (`pendiente`) hasta que
+se llama a `confirmar` o `rechazar`.
+
+Fecha: 2026-10-16
+"""
+from src.utils import DIR_DATA
+import cv2
+import numpy as np
+import os
+import sqlite3
+import threading
+import time
+
+
+# Base de datos de la caché (se puede cambiar con la variable de entorno CAPTCHA_CACHE)
+RUTA_CACHE_CAPTCHA = os.environ.get("CAPTCHA_CACHE", os.path.join(DIR_DATA, "captcha_cache.sqlite"))
+
+# Máximo de captchas guardados antes de desalojar los menos usados recientemente
+CAPACIDAD_CACHE_CAPTCHA = 5000
+
+# Tamaño (ancho, alto) de la imagen reducida de la huella: (ancho - 1) * alto bits
+TAMANO_HUELLA = (33, 8)
+
+# Bits distintos tolerados entre huellas para considerar que son la misma imagen
+# (en captchas sintéticos distintos la menor distancia observada es 14)
+DISTANCIA_MAXIMA = 6
+
+# Bandas de la huella indexadas por separado (ver `bandas_huella`). Con distancias
+# menores que el número de bandas, alguna banda queda sin bits distintos
+BANDAS_HUELLA = 8
+
+
+def huella_perceptual(gris):
+    """
+    Calcula el dHash de una imagen en escala de grises (ver `TAMANO_HUELLA`).
+
+    Args:
+        gris (numpy.ndarray): Imagen del captcha en escala de grises.
+
+    Returns:
+        str: Huella en hexadecimal.
+    """
+    reducida = cv2.resize(gris, TAMANO_HUELLA, interpolation=cv2.INTER_AREA).astype(np.int16)
+    return np.packbits(reducida[:, 1:] > reducida[:, :-1]).tobytes().hex()
+
+
+def bandas_huella(huella):
+    """
+    Parte una huella hexadecimal en `BANDAS_HUELLA` enteros.
+
+    Returns:
+        list[int]: Valor de cada banda.
+    """
+    ancho = len(huella) // BANDAS_HUELLA
+    return [int(huella[i * ancho:(i + 1) * ancho], 16) for i in range(BANDAS_HUELLA)]
+
+
+def distancia_hamming(huella_a, huella_b):
+    """
+    Número de bits distintos entre dos huellas hexadecimales.
+    """
+    return bin(int(huella_a, 16) ^ int(huella_b, 16)).count("1")
+
+
+class CacheCaptcha:
+    """
+    Caché LRU en SQLite de respuestas de captcha aceptadas, segura para uso entre hilos.
+
+    Ejemplo:
+        >>> cache = CacheCaptcha("data/captcha_cache.sqlite")
+        >>> texto = cache.buscar(gris) or ocr(gris)
+        >>> cache.confirmar(texto) if aceptado else cache.rechazar()
+    """
+
+    def __init__(self, ruta=None, capacidad=CAPACIDAD_CACHE_CAPTCHA, distancia_maxima=DISTANCIA_MAXIMA):
+        """
+        Args:
+            ruta (str, optional): Archivo SQLite. Por defecto `RUTA_CACHE_CAPTCHA`.
+            capacidad (int, optional): Máximo de entradas guardadas.
+            distancia_maxima (int, optional): Bits de diferencia tolerados entre huellas.
+        """
+        self.ruta = ruta or RUTA_CACHE_CAPTCHA
+        self.capacidad = capacidad
+        self.distancia_maxima = distancia_maxima
+        self._lock = threading.Lock()
+        self._pendientes = threading.local()
+        self._contadores = {"consultas": 0, "aciertos": 0, "registradas": 0, "rechazadas": 0}
+        os.makedirs(os.path.dirname(os.path.abspath(self.ruta)), exist_ok=True)
+        self._conn = sqlite3.connect(self.ruta, timeout=10, check_same_thread=False)
+        self._conn.execute("""
+                           CREATE TABLE IF NOT EXISTS captchas
+                           (
+                               huella TEXT PRIMARY KEY,
+                               respuesta TEXT NOT NULL,
+                               usos INTEGER NOT NULL DEFAULT 0,
+                               ultimo_uso REAL NOT NULL
+                           )
+                           """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_captchas_ultimo_uso ON captchas (ultimo_uso)")
+        self._crear_bandas()
+        self._conn.commit()
+
+    def _crear_bandas(self):
+        """
+        Agrega las columnas indexadas de las bandas (y las completa en bases creadas sin ellas).
+        """
+        columnas = {fila[1] for fila in self._conn.execute("PRAGMA table_info(captchas)")}
+        nuevas = [f"banda{i}" for i in range(BANDAS_HUELLA) if f"banda{i}" not in columnas]
+        for columna in nuevas:
+            self._conn.execute(f"ALTER TABLE captchas ADD COLUMN {columna} INTEGER")
+        if nuevas:
+            filas = self._conn.execute("SELECT huella FROM captchas").fetchall()
+            self._conn.executemany(f"UPDATE captchas SET {self._sql_bandas(' = ?, ')} = ? WHERE huella = ?",
+                                   [(*bandas_huella(huella), huella) for huella, in filas])
+        for i in range(BANDAS_HUELLA):
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_captchas_banda{i} ON captchas (banda{i})")
+
+    @staticmethod
+    def _sql_bandas(separador):
+        return separador.join(f"banda{i}" for i in range(BANDAS_HUELLA))
+
+    # ------------------------------------------------------------------
+    # Consulta y registro
+    # ------------------------------------------------------------------
+
+    def _buscar_huella(self, huella):
+        fila = self._conn.execute("SELECT huella, respuesta FROM captchas WHERE huella = ?", (huella,)).fetchone()
+        if fila is None and self.distancia_maxima > 0:
+            if self.distancia_maxima < BANDAS_HUELLA:
+                # Solo las filas que comparten alguna banda pueden estar a la distancia tolerada
+                candidatas = self._conn.execute(f"SELECT huella, respuesta FROM captchas WHERE {self._sql_bandas(' = ? OR ')} = ?",
+                                                bandas_huella(huella))
+            else:
+                candidatas = self._conn.execute("SELECT huella, respuesta FROM captchas")
+            cercanas = [(distancia_hamming(huella, h), h, r) for h, r in candidatas]
+            cercanas = [c for c in cercanas if c[0] <= self.distancia_maxima]
+            if cercanas:
+                fila = min(cercanas)[1:]
+        return fila
+
+    def buscar(self, gris):
+        """
+        Busca la respuesta aceptada de una imagen y la deja pendiente de confirmación.
+
+        Args:
+            gris (numpy.ndarray): Imagen del captcha en escala de grises.
+
+        Returns:
+            str | None: Respuesta guardada, o None si la imagen no está en la caché.
+        """
+        huella = huella_perceptual(gris)
+        with self._lock:
+            self._contadores["consultas"] += 1
+            fila = self._buscar_huella(huella)
+            if fila is not None:
+                self._contadores["aciertos"] += 1
+                self._conn.execute("UPDATE captchas SET usos = usos + 1, ultimo_uso = ? WHERE huella = ?", (time.time(), fila[0]))
+                self._conn.commit()
+        self._pendientes.huella = fila[0] if fila else huella
+        self._pendientes.desde_cache = fila is not None
+        return fila[1] if fila else None
+
+    def confirmar(self, respuesta):
+        """
+        Guarda la respuesta que el sitio aceptó para el último captcha consultado en este hilo.
+
+        Args:
+            respuesta (str): Texto enviado y aceptado.
+        """
+        huella = getattr(self._pendientes, "huella", None)
+        self._pendientes.huella = None
+        if huella is None or not respuesta:
+            return
+        with self._lock:
+            self._conn.execute(f"""
+                               INSERT INTO captchas (huella, respuesta, usos, ultimo_uso, {self._sql_bandas(', ')})
+                               VALUES (?, ?, 0, ?{', ?' * BANDAS_HUELLA})
+                               ON CONFLICT(huella) DO UPDATE SET respuesta = excluded.respuesta, ultimo_uso = excluded.ultimo_uso
+                               """, (huella, respuesta, time.time(), *bandas_huella(huella)))
+            self._contadores["registradas"] += 1
+            exceso = self._conn.execute("SELECT COUNT(*) FROM captchas").fetchone()[0] - self.capacidad
+            if exceso > 0:
+                self._conn.execute("DELETE FROM captchas WHERE huella IN "
+                                   "(SELECT huella FROM captchas ORDER BY ultimo_uso LIMIT ?)", (exceso,))
+            self._conn.commit()
+
+    def rechazar(self):
+        """
+        Descarta el último captcha consultado en este hilo; si su respuesta venía
+        de la caché y el sitio la rechazó, se elimina la entrada.
+        """
+        huella = getattr(self._pendientes, "huella", None)
+        self._pendientes.huella = None
+        if huella is None or not getattr(self._pendientes, "desde_cache", False):
+            return
+        with self._lock:
+            self._conn.execute("DELETE FROM captchas WHERE huella = ?", (huella,))
+            self._conn.commit()
+            self._contadores["rechazadas"] += 1
+
+    # ------------------------------------------------------------------
+    # Métricas y cierre
+    # ------------------------------------------------------------------
+
+    def metricas(self):
+        """
+        Devuelve los contadores de la caché en este proceso.
+
+        Returns:
+            dict: `consultas`, `aciertos`, `fallos`, `tasa_aciertos` (0-1), `registradas`,
+                `rechazadas` y `entradas` guardadas en la base de datos.
+        """
+        with self._lock:
+            metricas = dict(self._contadores)
+            metricas["entradas"] = self._conn.execute("SELECT COUNT(*) FROM captchas").fetchone()[0]
+        metricas["fallos"] = metricas["consultas"] - metricas["aciertos"]
+        metricas["tasa_aciertos"] = round(metricas["aciertos"] / metricas["consultas"], 4) if metricas["consultas"] else 0.0
+        return metricas
+
+    def cerrar(self):
+        """
+        Cierra la conexión con la base de datos.
+        """
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+_cache_por_defecto = None
+_lock_cache = threading.Lock()
+
+def obtener_cache_captcha():
+    """
+    Devuelve la caché compartida del proceso (en `RUTA_CACHE_CAPTCHA`), creándola la primera vez.
+    """
+    global _cache_por_defecto
+    with _lock_cache:
+        if _cache_por_defecto is None:
+            _cache_por_defecto = CacheCaptcha()
+        return _cache_por_defecto
@@ -0,0 +1,171 @@
+"""
+Caché de certificados ya parseados, indexada por el SHA-256 del PDF y el backend.
+
+Los mismos bytes de un certificado se parsean más de una vez (reintentos,
+repeticiones de un lote, reproceso masivo). `gestionar_pdf` calcula el hash
+del contenido y, si ese PDF ya se parseó con la misma versión del parser,
+devuelve el resultado guardado sin abrir el PDF.
+
+    - La clave incluye el backend de extracción (y su respaldo): los backends
+      deberían dar el mismo resultado, pero uno que deja campos vacíos o un
+      backend registrado en tiempo de ejecución no debe devolver lo que parseó otro.
+    - Cada entrada guarda la versión del parser con la que se obtuvo
+      (`pdf_parser.VERSION_PARSER`). Al subir la versión, las entradas viejas
+      dejan de coincidir (cuentan como `invalidadas`) y se reemplazan al
+      volver a parsear el PDF.
+    - Solo se guardan resultados sin error.
+    - `metricas()` expone consultas, aciertos, fallos y tasa de aciertos.
+
+Fecha: 2026-10-16
+"""
+from src.utils import DIR_DATA
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+# Base de datos de la caché (se puede cambiar con la variable de entorno PDF_CACHE)
+RUTA_CACHE_PDF = os.environ.get("PDF_CACHE", os.path.join(DIR_DATA, "pdf_cache.sqlite"))
+
+
+def huella_pdf(contenido):
+    """
+    Args:
+        contenido (bytes): Contenido del PDF.
+
+    Returns:
+        str: SHA-256 del contenido en hexadecimal.
+    """
+    return hashlib.sha256(contenido).hexdigest()
+
+
+class CachePdf:
+    """
+    Caché en SQLite de resultados de `gestionar_pdf`, segura para uso entre hilos.
+
+    Ejemplo:
+        >>> cache = CachePdf("data/pdf_cache.sqlite")
+        >>> huella = huella_pdf(pdf_bytes)
+        >>> datos = cache.buscar(huella, VERSION_PARSER, "pdfium") or parsear(pdf_bytes)
+        >>> cache.guardar(huella, VERSION_PARSER, datos, "pdfium")
+    """
+
+    def __init__(self, ruta=None):
+        """
+        Args:
+            ruta (str, optional): Archivo SQLite. Por defecto `RUTA_CACHE_PDF`.
+        """
+        self.ruta = ruta or RUTA_CACHE_PDF
+        self._lock = threading.Lock()
+        self._contadores = {"consultas": 0, "aciertos": 0, "invalidadas": 0, "guardadas": 0}
+        os.makedirs(os.path.dirname(os.path.abspath(self.ruta)), exist_ok=True)
+        self._conn = sqlite3.connect(self.ruta, timeout=10, check_same_thread=False)
+        columnas = [fila[1] for fila in self._conn.execute("PRAGMA table_info(certificados)")]
+        if columnas and "backend" not in columnas:
+            # Base creada antes de que el backend fuera parte de la clave: se descarta
+            self._conn.execute("DROP TABLE certificados")
+        self._conn.execute("""
+                           CREATE TABLE IF NOT EXISTS certificados
+                           (
+                               huella TEXT NOT NULL,
+                               backend TEXT NOT NULL,
+                               version_parser TEXT NOT NULL,
+                               datos TEXT NOT NULL,
+                               guardado REAL NOT NULL,
+                               PRIMARY KEY (huella, backend)
+                           )
+                           """)
+        self._conn.commit()
+
+    def buscar(self, huella, version_parser, backend=""):
+        """
+        Busca el resultado guardado de un PDF para la versión del parser y el backend indicados.
+
+        Args:
+            huella (str): SHA-256 del PDF (`huella_pdf`).
+            version_parser (str | int): Versión vigente del parser.
+            backend (str, optional): Backend (y respaldo) con el que se parsearía el PDF.
+
+        Returns:
+            dict | None: Resultado guardado (una copia nueva), o None si no está o
+                se obtuvo con otra versión del parser.
+        """
+        with self._lock:
+            self._contadores["consultas"] += 1
+            fila = self._conn.execute("SELECT version_parser, datos FROM certificados WHERE huella = ? AND backend = ?",
+                                      (huella, backend)).fetchone()
+            if fila is None:
+                return None
+            if fila[0] != str(version_parser):
+                self._contadores["invalidadas"] += 1
+                return None
+            self._contadores["aciertos"] += 1
+        return json.loads(fila[1])
+
+    def guardar(self, huella, version_parser, datos, backend=""):
+        """
+        Guarda (o reemplaza) el resultado de un PDF. Los resultados con `error` no se guardan.
+
+        Args:
+            huella (str): SHA-256 del PDF.
+            version_parser (str | int): Versión del parser que produjo `datos`.
+            datos (dict): Resultado de `gestionar_pdf`.
+            backend (str, optional): Backend (y respaldo) que produjo `datos`.
+        """
+        if not isinstance(datos, dict) or "error" in datos:
+            return
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO certificados (huella, backend, version_parser, datos, guardado) "
+                               "VALUES (?, ?, ?, ?, ?)",
+                               (huella, backend, str(version_parser), json.dumps(datos, ensure_ascii=False), time.time()))
+            self._conn.commit()
+            self._contadores["guardadas"] += 1
+
+    def metricas(self):
+        """
+        Devuelve los contadores de la caché en este proceso.
+
+        Returns:
+            dict: `consultas`, `aciertos`, `fallos`, `tasa_aciertos` (0-1), `invalidadas`
+                (entradas de otra versión del parser), `guardadas` y `entradas` en la base de datos.
+        """
+        with self._lock:
+            metricas = dict(self._contadores)
+            metricas["entradas"] = self._conn.execute("SELECT COUNT(*) FROM certificados").fetchone()[0]
+        metricas["fallos"] = metricas["consultas"] - metricas["aciertos"]
+        metricas["tasa_aciertos"] = round(metricas["aciertos"] / metricas["consultas"], 4) if metricas["consultas"] else 0.0
+        return metricas
+
+    def cerrar(self):
+        """
+        Cierra la conexión con la base de datos.
+        """
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+_cache_por_defecto = None
+_pid_cache = None
+_lock_cache = threading.Lock()
+
+def obtener_cache_pdf():
+    """
+    Devuelve la caché compartida del proceso (en `RUTA_CACHE_PDF`), creándola la primera vez.
+
+    Un proceso hijo creado por `fork` abre su propia conexión en lugar de usar la heredada.
+    """
+    global _cache_por_defecto, _pid_cache
+    with _lock_cache:
+        if _cache_por_defecto is None or _pid_cache != os.getpid():
+            _cache_por_defecto = CachePdf()
+            _pid_cache = os.getpid()
+        return _cache_por_defecto
@@ -0,0 +1,357 @@
+"""
+Resolvedor local del captcha por segmentación de caracteres y plantillas (NumPy).
+
+El captcha usa una sola fuente y el alfabeto A-Z0-9, por lo que no hace falta un
+motor de OCR general: basta con separar cada carácter y compararlo contra
+plantillas aprendidas de un corpus etiquetado. Todo el cálculo es NumPy/OpenCV
+en CPU, del orden de milisegundos por captcha, y se puede resolver un lote de
+captchas con una sola multiplicación de matrices.
+
+Incluye:
+    - Segmentación con componentes conectados de OpenCV (con fusión de trozos
+      y división de caracteres pegados).
+    - Clasificación por correlación normalizada contra plantillas por clase.
+    - Entrenamiento desde un corpus etiquetado y persistencia del modelo (.npz).
+
+El corpus es una carpeta de imágenes cuyo nombre empieza por la respuesta del
+captcha, por ejemplo `AB12C.png` o `AB12C_000123.png`.
+
+Uso:
+    python -m src.clasificador_captcha --corpus data/captchas --salida data/modelos/captcha_plantillas.npz
+
+Fecha: 2026-10-16
+"""
+from src.utils import DIR_DATA
+import argparse
+import os
+import random
+import time
+import cv2
+import numpy as np
+
+# Ruta por defecto del modelo entrenado
+RUTA_MODELO_CAPTCHA = os.environ.get("CAPTCHA_MODELO", os.path.join(DIR_DATA, "modelos", "captcha_plantillas.npz"))
+
+# Lado (en píxeles) al que se normaliza cada carácter
+TAMANO_GLIFO = 20
+
+# Componentes más pequeños que esto se consideran ruido
+AREA_MINIMA = 25
+ALTO_MINIMO = 8
+
+# Extensiones de imagen aceptadas en el corpus
+EXTENSIONES_IMAGEN = (".png", ".jpg", ".jpeg", ".gif", ".bmp")
+
+_modelos = {}
+
+
+def binarizar(gris):
+    """
+    Binariza el captcha dejando los caracteres en blanco sobre fondo negro.
+
+    Aplica un filtro de mediana (elimina puntos), umbral de Otsu invertido y una
+    apertura 2x2 que borra las líneas finas de ruido sin romper los trazos.
+
+    Args:
+        gris (numpy.ndarray): Imagen en escala de grises.
+
+    Returns:
+        numpy.ndarray: Imagen binaria `uint8` (0 / 255).
+    """
+    suavizada = cv2.medianBlur(gris, 3)
+    _, binaria = cv2.threshold(suavizada, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    return cv2.morphologyEx(binaria, cv2.MORPH_OPEN, np.ones((2, 2), np.uint8))
+
+
+def _dividir(caja, partes):
+    x, y, ancho, alto, area = caja
+    return [[x + round(i * ancho / partes), y, round((i + 1) * ancho / partes) - round(i * ancho / partes), alto, area // partes]
+            for i in range(partes)]
+
+
+def segmentar(binaria, cantidad=None):
+    """
+    Obtiene las cajas de cada carácter, ordenadas de izquierda a derecha.
+
+    Args:
+        binaria (numpy.ndarray): Imagen de `binarizar`.
+        cantidad (int, optional): Número de caracteres esperado (al entrenar se
+            conoce la respuesta). Si se indica, se descartan los componentes más
+            pequeños o se dividen los más anchos hasta obtener esa cantidad.
+
+    Returns:
+        list[list[int]]: Cajas `[x, y, ancho, alto, area]`.
+    """
+    _, _, estadisticas, _ = cv2.connectedComponentsWithStats(binaria, connectivity=8)
+    cajas = sorted(([int(v) for v in fila] for fila in estadisticas[1:]
+                    if fila[cv2.CC_STAT_AREA] >= AREA_MINIMA and fila[cv2.CC_STAT_HEIGHT] >= ALTO_MINIMO),
+                   key=lambda caja: caja[0])
+
+    # Fusionar trozos de un mismo carácter (se solapan casi por completo en horizontal)
+    fusionadas = []
+    for caja in cajas:
+        if fusionadas:
+            previa = fusionadas[-1]
+            solape = min(previa[0] + previa[2], caja[0] + caja[2]) - max(previa[0], caja[0])
+            if solape >= 0.7 * min(previa[2], caja[2]):
+                x0, y0 = min(previa[0], caja[0]), min(previa[1], caja[1])
+                x1, y1 = max(previa[0] + previa[2], caja[0] + caja[2]), max(previa[1] + previa[3], caja[1] + caja[3])
+                fusionadas[-1] = [x0, y0, x1 - x0, y1 - y0, previa[4] + caja[4]]
+                continue
+        fusionadas.append(caja)
+    cajas = fusionadas
+
+    if cantidad is None:
+        # Dividir componentes demasiado anchos (caracteres pegados)
+        if cajas:
+            referencia = max(np.median([c[2] for c in cajas]), 0.55 * np.median([c[3] for c in cajas]))
+            divididas = []
+            for caja in cajas:
+                partes = int(round(caja[2] / referencia)) if caja[2] > 1.7 * referencia else 1
+                divididas.extend(_dividir(caja, partes) if partes > 1 else [caja])
+            cajas = divididas
+    else:
+        while len(cajas) > cantidad:
+            cajas.remove(min(cajas, key=lambda c: c[4]))
+        while cajas and len(cajas) < cantidad:
+            i = max(range(len(cajas)), key=lambda j: cajas[j][2])
+            cajas[i:i + 1] = _dividir(cajas[i], 2)
+    return cajas
+
+
+def vectorizar_glifos(binaria, cajas):
+    """
+    Recorta, centra en un cuadrado y normaliza cada carácter.
+
+    Args:
+        binaria (numpy.ndarray): Imagen de `binarizar`.
+        cajas (list): Cajas de `segmentar`.
+
+    Returns:
+        numpy.ndarray: Matriz `(n, TAMANO_GLIFO**2)` `float32`, cada fila centrada
+        y con norma 1 (el producto punto es la correlación normalizada).
+    """
+    vectores = np.zeros((len(cajas), TAMANO_GLIFO * TAMANO_GLIFO), np.float32)
+    for i, (x, y, ancho, alto, _) in enumerate(cajas):
+        lado = max(ancho, alto)
+        cuadrado = np.zeros((lado, lado), np.uint8)
+        cuadrado[(lado - alto) // 2:(lado - alto) // 2 + alto, (lado - ancho) // 2:(lado - ancho) // 2 + ancho] = binaria[y:y + alto, x:x + ancho]
+        vectores[i] = cv2.resize(cuadrado, (TAMANO_GLIFO, TAMANO_GLIFO), interpolation=cv2.INTER_AREA).ravel()
+    vectores -= vectores.mean(axis=1, keepdims=True)
+    normas = np.linalg.norm(vectores, axis=1, keepdims=True)
+    return vectores / np.where(normas == 0, 1, normas)
+
+
+def _similitud_a_confianza(similitud):
+    # Correlación normalizada reescalada de [0.5, 1] a [0, 100]
+    return np.clip((similitud - 0.5) * 200, 0, 100)
+
+
+def clasificar(vectores, modelo):
+    """
+    Clasifica un lote de caracteres con una sola multiplicación de matrices.
+
+    Args:
+        vectores (numpy.ndarray): Salida de `vectorizar_glifos`.
+        modelo (dict): Modelo con `plantillas` y `etiquetas`.
+
+    Returns:
+        tuple[list[str], numpy.ndarray]: Carácter y confianza (0-100) de cada fila.
+    """
+    if not len(vectores):
+        return [], np.zeros(0, np.float32)
+    similitudes = vectores @ modelo["plantillas"].T
+    mejores = similitudes.argmax(axis=1)
+    return [str(modelo["etiquetas"][i]) for i in mejores], _similitud_a_confianza(similitudes.max(axis=1))
+
+
+def reconocer_lote(imagenes, modelo=None):
+    """
+    Resuelve varios captchas a la vez (todos los caracteres en una sola clasificación).
+
+    Args:
+        imagenes (Iterable[numpy.ndarray]): Captchas en escala de grises.
+        modelo (dict | str, optional): Modelo o ruta del modelo. Por defecto `RUTA_MODELO_CAPTCHA`.
+
+    Returns:
+        list[dict]: Por captcha, `texto`, `confianza` (la del carácter más débil) y `lecturas`.
+    """
+    modelo = cargar_modelo(modelo)
+    bloques, limites = [], [0]
+    for gris in imagenes:
+        binaria = binarizar(gris)
+        bloques.append(vectorizar_glifos(binaria, segmentar(binaria)))
+        limites.append(limites[-1] + len(bloques[-1]))
+    vectores = np.concatenate(bloques) if bloques else np.zeros((0, TAMANO_GLIFO * TAMANO_GLIFO), np.float32)
+    caracteres, confianzas = clasificar(vectores, modelo)
+
+    resultados = []
+    for inicio, fin in zip(limites, limites[1:]):
+        texto = "".join(caracteres[inicio:fin])
+        confianza = float(confianzas[inicio:fin].min()) if fin > inicio else 0.0
+        resultados.append({"texto": texto, "confianza": round(confianza, 2), "lecturas": {"plantillas": texto}})
+    return resultados
+
+
+def reconocer_captcha_plantillas(gris, modelo=None):
+    """
+    Resuelve un captcha con el clasificador de plantillas.
+
+    Args:
+        gris (numpy.ndarray): Captcha en escala de grises.
+        modelo (dict | str, optional): Modelo o ruta del modelo.
+
+    Returns:
+        dict: `texto`, `confianza` (0-100) y `lecturas` (mismo formato que `orc.reconocer_captcha`).
+    """
+    return reconocer_lote([gris], modelo)[0]
+
+
+# ---------------------------------------------------------------------------
+# Corpus, entrenamiento y persistencia
+# ---------------------------------------------------------------------------
+
+def etiqueta_desde_nombre(nombre_archivo):
+    """
+    Extrae la respuesta del captcha del nombre del archivo (`AB12C_000123.png` -> `AB12C`).
+    """
+    return os.path.splitext(os.path.basename(nombre_archivo))[0].split("_")[0].upper()
+
+
+def leer_corpus(directorio):
+    """
+    Recorre un corpus de captchas etiquetados sin cargarlo completo en memoria.
+
+    Args:
+        directorio (str): Carpeta con imágenes nombradas por su respuesta.
+
+    Yields:
+        tuple[str, str]: Etiqueta y ruta de cada imagen.
+    """
+    with os.scandir(directorio) as entradas:
+        for entrada in sorted(entradas, key=lambda e: e.name):
+            if entrada.is_file() and entrada.name.lower().endswith(EXTENSIONES_IMAGEN):
+                yield etiqueta_desde_nombre(entrada.name), entrada.path
+
+
+def leer_gris(ruta):
+    """
+    Lee una imagen del disco directamente en escala de grises.
+    """
+    with open(ruta, "rb") as f:
+        gris = cv2.imdecode(np.frombuffer(f.read(), np.uint8), cv2.IMREAD_GRAYSCALE)
+    if gris is None:
+        raise ValueError(f"No se pudo leer la imagen: {ruta}")
+    return gris
+
+
+def entrenar(muestras, max_por_clase=60, semilla=0):
+    """
+    Construye el modelo de plantillas a partir de captchas etiquetados.
+
+    Cada captcha se segmenta sabiendo cuántos caracteres tiene; si no se logra
+    obtener esa cantidad, se descarta. De cada clase se conservan hasta
+    `max_por_clase` muestras como plantillas (se compara contra la más parecida).
+
+    Args:
+        muestras (Iterable[tuple[str, numpy.ndarray]]): Etiqueta e imagen en escala de grises.
+        max_por_clase (int, optional): Plantillas máximas por carácter.
+        semilla (int, optional): Semilla para elegir las plantillas.
+
+    Returns:
+        dict: Modelo con `plantillas`, `etiquetas` y `estadisticas`.
+    """
+    por_clase = {}
+    usados = descartados = 0
+    for etiqueta, gris in muestras:
+        binaria = binarizar(gris)
+        cajas = segmentar(binaria, len(etiqueta))
+        if len(cajas) != len(etiqueta):
+            descartados += 1
+            continue
+        usados += 1
+        for caracter, vector in zip(etiqueta, vectorizar_glifos(binaria, cajas)):
+            por_clase.setdefault(caracter, []).append(vector)
+
+    if not por_clase:
+        raise ValueError("El corpus no produjo ningún carácter para entrenar.")
+
+    rng = random.Random(semilla)
+    plantillas, etiquetas = [], []
+    for caracter in sorted(por_clase):
+        vectores = por_clase[caracter]
+        rng.shuffle(vectores)
+        plantillas.extend(vectores[:max_por_clase])
+        etiquetas.extend([caracter] * min(len(vectores), max_por_clase))
+
+    return {
+        "plantillas": np.array(plantillas, np.float32),
+        "etiquetas": np.array(etiquetas),
+        "estadisticas": {"captchas_usados": usados, "captchas_descartados": descartados,
+                         "clases": len(por_clase), "plantillas": len(plantillas)},
+    }
+
+
+def guardar_modelo(modelo, ruta=None):
+    """
+    Guarda el modelo en un archivo `.npz` comprimido.
+
+    Returns:
+        str: Ruta del archivo guardado.
+    """
+    ruta = ruta or RUTA_MODELO_CAPTCHA
+    os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+    np.savez_compressed(ruta, plantillas=modelo["plantillas"], etiquetas=modelo["etiquetas"], tamano=TAMANO_GLIFO)
+    _modelos.pop(os.path.abspath(ruta), None)
+    return ruta
+
+
+def cargar_modelo(modelo=None):
+    """
+    Devuelve el modelo indicado; si es una ruta, lo carga una sola vez por proceso.
+
+    Args:
+        modelo (dict | str, optional): Modelo ya cargado o ruta. Por defecto `RUTA_MODELO_CAPTCHA`.
+
+    Returns:
+        dict: Modelo con `plantillas` y `etiquetas`.
+    """
+    if isinstance(modelo, dict):
+        return modelo
+    ruta = os.path.abspath(modelo or RUTA_MODELO_CAPTCHA)
+    if ruta not in _modelos:
+        if not os.path.exists(ruta):
+            raise FileNotFoundError(f"No existe el modelo del captcha: {ruta} (entrénalo con `python -m src.clasificador_captcha`).")
+        with np.load(ruta) as datos:
+            if int(datos["tamano"]) != TAMANO_GLIFO:
+                raise ValueError(f"El modelo {ruta} usa glifos de {int(datos['tamano'])} px y se esperaban {TAMANO_GLIFO}.")
+            _modelos[ruta] = {"plantillas": datos["plantillas"], "etiquetas": datos["etiquetas"]}
+    return _modelos[ruta]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Entrena el clasificador de plantillas del captcha.")
+    parser.add_argument("--corpus", required=True, help="Carpeta con imágenes nombradas por su respuesta.")
+    parser.add_argument("--salida", default=RUTA_MODELO_CAPTCHA, help="Ruta del modelo .npz.")
+    parser.add_argument("--max-por-clase", type=int, default=60)
+    parser.add_argument("--validacion", type=float, default=0.2, help="Fracción del corpus reservada para validar.")
+    args = parser.parse_args()
+
+    corpus = list(leer_corpus(args.corpus))
+    random.Random(0).shuffle(corpus)
+    corte = int(len(corpus) * (1 - args.validacion))
+    entrenamiento, validacion = corpus[:corte], corpus[corte:]
+
+    inicio = time.perf_counter()
+    modelo = entrenar(((etiqueta, leer_gris(ruta)) for etiqueta, ruta in entrenamiento), args.max_por_clase)
+    print(f"🧠 Modelo entrenado en {time.perf_counter() - inicio:.1f}s: {modelo['estadisticas']}")
+
+    if validacion:
+        inicio = time.perf_counter()
+        resultados = reconocer_lote([leer_gris(ruta) for _, ruta in validacion], modelo)
+        duracion = time.perf_counter() - inicio
+        aciertos = sum(1 for (etiqueta, _), r in zip(validacion, resultados) if r["texto"] == etiqueta)
+        print(f"📊 Validación: {aciertos}/{len(validacion)} aciertos ({aciertos / len(validacion):.1%}), "
+              f"{duracion / len(validacion) * 1000:.2f} ms/captcha")
+
+    print(f"🗂️ Modelo guardado en: {guardar_modelo(modelo, args.salida)}")
@@ -0,0 +1,314 @@
+"""
+Cola de captchas para resolución manual, sin bloquear el proceso en `input()`.
+
+Cuando el OCR no logra resolver el captcha, la consulta deja la imagen en una
+cola pendiente (SQLite) junto con los datos de su sesión y espera, con un plazo,
+a que una persona escriba la respuesta en una página web local:
+
+    - `ColaCaptchaManual` guarda las imágenes pendientes y sus respuestas. Al ser
+      SQLite, la página puede servirse desde otro proceso.
+    - `ServidorCaptchaManual` muestra los captchas pendientes (la página se
+      actualiza sola) y recibe las respuestas.
+    - Mientras un captcha espera, el resto de trabajadores sigue consultando; si
+      la respuesta no llega a tiempo, el captcha se marca como vencido, la sesión
+      se libera y el modo por lotes vuelve a encolar la consulta.
+    - Cada espera ocupa un trabajador y su navegador, por lo que la cola admite
+      como máximo `max_esperas` esperas simultáneas; sin turno libre, la consulta
+      libera su sesión y se vuelve a encolar en lugar de esperar.
+
+Uso (servir la página de una cola existente):
+    python -m src.cola_manual --puerto 8765
+
+Fecha: 2026-10-16
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.utils import DIR_DATA
+from urllib.parse import parse_qs, urlsplit
+import argparse
+import html
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+
+# Base de datos de la cola (se puede cambiar con la variable de entorno CAPTCHA_COLA_MANUAL)
+RUTA_COLA_MANUAL = os.environ.get("CAPTCHA_COLA_MANUAL", os.path.join(DIR_DATA, "captcha_manual.sqlite"))
+
+# Segundos que una consulta espera la respuesta manual antes de liberarse
+PLAZO_RESPUESTA_MANUAL = 120
+
+# Puerto por defecto de la página de resolución manual
+PUERTO_COLA_MANUAL = 8765
+
+
+class ColaCaptchaManual:
+    """
+    Cola SQLite de captchas pendientes de respuesta manual, segura para uso entre hilos.
+
+    Ejemplo:
+        >>> cola = ColaCaptchaManual()
+        >>> id_captcha = cola.encolar(png, {"cedula": "123"})
+        >>> cola.esperar_respuesta(id_captcha)      # en otro hilo: cola.responder(id_captcha, "AB12C")
+        'AB12C'
+    """
+
+    def __init__(self, ruta=None, plazo=PLAZO_RESPUESTA_MANUAL, max_esperas=None):
+        """
+        Args:
+            ruta (str, optional): Archivo SQLite. Por defecto `RUTA_COLA_MANUAL`.
+            plazo (float, optional): Segundos de espera por defecto de cada captcha.
+            max_esperas (int, optional): Esperas simultáneas admitidas (ver `tomar_turno`).
+                Por defecto, sin límite.
+        """
+        self.ruta = ruta or RUTA_COLA_MANUAL
+        self.plazo = plazo
+        self.max_esperas = max_esperas
+        self._turnos = threading.BoundedSemaphore(max_esperas) if max_esperas else None
+        self._lock = threading.Lock()
+        self._respuestas = threading.Condition(self._lock)
+        os.makedirs(os.path.dirname(os.path.abspath(self.ruta)), exist_ok=True)
+        self._conn = sqlite3.connect(self.ruta, timeout=10, check_same_thread=False)
+        self._conn.execute("""
+                           CREATE TABLE IF NOT EXISTS captchas_manuales
+                           (
+                               id TEXT PRIMARY KEY,
+                               imagen BLOB NOT NULL,
+                               contexto TEXT,
+                               estado TEXT NOT NULL,
+                               respuesta TEXT,
+                               creado REAL NOT NULL,
+                               vence REAL NOT NULL
+                           )
+                           """)
+        self._conn.commit()
+
+    def tomar_turno(self):
+        """
+        Reserva, sin bloquear, uno de los `max_esperas` turnos de espera manual.
+
+        Returns:
+            bool: True si hay turno; debe devolverse con `liberar_turno`.
+        """
+        return self._turnos is None or self._turnos.acquire(blocking=False)
+
+    def liberar_turno(self):
+        if self._turnos is not None:
+            self._turnos.release()
+
+    def encolar(self, imagen, contexto=None, plazo=None):
+        """
+        Deja un captcha pendiente de respuesta.
+
+        Args:
+            imagen (bytes): Imagen del captcha.
+            contexto (dict, optional): Datos de la sesión que se muestran en la página
+                (cédula, trabajador, etc.).
+            plazo (float, optional): Segundos para responder. Por defecto `self.plazo`.
+
+        Returns:
+            str: Identificador del captcha.
+        """
+        id_captcha = uuid.uuid4().hex[:12]
+        ahora = time.time()
+        with self._lock:
+            self._conn.execute("INSERT INTO captchas_manuales (id, imagen, contexto, estado, creado, vence) "
+                               "VALUES (?, ?, ?, 'pendiente', ?, ?)",
+                               (id_captcha, sqlite3.Binary(imagen), json.dumps(contexto or {}, ensure_ascii=False),
+                                ahora, ahora + (self.plazo if plazo is None else plazo)))
+            self._conn.commit()
+        return id_captcha
+
+    def pendientes(self):
+        """
+        Returns:
+            list[dict]: Captchas pendientes y no vencidos (`id`, `contexto`, `segundos_restantes`), del más antiguo al más nuevo.
+        """
+        ahora = time.time()
+        with self._lock:
+            filas = self._conn.execute("SELECT id, contexto, vence FROM captchas_manuales "
+                                       "WHERE estado = 'pendiente' AND vence > ? ORDER BY creado", (ahora,)).fetchall()
+        return [{"id": id_captcha, "contexto": json.loads(contexto or "{}"), "segundos_restantes": round(vence - ahora)}
+                for id_captcha, contexto, vence in filas]
+
+    def imagen(self, id_captcha):
+        """
+        Returns:
+            bytes | None: Imagen del captcha, o None si no existe.
+        """
+        with self._lock:
+            fila = self._conn.execute("SELECT imagen FROM captchas_manuales WHERE id = ?", (id_captcha,)).fetchone()
+        return bytes(fila[0]) if fila else None
+
+    def responder(self, id_captcha, respuesta):
+        """
+        Registra la respuesta de un captcha pendiente y no vencido.
+
+        Returns:
+            bool: True si la respuesta se aceptó.
+        """
+        respuesta = (respuesta or "").strip()
+        if not respuesta:
+            return False
+        with self._respuestas:
+            cursor = self._conn.execute("UPDATE captchas_manuales SET estado = 'respondido', respuesta = ? "
+                                        "WHERE id = ? AND estado = 'pendiente' AND vence > ?",
+                                        (respuesta, id_captcha, time.time()))
+            self._conn.commit()
+            self._respuestas.notify_all()
+        return cursor.rowcount == 1
+
+    def esperar_respuesta(self, id_captcha, intervalo=0.5):
+        """
+        Espera la respuesta de un captcha hasta su vencimiento.
+
+        Las respuestas de este proceso despiertan la espera de inmediato; las que
+        llegan desde otro proceso se detectan revisando la base cada `intervalo` segundos.
+
+        Returns:
+            str | None: Respuesta, o None si venció (el captcha queda como "vencido").
+        """
+        with self._respuestas:
+            while True:
+                fila = self._conn.execute("SELECT estado, respuesta, vence FROM captchas_manuales WHERE id = ?",
+                                          (id_captcha,)).fetchone()
+                if fila is None:
+                    return None
+                estado, respuesta, vence = fila
+                if estado == "respondido":
+                    return respuesta
+                restante = vence - time.time()
+                if estado != "pendiente" or restante <= 0:
+                    self._conn.execute("UPDATE captchas_manuales SET estado = 'vencido' WHERE id = ? AND estado = 'pendiente'",
+                                       (id_captcha,))
+                    self._conn.commit()
+                    return None
+                self._respuestas.wait(min(restante, intervalo))
+
+    def cerrar(self):
+        with self._lock:
+            self._conn.close()
+
+
+class _ManejadorColaManual(BaseHTTPRequestHandler):
+    """
+    Página local con los captchas pendientes y el formulario de respuesta.
+    """
+
+    def log_message(self, formato, *args):
+        pass
+
+    @property
+    def cola(self):
+        return self.server.cola
+
+    def _responder(self, codigo, tipo, cuerpo, cabeceras=None):
+        self.send_response(codigo)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.send_header("Cache-Control", "no-store")
+        for nombre, valor in (cabeceras or {}).items():
+            self.send_header(nombre, valor)
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def _pagina(self):
+        filas = []
+        for pendiente in self.cola.pendientes():
+            contexto = ", ".join(f"{clave}: {valor}" for clave, valor in pendiente["contexto"].items())
+            filas.append(f"""
+            <form method="post" action="/responder">
+                <img src="/imagen/{pendiente['id']}" alt="captcha">
+                <input type="hidden" name="id" value="{pendiente['id']}">
+                <input name="respuesta" autocomplete="off" autofocus>
+                <button type="submit">Enviar</button>
+                <small>{html.escape(contexto)} · vence en {pendiente['segundos_restantes']} s</small>
+            </form>""")
+        contenido = "".join(filas) or "<p>No hay captchas pendientes.</p>"
+        return f"""<!DOCTYPE html>
+<html lang="es"><head><meta charset="utf-8"><meta http-equiv="refresh" content="5">
+<title>Captchas pendientes</title></head>
+<body><h1>Captchas pendientes</h1>{contenido}</body></html>""".encode("utf-8")
+
+    def do_GET(self):
+        partes = urlsplit(self.path)
+        if partes.path == "/":
+            self._responder(200, "text/html; charset=utf-8", self._pagina())
+        elif partes.path.startswith("/imagen/"):
+            imagen = self.cola.imagen(partes.path.rsplit("/", 1)[-1])
+            if imagen is None:
+                self._responder(404, "text/plain; charset=utf-8", b"No encontrado")
+            else:
+                self._responder(200, "image/png", imagen)
+        else:
+            self._responder(404, "text/plain; charset=utf-8", b"No encontrado")
+
+    def do_POST(self):
+        if urlsplit(self.path).path != "/responder":
+            self._responder(404, "text/plain; charset=utf-8", b"No encontrado")
+            return
+        longitud = int(self.headers.get("Content-Length") or 0)
+        datos = parse_qs(self.rfile.read(longitud).decode("utf-8", errors="replace"))
+        aceptada = self.cola.responder((datos.get("id") or [""])[0], (datos.get("respuesta") or [""])[0])
+        if not aceptada:
+            self._responder(409, "text/plain; charset=utf-8", "El captcha ya venció o fue respondido.".encode("utf-8"))
+            return
+        self._responder(303, "text/plain; charset=utf-8", b"", {"Location": "/"})
+
+
+class ServidorCaptchaManual:
+    """
+    Servidor HTTP de la página de captchas pendientes, ejecutándose en un hilo en segundo plano.
+    """
+
+    def __init__(self, cola, host="127.0.0.1", puerto=PUERTO_COLA_MANUAL):
+        """
+        Args:
+            cola (ColaCaptchaManual): Cola que se muestra y responde.
+            host (str, optional): Interfaz de escucha (por defecto solo local).
+            puerto (int, optional): Puerto (0 = cualquiera libre).
+        """
+        self.cola = cola
+        self._servidor = ThreadingHTTPServer((host, puerto), _ManejadorColaManual)
+        self._servidor.daemon_threads = True
+        self._servidor.cola = cola
+        self._hilo = None
+
+    @property
+    def url(self):
+        host, puerto = self._servidor.server_address[:2]
+        return f"http://{host}:{puerto}/"
+
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.detener()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Página local para responder los captchas pendientes.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=PUERTO_COLA_MANUAL)
+    parser.add_argument("--cola", default=RUTA_COLA_MANUAL, help="Base SQLite de la cola.")
+    args = parser.parse_args()
+
+    servidor = ServidorCaptchaManual(ColaCaptchaManual(args.cola), args.host, args.puerto)
+    print(f"✍️ Captchas pendientes en {servidor.url} (Ctrl+C para detener)")
+    try:
+        servidor._servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor._servidor.server_close()
@@ -8,89 +8,471 @@ para ejecutar y controlar pruebas de scraping o automatización.
 Incluye:
     - Configuración dinámica del WebDriver (Chrome)
     - Creación y control del directorio de descargas
-    - Espera activa para detectar archivos PDF descargados
+    - Detección por eventos (inotify) de archivos PDF descargados
     - Funciones de soporte (abrir, cerrar navegador y generar fechas aleatorias)
+    - Caché local del binario de ChromeDriver (resuelto una sola vez por proceso)
+    - Plantilla de perfil de Chrome que se copia para cada navegador
+    - Modo headless con bloqueo de recursos vía CDP (por URL y por tipo de recurso)
+    - Conteo de viajes (comandos) al WebDriver por consulta
 
 Fecha: 2025-11-02
 """
 from time import time, sleep
-from datetime import datetime
+from collections import Counter
 from selenium.webdriver.chrome.options import Options
 from src import utils
 from selenium import webdriver
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.chrome.service import Service
+from webdriver_manager.core.driver_cache import DriverCacheManager
+import ctypes
+import ctypes.util
 import os
-import uuid
+import select
+import sys
 import glob
+import json
 import random
+import re
+import shutil
+import tempfile
+import threading
+import urllib.request
+import websocket
 
-def esperar_obtener_documento(ruta_descarga):
+# Carpeta base de datos del proyecto (definida en `utils` para que los módulos sin Selenium no importen este)
+DIR_DATA = utils.DIR_DATA
+
+# Carpeta de descargas por sesión (también en `utils`, por la misma razón)
+obtener_ruta_descarga = utils.obtener_ruta_descarga
+
+# Caché local del binario de ChromeDriver y archivo con la versión fijada
+DIR_CACHE_CHROMEDRIVER = os.path.join(DIR_DATA, "drivers")
+ARCHIVO_VERSION_CHROMEDRIVER = os.path.join(DIR_CACHE_CHROMEDRIVER, "version.json")
+
+# Versión fijada de ChromeDriver (None = la que corresponda al Chrome instalado)
+VERSION_CHROMEDRIVER = os.environ.get("CHROMEDRIVER_VERSION") or None
+
+# Plantilla de perfil de Chrome copiada para cada navegador
+DIR_PERFIL_PLANTILLA = os.path.join(DIR_DATA, "chrome_profile_template")
+
+# Argumentos de arranque para uso en servidor (sin GPU, extensiones ni tareas de primer uso)
+ARGUMENTOS_SERVIDOR = [
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-component-extensions-with-background-pages",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-dev-shm-usage",
+    "--metrics-recording-only",
+    "--password-store=basic",
+    "--window-size=1366,768",
+]
+
+_ruta_chromedriver = None
+_lock_chromedriver = threading.Lock()
+_lock_perfil = threading.Lock()
+
+def esperar_obtener_documento(ruta_descarga, plazo=40, ignorar=None):
     """
     Espera hasta que se detecte un archivo PDF descargado en una carpeta.
 
-    Esta función monitorea la carpeta de descargas configurada para el
-    navegador, verificando periódicamente si el archivo PDF ha terminado
-    de descargarse. Si se detecta un archivo `.crdownload`, espera hasta
-    que desaparezca antes de devolver la ruta final del PDF.
+    Esta función delega en `esperar_descarga()`, que detecta la finalización
+    de la descarga por eventos del sistema de archivos (inotify) en lugar de
+    listar la carpeta cada 1-2 segundos.
 
     Args:
         ruta_descarga (str): Ruta completa al directorio donde se descargan los archivos PDF.
+        plazo (float, optional): Segundos máximos de espera. Por defecto 40.
+        ignorar (set[str], optional): Nombres de archivo que ya existían antes de
+            solicitar la descarga y que no corresponden a esta consulta.
+
+    Returns:
+        str | None: Ruta absoluta del PDF descargado por esta consulta, o `None`
+        si no se detecta ningún PDF dentro del plazo.
+    """
+    return esperar_descarga(ruta_descarga, plazo, ignorar)["ruta"]
+
+def esperar_descarga(ruta_descarga, plazo=40, ignorar=None):
+    """
+    Detecta el PDF descargado en cuanto Chrome termina de escribirlo.
+
+    Chrome escribe primero un archivo `.crdownload` y al terminar lo renombra
+    a `.pdf`. En Linux se escuchan esos eventos con inotify, por lo que el
+    archivo se devuelve en el mismo instante en que queda completo; en otros
+    sistemas se revisa la carpeta cada 100 ms.
+
+    Solo se consideran archivos nuevos (los nombres en `ignorar` se descartan),
+    de modo que una carpeta compartida no devuelve el PDF de otra consulta.
+
+    Args:
+        ruta_descarga (str): Carpeta donde Chrome descarga los archivos.
+        plazo (float, optional): Segundos máximos de espera. Por defecto 40.
+        ignorar (set[str], optional): Nombres de archivo previos a la descarga.
 
     Returns:
-        str | None: Ruta absoluta del PDF más reciente descargado, o `None`
-        si no se detecta ningún PDF después del tiempo máximo de espera (40s).
+        dict: `{"ruta": str | None, "latencia": float}` con la ruta del PDF y los
+        segundos transcurridos hasta detectarlo (o hasta agotar el plazo).
     """
     print("Esperando finalizar la descarga del PDF...")
+    ignorar = set(ignorar or ())
+    inicio = time()
+    limite = inicio + plazo
+    observador = _crear_observador_inotify(ruta_descarga)
+    try:
+        while True:
+            ruta_pdf = _buscar_pdf_nuevo(ruta_descarga, ignorar)
+            restante = limite - time()
+            if ruta_pdf or restante <= 0:
+                break
+            if observador:
+                observador.esperar(min(restante, 0.5))
+            else:
+                sleep(min(restante, 0.1))
+    finally:
+        if observador:
+            observador.cerrar()
+
+    latencia = round(time() - inicio, 3)
+    if ruta_pdf:
+        print(f"Documento obtenido en la descarga: {os.path.basename(ruta_pdf)} ({latencia}s)")
+    else:
+        print(f"No se detectó PDF a tiempo ({latencia}s).")
+    return {"ruta": ruta_pdf, "latencia": latencia}
 
-    inicio  = time()
-    while time() - inicio < 40:
-        if any ( i.endswith('.crdownload') for i in os.listdir(ruta_descarga)):
-            sleep(1)
-            continue
-
-        # Buscar archivos PDF completados
-        pdf_archivo = glob.glob(os.path.join(ruta_descarga, '*.pdf'))
-        if pdf_archivo:
-            pdf_archivo.sort(key=os.path.getmtime, reverse=True)
-            ruta_pdf = pdf_archivo[0]
-            print("Documento obtenido en la descarga: ", os.path.basename(ruta_pdf))
-            return ruta_pdf
-        sleep(2)
-    print("No se detectó PDF a tiempo.")
+def _buscar_pdf_nuevo(ruta_descarga, ignorar):
+    """
+    Devuelve el primer PDF completo (sin `.crdownload` pendiente) que no esté en `ignorar`.
+    """
+    nombres = set(os.listdir(ruta_descarga))
+    for nombre in sorted(nombres):
+        if nombre.lower().endswith(".pdf") and nombre not in ignorar and f"{nombre}.crdownload" not in nombres:
+            return os.path.join(ruta_descarga, nombre)
     return None
 
-def obtener_ruta_descarga():
+class _ObservadorInotify:
+    """
+    Observador mínimo de inotify (vía ctypes) para los eventos de archivo
+    cerrado tras escritura y archivo renombrado dentro de una carpeta.
+    """
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+
+    def __init__(self, libc, ruta):
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        if libc.inotify_add_watch(self.fd, os.fsencode(ruta), self.IN_CLOSE_WRITE | self.IN_MOVED_TO) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), "inotify_add_watch")
+
+    def esperar(self, timeout):
+        """
+        Bloquea hasta que llegue algún evento o se cumpla el timeout, y vacía la cola.
+        """
+        listos, _, _ = select.select([self.fd], [], [], timeout)
+        if listos:
+            try:
+                os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                pass
+
+    def cerrar(self):
+        os.close(self.fd)
+
+def _crear_observador_inotify(ruta):
+    """
+    Crea un observador inotify para la carpeta, o devuelve None si el sistema no lo soporta.
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        return _ObservadorInotify(libc, ruta)
+    except (OSError, AttributeError) as ex:
+        print(f"⚠️ inotify no disponible, se usará revisión periódica: {ex}")
+        return None
+
+def resolver_chromedriver():
+    """
+    Obtiene la ruta del binario de ChromeDriver, resolviéndola una sola vez por proceso.
+
+    Orden de búsqueda:
+        1. Variable de entorno `CHROMEDRIVER_PATH`.
+        2. Versión fijada en `data/drivers/version.json` (sin acceso a la red).
+        3. Descarga con `webdriver_manager` hacia la caché local `data/drivers/`,
+           respetando `CHROMEDRIVER_VERSION` si está definida, y fijado de la versión.
+        4. Cualquier binario ya presente en la caché local (modo sin conexión).
+
+    Returns:
+        str | None: Ruta del binario, o `None` para que Selenium Manager lo resuelva.
+    """
+    global _ruta_chromedriver
+    with _lock_chromedriver:
+        if _ruta_chromedriver:
+            return _ruta_chromedriver
+
+        ruta = os.environ.get("CHROMEDRIVER_PATH")
+        if not ruta:
+            ruta = _leer_chromedriver_fijado()
+        if not ruta:
+            try:
+                cache = DriverCacheManager(root_dir=DIR_CACHE_CHROMEDRIVER, valid_range=365)
+                ruta = ChromeDriverManager(driver_version=VERSION_CHROMEDRIVER, cache_manager=cache).install()
+                _fijar_chromedriver(ruta)
+            except Exception as ex:
+                print(f"⚠️ No se pudo resolver ChromeDriver en línea: {ex}")
+                candidatos = glob.glob(os.path.join(DIR_CACHE_CHROMEDRIVER, "**", "chromedriver*"), recursive=True)
+                ruta = next((c for c in candidatos if os.path.isfile(c) and os.access(c, os.X_OK)), None)
+
+        _ruta_chromedriver = ruta
+        print(f"ChromeDriver resuelto: {ruta or 'Selenium Manager'}")
+        return ruta
+
+def _leer_chromedriver_fijado():
+    """
+    Lee la ruta del ChromeDriver fijado en la caché local si sigue siendo válida.
+    """
+    try:
+        with open(ARCHIVO_VERSION_CHROMEDRIVER, "r", encoding="utf-8") as f:
+            fijado = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if VERSION_CHROMEDRIVER and fijado.get("version") != VERSION_CHROMEDRIVER:
+        return None
+    return fijado.get("ruta") if os.path.isfile(fijado.get("ruta") or "") else None
+
+def _fijar_chromedriver(ruta):
+    """
+    Guarda la ruta y versión del ChromeDriver instalado para los siguientes procesos.
+    """
+    os.makedirs(DIR_CACHE_CHROMEDRIVER, exist_ok=True)
+    version = VERSION_CHROMEDRIVER or os.path.basename(os.path.dirname(os.path.dirname(ruta)))
+    with open(ARCHIVO_VERSION_CHROMEDRIVER, "w", encoding="utf-8") as f:
+        json.dump({"version": version, "ruta": ruta}, f, indent=4)
+
+def preparar_perfil_plantilla():
+    """
+    Crea (una sola vez) la plantilla de perfil de Chrome usada por todos los navegadores.
+
+    La plantilla ya trae marcado el primer uso y las preferencias de descarga,
+    de modo que Chrome no repite ese trabajo en cada arranque.
+
+    Returns:
+        str: Ruta de la carpeta de la plantilla.
+    """
+    preferencias_ruta = os.path.join(DIR_PERFIL_PLANTILLA, "Default", "Preferences")
+    with _lock_perfil:
+        if os.path.exists(preferencias_ruta):
+            return DIR_PERFIL_PLANTILLA
+
+        os.makedirs(os.path.dirname(preferencias_ruta), exist_ok=True)
+        open(os.path.join(DIR_PERFIL_PLANTILLA, "First Run"), "w").close()
+        preferencias = {
+            "browser": {"has_seen_welcome_page": True, "check_default_browser": False},
+            "download": {"prompt_for_download": False, "directory_upgrade": True},
+            "plugins": {"always_open_pdf_externally": True},
+            "profile": {"exit_type": "Normal", "exited_cleanly": True},
+        }
+        with open(preferencias_ruta, "w", encoding="utf-8") as f:
+            json.dump(preferencias, f)
+        return DIR_PERFIL_PLANTILLA
+
+def copiar_perfil_plantilla():
+    """
+    Copia la plantilla de perfil a una carpeta temporal exclusiva para un navegador.
+
+    Returns:
+        str: Ruta de la carpeta de perfil (`--user-data-dir`) del navegador.
+    """
+    destino = tempfile.mkdtemp(prefix="chrome_perfil_")
+    shutil.copytree(preparar_perfil_plantilla(), destino, dirs_exist_ok=True)
+    return destino
+
+def construir_patrones_bloqueo(tipos=None, permitidos=None):
+    """
+    Construye la lista de patrones para `Network.setBlockedURLs`.
+
+    Los patrones permitidos van primero con `block=False`, de modo que Chrome
+    aplica la lista blanca antes que la lista de bloqueo (gana el primer patrón
+    que coincide).
+
+    Args:
+        tipos (list[str], optional): Tipos de recurso a bloquear
+            (por defecto `utils.tipos_recurso_bloqueados`).
+        permitidos (list[str], optional): Patrones de URL que nunca se bloquean
+            (por defecto `utils.patrones_recursos_permitidos`).
+
+    Returns:
+        tuple[list[dict], list[str]]: Patrones con formato `BlockPattern` y la lista
+        plana de URLs bloqueadas (para versiones de Chrome sin lista blanca).
+    """
+    tipos = utils.tipos_recurso_bloqueados if tipos is None else tipos
+    permitidos = utils.patrones_recursos_permitidos if permitidos is None else permitidos
+
+    bloqueados = list(utils.dominios_bloqueados)
+    for tipo in tipos:
+        bloqueados.extend(utils.patrones_por_tipo_recurso.get(tipo, []))
+
+    patrones = [{"urlPattern": p, "block": False} for p in permitidos]
+    patrones += [{"urlPattern": p, "block": True} for p in bloqueados]
+    return patrones, bloqueados
+
+class InterceptorRecursos:
+    """
+    Bloqueo de recursos por tipo (`resourceType`) con el dominio `Fetch` de CDP.
+
+    `Network.setBlockedURLs` solo compara URLs, por lo que no detiene imágenes,
+    fuentes o estilos servidos sin extensión (por ejemplo `imagen.ashx?id=3`).
+    `Fetch.enable` sí filtra por tipo, pero pausa cada petición hasta que alguien
+    la continúe o la cancele; como `execute_cdp_cmd` no recibe eventos, el
+    interceptor abre su propia conexión WebSocket con la pestaña y atiende
+    `Fetch.requestPaused` en un hilo: las URLs de la lista blanca continúan y
+    el resto se cancela con `BlockedByClient`.
+
+    Si la conexión se cierra, Chrome desactiva `Fetch` para esa sesión y las
+    peticiones vuelven a pasar (solo queda el bloqueo por URL).
+    """
+
+    def __init__(self, url_ws, tipos, permitidos, conectar=None):
+        """
+        Args:
+            url_ws (str): `webSocketDebuggerUrl` de la pestaña.
+            tipos (list[str]): Tipos de recurso CDP a bloquear ("Image", "Font", ...).
+            permitidos (list[str]): Patrones de URL (comodín `*`) que nunca se bloquean.
+            conectar (callable, optional): Fábrica de la conexión WebSocket
+                (por defecto `websocket.create_connection`).
+        """
+        conectar = conectar or (lambda url: websocket.create_connection(url, suppress_origin=True))
+        self.permitidos = [re.compile(".*".join(re.escape(parte) for parte in p.split("*")) + r"\Z") for p in permitidos]
+        self.bloqueados = 0
+        self._ids = iter(range(1, 2 ** 31))
+        self._lock = threading.Lock()
+        self._conexion = conectar(url_ws)
+        self._enviar("Fetch.enable", {"patterns": [{"urlPattern": "*", "resourceType": t, "requestStage": "Request"} for t in tipos]})
+        self._hilo = threading.Thread(target=self._atender, name="interceptor-recursos", daemon=True)
+        self._hilo.start()
+
+    def _enviar(self, metodo, parametros):
+        with self._lock:
+            self._conexion.send(json.dumps({"id": next(self._ids), "method": metodo, "params": parametros}))
+
+    def permitido(self, url):
+        """
+        Indica si la URL coincide con algún patrón de la lista blanca.
+        """
+        return any(patron.match(url) for patron in self.permitidos)
+
+    def _atender(self):
+        while True:
+            try:
+                mensaje = json.loads(self._conexion.recv())
+            except (websocket.WebSocketException, OSError, ValueError):
+                return
+            if mensaje.get("method") != "Fetch.requestPaused":
+                continue
+            parametros = mensaje["params"]
+            try:
+                if self.permitido(parametros["request"]["url"]):
+                    self._enviar("Fetch.continueRequest", {"requestId": parametros["requestId"]})
+                else:
+                    self.bloqueados += 1
+                    self._enviar("Fetch.failRequest", {"requestId": parametros["requestId"], "errorReason": "BlockedByClient"})
+            except (websocket.WebSocketException, OSError):
+                return
+
+    def cerrar(self):
+        """
+        Cierra la conexión (Chrome libera las peticiones pausadas) y espera al hilo.
+        """
+        try:
+            self._conexion.close()
+        except Exception:
+            pass
+        self._hilo.join(timeout=2)
+
+def _url_websocket_pestana(driver):
     """
-     Genera y crea dinámicamente una carpeta de descargas única por sesión.
+    Obtiene el `webSocketDebuggerUrl` de la pestaña del navegador, o None si no está disponible.
+    """
+    direccion = driver.capabilities.get("goog:chromeOptions", {}).get("debuggerAddress")
+    if not direccion:
+        return None
+    with urllib.request.urlopen(f"http://{direccion}/json/list", timeout=5) as respuesta:
+        destinos = json.load(respuesta)
+    return next((d["webSocketDebuggerUrl"] for d in destinos if d.get("type") == "page" and d.get("webSocketDebuggerUrl")), None)
 
-     La carpeta se guarda dentro de `data/pdfs/` y lleva un nombre único
-     con la siguiente estructura:
-         `session__YYYYMMDD__HHMMSS__UUID`
+def configurar_bloqueo_recursos(driver, tipos=None, permitidos=None):
+    """
+    Activa el bloqueo de recursos innecesarios (estilos, fuentes, imágenes, analítica)
+    a nivel de red mediante el protocolo DevTools (CDP).
 
-     Esto facilita la organización de archivos descargados por ejecución
-     o sesión del bot.
+    Solo se necesitan los controles del formulario, la imagen del captcha y el PDF,
+    por lo que el resto de descargas se cancelan antes de salir a la red.
 
-     Returns:
-         str: Ruta absoluta de la carpeta de descarga recién creada.
-     """
-    actual_dir = os.path.dirname(os.path.abspath(__file__))
-    descarga_basico = os.path.abspath(os.path.join(actual_dir,"..","data","pdfs"))
-    os.makedirs(descarga_basico,exist_ok=True)
+    El bloqueo tiene dos capas:
+        - `Network.setBlockedURLs`: dominios de terceros y extensiones de archivo
+          (`utils.patrones_por_tipo_recurso`). No necesita viajes por petición, pero
+          solo compara URLs, y `urlPatterns` (lista blanca) es experimental en CDP;
+          si Chrome lo rechaza se usa la lista plana `urls`.
+        - `InterceptorRecursos` (`Fetch.enable` por `resourceType`): bloquea también
+          los recursos sin extensión. Si no se puede conectar con la pestaña, se
+          avisa y queda solo la primera capa.
 
-    ids_session= datetime.now().strftime("%Y%m%d__%H%M%S__")+str(uuid.uuid4())[:12]
-    descarga_dir = os.path.join(descarga_basico,f"session__{ids_session}")
-    os.makedirs(descarga_dir,exist_ok=True)
+    Args:
+        driver (webdriver.Chrome): Navegador donde se aplica el bloqueo.
+        tipos (list[str], optional): Tipos de recurso a bloquear.
+        permitidos (list[str], optional): Patrones de URL que nunca se bloquean.
 
-    return descarga_dir
+    Returns:
+        InterceptorRecursos | None: Interceptor por tipo de recurso (también en
+        `driver.interceptor_recursos`), o None si solo se bloquea por URL.
+    """
+    patrones, bloqueados = construir_patrones_bloqueo(tipos, permitidos)
+    driver.execute_cdp_cmd("Network.enable", {})
+    try:
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urlPatterns": patrones})
+    except Exception:
+        # Chrome sin soporte de lista blanca: se bloquea solo por patrón de URL
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": bloqueados})
+
+    interceptor = None
+    try:
+        url_ws = _url_websocket_pestana(driver)
+        if url_ws:
+            interceptor = InterceptorRecursos(url_ws, utils.tipos_recurso_bloqueados if tipos is None else tipos,
+                                              utils.patrones_recursos_permitidos if permitidos is None else permitidos)
+    except Exception as ex:
+        print(f"⚠️ Bloqueo por tipo de recurso no disponible, solo se bloquea por URL: {ex}")
+    driver.interceptor_recursos = interceptor
+    print(f"Bloqueo de recursos activo ({len(bloqueados)} patrones{', y por tipo de recurso' if interceptor else ''}).")
+    return interceptor
 
-def crear_driver():
+def crear_driver(optimizado=True, headless=False, bloquear_recursos=None, descargas=True):
     """
        Crea e inicializa una instancia de navegador Chrome configurada
        para descargas automáticas de archivos PDF.
 
-       Utiliza `webdriver_manager` para instalar automáticamente la versión
-       adecuada del controlador (ChromeDriver).
+       En modo optimizado, el binario de ChromeDriver se resuelve una sola vez
+       por proceso desde la caché local, se usa una copia de la plantilla de
+       perfil y se aplican argumentos de arranque para servidor (sin GPU,
+       extensiones ni tareas de primer uso, y sin maximizar la ventana).
+
+       Args:
+           optimizado (bool, optional): Si es False, reproduce el arranque original
+               (`ChromeDriverManager().install()` en cada llamada y ventana maximizada).
+               Se conserva para comparar tiempos de arranque.
+           headless (bool, optional): Ejecuta Chrome sin interfaz gráfica.
+           bloquear_recursos (bool, optional): Bloquea estilos, fuentes, imágenes y
+               analítica mediante CDP (ver `configurar_bloqueo_recursos`). Por defecto,
+               se activa junto con `headless`.
+           descargas (bool, optional): Si es False (PDF solo en memoria, sin archivar),
+               no se crea carpeta de descargas ni se configura `Page.setDownloadBehavior`,
+               y `driver.download_dir` queda en None.
 
        Returns:
            webdriver.Chrome: Instancia del navegador configurada con las
@@ -98,21 +480,52 @@ def crear_driver():
        """
     print("Creando navegador...")
 
-    ruta_descarga = obtener_ruta_descarga()
+    ruta_descarga = obtener_ruta_descarga() if descargas else None
 
     chrome_options = Options()
     prefs = {
-        "download.default_directory": ruta_descarga,
         "download.prompt_for_download": False,
         "download.directory_upgrade": True,
         "plugins.always_open_pdf_externally": True
     }
+    if ruta_descarga:
+        prefs["download.default_directory"] = ruta_descarga
     chrome_options.add_experimental_option("prefs", prefs)
 
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
+    if not optimizado:
+        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
+        driver.download_dir = ruta_descarga
+        driver.maximize_window()
+        print(f"Descargas configuradas en: {driver.download_dir}")
+        return driver
+
+    perfil_dir = copiar_perfil_plantilla()
+    chrome_options.add_argument(f"--user-data-dir={perfil_dir}")
+    for argumento in ARGUMENTOS_SERVIDOR:
+        chrome_options.add_argument(argumento)
+    if headless:
+        chrome_options.add_argument("--headless=new")
+        chrome_options.add_argument("--mute-audio")
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation", "enable-logging"])
+
+    ruta_chromedriver = resolver_chromedriver()
+    service = Service(ruta_chromedriver) if ruta_chromedriver else Service()
+    try:
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+    except Exception:
+        shutil.rmtree(perfil_dir, ignore_errors=True)
+        raise
     driver.download_dir = ruta_descarga
-    driver.maximize_window()
-    print(f"Descargas configuradas en: {driver.download_dir}")
+    driver.perfil_dir = perfil_dir
+
+    if headless and ruta_descarga:
+        driver.execute_cdp_cmd("Page.setDownloadBehavior", {"behavior": "allow", "downloadPath": ruta_descarga})
+    if bloquear_recursos is None:
+        bloquear_recursos = headless
+    if bloquear_recursos:
+        configurar_bloqueo_recursos(driver)
+
+    print(f"Descargas configuradas en: {driver.download_dir or 'sin carpeta (PDF en memoria)'}")
     return driver
 
 def abrir_enlace(driver):
@@ -125,6 +538,32 @@ def abrir_enlace(driver):
     print(f"Abriendo página: {utils.url_page}")
     driver.get(utils.url_page)
 
+def contar_viajes(driver):
+    """
+    Cuenta los viajes al WebDriver (comandos HTTP a ChromeDriver) de un navegador.
+
+    Envuelve una sola vez `driver.execute`, por donde pasan todos los comandos
+    del driver, sus elementos y sus alertas, y reinicia el contador en cada llamada.
+
+    Args:
+        driver (webdriver.Chrome): Navegador a instrumentar.
+
+    Returns:
+        collections.Counter: Viajes por comando desde este momento (se actualiza en vivo).
+    """
+    if getattr(driver, "viajes", None) is None:
+        execute_original = driver.execute
+        viajes = Counter()
+
+        def execute(comando, params=None):
+            viajes[comando] += 1
+            return execute_original(comando, params)
+
+        driver.execute = execute
+        driver.viajes = viajes
+    driver.viajes.clear()
+    return driver.viajes
+
 def cerrar_driver(driver):
     """
        Cierra de manera segura la instancia del navegador Chrome abierta por Selenium.
@@ -133,7 +572,13 @@ def cerrar_driver(driver):
            driver (webdriver.Chrome): Instancia activa del navegador Selenium.
        """
     print("Cerrando navegador...")
+    interceptor = getattr(driver, "interceptor_recursos", None)
+    if interceptor is not None:
+        interceptor.cerrar()
     driver.quit()
+    perfil_dir = getattr(driver, "perfil_dir", None)
+    if perfil_dir:
+        shutil.rmtree(perfil_dir, ignore_errors=True)
 
 def fecha_aleatorio():
     """
@@ -0,0 +1,256 @@
+"""
+Corpus etiquetado de captchas y evaluación de los resolvedores.
+
+Permite medir si un cambio en `orc` mejora o empeora la resolución del captcha
+antes de desplegarlo:
+
+    - generar:  crea un corpus sintético parecido a las imágenes del sitio
+                (mismo generador que `servidor_simulado`).
+    - importar: copia capturas reales etiquetadas desde un CSV `archivo,respuesta`.
+    - evaluar:  ejecuta un resolvedor sobre el corpus en un pool de procesos y
+                guarda un reporte JSON (precisión, error por carácter y latencias
+                p50/p95/p99) en `test/reports/`, con el formato de `reporte_parallel`.
+
+Las imágenes se nombran `<RESPUESTA>_<número>.png`, el formato que leen
+`clasificador_captcha.leer_corpus` y su comando de entrenamiento.
+
+Uso:
+    python -m src.corpus_captcha generar --salida data/captchas --cantidad 5000 --dificultad media
+    python -m src.corpus_captcha importar --etiquetas capturas.csv --salida data/captchas
+    python -m src.corpus_captcha evaluar --corpus data/captchas --resolvedor plantillas --workers 4
+
+Fecha: 2026-10-16
+"""
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from src.clasificador_captcha import leer_corpus
+from src.servidor_simulado import generar_imagen_captcha, NIVELES_DIFICULTAD
+import argparse
+import csv
+import json
+import os
+import random
+import shutil
+import time
+
+
+def generar_corpus(directorio, cantidad, dificultad="media", semilla=None):
+    """
+    Genera un corpus sintético de captchas etiquetados.
+
+    Args:
+        directorio (str): Carpeta de salida (se crea si no existe).
+        cantidad (int): Número de imágenes.
+        dificultad (str | list[str], optional): Nivel de `NIVELES_DIFICULTAD`, o
+            una lista de niveles que se mezclan al azar.
+        semilla (int, optional): Semilla para obtener siempre el mismo corpus.
+
+    Returns:
+        int: Número de imágenes generadas.
+    """
+    os.makedirs(directorio, exist_ok=True)
+    rng = random.Random(semilla)
+    niveles = [dificultad] if isinstance(dificultad, str) else list(dificultad)
+    inicial = sum(1 for _ in leer_corpus(directorio))
+    for i in range(inicial, inicial + cantidad):
+        texto, png = generar_imagen_captcha(dificultad=rng.choice(niveles), rng=rng)
+        with open(os.path.join(directorio, f"{texto}_{i:06d}.png"), "wb") as f:
+            f.write(png)
+    return cantidad
+
+
+def importar_capturas(archivo_etiquetas, directorio):
+    """
+    Copia capturas reales etiquetadas al corpus con el nombre `<RESPUESTA>_<número>`.
+
+    Args:
+        archivo_etiquetas (str): CSV con columnas `archivo` y `respuesta` (rutas
+            relativas al propio CSV o absolutas).
+        directorio (str): Carpeta del corpus.
+
+    Returns:
+        dict: Cantidad de imágenes `importadas` y `omitidas` (sin archivo o sin respuesta válida).
+    """
+    os.makedirs(directorio, exist_ok=True)
+    base = os.path.dirname(os.path.abspath(archivo_etiquetas))
+    siguiente = sum(1 for _ in leer_corpus(directorio))
+    importadas = omitidas = 0
+    with open(archivo_etiquetas, newline="", encoding="utf-8-sig") as f:
+        for fila in csv.DictReader(f):
+            origen = os.path.join(base, (fila.get("archivo") or "").strip())
+            respuesta = (fila.get("respuesta") or "").strip().upper()
+            if not respuesta.isalnum() or not os.path.isfile(origen):
+                omitidas += 1
+                continue
+            extension = os.path.splitext(origen)[1].lower() or ".png"
+            shutil.copyfile(origen, os.path.join(directorio, f"{respuesta}_{siguiente:06d}{extension}"))
+            siguiente += 1
+            importadas += 1
+    return {"importadas": importadas, "omitidas": omitidas}
+
+
+def distancia_edicion(a, b):
+    """
+    Distancia de Levenshtein entre dos textos (caracteres insertados, borrados o cambiados).
+    """
+    previa = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        actual = [i]
+        for j, cb in enumerate(b, start=1):
+            actual.append(min(previa[j] + 1, actual[j - 1] + 1, previa[j - 1] + (ca != cb)))
+        previa = actual
+    return previa[-1]
+
+
+def _resolver_archivo(tarea):
+    """
+    Resuelve una imagen del corpus midiendo el tiempo (se ejecuta en los procesos del pool).
+    """
+    id_prueba, etiqueta, ruta, resolvedor, opciones = tarea
+    from src import orc
+    try:
+        with open(ruta, "rb") as f:
+            imagen = f.read()
+        inicio = time.perf_counter()
+        resultado = orc.RESOLVEDORES_CAPTCHA[resolvedor](orc.bytes_a_gris(imagen), **opciones)
+        duracion = time.perf_counter() - inicio
+        return {
+            "id_prueba": id_prueba,
+            "archivo": os.path.basename(ruta),
+            "etiqueta": etiqueta,
+            "texto": resultado["texto"],
+            "confianza": resultado["confianza"],
+            "resultado": "ok" if resultado["texto"] == etiqueta else "falló",
+            "tiempo": round(duracion, 5),
+        }
+    except Exception as ex:
+        return {"id_prueba": id_prueba, "archivo": os.path.basename(ruta), "etiqueta": etiqueta,
+                "resultado": "error", "error": str(ex)}
+
+
+def _percentil(valores, p):
+    if not valores:
+        return None
+    return valores[min(len(valores) - 1, int(round(p / 100 * (len(valores) - 1))))]
+
+
+def evaluar_resolvedor(corpus, resolvedor="tesseract", workers=None, limite=None, umbral_confianza=None, **opciones):
+    """
+    Ejecuta un resolvedor sobre el corpus en un pool de procesos y resume los resultados.
+
+    Args:
+        corpus (str): Carpeta del corpus etiquetado.
+        resolvedor (str, optional): Nombre en `orc.RESOLVEDORES_CAPTCHA`.
+        workers (int, optional): Procesos del pool. Por defecto, uno por núcleo.
+        limite (int, optional): Máximo de imágenes a evaluar.
+        umbral_confianza (float, optional): Umbral para contar las respuestas que
+            se habrían enviado. Por defecto el de `orc.PARAMETROS_CAPTCHA`.
+        **opciones: Argumentos del resolvedor (`motor` y `variantes` para "tesseract",
+            `modelo` para "plantillas"). Los valores `None` se ignoran.
+
+    Returns:
+        dict: Reporte con el formato de `reporte_parallel` más las métricas del captcha.
+            Las respuestas equivocadas (`captchas_incorrectos`) se cuentan aparte de
+            las imágenes en las que el resolvedor lanzó una excepción
+            (`captchas_con_excepcion`); `precision_sin_excepciones` excluye estas últimas.
+    """
+    from src.orc import parametros_captcha, texto_aceptable
+    umbral_confianza = parametros_captcha()["umbral_confianza"] if umbral_confianza is None else umbral_confianza
+    opciones = {clave: valor for clave, valor in opciones.items() if valor is not None}
+    tareas = [(i, etiqueta, ruta, resolvedor, opciones)
+              for i, (etiqueta, ruta) in enumerate(leer_corpus(corpus), start=1) if limite is None or i <= limite]
+    if not tareas:
+        raise ValueError(f"El corpus {corpus} no contiene imágenes etiquetadas.")
+
+    inicio = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        detalles = list(executor.map(_resolver_archivo, tareas, chunksize=max(1, len(tareas) // (4 * (workers or os.cpu_count())))))
+    duracion_total = time.perf_counter() - inicio
+
+    medidos = [d for d in detalles if d["resultado"] != "error"]
+    exitos = sum(1 for d in medidos if d["resultado"] == "ok")
+    caracteres = sum(len(d["etiqueta"]) for d in medidos)
+    errores_caracter = sum(distancia_edicion(d["texto"], d["etiqueta"]) for d in medidos)
+    enviados = [d for d in medidos if d["confianza"] >= umbral_confianza and texto_aceptable(d["texto"])]
+    latencias = sorted(d["tiempo"] * 1000 for d in medidos)
+
+    return {
+        "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "modo": f"captcha_{resolvedor}",
+        "corpus": os.path.abspath(corpus),
+        "opciones": opciones,
+        "captchas_totales": len(detalles),
+        "captchas_resueltos": exitos,
+        "captchas_incorrectos": len(medidos) - exitos,
+        "captchas_con_excepcion": len(detalles) - len(medidos),
+        "precision": round(exitos / len(detalles), 4),
+        "precision_sin_excepciones": round(exitos / len(medidos), 4) if medidos else None,
+        "error_por_caracter": round(errores_caracter / caracteres, 4) if caracteres else None,
+        "umbral_confianza": umbral_confianza,
+        "captchas_enviados": len(enviados),
+        "precision_enviados": round(sum(1 for d in enviados if d["resultado"] == "ok") / len(enviados), 4) if enviados else None,
+        "latencia_ms": {
+            "p50": round(_percentil(latencias, 50), 3) if latencias else None,
+            "p95": round(_percentil(latencias, 95), 3) if latencias else None,
+            "p99": round(_percentil(latencias, 99), 3) if latencias else None,
+        },
+        "captchas_por_segundo": round(len(detalles) / duracion_total, 2),
+        "tiempo_total_segundos": round(duracion_total, 2),
+        "detalles": detalles,
+    }
+
+
+def guardar_reporte(reporte, prefijo="reporte_captcha"):
+    """
+    Guarda el reporte en `test/reports/<prefijo>_<fecha>.json`.
+
+    Returns:
+        str: Ruta del reporte.
+    """
+    ruta_reporte = os.path.join("test", "reports", f"{prefijo}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(ruta_reporte), exist_ok=True)
+    with open(ruta_reporte, "w", encoding="utf-8") as f:
+        json.dump(reporte, f, indent=4, ensure_ascii=False)
+    return ruta_reporte
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Corpus de captchas y evaluación de resolvedores.")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    generar = comandos.add_parser("generar", help="Genera un corpus sintético.")
+    generar.add_argument("--salida", required=True)
+    generar.add_argument("--cantidad", type=int, default=5000)
+    generar.add_argument("--dificultad", default="media",
+                         help=f"Nivel o lista separada por comas ({', '.join(NIVELES_DIFICULTAD)}).")
+    generar.add_argument("--semilla", type=int)
+
+    importar = comandos.add_parser("importar", help="Importa capturas reales etiquetadas.")
+    importar.add_argument("--etiquetas", required=True, help="CSV con columnas archivo,respuesta.")
+    importar.add_argument("--salida", required=True)
+
+    evaluar = comandos.add_parser("evaluar", help="Evalúa un resolvedor sobre el corpus.")
+    evaluar.add_argument("--corpus", required=True)
+    evaluar.add_argument("--resolvedor", default="tesseract")
+    evaluar.add_argument("--motor", help="Motor de OCR del resolvedor 'tesseract'.")
+    evaluar.add_argument("--variantes", help="Variantes del resolvedor 'tesseract', separadas por comas.")
+    evaluar.add_argument("--modelo", help="Modelo .npz del resolvedor 'plantillas'.")
+    evaluar.add_argument("--workers", type=int)
+    evaluar.add_argument("--limite", type=int)
+    args = parser.parse_args()
+
+    if args.comando == "generar":
+        cantidad = generar_corpus(args.salida, args.cantidad, args.dificultad.split(","), args.semilla)
+        print(f"🧪 {cantidad} captchas generados en {args.salida}")
+    elif args.comando == "importar":
+        print(f"📥 Capturas: {importar_capturas(args.etiquetas, args.salida)}")
+    else:
+        opciones = {"motor": args.motor, "variantes": args.variantes.split(",") if args.variantes else None} \
+            if args.resolvedor == "tesseract" else {"modelo": args.modelo}
+        reporte = evaluar_resolvedor(args.corpus, args.resolvedor, args.workers, args.limite, **opciones)
+        print(f"\n📊 {reporte['modo']}: {reporte['captchas_resueltos']}/{reporte['captchas_totales']} "
+              f"(precisión {reporte['precision']}, error por carácter {reporte['error_por_caracter']}), "
+              f"{reporte['captchas_incorrectos']} incorrectos, {reporte['captchas_con_excepcion']} con excepción, "
+              f"latencia p50/p95/p99 {reporte['latencia_ms']['p50']}/{reporte['latencia_ms']['p95']}/"
+              f"{reporte['latencia_ms']['p99']} ms")
+        print(f"🗂️ Reporte guardado en: {guardar_reporte(reporte)}\n")
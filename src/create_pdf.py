@@ -13,6 +13,7 @@ from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 from uuid import uuid4
 from datetime import datetime
+import io
 import os
 
 def crear_pdf(ruta_dir):
@@ -75,3 +76,45 @@ def crear_pdf_vacio(ruta_dir):
     doc_vac.showPage()
     doc_vac.save()
     return ruta_pdf_vacio
+
+def crear_pdf_certificado_bytes(numero_cedula, fecha_expedicion, lugar_expedicion, nombre, estado="VIGENTE", paginas_extra=0):
+    """
+        Genera en memoria un certificado PDF con los datos indicados.
+
+        Usa el mismo formato de `crear_pdf`, pero con datos variables, para que
+        el servidor simulado de la Registraduría devuelva certificados distintos
+        en cada consulta.
+
+        Args:
+            numero_cedula (str): Número de cédula (se formatea con puntos de miles).
+            fecha_expedicion (str): Fecha en texto, p. ej. "31 DE DICIEMBRE DE 2020".
+            lugar_expedicion (str): Lugar en texto, p. ej. "MOSQUERA - CUNDINAMARCA".
+            nombre (str): Nombre del ciudadano.
+            estado (str, optional): Estado de la cédula. Por defecto "VIGENTE".
+            paginas_extra (int, optional): Páginas de texto adicionales (sin datos del
+                certificado) después de la primera, para pruebas de lectura por páginas.
+
+        Returns:
+            bytes: Contenido del PDF generado.
+        """
+    buffer = io.BytesIO()
+    cedula_formato = f"{int(numero_cedula):,}".replace(",", ".") if str(numero_cedula).isdigit() else numero_cedula
+
+    create_doc = canvas.Canvas(buffer, pagesize=letter)
+    create_doc.setFont("Times-Roman", 15)
+
+    create_doc.drawString(100, 740, "CERTIFICADO DE PRUEBA DE CÉDULA DE CIUDADANÍA")
+    create_doc.drawString(100, 680, f"Cédula de Ciudadanía: {cedula_formato}")
+    create_doc.drawString(100, 650, f"Fecha de Expedición: {fecha_expedicion}")
+    create_doc.drawString(100, 620, f"Lugar de Expedición: {lugar_expedicion}")
+    create_doc.drawString(100, 590, f"A nombre de: {nombre}")
+    create_doc.drawString(100, 560, f"Estado: {estado}")
+
+    for pagina in range(paginas_extra):
+        create_doc.showPage()
+        create_doc.setFont("Times-Roman", 12)
+        for renglon in range(40):
+            create_doc.drawString(72, 740 - renglon * 17, f"Anexo {pagina + 1}, renglón {renglon + 1}: información informativa del trámite.")
+
+    create_doc.save()
+    return buffer.getvalue()
@@ -0,0 +1,223 @@
+"""
+Módulo de pool de navegadores (WebDriver) reutilizables.
+
+Arrancar Chrome es el costo más alto de cada consulta. Este módulo mantiene
+un conjunto de navegadores "calientes" que se prestan a las consultas y se
+devuelven al terminar, en lugar de cerrarse.
+
+Incluye:
+    - Préstamo y devolución de drivers con límite de navegadores simultáneos.
+    - Verificación de salud antes de cada préstamo.
+    - Limpieza del estado (cookies, alertas, ventanas) entre usos.
+    - Reciclaje del navegador después de N consultas.
+    - Carpeta de descargas propia para cada préstamo (o ninguna, con el PDF
+      solo en memoria).
+
+Fecha: 2026-10-16
+"""
+from contextlib import contextmanager
+from src.configuration import crear_driver, cerrar_driver, obtener_ruta_descarga
+import queue
+import threading
+
+
+class PoolDrivers:
+    """
+    Pool de navegadores Chrome reutilizables y seguros para uso entre hilos.
+
+    Ejemplo:
+        >>> with PoolDrivers(tamano=4) as pool:
+        ...     with pool.prestar() as driver:
+        ...         driver.get(utils.url_page)
+    """
+
+    def __init__(self, tamano=4, max_usos=25, fabrica_driver=crear_driver, fabrica_ruta_descarga=obtener_ruta_descarga,
+                 descargas=True):
+        """
+        Args:
+            tamano (int, optional): Máximo de navegadores vivos al mismo tiempo.
+            max_usos (int, optional): Consultas que atiende un navegador antes de reciclarse.
+            fabrica_driver (callable, optional): Función que crea un navegador nuevo.
+            fabrica_ruta_descarga (callable, optional): Función que crea la carpeta
+                de descargas de cada préstamo.
+            descargas (bool, optional): Si es False, los préstamos no reciben carpeta
+                de descargas (PDF capturado en memoria sin archivar). La fábrica de
+                drivers debe crear navegadores sin carpeta (`crear_driver(descargas=False)`).
+        """
+        self.tamano = tamano
+        self.max_usos = max_usos
+        self._fabrica_driver = fabrica_driver
+        self._fabrica_ruta_descarga = fabrica_ruta_descarga
+        self.descargas = descargas
+        self._disponibles = queue.LifoQueue()
+        self._cupos = threading.BoundedSemaphore(tamano)
+        self._lock = threading.Lock()
+        self._todos = set()
+        self._cerrado = False
+
+    # ------------------------------------------------------------------
+    # Préstamo y devolución
+    # ------------------------------------------------------------------
+
+    def adquirir(self, timeout=None):
+        """
+        Presta un navegador sano y limpio, con una carpeta de descargas nueva.
+
+        Args:
+            timeout (float, optional): Segundos máximos de espera por un cupo libre.
+                Con None (por defecto) espera hasta que se libere uno.
+
+        Returns:
+            webdriver.Chrome: Navegador listo para usar.
+
+        Raises:
+            TimeoutError: Si no se libera un cupo dentro del tiempo indicado.
+            RuntimeError: Si el pool ya fue cerrado.
+        """
+        if self._cerrado:
+            raise RuntimeError("El pool de drivers está cerrado.")
+        if not self._cupos.acquire(timeout=timeout):
+            raise TimeoutError("No hay navegadores disponibles en el pool.")
+        driver = None
+        try:
+            driver = self._obtener_driver_sano()
+            self._preparar_prestamo(driver)
+            return driver
+        except Exception:
+            if driver is not None:
+                # El navegador quedó a medio preparar: se cierra en lugar de perderlo
+                self._descartar(driver)
+            self._cupos.release()
+            raise
+
+    def liberar(self, driver, descartar=False):
+        """
+        Devuelve un navegador al pool o lo cierra si ya cumplió su ciclo de vida.
+
+        Args:
+            driver (webdriver.Chrome): Navegador prestado por `adquirir()`.
+            descartar (bool, optional): Si es True, el navegador se cierra en lugar
+                de volver al pool (por ejemplo, tras un error grave).
+        """
+        try:
+            driver.usos_pool = getattr(driver, "usos_pool", 0) + 1
+            if descartar or self._cerrado or driver.usos_pool >= self.max_usos:
+                self._descartar(driver)
+            else:
+                self._disponibles.put(driver)
+        finally:
+            self._cupos.release()
+
+    @contextmanager
+    def prestar(self, timeout=None):
+        """
+        Context manager que presta un navegador y lo devuelve al salir.
+
+        Si dentro del bloque ocurre una excepción, el navegador se descarta.
+        """
+        driver = self.adquirir(timeout)
+        descartar = False
+        try:
+            yield driver
+        except Exception:
+            descartar = True
+            raise
+        finally:
+            self.liberar(driver, descartar=descartar)
+
+    def cerrar(self):
+        """
+        Cierra todos los navegadores creados por el pool.
+        """
+        self._cerrado = True
+        with self._lock:
+            drivers = list(self._todos)
+            self._todos.clear()
+        for driver in drivers:
+            self._cerrar_seguro(driver)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    # ------------------------------------------------------------------
+    # Funciones internas
+    # ------------------------------------------------------------------
+
+    def _obtener_driver_sano(self):
+        """
+        Toma un navegador caliente del pool; si no hay o no está sano, crea uno nuevo.
+        """
+        while True:
+            try:
+                driver = self._disponibles.get_nowait()
+            except queue.Empty:
+                break
+            if self._esta_sano(driver):
+                return driver
+            print("⚠️ Navegador del pool no responde, se descarta.")
+            self._descartar(driver)
+
+        driver = self._fabrica_driver()
+        driver.usos_pool = 0
+        with self._lock:
+            self._todos.add(driver)
+        return driver
+
+    def _esta_sano(self, driver):
+        """
+        Verifica que la sesión de WebDriver siga respondiendo.
+        """
+        try:
+            return driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _preparar_prestamo(self, driver):
+        """
+        Limpia el estado dejado por la consulta anterior y asigna una carpeta de descargas nueva.
+        """
+        if driver.usos_pool > 0:
+            self._reiniciar(driver)
+
+        if not self.descargas:
+            # PDF solo en memoria: sin carpeta de descargas
+            return
+        if driver.usos_pool == 0 and getattr(driver, "download_dir", None):
+            # Navegador recién creado: ya tiene su propia carpeta de descargas
+            return
+
+        ruta_descarga = self._fabrica_ruta_descarga()
+        driver.execute_cdp_cmd("Page.setDownloadBehavior", {"behavior": "allow", "downloadPath": ruta_descarga})
+        driver.download_dir = ruta_descarga
+
+    def _reiniciar(self, driver):
+        """
+        Deja el navegador en un estado equivalente a uno recién creado.
+        """
+        try:
+            driver.switch_to.alert.accept()
+        except Exception:
+            pass
+
+        ventanas = driver.window_handles
+        for ventana in ventanas[1:]:
+            driver.switch_to.window(ventana)
+            driver.close()
+        driver.switch_to.window(ventanas[0])
+
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        driver.get("about:blank")
+
+    def _descartar(self, driver):
+        with self._lock:
+            self._todos.discard(driver)
+        self._cerrar_seguro(driver)
+
+    def _cerrar_seguro(self, driver):
+        try:
+            cerrar_driver(driver)
+        except Exception as ex:
+            print(f"⚠️ Error cerrando navegador del pool: {ex}")
@@ -0,0 +1,279 @@
+"""
+Motor de consulta asíncrono (asyncio) sin navegador.
+
+Variante `async` del motor HTTP (`motor_http`) pensada para mantener cientos
+de consultas en vuelo desde un solo proceso, sin un hilo bloqueado por cada una.
+
+Incluye:
+    - Pool de conexiones keep-alive compartido por todas las consultas
+      (cada consulta conserva sus propias cookies de sesión ASP.NET).
+    - Límite global de consultas simultáneas y límite por host.
+    - OCR del captcha y parseo del PDF (trabajo de CPU) en un executor,
+      para no bloquear el event loop.
+    - Ejecución de lotes con entrega de resultados a medida que terminan.
+
+Ejemplo:
+    >>> async with MotorAsync(max_concurrencia=200, max_por_host=50) as motor:
+    ...     resultado = await motor.consultar("1111111111", "05", "marzo", "2011")
+
+Fecha: 2026-10-16
+"""
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urljoin, urlsplit
+from src.motor_http import analizar_formulario, construir_datos_consulta, construir_datos_generar, es_pdf, CABECERAS_HTTP
+from src.orc import leer_texto_captcha_bytes
+from src.pdf_parser import gestionar_pdf
+from src.storage import guardar_informacion_extraida, guardar_pdf, error_de_resultado
+from src import utils
+import aiohttp
+import asyncio
+import io
+import os
+import queue
+import threading
+import time
+
+
+def _parsear_pdf_bytes(pdf_bytes):
+    """
+    Parsea un PDF en memoria (función de módulo para poder ejecutarse en otro proceso).
+    """
+    return gestionar_pdf(io.BytesIO(pdf_bytes))
+
+
+class MotorAsync:
+    """
+    Motor de consultas asíncronas con pool de conexiones y límites de concurrencia.
+    """
+
+    def __init__(self, max_concurrencia=200, max_por_host=50, executor=None, resolver=leer_texto_captcha_bytes, timeout=30):
+        """
+        Args:
+            max_concurrencia (int, optional): Máximo de consultas en vuelo en total.
+            max_por_host (int, optional): Máximo de consultas en vuelo por host.
+            executor (concurrent.futures.Executor, optional): Executor para OCR y parseo
+                de PDF. Por defecto, un `ProcessPoolExecutor` con un proceso por núcleo
+                (creado con `utils.contexto_procesos()`; `resolver` debe poder enviarse
+                a otro proceso, es decir, ser una función de módulo).
+            resolver (callable, optional): Función `bytes -> str | None` que resuelve el captcha.
+            timeout (float, optional): Timeout total de cada petición HTTP en segundos.
+        """
+        self.max_concurrencia = max_concurrencia
+        self.max_por_host = max_por_host
+        self.resolver = resolver
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._executor = executor
+        self._executor_propio = executor is None
+        self._semaforo_global = None
+        self._semaforos_host = {}
+        self._connector = None
+
+    async def iniciar(self):
+        """
+        Crea el pool de conexiones, los semáforos y el executor.
+        """
+        self._semaforo_global = asyncio.Semaphore(self.max_concurrencia)
+        self._connector = aiohttp.TCPConnector(limit=self.max_concurrencia, limit_per_host=self.max_por_host,
+                                               keepalive_timeout=30, ttl_dns_cache=300)
+        if self._executor is None:
+            # El event loop corre junto a otros hilos: los procesos no se crean por fork
+            self._executor = ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=utils.contexto_procesos())
+        return self
+
+    async def cerrar(self):
+        """
+        Cierra el pool de conexiones y el executor propio.
+        """
+        if self._connector is not None:
+            await self._connector.close()
+            self._connector = None
+        if self._executor_propio and self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def __aenter__(self):
+        return await self.iniciar()
+
+    async def __aexit__(self, *exc):
+        await self.cerrar()
+
+    def _semaforo_host(self, url):
+        host = urlsplit(url).netloc
+        if host not in self._semaforos_host:
+            self._semaforos_host[host] = asyncio.Semaphore(self.max_por_host)
+        return self._semaforos_host[host]
+
+    async def _en_executor(self, funcion, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, funcion, *args)
+
+    async def consultar(self, numero_cedula, dia_expedicion_cedula, mes_expedicion_cedula, year_expedicion_cedula,
+                        url=None, max_intentos=3, archivar_pdf=False, carpeta_pdf=None, result_dir=None):
+        """
+        Ejecuta una consulta completa del certificado de forma asíncrona.
+
+        Los argumentos y el valor de retorno son los mismos de
+        `motor_http.consultar_certificado_cedula_http`.
+
+        Returns:
+            dict | None: Rutas de almacenamiento si el proceso fue exitoso, o `None`.
+        """
+        url = url or utils.url_page
+        async with self._semaforo_global, self._semaforo_host(url):
+            # `unsafe=True` conserva la cookie de sesión también en hosts con IP (servidor simulado)
+            sesion = aiohttp.ClientSession(connector=self._connector, connector_owner=False, headers=CABECERAS_HTTP,
+                                           timeout=self.timeout, cookie_jar=aiohttp.CookieJar(unsafe=True))
+            try:
+                return await self._consultar(sesion, url, numero_cedula, dia_expedicion_cedula, mes_expedicion_cedula,
+                                             year_expedicion_cedula, max_intentos, archivar_pdf, carpeta_pdf, result_dir)
+            except Exception as ex:
+                print(f" Error durante la consulta asíncrona del documento: {ex}")
+                return None
+            finally:
+                await sesion.close()
+
+    async def _consultar(self, sesion, url, numero_cedula, dia, mes, year, max_intentos, archivar_pdf, carpeta_pdf, result_dir):
+        async with sesion.get(url) as respuesta:
+            respuesta.raise_for_status()
+            formulario, url_actual = analizar_formulario(await respuesta.text()), str(respuesta.url)
+
+        for intento in range(1, max_intentos + 1):
+            if not formulario["captcha_src"]:
+                raise ValueError("La página no contiene la imagen del captcha.")
+
+            async with sesion.get(urljoin(url_actual, formulario["captcha_src"])) as imagen:
+                imagen.raise_for_status()
+                imagen_bytes = await imagen.read()
+            codigo = await self._en_executor(self.resolver, imagen_bytes)
+            if not codigo:
+                async with sesion.get(url) as respuesta:
+                    formulario, url_actual = analizar_formulario(await respuesta.text()), str(respuesta.url)
+                continue
+
+            datos = construir_datos_consulta(formulario, numero_cedula, dia, mes, year, codigo)
+            async with sesion.post(urljoin(url_actual, formulario["action"] or url_actual), data=datos) as respuesta:
+                respuesta.raise_for_status()
+                formulario, url_actual = analizar_formulario(await respuesta.text()), str(respuesta.url)
+
+            if formulario["alerta"]:
+                print(f"❌ Captcha incorrecto ({numero_cedula}, intento {intento}/{max_intentos}): {formulario['alerta']}")
+                continue
+
+            datos_generar = construir_datos_generar(formulario)
+            if not datos_generar:
+                print(f"⚠️ No se detectó el botón 'Generar certificado' ({numero_cedula}).")
+                return None
+
+            async with sesion.post(urljoin(url_actual, formulario["action"] or url_actual), data=datos_generar) as respuesta:
+                respuesta.raise_for_status()
+                pdf_bytes = await respuesta.read()
+            if not es_pdf(pdf_bytes):
+                print(f"⚠️ La respuesta no es un PDF ({numero_cedula}).")
+                return None
+
+            if archivar_pdf:
+                await asyncio.to_thread(guardar_pdf, pdf_bytes, carpeta_pdf or utils.obtener_ruta_descarga(), numero_cedula)
+            informacion = await self._en_executor(_parsear_pdf_bytes, pdf_bytes)
+            # Un PDF que no se pudo parsear no se guarda como certificado
+            if error_de_resultado(informacion):
+                print(f"⚠️ No se pudo extraer la información del PDF ({numero_cedula}): {error_de_resultado(informacion)}")
+                return None
+            result = await asyncio.to_thread(guardar_informacion_extraida, informacion, result_dir)
+            return None if error_de_resultado(result) else result or None
+
+        print(f"🚫 No se logró resolver el captcha automáticamente ({numero_cedula}).")
+        return None
+
+    async def consultar_lote(self, filas, **kwargs):
+        """
+        Ejecuta un lote de consultas y entrega los resultados a medida que terminan.
+
+        Solo se crean `max_concurrencia` tareas a la vez, por lo que la memoria
+        no crece con el tamaño del lote.
+
+        Args:
+            filas (Iterable[tuple[int, dict]]): Tuplas `(numero_fila, datos)` validadas
+                (mismo formato que `batch.cargar_lote`).
+            **kwargs: Argumentos adicionales para `consultar`.
+
+        Yields:
+            dict: Resultado de cada consulta con las claves de `batch.ejecutar_lote`.
+        """
+        async def ejecutar(numero_fila, datos):
+            inicio = time.perf_counter()
+            resultado = await self.consultar(**datos, **kwargs)
+            return {
+                "fila": numero_fila,
+                "cedula": datos["numero_cedula"],
+                "resultado": "ok" if resultado and not error_de_resultado(resultado) else "falló",
+                "tiempo": round(time.perf_counter() - inicio, 2),
+                "rutas": resultado or None,
+            }
+
+        filas = iter(filas)
+        pendientes = set()
+        while True:
+            while len(pendientes) < self.max_concurrencia:
+                siguiente = next(filas, None)
+                if siguiente is None:
+                    break
+                pendientes.add(asyncio.ensure_future(ejecutar(*siguiente)))
+            if not pendientes:
+                break
+            terminadas, pendientes = await asyncio.wait(pendientes, return_when=asyncio.FIRST_COMPLETED)
+            for tarea in terminadas:
+                yield tarea.result()
+
+
+async def consultar_certificado_cedula_async(numero_cedula, dia_expedicion_cedula, mes_expedicion_cedula, year_expedicion_cedula, motor=None, **kwargs):
+    """
+    Variante `async` de la consulta del certificado.
+
+    Args:
+        numero_cedula (str): Número de cédula.
+        dia_expedicion_cedula (str): Día de expedición (dos dígitos).
+        mes_expedicion_cedula (str): Mes de expedición (nombre en español).
+        year_expedicion_cedula (str): Año de expedición (cuatro dígitos).
+        motor (MotorAsync, optional): Motor compartido. Si no se indica, se crea
+            uno solo para esta consulta.
+        **kwargs: Argumentos adicionales de `MotorAsync.consultar`.
+
+    Returns:
+        dict | None: Rutas de almacenamiento si el proceso fue exitoso, o `None`.
+    """
+    if motor is not None:
+        return await motor.consultar(numero_cedula, dia_expedicion_cedula, mes_expedicion_cedula, year_expedicion_cedula, **kwargs)
+    async with MotorAsync() as motor_propio:
+        return await motor_propio.consultar(numero_cedula, dia_expedicion_cedula, mes_expedicion_cedula, year_expedicion_cedula, **kwargs)
+
+def iterar_lote_async(filas, max_concurrencia=200, max_por_host=50, **kwargs):
+    """
+    Ejecuta un lote con `MotorAsync` desde código síncrono (por ejemplo, `batch.main`).
+
+    El event loop corre en un hilo propio y los resultados se entregan en
+    streaming a través de una cola.
+
+    Args:
+        filas (Iterable[tuple[int, dict]]): Tuplas `(numero_fila, datos)` validadas.
+        max_concurrencia (int, optional): Máximo de consultas en vuelo.
+        max_por_host (int, optional): Máximo de consultas en vuelo por host.
+        **kwargs: Argumentos adicionales para `MotorAsync.consultar`.
+
+    Yields:
+        dict: Resultado de cada consulta en el orden en que termina.
+    """
+    cola = queue.Queue()
+    fin = object()
+
+    async def ejecutar():
+        try:
+            async with MotorAsync(max_concurrencia=max_concurrencia, max_por_host=max_por_host) as motor:
+                async for resultado in motor.consultar_lote(filas, **kwargs):
+                    cola.put(resultado)
+        finally:
+            cola.put(fin)
+
+    hilo = threading.Thread(target=asyncio.run, args=(ejecutar(),), daemon=True)
+    hilo.start()
+    while (resultado := cola.get()) is not fin:
+        yield resultado
+    hilo.join()
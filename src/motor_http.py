@@ -0,0 +1,306 @@
+"""
+Motor de consulta sin navegador (HTTP) para la página de la Registraduría.
+
+La página `Datos.aspx` es un formulario clásico de ASP.NET WebForms, por lo
+que el flujo completo se puede reproducir con un cliente HTTP simple:
+
+    1. GET del formulario (se conservan cookies, `__VIEWSTATE` y `__EVENTVALIDATION`).
+    2. GET de la imagen del captcha (bytes originales) y resolución por OCR.
+    3. POST con cédula, fecha de expedición, código y botón "Continuar".
+       Si la respuesta trae un `alert(...)`, el captcha fue incorrecto y se reintenta.
+    4. POST con el botón "Generar Certificado", cuya respuesta es el PDF.
+    5. Procesamiento del PDF en memoria y almacenamiento de la información.
+
+La interfaz y el valor de retorno son los mismos de
+`scraping.consultar_certificado_cedula`, sin el costo de arrancar Chrome.
+
+Fecha: 2026-10-16
+"""
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+from src.orc import leer_texto_captcha_bytes
+from src.pdf_parser import gestionar_pdf
+from src.storage import guardar_informacion_extraida, guardar_pdf, error_de_resultado
+from src import utils
+import io
+import re
+import requests
+
+# Cabeceras enviadas en todas las peticiones
+CABECERAS_HTTP = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+    "Accept-Language": "es-CO,es;q=0.9",
+}
+
+# Expresión que detecta la alerta JavaScript de captcha incorrecto
+_REGEX_ALERTA = re.compile(r"alert\(\s*['\"](.*?)['\"]\s*\)", re.DOTALL)
+
+
+class _AnalizadorFormulario(HTMLParser):
+    """
+    Recorre el HTML de `Datos.aspx` y extrae lo necesario para reproducir el postback.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.action = None
+        self.campos = {}
+        self.ids = {}
+        self.botones = {}
+        self.selects = {}
+        self.captcha_src = None
+        self._select_actual = None
+        self._opcion_actual = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "form" and self.action is None:
+            self.action = attrs.get("action")
+        elif tag == "input":
+            nombre = attrs.get("name")
+            tipo = (attrs.get("type") or "text").lower()
+            if attrs.get("id") and nombre:
+                self.ids[attrs["id"]] = nombre
+            if not nombre:
+                return
+            if tipo in ("submit", "button", "image"):
+                self.botones[attrs.get("value", "")] = nombre
+            elif tipo not in ("checkbox", "radio") or "checked" in attrs:
+                self.campos[nombre] = attrs.get("value", "")
+        elif tag == "select":
+            self._select_actual = {"name": attrs.get("name"), "opciones": []}
+            if attrs.get("id"):
+                self.selects[attrs["id"]] = self._select_actual
+        elif tag == "option" and self._select_actual is not None:
+            self._opcion_actual = [attrs.get("value"), ""]
+            self._select_actual["opciones"].append(self._opcion_actual)
+        elif tag == "img" and attrs.get("id") == utils.id_campo_captcha:
+            self.captcha_src = attrs.get("src")
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_data(self, data):
+        if self._opcion_actual is not None:
+            self._opcion_actual[1] += data
+
+    def handle_endtag(self, tag):
+        if tag == "option" and self._opcion_actual is not None:
+            self._opcion_actual[1] = self._opcion_actual[1].strip()
+            if self._opcion_actual[0] is None:
+                self._opcion_actual[0] = self._opcion_actual[1]
+            self._opcion_actual = None
+        elif tag == "select":
+            self._select_actual = None
+
+
+def analizar_formulario(html):
+    """
+    Extrae del HTML de la página los datos necesarios para enviar el formulario.
+
+    Args:
+        html (str): HTML de `Datos.aspx`.
+
+    Returns:
+        dict: Estructura con las claves:
+            - `action`: URL de envío del formulario.
+            - `campos`: valores de los inputs (incluye `__VIEWSTATE`, `__EVENTVALIDATION`).
+            - `ids`: correspondencia id → name de los inputs.
+            - `botones`: correspondencia valor → name de los botones de envío.
+            - `selects`: por id, el name y la lista de opciones `[valor, texto]`.
+            - `captcha_src`: URL de la imagen del captcha (o None).
+            - `alerta`: texto del `alert(...)` presente en la página (o None).
+    """
+    analizador = _AnalizadorFormulario()
+    analizador.feed(html)
+    analizador.close()
+    alerta = _REGEX_ALERTA.search(html)
+    return {
+        "action": analizador.action,
+        "campos": analizador.campos,
+        "ids": analizador.ids,
+        "botones": analizador.botones,
+        "selects": analizador.selects,
+        "captcha_src": analizador.captcha_src,
+        "alerta": alerta.group(1).strip() if alerta else None,
+    }
+
+def _valor_opcion(select, buscado):
+    """
+    Busca en un select la opción cuyo valor o texto coincide con `buscado`.
+    """
+    buscado = str(buscado).strip().lower()
+    for valor, texto in select["opciones"]:
+        if str(valor).strip().lower() == buscado or texto.lower() == buscado:
+            return valor
+    for valor, texto in select["opciones"]:
+        if buscado.isdigit() and str(valor).isdigit() and int(valor) == int(buscado):
+            return valor
+    raise ValueError(f"No existe la opción '{buscado}' en {select['name']}")
+
+def construir_datos_consulta(formulario, numero_cedula, dia_expedicion_cedula, mes_expedicion_cedula, year_expedicion_cedula, codigo_captcha):
+    """
+    Construye el cuerpo del POST "Continuar" a partir del formulario analizado.
+
+    Args:
+        formulario (dict): Resultado de `analizar_formulario`.
+        numero_cedula (str): Número de cédula.
+        dia_expedicion_cedula (str): Día de expedición (dos dígitos).
+        mes_expedicion_cedula (str): Mes de expedición (nombre en español).
+        year_expedicion_cedula (str): Año de expedición (cuatro dígitos).
+        codigo_captcha (str): Texto del captcha.
+
+    Returns:
+        dict: Campos del formulario listos para enviar.
+    """
+    datos = dict(formulario["campos"])
+    datos[formulario["ids"][utils.id_campo_cedula]] = numero_cedula
+    datos[formulario["ids"][utils.id_campo_codigo]] = codigo_captcha
+    for id_select, valor in ((utils.id_select_campo_dia, dia_expedicion_cedula),
+                             (utils.id_select_campo_mes, mes_expedicion_cedula),
+                             (utils.id_select_campo_year, year_expedicion_cedula)):
+        select = formulario["selects"][id_select]
+        datos[select["name"]] = _valor_opcion(select, valor)
+    datos[formulario["botones"].get(utils.valor_boton_continuar, formulario["ids"].get(utils.id_boton_principal))] = utils.valor_boton_continuar
+    return datos
+
+def construir_datos_generar(formulario):
+    """
+    Construye el cuerpo del POST "Generar Certificado".
+
+    Args:
+        formulario (dict): Resultado de `analizar_formulario` sobre la página de confirmación.
+
+    Returns:
+        dict | None: Campos del formulario, o `None` si la página no tiene el botón.
+    """
+    nombre_boton = formulario["botones"].get(utils.valor_boton_generar_certificado)
+    if not nombre_boton:
+        return None
+    datos = dict(formulario["campos"])
+    datos[nombre_boton] = utils.valor_boton_generar_certificado
+    return datos
+
+def es_pdf(contenido):
+    """
+    Indica si unos bytes corresponden a un documento PDF.
+    """
+    return contenido[:1024].lstrip().startswith(b"%PDF")
+
+def procesar_pdf_en_memoria(pdf_bytes, numero_cedula, archivar_pdf=False, carpeta_pdf=None, result_dir=None):
+    """
+    Procesa el PDF recibido en memoria y guarda la información extraída.
+
+    Args:
+        pdf_bytes (bytes): Contenido del certificado.
+        numero_cedula (str): Cédula consultada (para el nombre del archivo archivado).
+        archivar_pdf (bool, optional): Si es True, guarda una copia del PDF en disco.
+        carpeta_pdf (str, optional): Carpeta del PDF archivado (por defecto `data/pdfs/`).
+        result_dir (str, optional): Directorio de resultados (por defecto `data/results/`).
+
+    Returns:
+        dict | None: Rutas de almacenamiento, o `None` si no se pudo gestionar.
+    """
+    if archivar_pdf:
+        guardar_pdf(pdf_bytes, carpeta_pdf or utils.obtener_ruta_descarga(), numero_cedula)
+    informacion = gestionar_pdf(io.BytesIO(pdf_bytes))
+    # Un PDF que no se pudo parsear no se guarda como certificado
+    if error_de_resultado(informacion):
+        print(f"⚠️ No se pudo extraer la información del PDF: {error_de_resultado(informacion)}")
+        return None
+    result = guardar_informacion_extraida(informacion, result_dir)
+    if not result or error_de_resultado(result):
+        print("⚠️ No se pudo gestionar correctamete la información del PDF.")
+        return None
+    return result
+
+def consultar_certificado_cedula_http(numero_cedula, dia_expedicion_cedula, mes_expedicion_cedula, year_expedicion_cedula,
+                                      sesion=None, url=None, resolver=leer_texto_captcha_bytes, max_intentos=3,
+                                      archivar_pdf=False, carpeta_pdf=None, result_dir=None, timeout=30):
+    """
+    Ejecuta la consulta completa del certificado sin navegador.
+
+    Args:
+        numero_cedula (str): Número de cédula.
+        dia_expedicion_cedula (str): Día de expedición de la cédula (dos dígitos).
+        mes_expedicion_cedula (str): Nombre del mes de expedición (en minúsculas, español).
+        year_expedicion_cedula (str): Año de expedición de la cédula (cuatro dígitos).
+        sesion (requests.Session, optional): Sesión HTTP reutilizable (conexiones keep-alive).
+            Si no se indica, se crea una y se cierra al terminar.
+        url (str, optional): URL del formulario. Por defecto `utils.url_page`.
+        resolver (callable, optional): Función `bytes -> str | None` que resuelve el captcha.
+        max_intentos (int, optional): Intentos de captcha antes de rendirse. Por defecto 3.
+        archivar_pdf (bool, optional): Guardar copia del PDF en disco. Por defecto False.
+        carpeta_pdf (str, optional): Carpeta donde archivar el PDF.
+        result_dir (str, optional): Directorio de resultados (por defecto `data/results/`).
+        timeout (float, optional): Timeout de cada petición HTTP en segundos.
+
+    Returns:
+        dict | None: Diccionario con rutas de almacenamiento si el proceso fue exitoso.
+            Ejemplo:
+            {
+                "db": "ruta/a/informacion.db",
+                "json": "ruta/a/resultado.json"
+            }
+            Retorna None si ocurre algún error o si el captcha no se resuelve.
+    """
+    url = url or utils.url_page
+    sesion_propia = sesion is None
+    if sesion_propia:
+        sesion = requests.Session()
+        sesion.headers.update(CABECERAS_HTTP)
+
+    try:
+        respuesta = sesion.get(url, timeout=timeout)
+        respuesta.raise_for_status()
+        formulario = analizar_formulario(respuesta.text)
+        url_actual = respuesta.url
+
+        for intento in range(1, max_intentos + 1):
+            print(f"\n🧠 Resolviendo captcha por HTTP (intento {intento}/{max_intentos})...")
+            if not formulario["captcha_src"]:
+                raise ValueError("La página no contiene la imagen del captcha.")
+
+            imagen = sesion.get(urljoin(url_actual, formulario["captcha_src"]), timeout=timeout)
+            imagen.raise_for_status()
+            codigo = resolver(imagen.content)
+            if not codigo:
+                print("Captcha no confiable, solicitando uno nuevo...")
+                respuesta = sesion.get(url, timeout=timeout)
+                formulario = analizar_formulario(respuesta.text)
+                url_actual = respuesta.url
+                continue
+
+            datos = construir_datos_consulta(formulario, numero_cedula, dia_expedicion_cedula,
+                                             mes_expedicion_cedula, year_expedicion_cedula, codigo)
+            respuesta = sesion.post(urljoin(url_actual, formulario["action"] or url_actual), data=datos, timeout=timeout)
+            respuesta.raise_for_status()
+            formulario = analizar_formulario(respuesta.text)
+            url_actual = respuesta.url
+
+            if formulario["alerta"]:
+                print(f"❌ Captcha incorrecto: {formulario['alerta']}")
+                continue
+
+            datos_generar = construir_datos_generar(formulario)
+            if not datos_generar:
+                print("⚠️ No se detectó el botón 'Generar certificado'. Puede que el captcha haya fallado.")
+                return None
+
+            print("✅ Captcha validado correctamente. Procediendo a generar certificado...")
+            respuesta = sesion.post(urljoin(url_actual, formulario["action"] or url_actual), data=datos_generar, timeout=timeout)
+            respuesta.raise_for_status()
+            if not es_pdf(respuesta.content):
+                print(f"⚠️ La respuesta no es un PDF (content-type: {respuesta.headers.get('Content-Type')}).")
+                return None
+            return procesar_pdf_en_memoria(respuesta.content, numero_cedula, archivar_pdf, carpeta_pdf, result_dir)
+
+        print("\n🚫 No se logró resolver el captcha automáticamente.")
+        return None
+
+    except Exception as ex:
+        print(f" Error durante la consulta HTTP del documento: {ex}")
+        return None
+    finally:
+        if sesion_propia:
+            sesion.close()
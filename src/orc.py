@@ -10,34 +10,646 @@ Si no logra obtener un texto confiable después de varios intentos, se devuelve
 
 Fecha: 2025-11-02
 """
-from selenium.webdriver.common.by import By
 from PIL import Image, ImageOps
 from src import utils
+from src.utils import DIR_DATA
+from src.clasificador_captcha import reconocer_captcha_plantillas, reconocer_lote
+from concurrent.futures import ThreadPoolExecutor
+import base64
 import cv2
 import numpy as np
 import io
+import json
+import os
 import time
+import threading
 import pytesseract
 
-# Ruta local del ejecutable de Tesseract OCR.
-# Ajusta esta ruta según tu instalación local si no coincide.
-pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+try:
+    # Opcional: API de Tesseract dentro del proceso (se importa aquí porque su
+    # primera importación debe ocurrir en el hilo principal)
+    import tesserocr
+except ImportError:
+    tesserocr = None
 
-def resolver_captcha(driver, max_intentos=1):
+# Ruta local del ejecutable de Tesseract OCR en Windows.
+# Ajusta esta ruta según tu instalación local si no coincide (en Linux/macOS se usa el del PATH).
+if os.name == "nt":
+    pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+
+# Motor de OCR por defecto (se puede cambiar con la variable de entorno OCR_MOTOR):
+#   - "pytesseract": lanza un proceso `tesseract` por captcha (recarga el idioma cada vez).
+#   - "tesserocr":   API de Tesseract dentro del proceso, una instancia viva por hilo.
+MOTOR_OCR = os.environ.get("OCR_MOTOR", "pytesseract")
+MOTORES_OCR = ("pytesseract", "tesserocr")
+
+# Caracteres posibles del captcha y configuración equivalente para el ejecutable
+LISTA_BLANCA_CAPTCHA = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+CONFIG_TESSERACT = "--psm {psm} -c tessedit_char_whitelist=" + LISTA_BLANCA_CAPTCHA
+
+# Resolvedor del captcha por defecto (se puede cambiar con la variable de entorno CAPTCHA_RESOLVEDOR):
+#   - "tesseract":  variantes de preprocesamiento + OCR de Tesseract + votación.
+#   - "plantillas": segmentación de caracteres + clasificador NumPy (`clasificador_captcha`).
+RESOLVEDOR_CAPTCHA = os.environ.get("CAPTCHA_RESOLVEDOR", "tesseract")
+
+# Variantes de preprocesamiento disponibles (ver `generar_variantes`)
+VARIANTES_CAPTCHA = ("fijo", "otsu", "adaptativo", "sin_ruido", "enderezada")
+
+# Variantes que se leen y votan por defecto con cada motor (si no se fijan en
+# `PARAMETROS_CAPTCHA["variantes"]` o en la llamada). Con "pytesseract" cada
+# variante es un proceso `tesseract` más: se votan tres (los umbrales fijo, Otsu y
+# adaptativo) y sus procesos se lanzan a la vez (`_lector_variantes`), así que la
+# latencia por captcha es cercana a la de una sola lectura si hay núcleos libres.
+# Con "tesserocr" la lectura ocurre dentro del proceso y se votan todas.
+VARIANTES_POR_MOTOR = {
+    "pytesseract": ("fijo", "otsu", "adaptativo"),
+    "tesserocr": VARIANTES_CAPTCHA,
+}
+
+# Parámetros del preprocesamiento y del OCR. Estos son los valores por defecto;
+# `ajuste_captcha` busca los mejores sobre un corpus etiquetado y los escribe en
+# RUTA_CONFIG_CAPTCHA, que se carga la primera vez que se usan (`parametros_captcha`).
+PARAMETROS_CAPTCHA = {
+    "umbral_fijo": 150,          # Umbral de la variante "fijo"
+    "kernel_cierre": 1,          # Lado del cierre morfológico aplicado a cada variante (1 = sin efecto)
+    "mediana": 3,                # Tamaño del filtro de mediana de la variante "sin_ruido"
+    "bloque_adaptativo": 15,     # Ventana del umbral adaptativo
+    "c_adaptativo": 8,           # Constante restada a la media local en el umbral adaptativo
+    "psm": 8,                    # Modo de segmentación de página de Tesseract
+    "longitud_minima": 4,        # Longitud aceptada del texto del captcha
+    "longitud_maxima": 8,
+    "variantes": None,           # None = las de `VARIANTES_POR_MOTOR` para el motor usado
+    "umbral_confianza": 60,      # Confianza mínima (0-100) para enviar; por debajo se recarga el captcha
+}
+
+# Archivo con los parámetros ajustados (se puede cambiar con la variable de entorno CAPTCHA_CONFIG)
+RUTA_CONFIG_CAPTCHA = os.environ.get("CAPTCHA_CONFIG", os.path.join(DIR_DATA, "captcha_config.json"))
+
+_configuracion_cargada = False
+_lock_configuracion = threading.Lock()
+
+# Instancias de la API de Tesseract (una por hilo: no es segura entre hilos)
+_apis_tesseract = threading.local()
+
+# Hilos que lanzan en paralelo los procesos `tesseract` de las variantes (ver `_lector_variantes`)
+_executor_variantes = None
+_lock_executor_variantes = threading.Lock()
+
+# Script que obtiene los bytes originales de la imagen del captcha desde la página:
+#   1. Consulta la caché HTTP del navegador (`only-if-cached`, sin volver a pedir la
+#      imagen al servidor, lo que podría cambiar el código).
+#   2. Si no está en caché, copia los píxeles ya decodificados a un canvas y los
+#      exporta como PNG (sin pérdida y sin el escalado de la captura de pantalla).
+SCRIPT_OBTENER_CAPTCHA = """
+const listo = arguments[arguments.length - 1];
+const img = document.getElementById(arguments[0]);
+if (!img || !img.complete || !img.naturalWidth) { listo({error: 'La imagen del captcha no está cargada'}); return; }
+const aBase64 = buffer => {
+    const bytes = new Uint8Array(buffer);
+    let binario = '';
+    for (let i = 0; i < bytes.length; i += 0x8000) {
+        binario += String.fromCharCode.apply(null, bytes.subarray(i, i + 0x8000));
+    }
+    return btoa(binario);
+};
+const desdeCanvas = () => {
+    try {
+        const canvas = document.createElement('canvas');
+        canvas.width = img.naturalWidth;
+        canvas.height = img.naturalHeight;
+        canvas.getContext('2d').drawImage(img, 0, 0);
+        listo({origen: 'canvas', datos: canvas.toDataURL('image/png').split(',')[1]});
+    } catch (e) { listo({error: String(e)}); }
+};
+fetch(img.currentSrc || img.src, {cache: 'only-if-cached', mode: 'same-origin', credentials: 'same-origin'})
+    .then(r => { if (!r.ok) throw new Error('HTTP ' + r.status); return r.arrayBuffer(); })
+    .then(buffer => listo({origen: 'cache', datos: aBase64(buffer)}))
+    .catch(desdeCanvas);
+"""
+
+def bytes_a_gris(imagen_bytes):
+    """
+    Decodifica los bytes de una imagen directamente a un arreglo NumPy en escala de grises.
+
+    Usa `cv2.imdecode` (sin pasar por Pillow) y, si OpenCV no soporta el formato
+    (por ejemplo GIF en versiones antiguas), recurre a Pillow.
+
+    Args:
+        imagen_bytes (bytes): Contenido de la imagen (PNG, JPEG, GIF...).
+
+    Returns:
+        numpy.ndarray: Matriz `uint8` de dos dimensiones.
+    """
+    gris = cv2.imdecode(np.frombuffer(imagen_bytes, np.uint8), cv2.IMREAD_GRAYSCALE)
+    if gris is None:
+        gris = np.array(ImageOps.grayscale(Image.open(io.BytesIO(imagen_bytes))))
+    return gris
+
+def obtener_bytes_captcha(driver, plazo=10):
+    """
+    Obtiene los bytes originales de la imagen del captcha desde la sesión del navegador.
+
+    Intenta primero la caché del navegador y luego un canvas dentro de la página
+    (ver `SCRIPT_OBTENER_CAPTCHA`). Si ninguno funciona, usa la captura de pantalla
+    del elemento como último recurso.
+
+    Args:
+        driver (webdriver): Navegador con la página del captcha cargada.
+        plazo (float, optional): Segundos máximos de espera del script.
+
+    Returns:
+        tuple[bytes, str]: Bytes de la imagen y su origen (`cache`, `canvas` o `captura`).
+    """
+    try:
+        driver.set_script_timeout(plazo)
+        respuesta = driver.execute_async_script(SCRIPT_OBTENER_CAPTCHA, utils.id_campo_captcha)
+        if respuesta and respuesta.get("datos"):
+            return base64.b64decode(respuesta["datos"]), respuesta["origen"]
+        print(f"⚠️ No se pudo leer la imagen del captcha desde la página: {respuesta and respuesta.get('error')}")
+    except Exception as ex:
+        print(f"⚠️ Error leyendo la imagen del captcha desde la página: {ex}")
+
+    from selenium.webdriver.common.by import By
+    return driver.find_element(By.ID, utils.id_campo_captcha).screenshot_as_png, "captura"
+
+def cargar_configuracion_captcha(ruta=None):
+    """
+    Carga los parámetros ajustados del captcha y los aplica a `PARAMETROS_CAPTCHA`.
+
+    Solo se aplican las claves conocidas; si el archivo no existe o no es válido
+    se conservan los valores por defecto.
+
+    Args:
+        ruta (str, optional): Archivo JSON. Por defecto `RUTA_CONFIG_CAPTCHA`.
+
+    Returns:
+        dict: Parámetros vigentes.
+    """
+    global _configuracion_cargada
+    _configuracion_cargada = True
+    ruta = ruta or RUTA_CONFIG_CAPTCHA
+    if not os.path.exists(ruta):
+        return PARAMETROS_CAPTCHA
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            configuracion = json.load(f)
+        parametros = configuracion.get("parametros", configuracion)
+        PARAMETROS_CAPTCHA.update({clave: valor for clave, valor in parametros.items() if clave in PARAMETROS_CAPTCHA})
+        print(f"⚙️ Parámetros del captcha cargados desde {ruta}")
+    except Exception as ex:
+        print(f"⚠️ No se pudo cargar la configuración del captcha ({ruta}): {ex}")
+    return PARAMETROS_CAPTCHA
+
+def parametros_captcha():
+    """
+    Devuelve `PARAMETROS_CAPTCHA`, aplicando antes los parámetros ajustados la primera vez.
+
+    El archivo de configuración se lee en el primer uso y no al importar el módulo,
+    para que importar `orc` (por ejemplo, en los procesos de un pool) no toque el disco.
+    """
+    if not _configuracion_cargada:
+        with _lock_configuracion:
+            if not _configuracion_cargada:
+                cargar_configuracion_captcha()
+    return PARAMETROS_CAPTCHA
+
+def _api_tesseract():
+    """
+    Devuelve la instancia de `tesserocr.PyTessBaseAPI` del hilo actual, creándola
+    (y cargando el idioma) solo la primera vez.
+    """
+    api = getattr(_apis_tesseract, "api", None)
+    if api is None:
+        if tesserocr is None:
+            raise RuntimeError("El motor 'tesserocr' requiere el paquete tesserocr (pip install tesserocr).")
+        opciones = {"path": os.environ["TESSDATA_PREFIX"]} if os.environ.get("TESSDATA_PREFIX") else {}
+        api = tesserocr.PyTessBaseAPI(lang="eng", psm=tesserocr.PSM.SINGLE_WORD, **opciones)
+        api.SetVariable("tessedit_char_whitelist", LISTA_BLANCA_CAPTCHA)
+        _apis_tesseract.api = api
+    return api
+
+def _preparar_api(imagen, psm):
+    api = _api_tesseract()
+    api.SetPageSegMode(psm)
+    imagen = np.ascontiguousarray(imagen)
+    api.SetImageBytes(imagen.tobytes(), imagen.shape[1], imagen.shape[0], 1, imagen.shape[1])
+    return api
+
+def ocr_texto(imagen, motor=None, psm=None):
+    """
+    Ejecuta Tesseract sobre una imagen ya preprocesada con el motor indicado.
+
+    Args:
+        imagen (numpy.ndarray): Matriz `uint8` en escala de grises.
+        motor (str, optional): "pytesseract" o "tesserocr". Por defecto `MOTOR_OCR`.
+        psm (int, optional): Modo de segmentación. Por defecto el de `PARAMETROS_CAPTCHA`.
+
+    Returns:
+        str: Texto reconocido, sin limpiar.
+    """
+    motor = motor or MOTOR_OCR
+    psm = int(psm or parametros_captcha()["psm"])
+    if motor == "tesserocr":
+        return _preparar_api(imagen, psm).GetUTF8Text()
+    if motor == "pytesseract":
+        return pytesseract.image_to_string(imagen, config=CONFIG_TESSERACT.format(psm=psm))
+    raise ValueError(f"Motor de OCR desconocido: {motor} (opciones: {', '.join(MOTORES_OCR)})")
+
+def _a_gris(image):
+    if isinstance(image, np.ndarray):
+        return image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return np.array(ImageOps.grayscale(image))
+
+def enderezar(gris, angulo_maximo=15):
+    """
+    Corrige la inclinación global del texto del captcha (deskew).
+
+    Estima el ángulo con el rectángulo de área mínima que contiene los píxeles
+    oscuros; si el ángulo es mayor que `angulo_maximo` se considera ruido y no se rota.
+
+    Args:
+        gris (numpy.ndarray): Imagen en escala de grises.
+        angulo_maximo (float, optional): Ángulo máximo (grados) que se corrige.
+
+    Returns:
+        numpy.ndarray: Imagen enderezada (mismo tamaño).
+    """
+    umbral, _ = cv2.threshold(gris, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    puntos = cv2.findNonZero((gris < umbral).astype(np.uint8))
+    if puntos is None or len(puntos) < 10:
+        return gris
+    angulo = cv2.minAreaRect(puntos)[-1]
+    if angulo > 45:
+        angulo -= 90
+    if abs(angulo) < 0.5 or abs(angulo) > angulo_maximo:
+        return gris
+    alto, ancho = gris.shape
+    matriz = cv2.getRotationMatrix2D((ancho / 2, alto / 2), angulo, 1.0)
+    return cv2.warpAffine(gris, matriz, (ancho, alto), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+def generar_variantes(gris, variantes=None, parametros=None):
+    """
+    Genera varias versiones binarizadas del captcha en una sola comparación vectorizada.
+
+    Cada variante es una pareja (imagen base, umbral por píxel); todas se apilan
+    y se binarizan juntas con una sola operación de NumPy:
+
+        - "fijo":       umbral fijo (150 por defecto, el preprocesamiento original).
+        - "otsu":       umbral global de Otsu.
+        - "adaptativo": umbral local (media de una ventana menos una constante).
+        - "sin_ruido":  filtro de mediana y luego Otsu.
+        - "enderezada": corrección de inclinación y luego Otsu.
+
+    Si `kernel_cierre` es mayor que 1, a cada variante se le aplica además un
+    cierre morfológico de ese tamaño.
+
+    Args:
+        gris (numpy.ndarray): Imagen en escala de grises.
+        variantes (Iterable[str], optional): Variantes a generar. Por defecto las de
+            `PARAMETROS_CAPTCHA` o, si no están fijadas, todas (`VARIANTES_CAPTCHA`).
+        parametros (dict, optional): Valores que reemplazan a los de `PARAMETROS_CAPTCHA`.
+
+    Returns:
+        dict[str, numpy.ndarray]: Imagen binaria (texto negro sobre blanco) por variante.
+    """
+    parametros = {**parametros_captcha(), **(parametros or {})}
+    variantes = tuple(variantes or parametros["variantes"] or VARIANTES_CAPTCHA)
+    otsu = lambda imagen: cv2.threshold(imagen, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[0]
+    bases, umbrales = [], []
+    for nombre in variantes:
+        if nombre == "fijo":
+            base, umbral = gris, parametros["umbral_fijo"]
+        elif nombre == "otsu":
+            base, umbral = gris, otsu(gris)
+        elif nombre == "adaptativo":
+            bloque = int(parametros["bloque_adaptativo"])
+            base, umbral = gris, cv2.blur(gris.astype(np.float32), (bloque, bloque)) - parametros["c_adaptativo"]
+        elif nombre == "sin_ruido":
+            base = cv2.medianBlur(gris, int(parametros["mediana"]))
+            umbral = otsu(base)
+        elif nombre == "enderezada":
+            base = enderezar(gris)
+            umbral = otsu(base)
+        else:
+            raise ValueError(f"Variante de preprocesamiento desconocida: {nombre}")
+        bases.append(base)
+        umbrales.append(np.broadcast_to(np.float32(umbral), gris.shape))
+
+    binarias = np.where(np.stack(bases) > np.stack(umbrales), 255, 0).astype(np.uint8)
+    kernel = int(parametros["kernel_cierre"])
+    if kernel > 1:
+        binarias = [cv2.morphologyEx(binaria, cv2.MORPH_CLOSE, np.ones((kernel, kernel), np.uint8)) for binaria in binarias]
+    return dict(zip(variantes, binarias))
+
+def ocr_con_confianza(imagen, motor=None, psm=None):
+    """
+    Ejecuta Tesseract y devuelve el texto con la confianza de cada carácter.
+
+    Con "tesserocr" la confianza es la de cada símbolo reconocido; con
+    "pytesseract" se usa `image_to_data`, que solo la informa por palabra,
+    y se asigna a cada uno de sus caracteres.
+
+    Args:
+        imagen (numpy.ndarray): Matriz `uint8` en escala de grises.
+        motor (str, optional): "pytesseract" o "tesserocr". Por defecto `MOTOR_OCR`.
+        psm (int, optional): Modo de segmentación. Por defecto el de `PARAMETROS_CAPTCHA`.
+
+    Returns:
+        tuple[str, list[float]]: Texto (mayúsculas, solo alfanuméricos) y confianzas (0-100).
+    """
+    motor = motor or MOTOR_OCR
+    psm = int(psm or parametros_captcha()["psm"])
+    texto, confianzas = "", []
+    if motor == "tesserocr":
+        api = _preparar_api(imagen, psm)
+        api.Recognize()
+        nivel = tesserocr.RIL.SYMBOL
+        if not api.GetUTF8Text().strip():
+            return texto, confianzas
+        for simbolo in tesserocr.iterate_level(api.GetIterator(), nivel):
+            try:
+                caracter = (simbolo.GetUTF8Text(nivel) or "").strip().upper()
+            except RuntimeError:
+                continue
+            if caracter.isalnum():
+                texto += caracter
+                confianzas.append(float(simbolo.Confidence(nivel)))
+        return texto, confianzas
+    if motor == "pytesseract":
+        datos = pytesseract.image_to_data(imagen, config=CONFIG_TESSERACT.format(psm=psm), output_type=pytesseract.Output.DICT)
+        for palabra, confianza in zip(datos["text"], datos["conf"]):
+            palabra = "".join(filter(str.isalnum, palabra.upper()))
+            if palabra and float(confianza) >= 0:
+                texto += palabra
+                confianzas.extend([float(confianza)] * len(palabra))
+        return texto, confianzas
+    raise ValueError(f"Motor de OCR desconocido: {motor} (opciones: {', '.join(MOTORES_OCR)})")
+
+def votar_lecturas(lecturas):
+    """
+    Combina las lecturas de varias variantes por votación ponderada por confianza.
+
+    Primero se elige la longitud con más respaldo (suma de confianzas medias) y,
+    entre las lecturas de esa longitud, el carácter con más confianza acumulada en
+    cada posición. La confianza de cada posición es esa suma dividida entre el
+    total de lecturas no vacías, de modo que el desacuerdo entre variantes la
+    reduce; una variante que no leyó nada no cuenta como voto en contra.
+
+    Args:
+        lecturas (list[tuple[str, list[float]]]): Texto y confianzas por variante.
+
+    Returns:
+        tuple[str, float]: Texto votado y su confianza (0-100; la de la posición más débil).
+    """
+    validas = [(texto, confianzas) for texto, confianzas in lecturas if texto and len(confianzas) == len(texto)]
+    if not validas:
+        return "", 0.0
+
+    por_longitud = {}
+    for texto, confianzas in validas:
+        por_longitud[len(texto)] = por_longitud.get(len(texto), 0.0) + sum(confianzas) / len(confianzas)
+    longitud = max(por_longitud, key=por_longitud.get)
+    candidatas = [(texto, confianzas) for texto, confianzas in validas if len(texto) == longitud]
+
+    texto_votado, confianza_minima = "", 100.0
+    for posicion in range(longitud):
+        votos = {}
+        for texto, confianzas in candidatas:
+            votos[texto[posicion]] = votos.get(texto[posicion], 0.0) + confianzas[posicion]
+        caracter = max(votos, key=votos.get)
+        texto_votado += caracter
+        confianza_minima = min(confianza_minima, votos[caracter] / len(validas))
+    return texto_votado, round(confianza_minima, 2)
+
+def _lector_variantes():
+    """
+    Devuelve el pool de hilos compartido que lee las variantes con "pytesseract".
+
+    Cada lectura espera a un proceso `tesseract` (sin retener el GIL); el pool
+    tiene un hilo por núcleo, de modo que los trabajadores no lanzan más procesos
+    a la vez que núcleos hay.
+    """
+    global _executor_variantes
+    with _lock_executor_variantes:
+        if _executor_variantes is None:
+            _executor_variantes = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="ocr-variantes")
+        return _executor_variantes
+
+def reconocer_captcha(image, motor=None, variantes=None, parametros=None):
+    """
+    Preprocesa el captcha en varias variantes, las lee con OCR y vota el resultado.
+
+    Args:
+        image (PIL.Image.Image | numpy.ndarray): Imagen del captcha o matriz en escala de grises.
+        motor (str, optional): Motor de OCR. Por defecto `MOTOR_OCR`.
+        variantes (Iterable[str], optional): Variantes de preprocesamiento. Por defecto las de
+            `PARAMETROS_CAPTCHA` o, si no están fijadas, las de `VARIANTES_POR_MOTOR`.
+            Con "pytesseract" las variantes se leen en paralelo.
+        parametros (dict, optional): Valores que reemplazan a los de `PARAMETROS_CAPTCHA`.
+
+    Returns:
+        dict: `texto` votado, `confianza` (0-100) y `lecturas` por variante.
+    """
+    motor = motor or MOTOR_OCR
+    psm = (parametros or {}).get("psm")
+    if not variantes and not {**parametros_captcha(), **(parametros or {})}["variantes"]:
+        variantes = VARIANTES_POR_MOTOR.get(motor, VARIANTES_CAPTCHA)
+    binarias = generar_variantes(_a_gris(image), variantes, parametros)
+    if motor == "pytesseract" and len(binarias) > 1:
+        futuros = {nombre: _lector_variantes().submit(ocr_con_confianza, binaria, motor, psm)
+                   for nombre, binaria in binarias.items()}
+        lecturas = {nombre: futuro.result() for nombre, futuro in futuros.items()}
+    else:
+        # tesserocr mantiene una API por hilo: se lee en el hilo que la creó
+        lecturas = {nombre: ocr_con_confianza(binaria, motor, psm) for nombre, binaria in binarias.items()}
+    texto, confianza = votar_lecturas(list(lecturas.values()))
+    return {"texto": texto, "confianza": confianza, "lecturas": {nombre: texto for nombre, (texto, _) in lecturas.items()}}
+
+# Resolvedores disponibles: función `gris -> {"texto", "confianza", "lecturas"}`
+# (ver `registrar_resolvedor`; "tesseract" recibe además el motor y las variantes)
+RESOLVEDORES_CAPTCHA = {
+    "tesseract": reconocer_captcha,
+    "plantillas": reconocer_captcha_plantillas,
+}
+
+# Resolvedores con versión por lotes: función `list[gris] -> list[dict]` (ver `resolver_lote`)
+RESOLVEDORES_LOTE = {
+    "plantillas": reconocer_lote,
+}
+
+def registrar_resolvedor(nombre, funcion, lote=None):
+    """
+    Registra un resolvedor de captcha adicional.
+
+    Args:
+        nombre (str): Nombre con el que se selecciona (`resolvedor=` o CAPTCHA_RESOLVEDOR).
+        funcion (callable): Función que recibe la imagen en escala de grises
+            (`numpy.ndarray`) y devuelve un dict con `texto` y `confianza` (0-100).
+        lote (callable, optional): Versión por lotes (`list[gris] -> list[dict]`),
+            usada por `resolver_lote` y el servicio de OCR.
+    """
+    RESOLVEDORES_CAPTCHA[nombre] = funcion
+    if lote is not None:
+        RESOLVEDORES_LOTE[nombre] = lote
+
+def leer_texto_captcha(image, motor=None, umbral_confianza=None, variantes=None, resolvedor=None):
+    """
+    Ejecuta el preprocesamiento y el OCR sobre una imagen de captcha ya obtenida.
+
+    Se usa tanto desde el navegador (`resolver_captcha`) como desde los motores
+    que descargan la imagen directamente por HTTP. El texto se obtiene por votación
+    entre varias variantes de preprocesamiento (ver `reconocer_captcha`) y se
+    descarta si su confianza no alcanza el umbral: es más barato recargar el
+    captcha que enviar una respuesta probablemente incorrecta.
+
+    Args:
+        image (PIL.Image.Image | numpy.ndarray): Imagen del captcha, o matriz en
+            escala de grises (ver `bytes_a_gris`).
+        motor (str, optional): Motor de OCR (ver `MOTORES_OCR`). Por defecto `MOTOR_OCR`.
+        umbral_confianza (float, optional): Confianza mínima (0-100). Por defecto la de `PARAMETROS_CAPTCHA`.
+        variantes (Iterable[str], optional): Variantes de preprocesamiento. Por defecto las de
+            `PARAMETROS_CAPTCHA` o las de `VARIANTES_POR_MOTOR`.
+        resolvedor (str, optional): Resolvedor registrado en `RESOLVEDORES_CAPTCHA`.
+            Por defecto `RESOLVEDOR_CAPTCHA`.
+
+    Returns:
+        str | None: Texto del captcha si parece confiable, o `None`.
+    """
+    resolvedor = resolvedor or RESOLVEDOR_CAPTCHA
+    if resolvedor not in RESOLVEDORES_CAPTCHA:
+        raise ValueError(f"Resolvedor de captcha desconocido: {resolvedor} (opciones: {', '.join(RESOLVEDORES_CAPTCHA)})")
+    if resolvedor == "tesseract":
+        resultado = reconocer_captcha(image, motor, variantes)
+    else:
+        resultado = RESOLVEDORES_CAPTCHA[resolvedor](_a_gris(image))
+    return aceptar_resultado(resultado, umbral_confianza)
+
+def aceptar_resultado(resultado, umbral_confianza=None):
+    """
+    Devuelve el texto de un resultado de resolvedor si su forma y su confianza son aceptables.
+
+    Args:
+        resultado (dict): `texto` y `confianza` (0-100) de un resolvedor.
+        umbral_confianza (float, optional): Confianza mínima. Por defecto la de `PARAMETROS_CAPTCHA`.
+
+    Returns:
+        str | None: Texto del captcha si parece confiable, o `None`.
+    """
+    umbral_confianza = parametros_captcha()["umbral_confianza"] if umbral_confianza is None else umbral_confianza
+    text = resultado["texto"]
+
+    print(f"🔎 Captcha detectado: '{text}' (confianza {resultado['confianza']})")
+
+    # ---------------------------------------------------------------------
+    # Validar si el texto detectado parece confiable
+    # ---------------------------------------------------------------------
+    if texto_aceptable(text) and resultado["confianza"] >= umbral_confianza:
+        return text
+    return None
+
+def resolver_lote(imagenes, motor=None, resolvedor=None):
+    """
+    Resuelve varios captchas con un resolvedor, en una sola llamada si tiene versión por lotes.
+
+    Args:
+        imagenes (list[numpy.ndarray]): Captchas en escala de grises.
+        motor (str, optional): Motor de OCR del resolvedor "tesseract".
+        resolvedor (str, optional): Resolvedor registrado. Por defecto `RESOLVEDOR_CAPTCHA`.
+
+    Returns:
+        list[dict]: `texto` y `confianza` de cada captcha, en el mismo orden.
+    """
+    resolvedor = resolvedor or RESOLVEDOR_CAPTCHA
+    if resolvedor in RESOLVEDORES_LOTE:
+        return RESOLVEDORES_LOTE[resolvedor](imagenes)
+    if resolvedor == "tesseract":
+        return [reconocer_captcha(gris, motor) for gris in imagenes]
+    if resolvedor not in RESOLVEDORES_CAPTCHA:
+        raise ValueError(f"Resolvedor de captcha desconocido: {resolvedor} (opciones: {', '.join(RESOLVEDORES_CAPTCHA)})")
+    return [RESOLVEDORES_CAPTCHA[resolvedor](gris) for gris in imagenes]
+
+def texto_aceptable(texto):
+    """
+    Indica si el texto tiene la forma de una respuesta de captcha (longitud y caracteres).
+    """
+    parametros = parametros_captcha()
+    return parametros["longitud_minima"] <= len(texto) <= parametros["longitud_maxima"] and texto.isalnum()
+
+def leer_texto_captcha_bytes(imagen_bytes, motor=None, resolvedor=None):
+    """
+    Resuelve un captcha a partir de los bytes originales de la imagen (PNG, JPEG, GIF).
+
+    Args:
+        imagen_bytes (bytes): Contenido de la imagen del captcha.
+        motor (str, optional): Motor de OCR. Por defecto `MOTOR_OCR`.
+        resolvedor (str, optional): Resolvedor de captcha. Por defecto `RESOLVEDOR_CAPTCHA`.
+
+    Returns:
+        str | None: Texto del captcha si parece confiable, o `None`.
+    """
+    return leer_texto_captcha(bytes_a_gris(imagen_bytes), motor, resolvedor=resolvedor)
+
+def recargar_captcha(driver, plazo=5):
+    """
+    Pulsa "Change the code" y espera solo hasta que la nueva imagen esté cargada.
+
+    Args:
+        driver (webdriver): Navegador con la página del captcha cargada.
+        plazo (float, optional): Segundos máximos de espera de la nueva imagen.
+
+    Returns:
+        bool: True si la imagen cambió dentro del plazo.
+    """
+    # Selenium se importa aquí: los procesos que solo hacen OCR no lo necesitan
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.wait import WebDriverWait
+    try:
+        src_previo = driver.find_element(By.ID, utils.id_campo_captcha).get_attribute("src")
+        driver.find_element(By.XPATH, utils.xpath_boton_recargar_captcha).click()
+    except Exception:
+        print("⚠️ No se encontró botón para refrescar el captcha.")
+        return False
+    inicio = time.perf_counter()
+    try:
+        WebDriverWait(driver, plazo, poll_frequency=0.1).until(lambda d: d.execute_script(
+            "const i = document.getElementById(arguments[0]);"
+            "return !!i && i.src !== arguments[1] && i.complete && i.naturalWidth > 0;",
+            utils.id_campo_captcha, src_previo))
+        print(f"⏱️ Captcha recargado ({time.perf_counter() - inicio:.3f}s)")
+        return True
+    except TimeoutException:
+        print(f"⚠️ La imagen del captcha no cambió tras recargar ({time.perf_counter() - inicio:.3f}s).")
+        return False
+
+def resolver_captcha(driver, max_intentos=1, motor=None, resolvedor=None, cache=None, servicio=None):
     """
     Intenta resolver el captcha de la Registraduría utilizando Tesseract OCR.
 
     El proceso incluye:
-        - Capturar la imagen del captcha directamente desde el navegador.
-        - Convertirla a escala de grises.
-        - Aplicar técnicas de limpieza (umbral binario y morfología) para mejorar la legibilidad.
-        - Ejecutar OCR con configuración ajustada para letras mayúsculas y números.
-        - Validar el texto extraído según su longitud y formato.
+        - Obtener los bytes originales de la imagen desde la sesión del navegador
+          (caché o canvas; la captura de pantalla queda como último recurso).
+        - Decodificarla directamente a escala de grises.
+        - Si se indica `cache` y la imagen ya fue resuelta y aceptada antes, devolver
+          esa respuesta sin OCR.
+        - Generar variantes binarizadas (fijo, Otsu, adaptativo, sin ruido, enderezada;
+          con "pytesseract" solo "fijo" por defecto, ver `VARIANTES_POR_MOTOR`).
+        - Ejecutar OCR sobre cada una y votar el texto según la confianza por carácter.
+        - Validar el texto según su longitud, formato y confianza; si no es confiable,
+          recargar el captcha de inmediato en lugar de enviar una respuesta dudosa.
 
     Args:
         driver (webdriver): Instancia activa de Selenium con la página cargada.
         max_intentos (int, opcional): Número máximo de intentos de resolución antes
             de rendirse y devolver None. Por defecto es 1.
+        motor (str, opcional): Motor de OCR ("pytesseract" o "tesserocr").
+            Por defecto `MOTOR_OCR`.
+        resolvedor (str, opcional): Resolvedor de captcha ("tesseract", "plantillas"...).
+            Por defecto `RESOLVEDOR_CAPTCHA`.
+        cache (CacheCaptcha, opcional): Caché de captchas aceptados. El llamador
+            debe confirmar o rechazar la respuesta tras enviarla.
+        servicio (ServicioOCR, opcional): Servicio de OCR compartido al que se envía
+            la imagen en lugar de resolverla en este hilo (usa su propio motor y resolvedor).
 
     Returns:
         str | None: Texto del captcha si se detecta correctamente,
@@ -47,49 +659,33 @@ def resolver_captcha(driver, max_intentos=1):
         print(f"\n🧠 Resolviendo captcha (intento {intento}/{max_intentos})...")
 
         # ---------------------------------------------------------------------
-        # Capturar la imagen del captcha directamente desde el navegador
-        # ---------------------------------------------------------------------
-        captcha_element = driver.find_element(By.ID, utils.id_campo_captcha)
-        captcha_png = captcha_element.screenshot_as_png
-        image = Image.open(io.BytesIO(captcha_png))
-
-
-        # ---------------------------------------------------------------------
-        # Preprocesamiento de imagen para mejorar precisión de OCR
-        # ---------------------------------------------------------------------
-        gray = ImageOps.grayscale(image)
-        img_cv = np.array(gray)
-        _, thresh = cv2.threshold(img_cv, 150, 255, cv2.THRESH_BINARY)  # No invertimos
-        kernel = np.ones((1, 1), np.uint8)
-        img_clean = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
-        final_image = Image.fromarray(img_clean)
-
-
-        # ---------------------------------------------------------------------
-        # Reconocimiento de texto mediante Tesseract
+        # Obtener la imagen original del captcha desde la sesión del navegador
         # ---------------------------------------------------------------------
-        config = "--psm 8 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
-        text = pytesseract.image_to_string(final_image, config=config).strip().replace(" ", "")
-        text = ''.join(filter(str.isalnum, text.upper()))
-
-        print(f"🔎 Captcha detectado: '{text}'")
-
+        captcha_bytes, origen = obtener_bytes_captcha(driver)
+        print(f"Imagen del captcha obtenida ({origen}, {len(captcha_bytes)} bytes).")
 
         # ---------------------------------------------------------------------
-        # Validar si el texto detectado parece confiable
+        # Preprocesamiento, OCR y validación del texto detectado
         # ---------------------------------------------------------------------
-        if 4 <= len(text) <= 8 and text.isalnum():
+        gris = bytes_a_gris(captcha_bytes)
+        if cache is not None:
+            text = cache.buscar(gris)
+            if text:
+                print(f"♻️ Captcha encontrado en la caché: '{text}'")
+                return text
+        if servicio is not None:
+            text = servicio.resolver(gris)
+        else:
+            text = leer_texto_captcha(gris, motor, resolvedor=resolvedor)
+        if text:
             return text
 
         print("Captcha no confiable, recargando imagen...")
-        try:
-            driver.find_element(By.XPATH, utils.xpath_boton_recargar_captcha).click()
-        except:
-            print("⚠️ No se encontró botón para refrescar el captcha.")
-        time.sleep(2)
+        recargar_captcha(driver)
 
     # -------------------------------------------------------------------------
     # Si se agotan los intentos, retornar None para ingreso manual
     # -------------------------------------------------------------------------
     print("OCR no logró resolver el captcha automáticamente.")
-    return None
\ No newline at end of file
+    return None
+
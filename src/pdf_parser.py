@@ -1,50 +1,307 @@
 """
 Módulo para lectura y análisis de certificados PDF de cédulas de ciudadanía.
 
-Este módulo utiliza `pdfplumber` para extraer texto desde archivos PDF descargados,
-y posteriormente analiza el contenido para obtener datos estructurados como
-número de cédula, nombre, fecha, lugar de expedición y estado del documento.
+Este módulo extrae texto desde archivos PDF descargados y posteriormente analiza
+el contenido para obtener datos estructurados como número de cédula, nombre,
+fecha, lugar de expedición y estado del documento.
 
 Flujo general:
     1. `leer_documento_pdf()` abre y extrae texto de un archivo PDF.
     2. `parsear_documento_pdf()` interpreta el texto y extrae los campos relevantes.
     3. `gestionar_pdf()` combina ambos pasos y devuelve un diccionario con los datos finales.
 
+Modo por flujo (el que usa `gestionar_pdf`):
+    `iterar_lineas_pdf()` extrae cada página una sola vez y entrega sus líneas a
+    `parsear_lineas_pdf()`, que deja de leer en cuanto todos los campos están
+    llenos (en los certificados, todos están en la primera página).
+
+Backends de extracción de texto (`BACKENDS_PDF`, ampliables con `registrar_backend_pdf`):
+    - "pdfium":     capa de texto de PDFium (`pypdfium2`), sin análisis de diseño.
+                    Es el más rápido y liviano, y el backend por defecto.
+    - "pdfminer":   texto de `pdfminer.six` página por página.
+    - "pdfplumber": análisis de diseño completo. Es el respaldo: `gestionar_pdf`
+                    lo usa si el backend elegido deja campos vacíos.
+
+Caché: `gestionar_pdf` guarda cada resultado con el SHA-256 del PDF, el backend
+y la `VERSION_PARSER` vigente (`cache_pdf`), y no vuelve a parsear el mismo contenido.
+
 Fecha: 2025-11-02
 """
+import io
+import os
+import re
+import threading
+from datetime import date
+from functools import lru_cache
 import pdfplumber
+from src.cache_pdf import obtener_cache_pdf, huella_pdf
+from pdfminer.high_level import extract_pages
+from pdfminer.layout import LTTextContainer
+
+try:
+    # Opcional: extracción de texto con PDFium
+    import pypdfium2
+except ImportError:
+    pypdfium2 = None
+
+# Versión de las reglas de extracción: subirla al cambiar el parser invalida los
+# resultados guardados en la caché de certificados (`cache_pdf`)
+VERSION_PARSER = 3
+
+# Campos que entrega el parser; la lectura por flujo termina cuando todos tienen valor
+CAMPOS_CERTIFICADO = ("cedula_ciudadania", "nombre_ciudadano", "fecha_expedida",
+                      "municipio_expedida", "departamento_expedida", "estado_cedula")
+
+# Backend de extracción por defecto (se puede cambiar con la variable de entorno PDF_BACKEND)
+# y backend de respaldo cuando el primero deja campos vacíos
+BACKEND_PDF = os.environ.get("PDF_BACKEND", "pdfium" if pypdfium2 is not None else "pdfplumber")
+BACKEND_RESPALDO_PDF = "pdfplumber"
+
+# PDFium no es seguro entre hilos: todas sus llamadas se serializan con este candado
+_lock_pdfium = threading.Lock()
+
+def _fuente_pdf(pdf_origen):
+    """
+    Normaliza el origen del PDF para los backends: las rutas y objetos tipo
+    archivo se usan tal cual y los `bytes` se envuelven en `io.BytesIO`.
+    """
+    if isinstance(pdf_origen, (bytes, bytearray, memoryview)):
+        return io.BytesIO(pdf_origen)
+    return pdf_origen
+
+def _lineas_pdfplumber(pdf_origen):
+    with pdfplumber.open(_fuente_pdf(pdf_origen)) as pdf:
+        for page in pdf.pages:
+            texto_pagina = page.extract_text()
+            page.close()
+            if texto_pagina:
+                yield from texto_pagina.splitlines()
+
+def _lineas_pdfminer(pdf_origen):
+    for pagina in extract_pages(_fuente_pdf(pdf_origen)):
+        for elemento in pagina:
+            if isinstance(elemento, LTTextContainer):
+                yield from elemento.get_text().splitlines()
+
+def _lineas_pdfium(pdf_origen):
+    if pypdfium2 is None:
+        raise RuntimeError("pypdfium2 no está instalado.")
+    with _lock_pdfium:
+        pdf = pypdfium2.PdfDocument(_fuente_pdf(pdf_origen))
+    try:
+        for indice in range(len(pdf)):
+            with _lock_pdfium:
+                pagina = pdf[indice]
+                capa_texto = pagina.get_textpage()
+                texto_pagina = capa_texto.get_text_range()
+                capa_texto.close()
+                pagina.close()
+            if texto_pagina:
+                yield from texto_pagina.splitlines()
+    finally:
+        with _lock_pdfium:
+            pdf.close()
+
+BACKENDS_PDF = {
+    "pdfium": _lineas_pdfium,
+    "pdfminer": _lineas_pdfminer,
+    "pdfplumber": _lineas_pdfplumber,
+}
+
+def registrar_backend_pdf(nombre, funcion):
+    """
+    Registra un backend de extracción de texto adicional.
+
+    Args:
+        nombre (str): Nombre con el que se selecciona (`backend=` o PDF_BACKEND).
+        funcion (callable): Generador que recibe el PDF (ruta, `bytes` u objeto tipo
+            archivo) y entrega sus líneas de texto página por página.
+    """
+    BACKENDS_PDF[nombre] = funcion
+
+def iterar_lineas_pdf(pdf_origen, backend=None):
+    """
+    Entrega las líneas de texto del PDF página por página, extrayendo cada página una sola vez.
+
+    Si quien consume el generador lo cierra antes de terminar (p. ej. porque ya
+    encontró todos los campos), no se leen las páginas restantes y el PDF se cierra.
 
-def leer_documento_pdf(pdf_ruta):
+    Args:
+        pdf_origen (str | bytes | BinaryIO): Ruta del PDF, su contenido en `bytes`
+            o un objeto tipo archivo (`io.BytesIO`).
+        backend (str, optional): Backend de `BACKENDS_PDF`. Por defecto `BACKEND_PDF`.
+
+    Yields:
+        str: Cada línea de texto, en el orden del documento.
     """
-    Lee el contenido textual de un archivo PDF utilizando `pdfplumber`.
+    backend = backend or BACKEND_PDF
+    if backend not in BACKENDS_PDF:
+        raise ValueError(f"Backend de PDF desconocido: {backend}")
+    yield from BACKENDS_PDF[backend](pdf_origen)
+
+def leer_documento_pdf(pdf_ruta, backend=None):
+    """
+    Lee el contenido textual de un archivo PDF.
 
     Args:
-        pdf_ruta (str): Ruta completa del archivo PDF a leer.
+        pdf_ruta (str | bytes | BinaryIO): Ruta completa del archivo PDF a leer, su
+            contenido en `bytes`, o un objeto tipo archivo (por ejemplo `io.BytesIO`)
+            con el PDF ya en memoria.
+        backend (str, optional): Backend de extracción. Por defecto `BACKEND_PDF`.
 
     Returns:
         str: Texto completo concatenado de todas las páginas del PDF.
         Si ocurre un error o el archivo no tiene texto legible, devuelve una cadena vacía.
     """
-    texto=""
     try:
-        with pdfplumber.open(pdf_ruta) as pdf:
-            for page in pdf.pages:
-                texto += page.extract_text()+'\n' if page.extract_text() else ''
-        return texto
+        return "".join(f"{linea}\n" for linea in iterar_lineas_pdf(pdf_ruta, backend))
     except Exception as e:
         print(f'Se tiene el error con la lectura del pdf: {e}')
         return ""
+
+# Línea de datos del certificado: etiqueta (tolerante a tildes, mayúsculas y
+# espacios), dos puntos y valor. La primera letra de la etiqueta identifica el campo.
+# Con MULTILINE, `finditer` recorre un texto completo sin partirlo en líneas.
+PATRON_LINEA_CERTIFICADO = re.compile(
+    r"^[ \t]*(?P<etiqueta>c[eé]dula\s+de\s+ciudadan[ií]a|fecha\s+de\s+expedici[oó]n|lugar\s+de\s+expedici[oó]n"
+    r"|a\s+nombre\s+de|estado(?:\s+de\s+la\s+c[eé]dula)?)[ \t]*:(?P<valor>.*)",
+    re.IGNORECASE | re.MULTILINE)
+
+PATRON_FECHA = re.compile(r"^(\d{1,2})\s*(?:de\s+|-|/)?\s*([a-zñáéíóú]+)\s*(?:del?\s+|-|/)?\s*(\d{4})$", re.IGNORECASE)
+PATRON_CEDULA = re.compile(r"^\d{1,10}$")
+PATRON_SEPARADOR_LUGAR = re.compile(r"\s*-\s*")
+
+MESES = {"enero": 1, "febrero": 2, "marzo": 3, "abril": 4, "mayo": 5, "junio": 6, "julio": 7, "agosto": 8,
+         "septiembre": 9, "setiembre": 9, "octubre": 10, "noviembre": 11, "diciembre": 12}
+
+_SIN_TILDES = str.maketrans("áéíóú", "aeiou")
+
+# Palabras que se dejan en minúscula al normalizar municipios y departamentos
+CONECTORES_LUGAR = {"de", "del", "la", "las", "los", "y", "el"}
+
+# Estados de validación de cada campo (`datos["validacion"]`)
+CAMPO_OK = "ok"
+CAMPO_FALTANTE = "faltante"
+CAMPO_INVALIDO = "invalido"
+
+@lru_cache(maxsize=4096)
+def _normalizar_lugar(texto):
+    """
+    "SAN ANDRÉS DE TUMACO" → "San Andrés de Tumaco", "BOGOTA D.C." → "Bogota D.C.".
+    """
+    palabras = texto.title().split()
+    if len(palabras) > 2:
+        palabras[1:-1] = [p.lower() if p.lower() in CONECTORES_LUGAR else p for p in palabras[1:-1]]
+    return " ".join(palabras) or None
+
+@lru_cache(maxsize=4096)
+def _normalizar_fecha(texto):
+    """
+    "31 DE DICIEMBRE DE 2020" → "2020-12-31". Devuelve None si no es una fecha válida.
+    """
+    coincidencia = PATRON_FECHA.match(texto)
+    if not coincidencia:
+        return None
+    dia, mes, year = coincidencia.groups()
+    mes = MESES.get(mes.lower().translate(_SIN_TILDES))
+    try:
+        return date(int(year), mes, int(dia)).isoformat() if mes else None
+    except ValueError:
+        return None
+
+def _asignar_campo(coincidencia, datos_finales, validacion):
+    """
+    Normaliza el valor de una línea de datos (`PATRON_LINEA_CERTIFICADO`), lo guarda
+    en `datos_finales` y registra en `validacion` si quedó normalizado o es inválido.
+    """
+    etiqueta, valor = coincidencia.group("etiqueta", "valor")
+    campo = etiqueta[0].lower()
+    valor = valor.strip()
+
+    if campo == "c":
+        cedula = valor.replace(".", "").replace(",", "").replace(" ", "")
+        valido = bool(PATRON_CEDULA.match(cedula))
+        datos_finales["cedula_ciudadania"] = cedula or None
+        validacion["cedula_ciudadania"] = CAMPO_OK if valido else CAMPO_INVALIDO if cedula else CAMPO_FALTANTE
+
+    elif campo == "f":
+        fecha = _normalizar_fecha(valor)
+        datos_finales["fecha_expedida"] = fecha or valor or None
+        validacion["fecha_expedida"] = CAMPO_OK if fecha else CAMPO_INVALIDO if valor else CAMPO_FALTANTE
+
+    elif campo == "l":
+        lugar = PATRON_SEPARADOR_LUGAR.split(valor, maxsplit=1)
+        municipio = _normalizar_lugar(lugar[0])
+        departamento = _normalizar_lugar(lugar[1]) if len(lugar) > 1 else None
+        datos_finales["municipio_expedida"], datos_finales["departamento_expedida"] = municipio, departamento
+        validacion["municipio_expedida"] = CAMPO_OK if municipio else CAMPO_FALTANTE
+        validacion["departamento_expedida"] = CAMPO_OK if departamento else CAMPO_FALTANTE
+
+    elif campo == "a":
+        nombre = " ".join(valor.split()).title()
+        datos_finales["nombre_ciudadano"] = nombre or None
+        validacion["nombre_ciudadano"] = CAMPO_OK if nombre else CAMPO_FALTANTE
+
+    else:
+        estado = " ".join(valor.split()).capitalize()
+        datos_finales["estado_cedula"] = estado or None
+        validacion["estado_cedula"] = CAMPO_OK if estado else CAMPO_FALTANTE
+
+def _procesar_linea(linea, datos_finales, validacion):
+    """
+    Llena en `datos_finales` el campo que corresponda a la línea, si es una línea de datos.
+    """
+    coincidencia = PATRON_LINEA_CERTIFICADO.match(linea)
+    if coincidencia:
+        _asignar_campo(coincidencia, datos_finales, validacion)
+
+def parsear_lineas_pdf(lineas):
+    """
+    Interpreta las líneas del certificado a medida que llegan y se detiene en
+    cuanto todos los campos de `CAMPOS_CERTIFICADO` tienen valor.
+
+    Args:
+        lineas (Iterable[str]): Líneas de texto (p. ej. `iterar_lineas_pdf(...)`).
+            Si es un generador, se cierra al terminar para no leer más páginas.
+
+    Returns:
+        tuple[dict, int]: Campos extraídos (mismo formato que `parsear_documento_pdf`)
+            y número de líneas con texto leídas.
+    """
+    datos_finales = dict.fromkeys(CAMPOS_CERTIFICADO)
+    validacion = dict.fromkeys(CAMPOS_CERTIFICADO, CAMPO_FALTANTE)
+    leidas = 0
+    try:
+        for linea in lineas:
+            if not linea.strip():
+                continue
+            leidas += 1
+            _procesar_linea(linea, datos_finales, validacion)
+            if None not in datos_finales.values():
+                break
+    finally:
+        if hasattr(lineas, "close"):
+            lineas.close()
+    datos_finales["validacion"] = validacion
+    return datos_finales, leidas
+
 def parsear_documento_pdf(texto_pdf):
     """
        Interpreta el texto extraído del PDF y estructura los datos relevantes.
 
-       Este método busca líneas clave que comienzan con etiquetas conocidas como:
+       Este método busca, con `PATRON_LINEA_CERTIFICADO`, líneas clave que comienzan
+       con etiquetas conocidas (sin importar tildes, mayúsculas ni espacios) como:
        - 'Cédula de ciudadanía'
        - 'Fecha de expedición'
        - 'Lugar de expedición'
        - 'A nombre de'
        - 'Estado'
 
+       Los valores se normalizan: la cédula queda solo con dígitos, la fecha en
+       formato ISO y el municipio y el departamento con mayúscula inicial. En
+       `validacion` se indica por campo si quedó "ok", "faltante" o "invalido"
+       (en ese caso se conserva el texto original).
+
        Args:
            texto_pdf (str): Texto plano extraído previamente desde el archivo PDF.
 
@@ -53,50 +310,89 @@ def parsear_documento_pdf(texto_pdf):
                {
                    "cedula_ciudadania": "1234567890",
                    "nombre_ciudadano": "Juan Pérez",
-                   "fecha_expedida": "29-marzo-2011",
+                   "fecha_expedida": "2011-03-29",
                    "municipio_expedida": "Bogotá",
                    "departamento_expedida": "Cundinamarca",
-                   "estado_cedula": "Vigente"
+                   "estado_cedula": "Vigente",
+                   "validacion": {"cedula_ciudadania": "ok", ..., "estado_cedula": "ok"}
                }
 
        Raises:
            Exception: Si el texto no cumple el formato esperado o falla el parseo.
        """
     try:
-        datos_finales={ "cedula_ciudadania":None,
-                        "nombre_ciudadano":None,
-                        "fecha_expedida":None,
-                        "municipio_expedida":None,
-                        "departamento_expedida":None,
-                        "estado_cedula":None
-                       }
-        for linea in texto_pdf.splitlines():
-            linea = linea.strip().lower()
+        datos_finales=dict.fromkeys(CAMPOS_CERTIFICADO)
+        validacion=dict.fromkeys(CAMPOS_CERTIFICADO, CAMPO_FALTANTE)
+        for coincidencia in PATRON_LINEA_CERTIFICADO.finditer(texto_pdf):
+            _asignar_campo(coincidencia, datos_finales, validacion)
 
-            if linea.startswith("cédula de ciudadanía"):datos_finales["cedula_ciudadania"]=linea.split(":")[-1].strip().replace(".","")
+        datos_finales["validacion"]=validacion
+        return datos_finales
+    except Exception as e:
+        print(f"No se puede parsear el documento, se tiene error: {e}")
 
-            elif linea.startswith("fecha de expedición"):datos_finales["fecha_expedida"] =linea.split(":")[-1].strip().replace(" de ","-")
+def _leer_con_backend(pdf_ruta, backend):
+    """
+    Lee y parsea el PDF por flujo con un backend. Los errores del backend se
+    informan y se devuelven como `(None, 0)` para poder intentar con el respaldo.
+    """
+    try:
+        return parsear_lineas_pdf(iterar_lineas_pdf(pdf_ruta, backend))
+    except Exception as e:
+        print(f"⚠️ Error leyendo el pdf con el backend '{backend}': {e}")
+        return None, 0
 
-            elif linea.startswith("lugar de expedición"):
-                 lugar =(linea.split(":")[-1].strip()).split(" - ")
-                 datos_finales["municipio_expedida"],datos_finales["departamento_expedida"]=lugar[0].capitalize(),lugar[1].capitalize()
+def _contenido_pdf(pdf_ruta):
+    """
+    Devuelve los bytes del PDF, sea una ruta, `bytes` o un objeto tipo archivo.
+    """
+    if isinstance(pdf_ruta, (bytes, bytearray, memoryview)):
+        return bytes(pdf_ruta)
+    if hasattr(pdf_ruta, "read"):
+        return pdf_ruta.read()
+    with open(pdf_ruta, "rb") as f:
+        return f.read()
 
-            elif linea.startswith("a nombre de"): datos_finales["nombre_ciudadano"]= linea.split(":")[-1].strip().title()
+def _leer_y_parsear(pdf_ruta, backend, respaldo):
+    """
+    Lee el PDF con `backend` (y con `respaldo` si hace falta) y devuelve los campos o un dict con `error`.
+    """
+    datos_finales, leidas = _leer_con_backend(pdf_ruta, backend)
+    vacios = [campo for campo in CAMPOS_CERTIFICADO if datos_finales is None or datos_finales[campo] is None]
+    if vacios and respaldo and respaldo != backend:
+        print(f"Campos vacíos con el backend '{backend}' ({', '.join(vacios)}), reintentando con '{respaldo}'...")
+        datos_respaldo, leidas_respaldo = _leer_con_backend(pdf_ruta, respaldo)
+        if datos_respaldo is not None:
+            datos_finales, leidas = datos_respaldo, leidas_respaldo
 
-            elif linea.startswith("estado"): datos_finales["estado_cedula"]= linea.split(":")[-1].strip().capitalize()
+    if datos_finales is None:
+        return {"error":"Pdf no contiene texto para gestionar"}
+    if not leidas:
+        print("No hay texto, pdf no contiene texto para lectura.")
+        return {"error":"Pdf sin texto para lectura"}
+    return datos_finales
 
-        return datos_finales
-    except Exception as e:
-        print(f"No se puede parsear el documento, se tiene error: {e}")
-def gestionar_pdf(pdf_ruta):
+def gestionar_pdf(pdf_ruta, backend=None, respaldo=BACKEND_RESPALDO_PDF, cache=True):
     """
        Procesa completamente un archivo PDF: lectura, validación y parseo de información.
 
-       Combina `leer_documento_pdf()` y `parsear_documento_pdf()` en una única función
-       que se encarga de manejar errores y validar si el PDF contiene texto legible.
+       Antes de abrir el PDF se busca su SHA-256 en la caché de certificados
+       parseados (`cache_pdf`); si ya se parseó con el mismo backend y la misma
+       `VERSION_PARSER`, se devuelve el resultado guardado. Si no, lee el PDF por flujo
+       (`iterar_lineas_pdf()` + `parsear_lineas_pdf()`): cada página se extrae una
+       sola vez y la lectura termina en cuanto se encuentran todos los campos. Si el
+       backend elegido falla o deja campos vacíos, se repite la lectura con el backend
+       de respaldo. Maneja los errores y valida si el PDF contiene texto legible.
 
        Args:
-           pdf_ruta (str): Ruta completa del archivo PDF que se desea procesar.
+           pdf_ruta (str | bytes | BinaryIO): Ruta completa del archivo PDF que se desea
+               procesar, su contenido en `bytes`, o un objeto tipo archivo (`io.BytesIO`)
+               con el PDF en memoria.
+           backend (str, optional): Backend de extracción. Por defecto `BACKEND_PDF`.
+           respaldo (str | None, optional): Backend de respaldo. Por defecto
+               `BACKEND_RESPALDO_PDF`; None lo desactiva.
+           cache (bool | CachePdf, optional): Caché de certificados parseados. True usa
+               la caché compartida (`obtener_cache_pdf`); False la desactiva.
 
        Returns:
            dict: Diccionario con la información extraída del PDF o un mensaje de error.
@@ -105,12 +401,25 @@ def gestionar_pdf(pdf_ruta):
        """
     print("Gestionando documento Pdf...")
     try:
-        texto_pdf = leer_documento_pdf(pdf_ruta)
-        if not texto_pdf.strip():
-            print("No hay texto, pdf no contiene texto para lectura.")
-            return {"error":"Pdf sin texto para lectura"}
+        backend = backend or BACKEND_PDF
+        cache = obtener_cache_pdf() if cache is True else (cache or None)
+        huella = None
+        if cache is not None:
+            pdf_ruta = _contenido_pdf(pdf_ruta)
+            huella = huella_pdf(pdf_ruta)
+            clave_backend = f"{backend}+{respaldo}" if respaldo and respaldo != backend else backend
+            datos_guardados = cache.buscar(huella, VERSION_PARSER, clave_backend)
+            if datos_guardados is not None:
+                print("♻️ Certificado encontrado en la caché de PDFs.")
+                return datos_guardados
+        elif respaldo and respaldo != backend and hasattr(pdf_ruta, "read"):
+            # El archivo se leerá hasta dos veces: se pasa a bytes una sola vez
+            pdf_ruta = pdf_ruta.read()
 
-        return parsear_documento_pdf(texto_pdf)
+        resultado = _leer_y_parsear(pdf_ruta, backend, respaldo)
+        if huella is not None:
+            cache.guardar(huella, VERSION_PARSER, resultado, clave_backend)
+        return resultado
     except Exception as e:
         print(f'Error gestionando el pdf: {e}')
-        return {"error":"Pdf no contiene texto para gestionar"}
\ No newline at end of file
+        return {"error":"Pdf no contiene texto para gestionar"}
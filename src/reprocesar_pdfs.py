@@ -0,0 +1,203 @@
+"""
+Reproceso masivo de los certificados PDF ya descargados.
+
+Cuando cambian las reglas de extracción hay que volver a leer todos los
+certificados archivados (`data/pdfs/session__*`). Este comando:
+
+    - Recorre el árbol de carpetas de forma perezosa (`os.scandir`), sin armar
+      primero la lista completa de archivos.
+    - Parsea los PDFs con `gestionar_pdf` en un pool de procesos con un proceso
+      por núcleo, manteniendo en vuelo solo unos pocos PDFs por proceso.
+    - Guarda los resultados en SQLite por lotes (una transacción cada
+      `tamano_lote` PDFs, tabla `reproceso_pdf`).
+    - Se puede reanudar: los PDFs ya guardados en la misma corrida se omiten. Si
+      se interrumpe con Ctrl+C, el lote pendiente se guarda antes de salir.
+    - Informa PDFs por segundo, fallidos e incompletos (algún campo sin validar).
+
+Uso:
+    python -m src.reprocesar_pdfs data/pdfs --corrida reglas_v2
+    python -m src.reprocesar_pdfs data/pdfs --corrida reglas_v2              # reanuda la misma corrida
+    python -m src.reprocesar_pdfs data/pdfs --corrida reglas_v2 --reiniciar  # la empieza de cero
+
+Fecha: 2026-10-16
+"""
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import redirect_stdout
+from src.utils import DIR_DATA
+from src.storage import guardar_lote_reproceso, rutas_reprocesadas, borrar_corrida_reproceso
+import argparse
+import io
+import os
+import sys
+import time
+
+# Carpeta de certificados archivados y base de resultados por defecto
+DIR_PDFS = os.path.join(DIR_DATA, "pdfs")
+RUTA_DB_REPROCESO = os.path.join(DIR_DATA, "results", "reproceso.db")
+
+# Fallidos que se listan al final (el resto solo se cuenta)
+MAX_FALLIDOS_LISTADOS = 20
+
+
+def iterar_pdfs(directorio):
+    """
+    Recorre `directorio` y sus subcarpetas entregando las rutas de los PDFs a medida que se encuentran.
+
+    Las entradas de cada carpeta se visitan en orden alfabético, para que una
+    corrida reanudada recorra los archivos en el mismo orden.
+
+    Yields:
+        str: Ruta de cada archivo `.pdf`.
+    """
+    pendientes = [directorio]
+    while pendientes:
+        carpeta = pendientes.pop()
+        try:
+            with os.scandir(carpeta) as entradas:
+                entradas = sorted(entradas, key=lambda entrada: entrada.name)
+        except OSError as ex:
+            print(f"⚠️ No se pudo leer la carpeta {carpeta}: {ex}", file=sys.stderr)
+            continue
+        subcarpetas = []
+        for entrada in entradas:
+            if entrada.is_dir(follow_symlinks=False):
+                subcarpetas.append(entrada.path)
+            elif entrada.is_file() and entrada.name.lower().endswith(".pdf"):
+                yield entrada.path
+        pendientes.extend(reversed(subcarpetas))
+
+
+def _procesar_pdf(ruta_pdf, backend, cache):
+    """
+    Parsea un PDF (se ejecuta en los procesos del pool) sin imprimir el detalle de cada archivo.
+    """
+    from src.pdf_parser import gestionar_pdf
+    try:
+        with redirect_stdout(io.StringIO()):
+            return gestionar_pdf(ruta_pdf, backend=backend, cache=cache)
+    except Exception as ex:
+        return {"error": str(ex)}
+
+
+def reprocesar(directorio, db_path=None, corrida="reproceso", workers=None, tamano_lote=200, backend=None,
+               reintentar_fallidos=False, reiniciar=False, cache=False):
+    """
+    Vuelve a extraer la información de todos los PDFs de `directorio` y la guarda por lotes.
+
+    Args:
+        directorio (str): Carpeta raíz con los PDFs (se recorre recursivamente).
+        db_path (str, optional): Base SQLite de resultados. Por defecto `RUTA_DB_REPROCESO`.
+        corrida (str, optional): Nombre de la corrida; permite reanudarla y separar
+            los resultados de distintas reglas de extracción.
+        workers (int, optional): Procesos del pool. Por defecto, uno por núcleo.
+        tamano_lote (int, optional): PDFs por transacción de escritura.
+        backend (str, optional): Backend de extracción de `pdf_parser`.
+        reintentar_fallidos (bool, optional): Al reanudar, vuelve a procesar los PDFs
+            que terminaron con error.
+        reiniciar (bool, optional): Borra los resultados previos de la corrida.
+        cache (bool, optional): Usa la caché de certificados parseados (`cache_pdf`);
+            con el mismo backend y la misma `VERSION_PARSER`, un PDF ya parseado no se
+            vuelve a abrir. Desactivada por defecto: un reproceso suele buscar justamente
+            volver a leer los PDFs.
+
+    Returns:
+        dict: Resumen con `procesados`, `fallidos`, `incompletos`, `omitidos`,
+            `segundos`, `pdfs_por_segundo` y la lista `errores` (ruta y error).
+    """
+    db_path = db_path or RUTA_DB_REPROCESO
+    workers = workers or os.cpu_count() or 1
+    if reiniciar:
+        borrar_corrida_reproceso(db_path, corrida)
+    hechos = rutas_reprocesadas(db_path, corrida, incluir_fallidas=not reintentar_fallidos)
+
+    resumen = {"procesados": 0, "fallidos": 0, "incompletos": 0, "omitidos": 0, "errores": []}
+    lote = []
+
+    def guardar_lote():
+        if lote:
+            guardado = guardar_lote_reproceso(db_path, corrida, lote)
+            if isinstance(guardado, dict):
+                raise RuntimeError(f"No se pudo guardar el lote de resultados: {guardado['error']}")
+            lote.clear()
+
+    rutas = iterar_pdfs(directorio)
+    en_vuelo = {}
+    inicio = time.perf_counter()
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        while True:
+            while len(en_vuelo) < 4 * workers:
+                ruta_pdf = next(rutas, None)
+                if ruta_pdf is None:
+                    break
+                if ruta_pdf in hechos:
+                    resumen["omitidos"] += 1
+                    continue
+                en_vuelo[executor.submit(_procesar_pdf, ruta_pdf, backend, cache)] = ruta_pdf
+            if not en_vuelo:
+                break
+            terminados, _ = wait(en_vuelo, return_when=FIRST_COMPLETED)
+            for futuro in terminados:
+                ruta_pdf = en_vuelo.pop(futuro)
+                try:
+                    informacion = futuro.result()
+                except Exception as ex:
+                    informacion = {"error": str(ex)}
+                resumen["procesados"] += 1
+                if "error" in informacion:
+                    resumen["fallidos"] += 1
+                    resumen["errores"].append({"ruta": ruta_pdf, "error": informacion["error"]})
+                elif any(estado != "ok" for estado in (informacion.get("validacion") or {}).values()):
+                    resumen["incompletos"] += 1
+                lote.append((ruta_pdf, informacion))
+            if len(lote) >= tamano_lote:
+                guardar_lote()
+    except KeyboardInterrupt:
+        print("⏹️ Reproceso interrumpido: se guarda lo terminado y se puede reanudar con la misma corrida.", file=sys.stderr)
+        resumen["interrumpido"] = True
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        guardar_lote()
+
+    resumen["segundos"] = round(time.perf_counter() - inicio, 2)
+    resumen["pdfs_por_segundo"] = round(resumen["procesados"] / resumen["segundos"], 2) if resumen["segundos"] else 0.0
+    return resumen
+
+
+def main(argv=None):
+    """
+    Punto de entrada de línea de comandos del reproceso masivo.
+
+    Returns:
+        int: 0 si todos los PDFs se procesaron sin error, 1 en caso contrario.
+    """
+    parser = argparse.ArgumentParser(description="Reprocesa en paralelo los certificados PDF archivados.")
+    parser.add_argument("directorio", nargs="?", default=DIR_PDFS, help="Carpeta raíz de los PDFs (por defecto data/pdfs).")
+    parser.add_argument("--db", default=RUTA_DB_REPROCESO, help="Base SQLite de resultados.")
+    parser.add_argument("--corrida", default="reproceso", help="Nombre de la corrida (para reanudarla).")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos del pool (por defecto, uno por núcleo).")
+    parser.add_argument("--tamano-lote", type=int, default=200, help="PDFs guardados por transacción.")
+    parser.add_argument("--backend", default=None, help="Backend de extracción (pdfium, pdfminer, pdfplumber).")
+    parser.add_argument("--reintentar-fallidos", action="store_true", help="Volver a procesar los PDFs que fallaron.")
+    parser.add_argument("--reiniciar", action="store_true", help="Borrar los resultados previos de la corrida.")
+    parser.add_argument("--cache", action="store_true",
+                        help="Reutilizar los resultados de la caché de certificados (mismo backend y VERSION_PARSER).")
+    args = parser.parse_args(argv)
+
+    print(f"🔄 Reprocesando PDFs de {args.directorio} (corrida '{args.corrida}')...", file=sys.stderr)
+    resumen = reprocesar(args.directorio, db_path=args.db, corrida=args.corrida, workers=args.workers,
+                         tamano_lote=args.tamano_lote, backend=args.backend,
+                         reintentar_fallidos=args.reintentar_fallidos, reiniciar=args.reiniciar, cache=args.cache)
+
+    for error in resumen["errores"][:MAX_FALLIDOS_LISTADOS]:
+        print(f"⚠️ {error['ruta']}: {error['error']}", file=sys.stderr)
+    if len(resumen["errores"]) > MAX_FALLIDOS_LISTADOS:
+        print(f"⚠️ ... y {len(resumen['errores']) - MAX_FALLIDOS_LISTADOS} fallidos más.", file=sys.stderr)
+    print(f"📊 {resumen['procesados']} PDFs en {resumen['segundos']} segundos ({resumen['pdfs_por_segundo']} PDFs/s): "
+          f"{resumen['fallidos']} fallidos, {resumen['incompletos']} incompletos, {resumen['omitidos']} omitidos "
+          f"(ya procesados). Resultados en {args.db}", file=sys.stderr)
+    return 0 if not resumen["fallidos"] and not resumen.get("interrumpido") else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,27 +5,240 @@ Este archivo contiene la lógica principal del scraping:
 - Accede a la página oficial de consulta.
 - Llena los campos del formulario (cédula, fecha de expedición, captcha).
 - Intenta resolver el captcha automáticamente (usando OCR).
-- Si falla, solicita el ingreso manual del código.
-- Descarga y gestiona el PDF resultante.
+- Si falla, solicita el ingreso manual del código (por consola o en la cola
+  de captchas manuales con su página web local).
+- Descarga y gestiona el PDF resultante (desde disco o capturado en memoria).
 - Guarda la información extraída en la base de datos y archivos estructurados.
 
 Fecha: 2025-11-02
 """
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, TimeoutException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import Select
 from selenium.webdriver.support.wait import WebDriverWait
-from src.storage import guardar_informacion_extraida
-from src.configuration import abrir_enlace, esperar_obtener_documento, cerrar_driver
+from src.storage import guardar_informacion_extraida, guardar_pdf, error_de_resultado
+from src.configuration import abrir_enlace, esperar_obtener_documento, cerrar_driver, crear_driver, contar_viajes, obtener_ruta_descarga
 from selenium.webdriver.support import expected_conditions as EC
-from src.orc import resolver_captcha
+from src.orc import resolver_captcha, recargar_captcha, obtener_bytes_captcha, bytes_a_gris, leer_texto_captcha
+from src.cache_captcha import obtener_cache_captcha
 from src import utils
 from src.pdf_parser import gestionar_pdf
+from concurrent.futures import ThreadPoolExecutor
+import base64
+import io
+import os
+import threading
 import time
 
+# Script que completa el formulario en un solo viaje: escribe la cédula, elige
+# día/mes/año y dispara los eventos `input`/`change` que espera ASP.NET.
+# Devuelve los IDs de los campos u opciones que no encontró.
+SCRIPT_LLENAR_FORMULARIO = """
+const [idCedula, cedula, selects] = arguments;
+const faltantes = [];
+const disparar = (el, tipos) => tipos.forEach(t => el.dispatchEvent(new Event(t, {bubbles: true})));
+const campo = document.getElementById(idCedula);
+if (campo) {
+    campo.value = cedula;
+    disparar(campo, ['input', 'change']);
+} else {
+    faltantes.push(idCedula);
+}
+for (const [id, valor, porTexto] of selects) {
+    const select = document.getElementById(id);
+    const opcion = select && Array.from(select.options).find(o => porTexto ? o.text.trim() === valor : o.value === valor);
+    if (!opcion) { faltantes.push(id); continue; }
+    select.value = opcion.value;
+    disparar(select, ['change']);
+}
+return faltantes;
+"""
+
+# Plazos (segundos) de cada espera del envío del captcha
+PLAZO_RESULTADO_CAPTCHA = 10     # Alerta, botón "Generar Certificado" o captcha nuevo tras "Continuar"
+PLAZO_RECARGA_CAPTCHA = 5        # Imagen nueva tras pulsar "Change the code"
+PLAZO_GENERAR_CERTIFICADO = 60   # Botón "Generar Certificado" antes de descargar
+PLAZO_CONFIRMAR_CAPTCHA = 5      # Botón "Generar Certificado" cuando el envío del captcha no tuvo desenlace
+
+# Script que envía el formulario con el botón "Generar Certificado" mediante
+# fetch() dentro de la página (misma sesión y cookies) y devuelve el PDF en base64
+SCRIPT_CAPTURAR_PDF = """
+const listo = arguments[arguments.length - 1];
+const boton = document.evaluate(arguments[0], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+if (!boton) { listo({error: 'No se encontró el botón de generar certificado'}); return; }
+const form = boton.form;
+let datos;
+try { datos = new FormData(form, boton); } catch (e) { datos = new FormData(form); datos.append(boton.name, boton.value); }
+fetch(form.action || location.href, {method: 'POST', body: new URLSearchParams(datos), credentials: 'same-origin'})
+    .then(r => r.arrayBuffer().then(buffer => ({tipo: r.headers.get('content-type') || '', buffer})))
+    .then(({tipo, buffer}) => {
+        const bytes = new Uint8Array(buffer);
+        let binario = '';
+        for (let i = 0; i < bytes.length; i += 0x8000) {
+            binario += String.fromCharCode.apply(null, bytes.subarray(i, i + 0x8000));
+        }
+        listo({tipo: tipo, datos: btoa(binario)});
+    })
+    .catch(e => listo({error: String(e)}));
+"""
+
+
+def capturar_pdf_en_memoria(driver, plazo=40):
+    """
+    Obtiene los bytes del certificado PDF sin pasar por la carpeta de descargas.
+
+    En lugar de hacer clic en "Generar Certificado" y esperar a que Chrome escriba
+    el archivo, envía el mismo formulario (con `__VIEWSTATE`, `__EVENTVALIDATION`
+    y las cookies de la sesión) desde la propia página y recibe la respuesta
+    completa en memoria.
+
+    Args:
+        driver (webdriver): Navegador con la página lista para generar el certificado.
+        plazo (float, optional): Segundos máximos de espera de la respuesta.
+
+    Returns:
+        bytes | None: Contenido del PDF, o `None` si la respuesta no es un PDF.
+    """
+    driver.set_script_timeout(plazo)
+    respuesta = driver.execute_async_script(SCRIPT_CAPTURAR_PDF, utils.xpath_boton_generar_certificado)
+    if not respuesta or respuesta.get("error"):
+        print(f"⚠️ No se pudo capturar el PDF en memoria: {respuesta and respuesta.get('error')}")
+        return None
+
+    pdf_bytes = base64.b64decode(respuesta["datos"])
+    if not pdf_bytes.startswith(b"%PDF"):
+        print(f"⚠️ La respuesta no es un PDF (content-type: {respuesta.get('tipo')}).")
+        return None
+    print(f"Documento capturado en memoria ({len(pdf_bytes)} bytes).")
+    return pdf_bytes
+
+
+
+
+def _src_captcha(driver):
+    try:
+        return driver.find_element(By.ID, utils.id_campo_captcha).get_attribute("src")
+    except (NoSuchElementException, StaleElementReferenceException):
+        return None
+
+
+def llenar_formulario(driver, numero_cedula, dia_expedicion_cedula, mes_expedicion_cedula, year_expedicion_cedula):
+    """
+    Completa cédula y fecha de expedición con un único `execute_script`.
+
+    Equivale a `clear`/`send_keys` de la cédula y a los tres `Select(...)`, que
+    suman más de una docena de viajes al WebDriver.
+
+    Returns:
+        list[str]: IDs de los campos u opciones que no se encontraron (vacía si todo se llenó).
+    """
+    return driver.execute_script(SCRIPT_LLENAR_FORMULARIO, utils.id_campo_cedula, numero_cedula, [
+        [utils.id_select_campo_dia, dia_expedicion_cedula, False],
+        [utils.id_select_campo_mes, mes_expedicion_cedula.capitalize(), True],
+        [utils.id_select_campo_year, year_expedicion_cedula, False],
+    ]) or []
+
+
+def llenar_formulario_y_leer_captcha(driver, datos, cache=None, servicio=None):
+    """
+    Llena el formulario mientras el OCR lee el captcha ya descargado.
+
+    Se obtienen primero los bytes de la imagen (un viaje); el OCR arranca en otro
+    hilo (o en el servicio compartido) y, en paralelo, el formulario se llena con
+    `llenar_formulario`. El OCR no usa el driver, así que no compite con él.
+
+    Args:
+        driver (webdriver): Navegador con el formulario cargado.
+        datos (tuple): `(numero_cedula, dia, mes, year)`.
+        cache (CacheCaptcha, optional): Caché de captchas aceptados.
+        servicio (ServicioOCR, optional): Servicio de OCR compartido.
+
+    Returns:
+        str | None: Texto del captcha si se leyó con confianza, o None.
+    """
+    captcha_bytes, origen = obtener_bytes_captcha(driver)
+    gris = bytes_a_gris(captcha_bytes)
+    texto = cache.buscar(gris) if cache is not None else None
+    if texto:
+        print(f"♻️ Captcha encontrado en la caché: '{texto}'")
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        lectura = None if texto else executor.submit(servicio.resolver if servicio is not None else leer_texto_captcha, gris)
+        faltantes = llenar_formulario(driver, *datos)
+        texto = texto or lectura.result()
+    if faltantes:
+        raise ValueError(f"No se pudo completar el formulario: {', '.join(faltantes)}")
+    return texto
 
 
+def esperar_resultado_captcha(driver, src_previo, plazo=PLAZO_RESULTADO_CAPTCHA):
+    """
+    Espera el primer desenlace tras enviar el captcha con "Continuar".
 
-def consultar_certificado_cedula(driver,numero_cedula,dia_expedicion_cedula,mes_expedicion_cedula,year_expedicion_cedula):
+    Revisa cada 100 ms, en este orden:
+        - "alerta":     el sitio mostró un `alert` (captcha incorrecto). La alerta
+                        se acepta y su texto se devuelve en `mensaje`.
+        - "aceptado":   el botón "Generar Certificado" está visible.
+        - "recargado":  la imagen del captcha cambió sin alerta (el sitio pidió
+                        otro código).
+
+    Args:
+        driver (webdriver): Navegador en el que se pulsó "Continuar".
+        src_previo (str | None): `src` de la imagen del captcha antes de enviar.
+        plazo (float, optional): Segundos máximos de espera.
+
+    Returns:
+        dict: `{"resultado": str, "mensaje": str | None, "latencia": float}`; el
+        resultado es "tiempo_agotado" si no ocurre nada dentro del plazo.
+    """
+    def desenlace(d):
+        alerta = EC.alert_is_present()(d)
+        if alerta:
+            return "alerta", alerta
+        if any(boton.is_displayed() for boton in d.find_elements(By.XPATH, utils.xpath_boton_generar_certificado)):
+            return "aceptado", None
+        src_actual = _src_captcha(d)
+        if src_actual and src_previo and src_actual != src_previo:
+            return "recargado", None
+        return False
+
+    inicio = time.perf_counter()
+    try:
+        resultado, alerta = WebDriverWait(driver, plazo, poll_frequency=0.1,
+                                          ignored_exceptions=(NoSuchElementException, StaleElementReferenceException)).until(desenlace)
+    except TimeoutException:
+        resultado, alerta = "tiempo_agotado", None
+    mensaje = None
+    if alerta is not None:
+        mensaje = alerta.text.strip()
+        alerta.accept()
+    latencia = round(time.perf_counter() - inicio, 3)
+    print(f"⏱️ Resultado del captcha: {resultado} ({latencia}s)")
+    return {"resultado": resultado, "mensaje": mensaje, "latencia": latencia}
+
+
+def enviar_captcha(driver, captcha_text, plazo=PLAZO_RESULTADO_CAPTCHA):
+    """
+    Escribe el código del captcha, pulsa "Continuar" y espera el desenlace.
+
+    Returns:
+        dict: Resultado de `esperar_resultado_captcha`.
+    """
+    src_previo = _src_captcha(driver)
+    cod_imagen = driver.find_element(By.ID, utils.id_campo_codigo)
+    cod_imagen.clear()
+    cod_imagen.send_keys(captcha_text)
+    driver.find_element(By.XPATH, utils.xpath_boton_continuar).click()
+    return esperar_resultado_captcha(driver, src_previo, plazo)
+
+
+def _registrar_espera(esperas, nombre, resultado, inicio):
+    """
+    Agrega a `esperas` la duración de una espera que empezó en `inicio` (`time.perf_counter()`).
+    """
+    esperas.append({"espera": nombre, "resultado": resultado, "segundos": round(time.perf_counter() - inicio, 3)})
+
+
+def consultar_certificado_cedula(driver,numero_cedula,dia_expedicion_cedula,mes_expedicion_cedula,year_expedicion_cedula,pool=None,pdf_en_memoria=False,archivar_pdf=True,cache_captcha=True,servicio_ocr=None,cola_manual=None,formulario_rapido=False):
     """
     Ejecuta el proceso completo de scraping en la página de consulta de certificados de cédula.
 
@@ -33,7 +246,8 @@ def consultar_certificado_cedula(driver,numero_cedula,dia_expedicion_cedula,mes_
         1. Abre la página de consulta usando Selenium.
         2. Completa los campos del formulario (número de cédula y fecha de expedición).
         3. Intenta resolver el captcha automáticamente (máx. 2 intentos).
-        4. Si no logra resolverlo, solicita ingreso manual del captcha.
+        4. Si no logra resolverlo, solicita ingreso manual del captcha (por consola,
+           o en `cola_manual` con un plazo si se indica).
         5. Descarga el certificado PDF.
         6. Procesa el PDF y guarda la información extraída.
 
@@ -43,16 +257,55 @@ def consultar_certificado_cedula(driver,numero_cedula,dia_expedicion_cedula,mes_
         dia_expedicion_cedula (str): Día de expedición de la cédula (dos dígitos).
         mes_expedicion_cedula (str): Nombre del mes de expedición (en minúsculas, español).
         year_expedicion_cedula (str): Año de expedición de la cédula (cuatro dígitos).
+        pool (PoolDrivers, optional): Pool de navegadores. Si se indica, el driver se
+            toma prestado del pool (el argumento `driver` puede ser None) y se devuelve
+            al terminar en lugar de cerrarse.
+        pdf_en_memoria (bool, optional): Si es True, el PDF se captura en memoria y se
+            entrega al parser como `BytesIO`, sin esperar la descarga en disco.
+        archivar_pdf (bool, optional): En modo `pdf_en_memoria`, indica si además se
+            guarda una copia del PDF en la carpeta de descargas. Por defecto True.
+        cache_captcha (bool | CacheCaptcha, optional): Caché de captchas aceptados.
+            True usa la caché compartida (`obtener_cache_captcha`); False la desactiva.
+        servicio_ocr (ServicioOCR, optional): Servicio de OCR compartido entre
+            trabajadores. Si no se indica, el OCR se ejecuta en este hilo.
+        cola_manual (ColaCaptchaManual, optional): Cola de captchas manuales. Si se
+            indica, el captcha no resuelto se encola en lugar de llamar a `input()` y,
+            si nadie responde antes del plazo, se libera la sesión. Si la cola no tiene
+            turno de espera libre (`max_esperas`), la sesión se libera sin esperar.
+        formulario_rapido (bool, optional): Llena el formulario con un único
+            `execute_script` mientras el OCR lee el primer captcha en paralelo.
 
     Returns:
-        dict | None: Diccionario con rutas de almacenamiento si el proceso fue exitoso.
+        dict: Diccionario con rutas de almacenamiento si el proceso fue exitoso.
             Ejemplo:
             {
                 "db": "ruta/a/identifier.sqlite",
                 "json": "ruta/a/resultado.json"
             }
-            Retorna None si ocurre algún error o si el captcha no se resuelve correctamente.
+            Retorna `{"error": ...}` si ocurre algún error o si el captcha no se resuelve correctamente,
+            y `{"reencolar": True, "motivo": ...}` si la respuesta manual no llegó a tiempo,
+            fue incorrecta o no había turno de espera manual.
+            Los diccionarios incluyen además `esperas` (lista con `espera`, `resultado` y
+            `segundos` de cada espera: resultado del captcha, recargas, respuesta manual,
+            botón "Generar Certificado" y PDF) y `viajes` (comandos enviados al WebDriver).
     """
+    if pool is not None:
+        driver = pool.adquirir()
+    elif driver is None:
+        driver = crear_driver(descargas=not pdf_en_memoria or archivar_pdf)
+    error_grave = False
+    viajes = contar_viajes(driver)
+    esperas = []
+
+    def fallo(error):
+        # Las consultas fallidas también devuelven sus esperas y viajes para diagnosticarlas
+        return {"error": error, "esperas": esperas, "viajes": sum(viajes.values())}
+
+    def recargar():
+        inicio = time.perf_counter()
+        recargado = recargar_captcha(driver, plazo=PLAZO_RECARGA_CAPTCHA)
+        _registrar_espera(esperas, "recarga_captcha", "recargado" if recargado else "tiempo_agotado", inicio)
+
     try:
         # --- Abrir página y preparar espera explícita ---
         abrir_enlace(driver)
@@ -60,91 +313,152 @@ def consultar_certificado_cedula(driver,numero_cedula,dia_expedicion_cedula,mes_
 
         # Esperar que el campo del captcha sea visible
         captcha=wait.until(EC.visibility_of_element_located((By.ID,utils.id_campo_captcha)))
-        driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth',block: 'center'});", captcha)
+        cache = obtener_cache_captcha() if cache_captcha is True else (cache_captcha or None)
+        captcha_leido = None
 
-        # --- Completar formulario de datos personales ---
-        cedula=driver.find_element(By.ID,utils.id_campo_cedula)
-        cedula.clear()
-        cedula.send_keys(numero_cedula)
+        if formulario_rapido:
+            # --- Formulario en un solo viaje, con el OCR del primer captcha en paralelo ---
+            captcha_leido = llenar_formulario_y_leer_captcha(
+                driver, (numero_cedula, dia_expedicion_cedula, mes_expedicion_cedula, year_expedicion_cedula), cache, servicio_ocr)
+            if not captcha_leido:
+                print("Captcha no confiable, recargando imagen...")
+                recargar()
+        else:
+            driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth',block: 'center'});", captcha)
 
-        Select(driver.find_element(By.ID,utils.id_select_campo_dia)).select_by_value(dia_expedicion_cedula)
-        Select(driver.find_element(By.ID, utils.id_select_campo_mes)).select_by_visible_text(mes_expedicion_cedula.capitalize())
-        Select(driver.find_element(By.ID, utils.id_select_campo_year)).select_by_value(year_expedicion_cedula)
+            # --- Completar formulario de datos personales ---
+            cedula=driver.find_element(By.ID,utils.id_campo_cedula)
+            cedula.clear()
+            cedula.send_keys(numero_cedula)
+
+            Select(driver.find_element(By.ID,utils.id_select_campo_dia)).select_by_value(dia_expedicion_cedula)
+            Select(driver.find_element(By.ID, utils.id_select_campo_mes)).select_by_visible_text(mes_expedicion_cedula.capitalize())
+            Select(driver.find_element(By.ID, utils.id_select_campo_year)).select_by_value(year_expedicion_cedula)
 
         # ---------------------------------------------------------------------
         # Intentar resolver captcha automáticamente (máximo 2 intentos)
         # ---------------------------------------------------------------------
         captcha_correcto = False
+        plazo_boton = PLAZO_GENERAR_CERTIFICADO
         for intento in range(1, 3):
             print(f"\n🧠 Intentando resolver captcha automáticamente (intento {intento}/2)...")
 
-            captcha_text = resolver_captcha(driver)
+            captcha_text, captcha_leido = captcha_leido, None
+            captcha_text = captcha_text or resolver_captcha(driver, max_intentos=3, cache=cache, servicio=servicio_ocr)
             if not captcha_text:
                 print("⚠️ No se pudo obtener texto del captcha. Reintentando...")
                 continue
 
-            # Ingresar el texto del captcha detectado
-            cod_imagen = driver.find_element(By.ID, utils.id_campo_codigo)
-            cod_imagen.clear()
-            cod_imagen.send_keys(captcha_text)
-            driver.find_element(By.XPATH, utils.xpath_boton_continuar).click()
-            time.sleep(2)
-
-            # Verificar si apareció una alerta indicando error en captcha
-            try:
-                alert = driver.switch_to.alert
-                mensaje = alert.text.strip()
-                alert.accept()
-                print(f"❌ Captcha incorrecto: {mensaje}")
-
-                # Intentar refrescar el captcha
-                try:
-                    driver.find_element(By.XPATH, utils.xpath_boton_recargar_captcha).click()
-                    time.sleep(2)
-                except:
-                    print("⚠️ No se pudo refrescar el captcha automáticamente.")
-                continue
-            except:
+            # Ingresar el texto del captcha detectado y esperar el primer desenlace
+            espera = enviar_captcha(driver, captcha_text)
+            esperas.append({"espera": "resultado_captcha", "resultado": espera["resultado"], "segundos": espera["latencia"]})
+            if espera["resultado"] == "aceptado":
+                captcha_correcto = True
+                if cache is not None:
+                    cache.confirmar(captcha_text)
+                break
+            if espera["resultado"] == "tiempo_agotado":
+                # Sin alerta ni captcha nuevo en el plazo: solo una espera corta más por el botón
                 captcha_correcto = True
+                plazo_boton = PLAZO_CONFIRMAR_CAPTCHA
                 break
 
+            if cache is not None:
+                cache.rechazar()
+            if espera["resultado"] == "alerta":
+                print(f"❌ Captcha incorrecto: {espera['mensaje']}")
+                # La imagen no cambia sola tras la alerta: pedir otra y esperar solo hasta que cargue
+                recargar()
+            else:
+                print("❌ Captcha incorrecto: el sitio mostró un código nuevo.")
+
 
         # ---------------------------------------------------------------------
         # Si no se logra resolver automáticamente, permitir ingreso manual
         # ---------------------------------------------------------------------
         if not captcha_correcto:
             print("\n🚫 No se logró resolver el captcha automáticamente.")
-            captcha_text = input("👉 Ingresa manualmente el captcha que ves en pantalla: ")
-
-            cod_imagen = driver.find_element(By.ID, utils.id_campo_codigo)
-            cod_imagen.clear()
-            cod_imagen.send_keys(captcha_text)
-            driver.find_element(By.XPATH, utils.xpath_boton_continuar).click()
-            time.sleep(2)
+            if cola_manual is not None:
+                # Cada espera retiene este trabajador y su navegador: sin turno libre, liberar la sesión
+                if not cola_manual.tomar_turno():
+                    print("⌛ Todos los turnos de respuesta manual están ocupados; se libera la sesión.")
+                    return {"reencolar": True, "motivo": "cola_manual_llena", "esperas": esperas, "viajes": sum(viajes.values())}
+                try:
+                    captcha_bytes, _ = obtener_bytes_captcha(driver)
+                    id_captcha = cola_manual.encolar(captcha_bytes, {"cedula": numero_cedula, "trabajador": threading.current_thread().name})
+                    print(f"✍️ Captcha {id_captcha} en espera de respuesta manual...")
+                    inicio_manual = time.perf_counter()
+                    captcha_text = cola_manual.esperar_respuesta(id_captcha)
+                finally:
+                    cola_manual.liberar_turno()
+                _registrar_espera(esperas, "respuesta_manual", "respondido" if captcha_text else "tiempo_agotado", inicio_manual)
+                if not captcha_text:
+                    print(f"⌛ Sin respuesta manual para el captcha {id_captcha}; se libera la sesión.")
+                    return {"reencolar": True, "motivo": "captcha_manual_vencido", "esperas": esperas, "viajes": sum(viajes.values())}
+            else:
+                captcha_text = input("👉 Ingresa manualmente el captcha que ves en pantalla: ")
+            espera = enviar_captcha(driver, captcha_text)
+            esperas.append({"espera": "resultado_captcha", "resultado": espera["resultado"], "segundos": espera["latencia"]})
+            if espera["resultado"] in ("alerta", "recargado"):
+                # Respuesta manual incorrecta: no esperar el botón, liberar la sesión y reencolar
+                print(f"❌ Captcha manual incorrecto: {espera['mensaje'] or 'el sitio mostró un código nuevo.'}")
+                return {"reencolar": True, "motivo": "captcha_manual_incorrecto", "esperas": esperas, "viajes": sum(viajes.values())}
+            if espera["resultado"] == "tiempo_agotado":
+                plazo_boton = PLAZO_CONFIRMAR_CAPTCHA
 
         # ---------------------------------------------------------------------
         # Esperar que aparezca el botón para generar certificado
         # ---------------------------------------------------------------------
+        inicio_espera = time.perf_counter()
         try:
-            wait.until(EC.visibility_of_element_located((By.XPATH, utils.xpath_boton_generar_certificado)))
-            print("✅ Captcha validado correctamente. Procediendo a generar certificado...")
-        except:
+            WebDriverWait(driver, plazo_boton, poll_frequency=0.1).until(
+                EC.visibility_of_element_located((By.XPATH, utils.xpath_boton_generar_certificado)))
+            _registrar_espera(esperas, "boton_generar", "visible", inicio_espera)
+            print(f"✅ Captcha validado correctamente ({esperas[-1]['segundos']:.3f}s). Procediendo a generar certificado...")
+        except Exception:
+            _registrar_espera(esperas, "boton_generar", "tiempo_agotado", inicio_espera)
             print("⚠️ No se detectó el botón 'Generar certificado'. Puede que el captcha haya fallado.")
-            return None
+            return fallo("No se detectó el botón 'Generar certificado'")
 
         # ---------------------------------------------------------------------
         # Descargar y procesar el certificado PDF
         # ---------------------------------------------------------------------
-        driver.find_element(By.XPATH,utils.xpath_boton_generar_certificado).click()
-        result = guardar_informacion_extraida(gestionar_pdf(esperar_obtener_documento(driver.download_dir)))
-        if not result:
+        inicio_pdf = time.perf_counter()
+        if pdf_en_memoria:
+            pdf_bytes = capturar_pdf_en_memoria(driver)
+            _registrar_espera(esperas, "pdf", "capturado" if pdf_bytes else "fallido", inicio_pdf)
+            if not pdf_bytes:
+                return fallo("No se pudo capturar el PDF en memoria")
+            if archivar_pdf:
+                guardar_pdf(pdf_bytes, driver.download_dir or obtener_ruta_descarga(), numero_cedula)
+            informacion = gestionar_pdf(io.BytesIO(pdf_bytes))
+        else:
+            previos = set(os.listdir(driver.download_dir))
+            driver.find_element(By.XPATH,utils.xpath_boton_generar_certificado).click()
+            documento = esperar_obtener_documento(driver.download_dir, ignorar=previos)
+            _registrar_espera(esperas, "pdf", "descargado" if documento else "tiempo_agotado", inicio_pdf)
+            if not documento:
+                return fallo("No se descargó el PDF a tiempo")
+            informacion = gestionar_pdf(documento)
+        # Un PDF que no se pudo parsear no se guarda como certificado
+        if error_de_resultado(informacion):
+            print(f"⚠️ No se pudo extraer la información del PDF: {error_de_resultado(informacion)}")
+            return fallo(error_de_resultado(informacion))
+        result = guardar_informacion_extraida(informacion)
+        if not result or error_de_resultado(result):
             print("⚠️ No se pudo gestionar correctamete la información del PDF.")
-            return None
-        return result
+            return fallo(error_de_resultado(result) or "No se pudo guardar la información del PDF")
+        return {**result, "esperas": esperas, "viajes": sum(viajes.values())}
 
 
     except Exception as ex:
+        error_grave = True
         print(f" Error durante el proceso de scraping del documento en la página: {ex}")
+        return fallo(str(ex))
     finally:
-        # Cerrar el navegador al finalizar el proceso
-        cerrar_driver(driver)
\ No newline at end of file
+        print(f"📡 Viajes al WebDriver en la consulta: {sum(viajes.values())}")
+        # Devolver el navegador al pool o cerrarlo al finalizar el proceso
+        if pool is not None:
+            pool.liberar(driver, descartar=error_grave)
+        else:
+            cerrar_driver(driver)
\ No newline at end of file
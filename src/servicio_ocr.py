@@ -0,0 +1,248 @@
+"""
+Servicio local de OCR del captcha compartido por todos los trabajadores.
+
+Con N hilos de consulta, cada uno ejecutando su propio OCR, el trabajo de CPU
+queda repartido entre hilos que compiten por el GIL. Este servicio centraliza
+la resolución:
+
+    - Los trabajadores envían la imagen (`enviar`) y esperan un `Future`.
+    - Un hilo colector junta en lotes las imágenes que llegan de todos los
+      trabajadores (hasta `tamano_lote`, esperando como máximo `espera_lote`).
+    - Cada lote se resuelve en un pool de procesos dimensionado al número de
+      núcleos, con la versión por lotes del resolvedor cuando existe
+      (`orc.RESOLVEDORES_LOTE`, p. ej. las plantillas clasifican todos los
+      caracteres del lote en una sola multiplicación de matrices).
+    - Mientras todos los procesos están ocupados, las imágenes se acumulan y el
+      siguiente lote sale más grande.
+
+Así la resolución del captcha escala con los núcleos y no con la cantidad de
+navegadores.
+
+El pool se crea con `utils.contexto_procesos()` (forkserver) y no por `fork`:
+los lotes se envían desde el hilo colector mientras corren los hilos de
+Selenium, y un `fork` en ese momento puede dejar al hijo bloqueado en un lock
+heredado. Los resolvedores registrados con `orc.registrar_resolvedor` se
+vuelven a registrar en cada proceso al arrancar; deben ser funciones de módulo
+(los que no se pueden enviar a otro proceso solo sirven con `procesos=False`).
+
+Ejemplo:
+    >>> with ServicioOCR(resolvedor="plantillas") as servicio:
+    ...     texto = servicio.resolver(gris)          # o servicio.enviar(gris).result()
+
+Fecha: 2026-10-16
+"""
+from concurrent.futures import Future, ProcessPoolExecutor
+from src import utils
+import os
+import pickle
+import queue
+import threading
+import time
+
+
+def _iniciar_proceso(resolvedores, resolvedores_lote):
+    """
+    Registra en un proceso del pool los resolvedores del proceso principal.
+    """
+    from src import orc
+    for nombre, funcion in resolvedores.items():
+        orc.registrar_resolvedor(nombre, funcion, lote=resolvedores_lote.get(nombre))
+
+
+def _resolvedores_enviables():
+    """
+    Devuelve los resolvedores registrados que se pueden enviar a los procesos del pool.
+    """
+    from src import orc
+    resolvedores, resolvedores_lote = {}, {}
+    for nombre, funcion in orc.RESOLVEDORES_CAPTCHA.items():
+        lote = orc.RESOLVEDORES_LOTE.get(nombre)
+        try:
+            pickle.dumps((funcion, lote))
+        except Exception:
+            print(f"⚠️ El resolvedor '{nombre}' no se puede enviar al pool de procesos; solo sirve con procesos=False.")
+            continue
+        resolvedores[nombre] = funcion
+        if lote is not None:
+            resolvedores_lote[nombre] = lote
+    return resolvedores, resolvedores_lote
+
+
+def _resolver_lote(imagenes, motor, resolvedor, umbral_confianza):
+    """
+    Resuelve un lote de captchas (se ejecuta en los procesos del pool).
+    """
+    from src import orc
+    return [orc.aceptar_resultado(resultado, umbral_confianza)
+            for resultado in orc.resolver_lote(imagenes, motor, resolvedor)]
+
+
+class ServicioOCR:
+    """
+    Cola de OCR con resolución por lotes en un pool de procesos, segura para uso entre hilos.
+    """
+
+    def __init__(self, workers=None, tamano_lote=16, espera_lote=0.01, motor=None, resolvedor=None,
+                 umbral_confianza=None, procesos=True):
+        """
+        Args:
+            workers (int, optional): Procesos del pool. Por defecto, uno por núcleo.
+            tamano_lote (int, optional): Máximo de imágenes por lote.
+            espera_lote (float, optional): Segundos que se espera a otras imágenes
+                antes de despachar un lote incompleto.
+            motor (str, optional): Motor de OCR del resolvedor "tesseract".
+            resolvedor (str, optional): Resolvedor de `orc`. Por defecto `orc.RESOLVEDOR_CAPTCHA`.
+            umbral_confianza (float, optional): Confianza mínima. Por defecto la de `orc.PARAMETROS_CAPTCHA`.
+            procesos (bool, optional): Si es False, los lotes se resuelven en el
+                propio hilo colector (sin pool de procesos).
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.tamano_lote = tamano_lote
+        self.espera_lote = espera_lote
+        self.motor = motor
+        self.resolvedor = resolvedor
+        self.umbral_confianza = umbral_confianza
+        self._cola = queue.Queue()
+        self._executor = None
+        if procesos:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=utils.contexto_procesos(),
+                                                 initializer=_iniciar_proceso, initargs=_resolvedores_enviables())
+        self._en_vuelo = threading.BoundedSemaphore(self.workers)
+        self._lock = threading.Lock()
+        self._metricas = {"imagenes": 0, "lotes": 0, "lote_maximo": 0, "tiempo_ocr_segundos": 0.0}
+        self._cerrado = False
+        self._colector = threading.Thread(target=self._recolectar, name="servicio-ocr", daemon=True)
+        self._colector.start()
+
+    # ------------------------------------------------------------------
+    # Envío de imágenes
+    # ------------------------------------------------------------------
+
+    def enviar(self, gris):
+        """
+        Encola un captcha para resolverlo en el siguiente lote.
+
+        Args:
+            gris (numpy.ndarray): Captcha en escala de grises.
+
+        Returns:
+            concurrent.futures.Future: Se completa con el texto del captcha o `None`.
+        """
+        if self._cerrado:
+            raise RuntimeError("El servicio de OCR está cerrado.")
+        futuro = Future()
+        self._cola.put((gris, futuro))
+        return futuro
+
+    def resolver(self, gris, timeout=60):
+        """
+        Resuelve un captcha y espera el resultado (misma salida que `orc.leer_texto_captcha`).
+        """
+        return self.enviar(gris).result(timeout=timeout)
+
+    def resolver_bytes(self, imagen_bytes, timeout=60):
+        """
+        Resuelve un captcha a partir de sus bytes (firma de `orc.leer_texto_captcha_bytes`).
+        """
+        from src.orc import bytes_a_gris
+        return self.resolver(bytes_a_gris(imagen_bytes), timeout)
+
+    # ------------------------------------------------------------------
+    # Formación y despacho de lotes
+    # ------------------------------------------------------------------
+
+    def _recolectar(self):
+        while True:
+            pedido = self._cola.get()
+            if pedido is None:
+                break
+            lote = [pedido]
+            limite = time.monotonic() + self.espera_lote
+            while len(lote) < self.tamano_lote:
+                try:
+                    pedido = self._cola.get(timeout=max(0.0, limite - time.monotonic()))
+                except queue.Empty:
+                    break
+                if pedido is None:
+                    self._cola.put(None)
+                    break
+                lote.append(pedido)
+            self._despachar(lote)
+
+    def _despachar(self, lote):
+        lote = [(gris, futuro) for gris, futuro in lote if futuro.set_running_or_notify_cancel()]
+        if not lote:
+            return
+        imagenes = [gris for gris, _ in lote]
+        futuros = [futuro for _, futuro in lote]
+        with self._lock:
+            self._metricas["imagenes"] += len(futuros)
+            self._metricas["lotes"] += 1
+            self._metricas["lote_maximo"] = max(self._metricas["lote_maximo"], len(futuros))
+
+        inicio = time.perf_counter()
+        if self._executor is None:
+            try:
+                self._entregar(futuros, _resolver_lote(imagenes, self.motor, self.resolvedor, self.umbral_confianza), inicio)
+            except Exception as ex:
+                self._entregar(futuros, ex, inicio)
+            return
+
+        # Con todos los procesos ocupados se bloquea aquí y las imágenes se acumulan en la cola
+        self._en_vuelo.acquire()
+        try:
+            tarea = self._executor.submit(_resolver_lote, imagenes, self.motor, self.resolvedor, self.umbral_confianza)
+        except Exception as ex:
+            self._en_vuelo.release()
+            self._entregar(futuros, ex, inicio)
+            return
+
+        def terminar(tarea):
+            self._en_vuelo.release()
+            self._entregar(futuros, tarea.exception() or tarea.result(), inicio)
+        tarea.add_done_callback(terminar)
+
+    def _entregar(self, futuros, resultados, inicio):
+        with self._lock:
+            self._metricas["tiempo_ocr_segundos"] += time.perf_counter() - inicio
+        if isinstance(resultados, BaseException):
+            print(f"⚠️ Error resolviendo un lote de {len(futuros)} captchas: {resultados}")
+            for futuro in futuros:
+                futuro.set_exception(resultados)
+            return
+        for futuro, resultado in zip(futuros, resultados):
+            futuro.set_result(resultado)
+
+    # ------------------------------------------------------------------
+    # Métricas y cierre
+    # ------------------------------------------------------------------
+
+    def metricas(self):
+        """
+        Returns:
+            dict: `imagenes` resueltas, `lotes`, `lote_medio`, `lote_maximo` y
+                `tiempo_ocr_segundos` acumulado.
+        """
+        with self._lock:
+            metricas = dict(self._metricas)
+        metricas["lote_medio"] = round(metricas["imagenes"] / metricas["lotes"], 2) if metricas["lotes"] else 0.0
+        metricas["tiempo_ocr_segundos"] = round(metricas["tiempo_ocr_segundos"], 3)
+        return metricas
+
+    def cerrar(self):
+        """
+        Deja de aceptar imágenes, resuelve las pendientes y detiene el pool.
+        """
+        if self._cerrado:
+            return
+        self._cerrado = True
+        self._cola.put(None)
+        self._colector.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
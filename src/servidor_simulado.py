@@ -0,0 +1,437 @@
+"""
+Servidor local que simula la página de consulta de la Registraduría.
+
+Permite probar y medir de extremo a extremo los motores Selenium, HTTP y
+asíncrono sin salir a la red. La página servida usa los mismos IDs y XPaths
+definidos en `src/utils.py` y reproduce el comportamiento del sitio:
+
+    - Formulario ASP.NET con `__VIEWSTATE`, `__EVENTVALIDATION` y cookie de sesión.
+    - Imagen de captcha generada con Pillow y respuesta conocida.
+    - Botón "Change the code" para recargar el captcha.
+    - `alert(...)` de JavaScript cuando el código es incorrecto.
+    - Página de confirmación con el botón "Generar Certificado".
+    - Certificado PDF generado con reportlab (`create_pdf`).
+
+La latencia, la tasa de errores y la dificultad del captcha son configurables.
+
+Uso:
+    python -m src.servidor_simulado --puerto 8080 --latencia-min 0.05 --latencia-max 0.3 --dificultad media
+    REGISTRADURIA_URL=http://127.0.0.1:8080/Datos.aspx python -m src.batch cedulas.csv --motor http
+
+Fecha: 2026-10-16
+"""
+from collections import OrderedDict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from http.cookies import SimpleCookie
+from urllib.parse import urlsplit, parse_qs
+from PIL import Image, ImageDraw, ImageFont
+from src.create_pdf import crear_pdf_certificado_bytes
+from src import utils
+import argparse
+import hashlib
+import html
+import io
+import random
+import secrets
+import threading
+import time
+
+# Alfabeto del captcha (el mismo de la lista blanca de Tesseract en `orc.py`)
+ALFABETO_CAPTCHA = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+
+# Niveles de dificultad del captcha generado
+NIVELES_DIFICULTAD = {
+    "facil": {"longitud": (5, 5), "lineas": 0, "puntos": 0, "rotacion": 0, "desplazamiento": 2},
+    "media": {"longitud": (4, 6), "lineas": 3, "puntos": 150, "rotacion": 12, "desplazamiento": 5},
+    "dificil": {"longitud": (5, 8), "lineas": 6, "puntos": 400, "rotacion": 25, "desplazamiento": 8},
+}
+
+# Tamaño de la imagen del captcha (ancho, alto)
+TAMANO_CAPTCHA = (200, 50)
+
+# Límite de sesiones guardadas y segundos sin uso tras los que una sesión se descarta
+MAX_SESIONES = 10000
+TTL_SESION = 600
+
+MENSAJE_CAPTCHA_INCORRECTO = "El código de la imagen no es correcto. Intente nuevamente."
+
+NOMBRES_SIMULADOS = ["NOMBRE PRUEBA TESTING", "MARIA FERNANDA GOMEZ", "JUAN CARLOS PEREZ", "LUISA TORRES DIAZ"]
+LUGARES_SIMULADOS = ["MOSQUERA - CUNDINAMARCA", "BOGOTÁ D.C. - BOGOTÁ", "MEDELLÍN - ANTIOQUIA", "CALI - VALLE"]
+
+_fuentes = {}
+
+def _fuente(tamano):
+    """
+    Carga (una vez por tamaño) una fuente TrueType; si no hay, usa la fuente por defecto de Pillow.
+    """
+    if tamano not in _fuentes:
+        try:
+            _fuentes[tamano] = ImageFont.truetype("DejaVuSans-Bold.ttf", tamano)
+        except OSError:
+            _fuentes[tamano] = ImageFont.load_default(size=tamano)
+    return _fuentes[tamano]
+
+def generar_imagen_captcha(texto=None, dificultad="media", rng=None):
+    """
+    Genera una imagen de captcha similar a la del sitio, con respuesta conocida.
+
+    Args:
+        texto (str, optional): Texto del captcha. Si no se indica, se genera al azar
+            con la longitud del nivel de dificultad.
+        dificultad (str | dict, optional): Nivel de `NIVELES_DIFICULTAD` o un dict
+            con las mismas claves.
+        rng (random.Random, optional): Generador aleatorio (para corpus reproducibles).
+
+    Returns:
+        tuple[str, bytes]: Texto del captcha y la imagen en formato PNG.
+    """
+    rng = rng or random
+    nivel = NIVELES_DIFICULTAD[dificultad] if isinstance(dificultad, str) else dificultad
+    if texto is None:
+        texto = "".join(rng.choice(ALFABETO_CAPTCHA) for _ in range(rng.randint(*nivel["longitud"])))
+
+    ancho, alto = TAMANO_CAPTCHA
+    imagen = Image.new("RGB", (ancho, alto), (rng.randint(225, 255), rng.randint(225, 255), rng.randint(225, 255)))
+    fuente = _fuente(30)
+    paso = (ancho - 20) / max(len(texto), 1)
+
+    for i, caracter in enumerate(texto):
+        glifo = Image.new("RGBA", (40, 46), (0, 0, 0, 0))
+        color = (rng.randint(0, 90), rng.randint(0, 90), rng.randint(0, 90), 255)
+        ImageDraw.Draw(glifo).text((6, 4), caracter, font=fuente, fill=color)
+        if nivel["rotacion"]:
+            glifo = glifo.rotate(rng.uniform(-nivel["rotacion"], nivel["rotacion"]), resample=Image.BICUBIC, expand=False)
+        x = int(10 + i * paso + rng.uniform(-nivel["desplazamiento"], nivel["desplazamiento"]) / 2)
+        y = int(2 + rng.uniform(-nivel["desplazamiento"], nivel["desplazamiento"]) / 2)
+        imagen.paste(glifo, (x, y), glifo)
+
+    dibujo = ImageDraw.Draw(imagen)
+    for _ in range(nivel["lineas"]):
+        puntos = [(rng.randint(0, ancho), rng.randint(0, alto)) for _ in range(2)]
+        dibujo.line(puntos, fill=(rng.randint(60, 160),) * 3, width=rng.randint(1, 2))
+    for _ in range(nivel["puntos"]):
+        dibujo.point((rng.randint(0, ancho - 1), rng.randint(0, alto - 1)), fill=(rng.randint(0, 200),) * 3)
+
+    buffer = io.BytesIO()
+    imagen.save(buffer, format="PNG")
+    return texto, buffer.getvalue()
+
+
+class SimuladorRegistraduria:
+    """
+    Estado y lógica de negocio del sitio simulado (independiente del servidor HTTP).
+    """
+
+    def __init__(self, latencia=(0.0, 0.0), tasa_error=0.0, dificultad="media", semilla=None,
+                 max_sesiones=MAX_SESIONES, ttl_sesion=TTL_SESION):
+        """
+        Args:
+            latencia (tuple[float, float], optional): Rango de latencia artificial por petición (segundos).
+            tasa_error (float, optional): Probabilidad (0-1) de responder con HTTP 503.
+            dificultad (str | dict, optional): Dificultad del captcha (ver `NIVELES_DIFICULTAD`).
+            semilla (int, optional): Semilla para resultados reproducibles.
+            max_sesiones (int, optional): Sesiones guardadas como máximo; al superarlo se
+                descarta la usada hace más tiempo.
+            ttl_sesion (float, optional): Segundos sin uso tras los que una sesión se descarta.
+        """
+        self.latencia = latencia
+        self.tasa_error = tasa_error
+        self.dificultad = dificultad
+        self.rng = random.Random(semilla)
+        self.max_sesiones = max_sesiones
+        self.ttl_sesion = ttl_sesion
+        self.sesiones = OrderedDict()
+        self.respuestas_por_imagen = OrderedDict()
+        self.metricas = {"solicitudes": 0, "errores_simulados": 0, "captchas_generados": 0,
+                         "captchas_incorrectos": 0, "certificados": 0}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Sesiones y captcha
+    # ------------------------------------------------------------------
+
+    def obtener_sesion(self, id_sesion):
+        """
+        Devuelve la sesión de la cookie, o una nueva si no existe o ya se descartó.
+
+        Las sesiones se guardan en orden de uso: en cada llamada se descartan las
+        que llevan más de `ttl_sesion` segundos sin uso y, si se supera
+        `max_sesiones`, las usadas hace más tiempo.
+        """
+        ahora = time.monotonic()
+        with self._lock:
+            while self.sesiones and ahora - next(iter(self.sesiones.values()))["ultimo_uso"] > self.ttl_sesion:
+                self.sesiones.popitem(last=False)
+            if not id_sesion or id_sesion not in self.sesiones:
+                while len(self.sesiones) >= self.max_sesiones:
+                    self.sesiones.popitem(last=False)
+                id_sesion = secrets.token_hex(12)
+                self.sesiones[id_sesion] = {"captcha": None, "imagen": None, "viewstate": None, "datos": None}
+            else:
+                self.sesiones.move_to_end(id_sesion)
+            sesion = self.sesiones[id_sesion]
+            sesion["ultimo_uso"] = ahora
+            return id_sesion, sesion
+
+    def nuevo_captcha(self, sesion):
+        with self._lock:
+            rng = random.Random(self.rng.random())
+        texto, imagen = generar_imagen_captcha(dificultad=self.dificultad, rng=rng)
+        with self._lock:
+            sesion["captcha"], sesion["imagen"] = texto, imagen
+            self.respuestas_por_imagen[hashlib.sha1(imagen).hexdigest()] = texto
+            while len(self.respuestas_por_imagen) > 10000:
+                self.respuestas_por_imagen.popitem(last=False)
+            self.metricas["captchas_generados"] += 1
+        return imagen
+
+    def respuesta_para_imagen(self, imagen_bytes):
+        """
+        Devuelve el texto de un captcha generado por este simulador (oráculo para pruebas).
+
+        Args:
+            imagen_bytes (bytes): Bytes PNG exactamente como los sirvió el simulador.
+
+        Returns:
+            str | None: Texto del captcha, o `None` si la imagen no es conocida.
+        """
+        return self.respuestas_por_imagen.get(hashlib.sha1(imagen_bytes).hexdigest())
+
+    def simular_red(self):
+        """
+        Aplica la latencia artificial y decide si la petición debe fallar.
+
+        Returns:
+            bool: True si se debe responder con un error simulado.
+        """
+        with self._lock:
+            self.metricas["solicitudes"] += 1
+            espera = self.rng.uniform(*self.latencia) if self.latencia[1] > 0 else 0
+            fallar = self.rng.random() < self.tasa_error
+            if fallar:
+                self.metricas["errores_simulados"] += 1
+        if espera:
+            time.sleep(espera)
+        return fallar
+
+    # ------------------------------------------------------------------
+    # Páginas
+    # ------------------------------------------------------------------
+
+    def pagina_formulario(self, sesion, alerta=None, datos=None):
+        self.nuevo_captcha(sesion)
+        sesion["viewstate"] = secrets.token_urlsafe(24)
+        datos = datos or {}
+
+        def opciones(pares, seleccionada):
+            # Como en el sitio real, el postback conserva la opción enviada
+            return "".join(f'<option value="{valor}"{" selected" if valor == seleccionada else ""}>{texto}</option>'
+                           for valor, texto in pares)
+
+        dias = opciones(((f"{d:02d}", f"{d:02d}") for d in range(1, 32)), datos.get("dia"))
+        meses = opciones(((str(i), m.capitalize()) for i, m in enumerate(utils.meses, start=1)), datos.get("mes"))
+        years = opciones(((str(y), y) for y in range(datetime.today().year, 1939, -1)), datos.get("year"))
+        script_alerta = f"<script type=\"text/javascript\">alert('{html.escape(alerta)}');</script>" if alerta else ""
+        return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Certificado de Vigencia de Cédula</title></head>
+<body>
+<form method="post" action="./Datos.aspx" id="form1">
+<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="{sesion['viewstate']}" />
+<input type="hidden" name="__EVENTVALIDATION" id="__EVENTVALIDATION" value="{sesion['viewstate'][::-1]}" />
+<label>Número de cédula</label>
+<input name="ctl00$ContentPlaceHolder1$TextBox1" type="text" id="{utils.id_campo_cedula}" value="{html.escape(datos.get('cedula', ''))}" />
+<label>Fecha de expedición</label>
+<select name="ctl00$ContentPlaceHolder1$DropDownList1" id="{utils.id_select_campo_dia}">{dias}</select>
+<select name="ctl00$ContentPlaceHolder1$DropDownList2" id="{utils.id_select_campo_mes}">{meses}</select>
+<select name="ctl00$ContentPlaceHolder1$DropDownList3" id="{utils.id_select_campo_year}">{years}</select>
+<div>
+<img id="{utils.id_campo_captcha}" src="BotDetectCaptcha.ashx?get=image&amp;c=datos_contentplaceholder1_captcha1&amp;t={secrets.token_hex(8)}" alt="CAPTCHA" width="{TAMANO_CAPTCHA[0]}" height="{TAMANO_CAPTCHA[1]}" />
+<a href="javascript:void(0)" title="Change the code" onclick="document.getElementById('{utils.id_campo_captcha}').src='BotDetectCaptcha.ashx?get=image&amp;c=datos_contentplaceholder1_captcha1&amp;nuevo=1&amp;t='+Date.now();return false;">Recargar</a>
+</div>
+<input name="ctl00$ContentPlaceHolder1$TextBox2" type="text" id="{utils.id_campo_codigo}" />
+<input type="submit" name="ctl00$ContentPlaceHolder1$Button1" value="{utils.valor_boton_continuar}" id="{utils.id_boton_principal}" />
+</form>
+{script_alerta}
+</body></html>"""
+
+    def pagina_confirmacion(self, sesion):
+        sesion["viewstate"] = secrets.token_urlsafe(24)
+        return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Certificado de Vigencia de Cédula</title></head>
+<body>
+<form method="post" action="./Datos.aspx" id="form1">
+<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="{sesion['viewstate']}" />
+<input type="hidden" name="__EVENTVALIDATION" id="__EVENTVALIDATION" value="{sesion['viewstate'][::-1]}" />
+<span id="ContentPlaceHolder1_Label1">La certificación se expedira para el numero de cédula {html.escape(sesion['datos']['cedula'])}</span>
+<input type="submit" name="ctl00$ContentPlaceHolder1$Button1" value="{utils.valor_boton_generar_certificado}" id="{utils.id_boton_principal}" />
+</form>
+</body></html>"""
+
+    def procesar_postback(self, sesion, campos):
+        """
+        Procesa un POST del formulario.
+
+        Returns:
+            tuple[int, str, bytes, dict]: Código HTTP, content-type, cuerpo y cabeceras extra.
+        """
+        valor = lambda nombre: campos.get(nombre, [""])[0]
+        if not sesion["viewstate"] or valor("__VIEWSTATE") != sesion["viewstate"] or valor("__EVENTVALIDATION") != sesion["viewstate"][::-1]:
+            return 400, "text/plain; charset=utf-8", "Validación de ViewState fallida".encode("utf-8"), {}
+
+        boton = valor("ctl00$ContentPlaceHolder1$Button1")
+        if boton == utils.valor_boton_continuar:
+            datos = {"cedula": valor("ctl00$ContentPlaceHolder1$TextBox1"), "dia": valor("ctl00$ContentPlaceHolder1$DropDownList1"),
+                     "mes": valor("ctl00$ContentPlaceHolder1$DropDownList2"), "year": valor("ctl00$ContentPlaceHolder1$DropDownList3")}
+            codigo = valor("ctl00$ContentPlaceHolder1$TextBox2").strip().upper()
+            if not sesion["captcha"] or codigo != sesion["captcha"]:
+                with self._lock:
+                    self.metricas["captchas_incorrectos"] += 1
+                return 200, "text/html; charset=utf-8", self.pagina_formulario(sesion, MENSAJE_CAPTCHA_INCORRECTO, datos).encode("utf-8"), {}
+            sesion["captcha"], sesion["datos"] = None, datos
+            return 200, "text/html; charset=utf-8", self.pagina_confirmacion(sesion).encode("utf-8"), {}
+
+        if boton == utils.valor_boton_generar_certificado and sesion["datos"]:
+            datos = sesion["datos"]
+            rng = random.Random(datos["cedula"])
+            mes = utils.meses[int(datos["mes"]) - 1] if datos["mes"].isdigit() else datos["mes"].lower()
+            pdf = crear_pdf_certificado_bytes(datos["cedula"], f"{datos['dia']} DE {mes.upper()} DE {datos['year']}",
+                                              rng.choice(LUGARES_SIMULADOS), rng.choice(NOMBRES_SIMULADOS))
+            with self._lock:
+                self.metricas["certificados"] += 1
+            cabeceras = {"Content-Disposition": f'attachment; filename="certificado_{datos["cedula"]}.pdf"'}
+            return 200, "application/pdf", pdf, cabeceras
+
+        return 400, "text/plain; charset=utf-8", "Solicitud no válida".encode("utf-8"), {}
+
+
+class _ManejadorRegistraduria(BaseHTTPRequestHandler):
+    """
+    Traduce las peticiones HTTP a llamadas del `SimuladorRegistraduria`.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, formato, *args):
+        pass
+
+    @property
+    def simulador(self):
+        return self.server.simulador
+
+    def _sesion(self):
+        cookie = SimpleCookie(self.headers.get("Cookie", ""))
+        id_actual = cookie["ASP.NET_SessionId"].value if "ASP.NET_SessionId" in cookie else None
+        id_sesion, sesion = self.simulador.obtener_sesion(id_actual)
+        return id_sesion, sesion, id_sesion != id_actual
+
+    def _responder(self, codigo, tipo, cuerpo, id_sesion=None, cabeceras=None):
+        self.send_response(codigo)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.send_header("Cache-Control", "no-store")
+        if id_sesion:
+            self.send_header("Set-Cookie", f"ASP.NET_SessionId={id_sesion}; path=/; HttpOnly")
+        for nombre, valor in (cabeceras or {}).items():
+            self.send_header(nombre, valor)
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def _error_simulado(self):
+        if self.simulador.simular_red():
+            self._responder(503, "text/plain; charset=utf-8", "Servicio no disponible (simulado)".encode("utf-8"))
+            return True
+        return False
+
+    def do_GET(self):
+        partes = urlsplit(self.path)
+        if self._error_simulado():
+            return
+        id_sesion, sesion, nueva = self._sesion()
+        cookie = id_sesion if nueva else None
+
+        if partes.path.endswith("/Datos.aspx"):
+            self._responder(200, "text/html; charset=utf-8", self.simulador.pagina_formulario(sesion).encode("utf-8"), cookie)
+        elif partes.path.endswith("/BotDetectCaptcha.ashx"):
+            if "nuevo" in parse_qs(partes.query) or not sesion["imagen"]:
+                self.simulador.nuevo_captcha(sesion)
+            self._responder(200, "image/png", sesion["imagen"], cookie)
+        else:
+            self._responder(404, "text/plain; charset=utf-8", b"No encontrado", cookie)
+
+    def do_POST(self):
+        partes = urlsplit(self.path)
+        longitud = int(self.headers.get("Content-Length") or 0)
+        cuerpo = self.rfile.read(longitud).decode("utf-8", errors="replace")
+        if self._error_simulado():
+            return
+        id_sesion, sesion, nueva = self._sesion()
+        if not partes.path.endswith("/Datos.aspx"):
+            self._responder(404, "text/plain; charset=utf-8", b"No encontrado", id_sesion if nueva else None)
+            return
+        codigo, tipo, contenido, cabeceras = self.simulador.procesar_postback(sesion, parse_qs(cuerpo, keep_blank_values=True))
+        self._responder(codigo, tipo, contenido, id_sesion if nueva else None, cabeceras)
+
+
+class ServidorSimulado:
+    """
+    Servidor HTTP del sitio simulado, ejecutándose en un hilo en segundo plano.
+
+    Ejemplo:
+        >>> with ServidorSimulado(latencia=(0.05, 0.2), dificultad="facil") as servidor:
+        ...     consultar_certificado_cedula_http(..., url=servidor.url, resolver=servidor.simulador.respuesta_para_imagen)
+    """
+
+    def __init__(self, host="127.0.0.1", puerto=0, **config):
+        """
+        Args:
+            host (str, optional): Interfaz de escucha.
+            puerto (int, optional): Puerto (0 = cualquiera libre).
+            **config: Argumentos de `SimuladorRegistraduria` (latencia, tasa_error, dificultad, semilla).
+        """
+        self.simulador = SimuladorRegistraduria(**config)
+        self._servidor = ThreadingHTTPServer((host, puerto), _ManejadorRegistraduria)
+        self._servidor.daemon_threads = True
+        self._servidor.simulador = self.simulador
+        self._hilo = None
+
+    @property
+    def url(self):
+        host, puerto = self._servidor.server_address[:2]
+        return f"http://{host}:{puerto}/Datos.aspx"
+
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.detener()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local que simula la consulta de la Registraduría.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8080)
+    parser.add_argument("--latencia-min", type=float, default=0.0, help="Latencia mínima por petición (s).")
+    parser.add_argument("--latencia-max", type=float, default=0.0, help="Latencia máxima por petición (s).")
+    parser.add_argument("--tasa-error", type=float, default=0.0, help="Probabilidad de responder HTTP 503.")
+    parser.add_argument("--dificultad", choices=list(NIVELES_DIFICULTAD), default="media")
+    parser.add_argument("--semilla", type=int)
+    args = parser.parse_args()
+
+    servidor = ServidorSimulado(args.host, args.puerto, latencia=(args.latencia_min, args.latencia_max),
+                                tasa_error=args.tasa_error, dificultad=args.dificultad, semilla=args.semilla)
+    print(f"🧪 Servidor simulado en {servidor.url} (Ctrl+C para detener)")
+    try:
+        servidor._servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor._servidor.server_close()
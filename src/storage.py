@@ -51,6 +51,29 @@ def guardar_informacion_extraida(informacion, result_dir=None):
     except Exception as ex:
         print(f"Error al guardar informacion: {ex}")
         return {'error': str(ex)}
+def error_de_resultado(resultado):
+    """
+        Devuelve el error de un resultado de `gestionar_pdf` o de `guardar_informacion_extraida`.
+
+        Args:
+            resultado (dict | None): Datos del PDF, o rutas de almacenamiento (cada ruta
+                puede ser a su vez un dict con error).
+
+        Returns:
+            str | None: Mensaje de error, o None si el resultado no tiene error.
+
+        Ejemplo:
+            >>> error_de_resultado({'db': {'error': 'disk I/O error'}, 'json': '...'})
+            'disk I/O error'
+        """
+    if not isinstance(resultado, dict):
+        return None
+    if "error" in resultado:
+        return str(resultado["error"])
+    for valor in resultado.values():
+        if isinstance(valor, dict) and "error" in valor:
+            return str(valor["error"])
+    return None
 def gestionar_base_de_datos(db_path,informacion):
     """
         Inserta los datos en una base de datos SQLite.
@@ -144,4 +167,124 @@ def gestionar_json(informacion,result_dir):
         return json_ruta
     except Exception as e:
         print(f'Error en la gestión del json: {e}')
-        return {'error': str(e)}
\ No newline at end of file
+        return {'error': str(e)}
+def guardar_pdf(pdf_bytes, carpeta, numero_cedula=None):
+    """
+       Archiva en disco un certificado PDF recibido en memoria.
+
+       Args:
+           pdf_bytes (bytes): Contenido del PDF.
+           carpeta (str): Carpeta donde se guardará el archivo.
+           numero_cedula (str, optional): Cédula consultada, usada en el nombre del archivo.
+
+       Returns:
+           str | dict: Ruta del PDF si tiene éxito, o un dict con error.
+
+       Ejemplo:
+           >>> guardar_pdf(pdf_bytes, "data/pdfs/session__...", "12345678")
+           'C:/.../data/pdfs/session__.../certificado_12345678_abc123.pdf'
+       """
+    try:
+        os.makedirs(carpeta, exist_ok=True)
+        pdf_ruta = os.path.join(carpeta, f'certificado_{numero_cedula or "no tiene"}_{str(uuid4())[:12]}.pdf')
+        with open(pdf_ruta, 'wb') as f:
+            f.write(pdf_bytes)
+        print(f'Certificado PDF archivado: {pdf_ruta}')
+        return pdf_ruta
+    except Exception as e:
+        print(f'Error archivando el pdf: {e}')
+        return {'error': str(e)}
+def _conectar_reproceso(db_path):
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=10)
+    conn.execute('''
+                 CREATE TABLE IF NOT EXISTS reproceso_pdf
+                 (
+                     corrida TEXT NOT NULL,
+                     ruta_pdf TEXT NOT NULL,
+                     cedula TEXT,
+                     nombre TEXT,
+                     fecha_expedida TEXT,
+                     municipio_expedida TEXT,
+                     departamento_expedida TEXT,
+                     estado_cedula TEXT,
+                     validacion TEXT,
+                     error TEXT,
+                     procesado TEXT NOT NULL,
+                     PRIMARY KEY (corrida, ruta_pdf)
+                 )
+                 ''')
+    return conn
+def guardar_lote_reproceso(db_path, corrida, registros):
+    """
+        Guarda en una sola transacción los resultados de un lote de PDFs reprocesados.
+
+        Cada PDF ocupa una fila por corrida (`corrida`, `ruta_pdf`); si ya existía,
+        se reemplaza.
+
+        Args:
+            db_path (str): Ruta del archivo de base de datos SQLite.
+            corrida (str): Nombre de la corrida de reproceso.
+            registros (list[tuple[str, dict]]): Pares `(ruta_pdf, informacion)`, donde
+                `informacion` es la salida de `gestionar_pdf` (o un dict con `error`).
+
+        Returns:
+            str | dict: Ruta del archivo SQLite si tiene éxito, o un dict con error.
+        """
+    try:
+        procesado = datetime.now().isoformat(timespec="seconds")
+        conn = _conectar_reproceso(db_path)
+        with conn:
+            conn.executemany('''
+                             INSERT OR REPLACE INTO reproceso_pdf (corrida, ruta_pdf, cedula, nombre, fecha_expedida,
+                                                                   municipio_expedida, departamento_expedida,
+                                                                   estado_cedula, validacion, error, procesado)
+                             values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                             ''', [(
+                                 corrida,
+                                 ruta_pdf,
+                                 informacion.get('cedula_ciudadania'),
+                                 informacion.get('nombre_ciudadano'),
+                                 informacion.get('fecha_expedida'),
+                                 informacion.get('municipio_expedida'),
+                                 informacion.get('departamento_expedida'),
+                                 informacion.get('estado_cedula'),
+                                 json.dumps(informacion['validacion'], ensure_ascii=False) if informacion.get('validacion') else None,
+                                 informacion.get('error'),
+                                 procesado,
+                             ) for ruta_pdf, informacion in registros])
+        conn.close()
+        return db_path
+    except Exception as e:
+        print(f'Error guardando el lote de reproceso en SQLite: {e}')
+        return {'error': str(e)}
+def rutas_reprocesadas(db_path, corrida, incluir_fallidas=True):
+    """
+        Devuelve las rutas de PDF ya guardadas en una corrida de reproceso (para reanudarla).
+
+        Args:
+            db_path (str): Ruta del archivo de base de datos SQLite.
+            corrida (str): Nombre de la corrida de reproceso.
+            incluir_fallidas (bool, optional): Si es False, las rutas que terminaron con
+                error no se devuelven (y se vuelven a intentar al reanudar).
+
+        Returns:
+            set[str]: Rutas de los PDFs ya procesados.
+        """
+    if not os.path.exists(db_path):
+        return set()
+    conn = _conectar_reproceso(db_path)
+    consulta = "SELECT ruta_pdf FROM reproceso_pdf WHERE corrida = ?" + ("" if incluir_fallidas else " AND error IS NULL")
+    rutas = {ruta for ruta, in conn.execute(consulta, (corrida,))}
+    conn.close()
+    return rutas
+def borrar_corrida_reproceso(db_path, corrida):
+    """
+        Elimina los resultados de una corrida de reproceso para empezarla de cero.
+        """
+    if not os.path.exists(db_path):
+        return
+    conn = _conectar_reproceso(db_path)
+    with conn:
+        conn.execute("DELETE FROM reproceso_pdf WHERE corrida = ?", (corrida,))
+    conn.close()
@@ -7,16 +7,27 @@ en la página de la Registraduría Nacional del Estado Civil de Colombia.
 
 Fecha: 2025-11-02
 """
+from datetime import datetime
+import multiprocessing
+import os
+import uuid
+
+# Carpeta base de datos del proyecto (cachés, colas, modelos, PDFs y resultados)
+DIR_DATA = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data"))
 
 # Lista de meses del año (en minúsculas y en español)
 meses=["enero","febrero","marzo","abril","mayo","junio","julio","agosto","septiembre","octubre","noviembre","diciembre"]
 
 #  URL principal de la página de consulta
-url_page = "https://certvigenciacedula.registraduria.gov.co/Datos.aspx"
+#  (se puede redirigir al servidor simulado con la variable de entorno REGISTRADURIA_URL)
+url_page = os.environ.get("REGISTRADURIA_URL", "https://certvigenciacedula.registraduria.gov.co/Datos.aspx")
 
 # Identificadores y XPaths de los elementos usados en la automatización Selenium
 id_campo_cedula="ContentPlaceHolder1_TextBox1"
 
+# Identificador del botón principal del formulario ("Continuar" / "Generar Certificado")
+id_boton_principal="ContentPlaceHolder1_Button1"
+
 # XPaths para los botones principales
 xpath_boton_continuar="//input[@id='ContentPlaceHolder1_Button1' and @value='Continuar']"
 xpath_boton_generar_certificado = "//input[@id='ContentPlaceHolder1_Button1' and @value='Generar Certificado']"
@@ -36,10 +47,76 @@ id_select_campo_year="ContentPlaceHolder1_DropDownList3"
 id_campo_captcha="datos_contentplaceholder1_captcha1_CaptchaImage"
 id_campo_codigo="ContentPlaceHolder1_TextBox2"
 
+# Textos del botón principal en cada paso del formulario
+valor_boton_continuar="Continuar"
+valor_boton_generar_certificado="Generar Certificado"
+
+# ---------------------------------------------------------------------------
+# Bloqueo de recursos en modo headless
+# ---------------------------------------------------------------------------
+
+# Patrones de URL que siempre se deben cargar: el formulario, el captcha
+# (BotDetect) con su script de recarga y el certificado PDF
+patrones_recursos_permitidos = ["*/Datos.aspx*", "*BotDetectCaptcha.ashx*", "*WebResource.axd*", "*ScriptResource.axd*", "*.pdf*"]
+
+# Patrones de URL bloqueados por tipo de recurso
+patrones_por_tipo_recurso = {
+    "Stylesheet": ["*.css", "*.css?*"],
+    "Font": ["*.woff", "*.woff?*", "*.woff2", "*.woff2?*", "*.ttf", "*.ttf?*", "*.otf", "*.eot"],
+    "Image": ["*.png", "*.png?*", "*.jpg", "*.jpg?*", "*.jpeg", "*.gif", "*.gif?*", "*.svg", "*.ico", "*.webp"],
+    "Media": ["*.mp3", "*.mp4", "*.wav", "*.webm"],
+}
+
+# Tipos de recurso bloqueados por defecto
+tipos_recurso_bloqueados = ["Stylesheet", "Font", "Image", "Media"]
+
+# Dominios de terceros que no aportan al formulario
+dominios_bloqueados = ["*google-analytics.com*", "*googletagmanager.com*", "*fonts.googleapis.com*", "*fonts.gstatic.com*", "*doubleclick.net*", "*facebook.net*"]
+
+# ---------------------------------------------------------------------------
+# Pools de procesos
+# ---------------------------------------------------------------------------
+
+def contexto_procesos():
+    """
+    Contexto de `multiprocessing` para los pools de procesos que se crean con otros hilos en marcha.
+
+    Con `fork`, el hijo hereda copiados los locks que los hilos de Selenium, HTTP
+    o el colector de OCR tengan tomados en ese instante y puede quedar bloqueado.
+    `forkserver` crea los procesos desde un servidor de un solo hilo; donde no
+    existe (Windows) se usa `spawn`.
+
+    Returns:
+        multiprocessing.context.BaseContext: Contexto para `ProcessPoolExecutor(mp_context=...)`.
+    """
+    metodo = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(metodo)
+
 
+# ---------------------------------------------------------------------------
+# Carpetas de descarga
+# ---------------------------------------------------------------------------
 
+def obtener_ruta_descarga():
+    """
+     Genera y crea dinámicamente una carpeta de descargas única por sesión.
 
+     La carpeta se guarda dentro de `data/pdfs/` y lleva un nombre único
+     con la siguiente estructura:
+         `session__YYYYMMDD__HHMMSS__UUID`
 
+     Esto facilita la organización de archivos descargados por ejecución
+     o sesión del bot. Vive en `utils` para que los motores sin navegador
+     (`motor_http`, `motor_async`) no importen Selenium.
 
+     Returns:
+         str: Ruta absoluta de la carpeta de descarga recién creada.
+     """
+    descarga_basico = os.path.join(DIR_DATA, "pdfs")
+    os.makedirs(descarga_basico,exist_ok=True)
 
+    ids_session= datetime.now().strftime("%Y%m%d__%H%M%S__")+str(uuid.uuid4())[:12]
+    descarga_dir = os.path.join(descarga_basico,f"session__{ids_session}")
+    os.makedirs(descarga_dir,exist_ok=True)
 
+    return descarga_dir
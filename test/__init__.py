@@ -0,0 +1,18 @@
+"""
+Paquete de pruebas.
+
+Las pruebas no deben escribir en las cachés compartidas de `data/`: antes de
+importar `src`, la caché de certificados parseados (`PDF_CACHE`) apunta a una
+carpeta temporal que se borra al terminar. Los procesos hijos (pools de OCR y
+de reproceso) heredan la variable y no crean otra carpeta.
+"""
+import atexit
+import os
+import shutil
+import tempfile
+
+if not os.environ.get("PDF_CACHE_PRUEBAS"):
+    _dir_cache_pruebas = tempfile.mkdtemp(prefix="pdf_cache_pruebas_")
+    os.environ["PDF_CACHE_PRUEBAS"] = _dir_cache_pruebas
+    os.environ["PDF_CACHE"] = os.path.join(_dir_cache_pruebas, "pdf_cache.sqlite")
+    atexit.register(shutil.rmtree, _dir_cache_pruebas, ignore_errors=True)
@@ -0,0 +1,83 @@
+"""
+Benchmark del tiempo de arranque del navegador (modo original vs. optimizado).
+
+Mide, para cada modo de `configuration.crear_driver`, el tiempo desde que se
+solicita el navegador hasta que la sesión responde, y el tiempo total
+incluyendo el cierre. Requiere Google Chrome instalado.
+
+Modos comparados:
+    - original:   `ChromeDriverManager().install()` en cada arranque y ventana maximizada.
+    - optimizado: ChromeDriver en caché por proceso, plantilla de perfil y argumentos de servidor.
+
+Recomendación:
+    Ejecutar con `python -m test.bench_arranque_driver --repeticiones 5`
+"""
+
+from src.configuration import crear_driver, cerrar_driver
+from datetime import datetime
+import argparse
+import json
+import os
+import statistics
+import time
+
+
+def medir_arranque(optimizado, repeticiones):
+    """
+    Arranca y cierra el navegador varias veces midiendo cada fase.
+
+    Args:
+        optimizado (bool): Modo de `crear_driver` a medir.
+        repeticiones (int): Número de arranques.
+
+    Returns:
+        list[dict]: Tiempos (en segundos) de arranque y total por repetición.
+    """
+    detalles = []
+    for i in range(1, repeticiones + 1):
+        inicio = time.perf_counter()
+        driver = crear_driver(optimizado=optimizado)
+        driver.execute_script("return 1")
+        arranque = time.perf_counter() - inicio
+        cerrar_driver(driver)
+        total = time.perf_counter() - inicio
+        detalles.append({"repeticion": i, "arranque": round(arranque, 3), "total": round(total, 3)})
+        print(f" → {'optimizado' if optimizado else 'original'} #{i}: arranque {arranque:.2f}s, total {total:.2f}s")
+    return detalles
+
+
+def resumir(detalles):
+    arranques = [d["arranque"] for d in detalles]
+    return {
+        "arranque_promedio": round(statistics.mean(arranques), 3),
+        "arranque_mediana": round(statistics.median(arranques), 3),
+        "arranque_minimo": round(min(arranques), 3),
+        "arranque_maximo": round(max(arranques), 3),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de arranque del navegador.")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    original = medir_arranque(False, args.repeticiones)
+    optimizado = medir_arranque(True, args.repeticiones)
+
+    reporte = {
+        "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "modo": "arranque_driver",
+        "repeticiones": args.repeticiones,
+        "original": resumir(original),
+        "optimizado": resumir(optimizado),
+        "detalles": {"original": original, "optimizado": optimizado},
+    }
+    mejora = reporte["original"]["arranque_mediana"] - reporte["optimizado"]["arranque_mediana"]
+    print(f"\n📊 Mediana de arranque: original {reporte['original']['arranque_mediana']}s, "
+          f"optimizado {reporte['optimizado']['arranque_mediana']}s (ahorro {mejora:.2f}s)")
+
+    ruta_reporte = os.path.join("test", "reports", f"reporte_arranque_driver_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(ruta_reporte), exist_ok=True)
+    with open(ruta_reporte, "w", encoding="utf-8") as f:
+        json.dump(reporte, f, indent=4, ensure_ascii=False)
+    print(f"🗂️ Reporte guardado en: {ruta_reporte}\n")
@@ -0,0 +1,137 @@
+"""
+Benchmark de los backends de extracción de texto de los PDF (`pdf_parser.BACKENDS_PDF`).
+
+Genera un corpus sintético de certificados con datos distintos
+(`create_pdf.crear_pdf_certificado_bytes`) y lo procesa completo con cada
+backend, cada uno en un proceso nuevo (`spawn`) para que la memoria de uno no
+contamine la medición del siguiente. Por backend se reporta:
+
+    - Latencia por PDF (promedio y p95) y PDFs por segundo.
+    - Pico de memoria residente (RSS) del proceso y su aumento sobre el proceso
+      recién iniciado (solo en sistemas con el módulo `resource`).
+    - PDFs con los seis campos extraídos correctamente.
+
+Recomendación:
+    Ejecutar con `python -m test.bench_backends_pdf --pdfs 2000 --paginas-extra 1`
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from src.create_pdf import crear_pdf_certificado_bytes
+from datetime import datetime
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+MESES = ("ENERO", "FEBRERO", "MARZO", "ABRIL", "MAYO", "JUNIO", "JULIO", "AGOSTO",
+         "SEPTIEMBRE", "OCTUBRE", "NOVIEMBRE", "DICIEMBRE")
+LUGARES = ("MOSQUERA - CUNDINAMARCA", "CALI - VALLE", "MEDELLIN - ANTIOQUIA", "PASTO - NARIÑO", "TUNJA - BOYACA")
+
+
+def rss_pico_mb():
+    """
+    Pico de memoria residente del proceso en MB (None si no se puede medir).
+    """
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(pico / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def generar_corpus(ruta_dir, cantidad, paginas_extra, semilla):
+    """
+    Escribe `cantidad` certificados en `ruta_dir` y devuelve `(ruta, cedula_esperada)` de cada uno.
+    """
+    rng = random.Random(semilla)
+    corpus = []
+    for i in range(cantidad):
+        cedula = str(rng.randint(1_000_000, 1_999_999_999))
+        pdf = crear_pdf_certificado_bytes(cedula, f"{rng.randint(1, 28)} DE {rng.choice(MESES)} DE {rng.randint(1970, 2024)}",
+                                          rng.choice(LUGARES), f"CIUDADANO PRUEBA {i}", paginas_extra=paginas_extra)
+        ruta = os.path.join(ruta_dir, f"certificado_{i:06d}.pdf")
+        with open(ruta, "wb") as f:
+            f.write(pdf)
+        corpus.append((ruta, cedula))
+    return corpus
+
+
+def medir_backend(backend, corpus):
+    """
+    Procesa el corpus con un backend (se ejecuta en un proceso nuevo).
+    """
+    from src.pdf_parser import gestionar_pdf
+    rss_inicial = rss_pico_mb()
+
+    latencias = []
+    correctos = 0
+    with redirect_stdout(io.StringIO()):
+        for ruta, cedula in corpus:
+            inicio = time.perf_counter()
+            datos = gestionar_pdf(ruta, backend=backend, respaldo=None)
+            latencias.append(time.perf_counter() - inicio)
+            correctos += datos.get("cedula_ciudadania") == cedula and all(datos.get(campo) for campo in datos)
+
+    latencias.sort()
+    rss_final = rss_pico_mb()
+    return {
+        "backend": backend,
+        "pdfs": len(corpus),
+        "correctos": correctos,
+        "latencia_promedio_ms": round(statistics.mean(latencias) * 1000, 3),
+        "latencia_p95_ms": round(latencias[int(0.95 * (len(latencias) - 1))] * 1000, 3),
+        "pdfs_por_segundo": round(len(latencias) / sum(latencias), 2),
+        "rss_pico_mb": rss_final,
+        "rss_aumento_mb": round(rss_final - rss_inicial, 1) if rss_final is not None else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de backends de extracción de texto de PDF.")
+    parser.add_argument("--backends", default="pdfium,pdfminer,pdfplumber")
+    parser.add_argument("--pdfs", type=int, default=1000)
+    parser.add_argument("--paginas-extra", type=int, default=0, help="Páginas de anexo por certificado.")
+    parser.add_argument("--semilla", type=int, default=2026)
+    args = parser.parse_args()
+
+    detalles = []
+    with tempfile.TemporaryDirectory() as ruta_dir:
+        print(f"Generando {args.pdfs} certificados sintéticos...")
+        corpus = generar_corpus(ruta_dir, args.pdfs, args.paginas_extra, args.semilla)
+
+        contexto = multiprocessing.get_context("spawn")
+        for backend in (b.strip() for b in args.backends.split(",")):
+            try:
+                with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as executor:
+                    resumen = executor.submit(medir_backend, backend, corpus).result()
+            except Exception as ex:
+                print(f"⚠️ No se pudo medir el backend {backend}: {ex}")
+                continue
+            detalles.append(resumen)
+            print(f" → {resumen['backend']}: {resumen['latencia_promedio_ms']} ms/pdf (p95 {resumen['latencia_p95_ms']} ms), "
+                  f"{resumen['pdfs_por_segundo']} pdfs/s, RSS pico {resumen['rss_pico_mb']} MB "
+                  f"(+{resumen['rss_aumento_mb']} MB), correctos {resumen['correctos']}/{resumen['pdfs']}")
+
+    reporte = {
+        "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "modo": "backends_pdf",
+        "pdfs": args.pdfs,
+        "paginas_extra": args.paginas_extra,
+        "detalles": detalles,
+    }
+    ruta_reporte = os.path.join("test", "reports", f"reporte_backends_pdf_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(ruta_reporte), exist_ok=True)
+    with open(ruta_reporte, "w", encoding="utf-8") as f:
+        json.dump(reporte, f, indent=4, ensure_ascii=False)
+    print(f"🗂️ Reporte guardado en: {ruta_reporte}\n")
@@ -0,0 +1,128 @@
+"""
+Benchmark de extremo a extremo de los motores de consulta contra el servidor simulado.
+
+Levanta `src/servidor_simulado.py` en un puerto local y ejecuta el mismo lote
+con cada motor, midiendo el tiempo total, el rendimiento (consultas/s) y la
+distribución de tiempos por consulta. No requiere conexión a internet.
+
+Motores comparados:
+    - http:     `motor_http` con un hilo por consulta (`batch.ejecutar_lote`).
+    - async:    `motor_async.MotorAsync` con un solo event loop.
+    - selenium: `scraping.consultar_certificado_cedula` con un pool de navegadores
+                (requiere Google Chrome y Tesseract: el captcha se resuelve con OCR real).
+
+En los motores sin navegador el captcha se resuelve con el oráculo del simulador,
+de modo que se mide el flujo HTTP y el procesamiento del PDF, no la precisión del OCR.
+
+Recomendación:
+    Ejecutar con `python -m test.bench_motores --consultas 50 --workers 8 --latencia-min 0.05 --latencia-max 0.3`
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from src.servidor_simulado import ServidorSimulado, NIVELES_DIFICULTAD
+from src.batch import ejecutar_lote
+from src.motor_http import consultar_certificado_cedula_http
+from src import utils
+from datetime import datetime
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+
+
+def generar_filas(cantidad):
+    return [(i, {"numero_cedula": f"10{i:08d}", "dia_expedicion_cedula": f"{i % 28 + 1:02d}",
+                 "mes_expedicion_cedula": utils.meses[i % 12], "year_expedicion_cedula": str(1990 + i % 30)})
+            for i in range(1, cantidad + 1)]
+
+
+def medir_http(servidor, filas, workers, result_dir):
+    consulta = lambda driver, **datos: consultar_certificado_cedula_http(
+        **datos, url=servidor.url, resolver=servidor.simulador.respuesta_para_imagen, result_dir=result_dir)
+    return list(ejecutar_lote(filas, workers=workers, consulta=consulta, fabrica_driver=lambda: None))
+
+
+def medir_async(servidor, filas, workers, result_dir):
+    from src.motor_async import MotorAsync
+
+    async def ejecutar():
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            async with MotorAsync(max_concurrencia=workers, max_por_host=workers, executor=executor,
+                                  resolver=servidor.simulador.respuesta_para_imagen) as motor:
+                return [r async for r in motor.consultar_lote(filas, url=servidor.url, result_dir=result_dir)]
+
+    return asyncio.run(ejecutar())
+
+
+def medir_selenium(servidor, filas, workers, result_dir):
+    from src.driver_pool import PoolDrivers
+    from src.scraping import consultar_certificado_cedula
+    from src.configuration import crear_driver
+
+    utils.url_page = servidor.url
+    with PoolDrivers(tamano=workers, fabrica_driver=partial(crear_driver, headless=True)) as pool:
+        return list(ejecutar_lote(filas, workers=workers, consulta=consultar_certificado_cedula, pool=pool))
+
+
+MOTORES = {"http": medir_http, "async": medir_async, "selenium": medir_selenium}
+
+
+def resumir(resultados, duracion):
+    tiempos = sorted(r["tiempo"] for r in resultados)
+    exitos = sum(1 for r in resultados if r["resultado"] == "ok")
+    return {
+        "consultas_exitosas": exitos,
+        "consultas_con_error": len(resultados) - exitos,
+        "tiempo_total_segundos": round(duracion, 2),
+        "consultas_por_segundo": round(len(resultados) / duracion, 2) if duracion else None,
+        "tiempo_mediana": round(statistics.median(tiempos), 3) if tiempos else None,
+        "tiempo_p95": round(tiempos[int(0.95 * (len(tiempos) - 1))], 3) if tiempos else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de motores contra el servidor simulado.")
+    parser.add_argument("--motores", default="http,async", help="Lista separada por comas: http, async, selenium.")
+    parser.add_argument("--consultas", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latencia-min", type=float, default=0.05)
+    parser.add_argument("--latencia-max", type=float, default=0.3)
+    parser.add_argument("--tasa-error", type=float, default=0.0)
+    parser.add_argument("--dificultad", choices=list(NIVELES_DIFICULTAD), default="media")
+    args = parser.parse_args()
+
+    filas = generar_filas(args.consultas)
+    reporte = {
+        "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "modo": "motores_servidor_simulado",
+        "consultas_totales": args.consultas,
+        "workers": args.workers,
+        "servidor": {"latencia": [args.latencia_min, args.latencia_max], "tasa_error": args.tasa_error,
+                     "dificultad": args.dificultad},
+        "motores": {},
+        "detalles": {},
+    }
+
+    with ServidorSimulado(latencia=(args.latencia_min, args.latencia_max), tasa_error=args.tasa_error,
+                          dificultad=args.dificultad) as servidor, tempfile.TemporaryDirectory() as result_dir:
+        print(f"🧪 Servidor simulado en {servidor.url}")
+        for nombre in args.motores.split(","):
+            nombre = nombre.strip()
+            inicio = time.perf_counter()
+            resultados = MOTORES[nombre](servidor, filas, args.workers, result_dir)
+            resumen = resumir(resultados, time.perf_counter() - inicio)
+            reporte["motores"][nombre] = resumen
+            reporte["detalles"][nombre] = [{k: r.get(k) for k in ("fila", "cedula", "resultado", "tiempo")} for r in resultados]
+            print(f" → {nombre}: {resumen['consultas_exitosas']}/{args.consultas} ok en {resumen['tiempo_total_segundos']}s "
+                  f"({resumen['consultas_por_segundo']} consultas/s, p95 {resumen['tiempo_p95']}s)")
+        reporte["servidor"]["metricas"] = dict(servidor.simulador.metricas)
+
+    ruta_reporte = os.path.join("test", "reports", f"reporte_motores_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(ruta_reporte), exist_ok=True)
+    with open(ruta_reporte, "w", encoding="utf-8") as f:
+        json.dump(reporte, f, indent=4, ensure_ascii=False)
+    print(f"🗂️ Reporte guardado en: {ruta_reporte}\n")
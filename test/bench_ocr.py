@@ -0,0 +1,98 @@
+"""
+Benchmark de los motores de OCR del captcha (pytesseract vs. tesserocr).
+
+Genera captchas con respuesta conocida (`servidor_simulado.generar_imagen_captcha`)
+y los resuelve con cada motor usando distintos números de hilos simultáneos,
+midiendo la latencia por captcha, el rendimiento (captchas/s) y la precisión.
+
+Motores comparados:
+    - pytesseract: un proceso `tesseract` nuevo por captcha.
+    - tesserocr:   API de Tesseract en el mismo proceso, una instancia por hilo.
+
+Recomendación:
+    Ejecutar con `python -m test.bench_ocr --captchas 200 --workers 1,2,4,8`
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from src.orc import leer_texto_captcha_bytes, MOTORES_OCR
+from src.servidor_simulado import generar_imagen_captcha, NIVELES_DIFICULTAD
+from datetime import datetime
+import argparse
+import io
+import json
+import os
+import random
+import statistics
+import time
+
+
+def resolver_medido(imagen, motor):
+    inicio = time.perf_counter()
+    texto = leer_texto_captcha_bytes(imagen, motor)
+    return texto, time.perf_counter() - inicio
+
+
+def medir(motor, corpus, workers):
+    """
+    Resuelve todo el corpus con `workers` hilos y resume latencias y aciertos.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Calentamiento: cada hilo crea su instancia del motor antes de medir
+        list(executor.map(lambda imagen: leer_texto_captcha_bytes(imagen, motor), [corpus[0][1]] * workers))
+        inicio = time.perf_counter()
+        resultados = list(executor.map(lambda item: resolver_medido(item[1], motor), corpus))
+        duracion = time.perf_counter() - inicio
+
+    latencias = sorted(latencia for _, latencia in resultados)
+    aciertos = sum(1 for (texto, _), (respuesta, _) in zip(resultados, corpus) if texto == respuesta)
+    return {
+        "motor": motor,
+        "workers": workers,
+        "captchas": len(corpus),
+        "aciertos": aciertos,
+        "precision": round(aciertos / len(corpus), 3),
+        "latencia_promedio_ms": round(statistics.mean(latencias) * 1000, 2),
+        "latencia_p95_ms": round(latencias[int(0.95 * (len(latencias) - 1))] * 1000, 2),
+        "captchas_por_segundo": round(len(corpus) / duracion, 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de motores de OCR del captcha.")
+    parser.add_argument("--motores", default=",".join(MOTORES_OCR))
+    parser.add_argument("--captchas", type=int, default=200)
+    parser.add_argument("--workers", default="1,2,4,8", help="Lista de hilos simultáneos a medir.")
+    parser.add_argument("--dificultad", choices=list(NIVELES_DIFICULTAD), default="media")
+    parser.add_argument("--semilla", type=int, default=2026)
+    args = parser.parse_args()
+
+    rng = random.Random(args.semilla)
+    corpus = [generar_imagen_captcha(dificultad=args.dificultad, rng=rng) for _ in range(args.captchas)]
+
+    detalles = []
+    for motor in args.motores.split(","):
+        for workers in (int(w) for w in args.workers.split(",")):
+            try:
+                with redirect_stdout(io.StringIO()):
+                    resumen = medir(motor.strip(), corpus, workers)
+            except Exception as ex:
+                print(f"⚠️ No se pudo medir {motor} con {workers} hilos: {ex}")
+                continue
+            detalles.append(resumen)
+            print(f" → {resumen['motor']} x{workers}: {resumen['latencia_promedio_ms']} ms/captcha "
+                  f"(p95 {resumen['latencia_p95_ms']} ms), {resumen['captchas_por_segundo']} captchas/s, "
+                  f"precisión {resumen['precision']}")
+
+    reporte = {
+        "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "modo": "ocr_captcha",
+        "captchas": args.captchas,
+        "dificultad": args.dificultad,
+        "detalles": detalles,
+    }
+    ruta_reporte = os.path.join("test", "reports", f"reporte_ocr_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(ruta_reporte), exist_ok=True)
+    with open(ruta_reporte, "w", encoding="utf-8") as f:
+        json.dump(reporte, f, indent=4, ensure_ascii=False)
+    print(f"🗂️ Reporte guardado en: {ruta_reporte}\n")
@@ -0,0 +1,175 @@
+"""
+Microbenchmark de la extracción de texto de los certificados PDF.
+
+Genera certificados con `create_pdf.crear_pdf` (o, con `--paginas-extra`, con
+`crear_pdf_certificado_bytes` y páginas de anexo) y mide la latencia por PDF de
+cada modo de lectura:
+
+    - referencia:     lectura anterior (`extract_text()` dos veces por página y
+                      concatenación del texto de todas las páginas).
+    - texto_completo: `leer_documento_pdf` + `parsear_documento_pdf`.
+    - flujo:          `iterar_lineas_pdf` + `parsear_lineas_pdf` (una extracción
+                      por página y salida en cuanto los campos están completos).
+
+Cada modo se mide con el PDF como ruta y como `bytes`. Además se compara solo
+el parser de campos (sin extracción) sobre el texto ya extraído: la cadena de
+`startswith` anterior frente al extractor con expresión regular compilada.
+
+Recomendación:
+    Ejecutar con `python -m test.bench_pdf --pdfs 50 --repeticiones 3 --paginas-extra 0,3`
+"""
+
+from contextlib import redirect_stdout
+from src.create_pdf import crear_pdf, crear_pdf_certificado_bytes
+from src.pdf_parser import leer_documento_pdf, parsear_documento_pdf, iterar_lineas_pdf, parsear_lineas_pdf
+from datetime import datetime
+import argparse
+import io
+import json
+import os
+import pdfplumber
+import statistics
+import tempfile
+import time
+
+
+def leer_referencia(pdf_origen):
+    texto = ""
+    with pdfplumber.open(io.BytesIO(pdf_origen) if isinstance(pdf_origen, bytes) else pdf_origen) as pdf:
+        for page in pdf.pages:
+            texto += page.extract_text() + '\n' if page.extract_text() else ''
+    return parsear_documento_pdf(texto)
+
+
+def parsear_referencia(texto_pdf):
+    """
+    Parser anterior (cadena de `startswith` sobre cada línea en minúsculas).
+    """
+    datos_finales = {}
+    for linea in texto_pdf.splitlines():
+        linea = linea.strip().lower()
+        if linea.startswith("cédula de ciudadanía"): datos_finales["cedula_ciudadania"] = linea.split(":")[-1].strip().replace(".", "")
+        elif linea.startswith("fecha de expedición"): datos_finales["fecha_expedida"] = linea.split(":")[-1].strip().replace(" de ", "-")
+        elif linea.startswith("lugar de expedición"):
+            lugar = (linea.split(":")[-1].strip()).split(" - ")
+            datos_finales["municipio_expedida"], datos_finales["departamento_expedida"] = lugar[0].capitalize(), lugar[1].capitalize()
+        elif linea.startswith("a nombre de"): datos_finales["nombre_ciudadano"] = linea.split(":")[-1].strip().title()
+        elif linea.startswith("estado"): datos_finales["estado_cedula"] = linea.split(":")[-1].strip().capitalize()
+    return datos_finales
+
+
+PARSERS = {
+    "startswith": parsear_referencia,
+    "regex": parsear_documento_pdf,
+}
+
+
+MODOS = {
+    "referencia": leer_referencia,
+    "texto_completo": lambda pdf_origen: parsear_documento_pdf(leer_documento_pdf(pdf_origen)),
+    "flujo": lambda pdf_origen: parsear_lineas_pdf(iterar_lineas_pdf(pdf_origen))[0],
+}
+
+
+def generar_corpus(ruta_dir, cantidad, paginas_extra):
+    """
+    Crea `cantidad` certificados en `ruta_dir` y devuelve sus rutas.
+    """
+    rutas = []
+    with redirect_stdout(io.StringIO()):
+        for i in range(cantidad):
+            if paginas_extra == 0:
+                rutas.append(crear_pdf(ruta_dir))
+                continue
+            ruta = os.path.join(ruta_dir, f"anexos_{paginas_extra}_{i}.pdf")
+            with open(ruta, "wb") as f:
+                f.write(crear_pdf_certificado_bytes(str(1000000 + i), "31 DE DICIEMBRE DE 2020", "MOSQUERA - CUNDINAMARCA",
+                                                    "NOMBRE PRUEBA TESTING", paginas_extra=paginas_extra))
+            rutas.append(ruta)
+    return rutas
+
+
+def medir(modo, entradas, repeticiones):
+    """
+    Procesa todas las entradas `repeticiones` veces y resume la latencia por PDF.
+    """
+    funcion = MODOS[modo]
+    esperado = MODOS["referencia"](entradas[0])
+    if funcion(entradas[0]) != esperado:
+        raise AssertionError(f"El modo {modo} no devuelve los mismos campos que la referencia")
+
+    latencias = []
+    for _ in range(repeticiones):
+        for entrada in entradas:
+            inicio = time.perf_counter()
+            funcion(entrada)
+            latencias.append(time.perf_counter() - inicio)
+    latencias.sort()
+    return {
+        "latencia_promedio_ms": round(statistics.mean(latencias) * 1000, 3),
+        "latencia_p95_ms": round(latencias[int(0.95 * (len(latencias) - 1))] * 1000, 3),
+        "pdfs_por_segundo": round(len(latencias) / sum(latencias), 2),
+    }
+
+
+def medir_parser(nombre, textos, repeticiones):
+    """
+    Parsea los textos ya extraídos `repeticiones` veces y devuelve documentos por segundo.
+    """
+    funcion = PARSERS[nombre]
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        for texto in textos:
+            funcion(texto)
+    duracion = time.perf_counter() - inicio
+    return {"parser": nombre, "documentos": len(textos) * repeticiones,
+            "documentos_por_segundo": round(len(textos) * repeticiones / duracion, 1)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Microbenchmark de la extracción de texto de los PDF.")
+    parser.add_argument("--pdfs", type=int, default=50)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--paginas-extra", default="0", help="Lista de páginas de anexo por certificado (0 = crear_pdf).")
+    parser.add_argument("--modos", default=",".join(MODOS))
+    parser.add_argument("--repeticiones-parser", type=int, default=200)
+    args = parser.parse_args()
+
+    detalles = []
+    parsers = []
+    with tempfile.TemporaryDirectory() as ruta_dir:
+        for paginas_extra in (int(p) for p in args.paginas_extra.split(",")):
+            rutas = generar_corpus(ruta_dir, args.pdfs, paginas_extra)
+            contenidos = []
+            for ruta in rutas:
+                with open(ruta, "rb") as f:
+                    contenidos.append(f.read())
+
+            for entrada, corpus in (("ruta", rutas), ("bytes", contenidos)):
+                for modo in args.modos.split(","):
+                    resumen = {"modo": modo.strip(), "entrada": entrada, "paginas": 1 + paginas_extra,
+                               **medir(modo.strip(), corpus, args.repeticiones)}
+                    detalles.append(resumen)
+                    print(f" → {resumen['modo']} ({entrada}, {resumen['paginas']} pág.): "
+                          f"{resumen['latencia_promedio_ms']} ms/pdf (p95 {resumen['latencia_p95_ms']} ms), "
+                          f"{resumen['pdfs_por_segundo']} pdfs/s")
+
+            textos = [leer_documento_pdf(contenido) for contenido in contenidos]
+            for nombre in PARSERS:
+                resumen = {"paginas": 1 + paginas_extra, **medir_parser(nombre, textos, args.repeticiones_parser)}
+                parsers.append(resumen)
+                print(f" → parser {nombre} ({resumen['paginas']} pág.): {resumen['documentos_por_segundo']} documentos/s")
+
+    reporte = {
+        "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "modo": "extraccion_pdf",
+        "pdfs": args.pdfs,
+        "repeticiones": args.repeticiones,
+        "detalles": detalles,
+        "parsers": parsers,
+    }
+    ruta_reporte = os.path.join("test", "reports", f"reporte_pdf_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(ruta_reporte), exist_ok=True)
+    with open(ruta_reporte, "w", encoding="utf-8") as f:
+        json.dump(reporte, f, indent=4, ensure_ascii=False)
+    print(f"🗂️ Reporte guardado en: {ruta_reporte}\n")
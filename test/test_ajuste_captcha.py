@@ -0,0 +1,107 @@
+"""
+Módulo de pruebas unitarias para `src/ajuste_captcha.py`.
+
+Verifica la búsqueda de parámetros del OCR del captcha y la carga de la
+configuración ajustada en `orc`.
+
+Casos principales:
+    - Rejilla completa y búsqueda aleatoria reproducible sin repeticiones.
+    - Elección del umbral de confianza.
+    - Parámetros aplicados por `generar_variantes` (umbral fijo y cierre morfológico).
+    - Guardado de la configuración y carga en `orc.PARAMETROS_CAPTCHA`.
+    - Ajuste completo en el pool de procesos (solo con tesserocr instalado).
+
+Recomendación:
+    Ejecutar con `python -m unittest test/test_ajuste_captcha.py -v`
+"""
+
+from src.ajuste_captcha import candidatos, elegir_umbral_confianza, ajustar, guardar_configuracion
+from src.corpus_captcha import generar_corpus
+from src import orc
+import os
+import tempfile
+import unittest
+import numpy as np
+import HtmlTestRunner
+
+
+class Test_Ajuste_Captcha(unittest.TestCase):
+
+    def setUp(self):
+        self.nv_dir_temp = tempfile.TemporaryDirectory()
+        self.parametros_originales = dict(orc.PARAMETROS_CAPTCHA)
+
+    def tearDown(self):
+        orc.PARAMETROS_CAPTCHA.clear()
+        orc.PARAMETROS_CAPTCHA.update(self.parametros_originales)
+        self.nv_dir_temp.cleanup()
+
+    def test_candidatos(self):
+        print("[Test] Validando rejilla y búsqueda aleatoria...")
+        espacio = {"umbral_fijo": [120, 150], "psm": [7, 8, 13]}
+        rejilla = candidatos(espacio)
+        self.assertEqual(len(rejilla), 6)
+        self.assertIn({"umbral_fijo": 150, "psm": 13}, rejilla)
+
+        aleatorio = candidatos(espacio, aleatorio=4, semilla=1)
+        self.assertEqual(len(aleatorio), 4)
+        self.assertEqual(len({tuple(c.items()) for c in aleatorio}), 4, "La búsqueda aleatoria repitió combinaciones")
+        self.assertTrue(all(c in rejilla for c in aleatorio))
+        self.assertEqual(aleatorio, candidatos(espacio, aleatorio=4, semilla=1), "La búsqueda aleatoria no es reproducible")
+        self.assertEqual(len(candidatos(espacio, aleatorio=50)), 6)
+
+    def test_elegir_umbral_confianza(self):
+        print("[Test] Validando elección del umbral de confianza...")
+        lecturas = [("AB12", "AB12", 90), ("CD34", "CD34", 80), ("EF56", "EF5G", 40), ("GH78", "GH7B", 30)]
+        self.assertEqual(elegir_umbral_confianza(lecturas), 45)
+        self.assertEqual(elegir_umbral_confianza([("AB12", "AB12", 10)]), 0)
+
+    def test_parametros_variantes(self):
+        print("[Test] Validando parámetros del preprocesamiento...")
+        gris = np.tile(np.arange(0, 250, 10, dtype=np.uint8), (10, 1))
+        fijo = orc.generar_variantes(gris, ["fijo"], {"umbral_fijo": 100})["fijo"]
+        self.assertTrue(np.array_equal(fijo, np.where(gris > 100, 255, 0).astype(np.uint8)))
+
+        ruidosa = np.full((20, 20), 255, np.uint8)
+        ruidosa[10, 10] = 0
+        self.assertEqual(orc.generar_variantes(ruidosa, ["fijo"])["fijo"][10, 10], 0)
+        self.assertEqual(orc.generar_variantes(ruidosa, ["fijo"], {"kernel_cierre": 3})["fijo"][10, 10], 255,
+                         "El cierre morfológico no eliminó el punto de ruido")
+
+    def test_guardar_y_cargar_configuracion(self):
+        print("[Test] Validando carga de la configuración ajustada...")
+        ruta = guardar_configuracion({"precision": 0.5, "parametros": {"umbral_fijo": 170, "psm": 7, "desconocido": 1}},
+                                     os.path.join(self.nv_dir_temp.name, "captcha_config.json"))
+        parametros = orc.cargar_configuracion_captcha(ruta)
+        self.assertEqual((parametros["umbral_fijo"], parametros["psm"]), (170, 7))
+        self.assertNotIn("desconocido", parametros)
+        self.assertEqual(orc.cargar_configuracion_captcha(os.path.join(self.nv_dir_temp.name, "no_existe.json")), parametros)
+
+        orc.PARAMETROS_CAPTCHA.update({"longitud_minima": 5, "longitud_maxima": 5})
+        self.assertTrue(orc.texto_aceptable("AB12C"))
+        self.assertFalse(orc.texto_aceptable("AB12"))
+
+    @unittest.skipUnless(orc.tesserocr is not None and "eng" in (orc.tesserocr.get_languages()[1] if orc.tesserocr else []),
+                         "tesserocr o su idioma 'eng' no están instalados")
+    def test_ajustar(self):
+        print("[Test] Validando ajuste en el pool de procesos...")
+        corpus = os.path.join(self.nv_dir_temp.name, "corpus")
+        generar_corpus(corpus, 8, "facil", semilla=5)
+        configuracion = ajustar(corpus, "tesserocr", {"umbral_fijo": [130, 170], "variantes": [["fijo"]]}, workers=2)
+        self.assertEqual(configuracion["combinaciones_evaluadas"], 2)
+        self.assertIn(configuracion["parametros"]["umbral_fijo"], (130, 170))
+        self.assertEqual((configuracion["parametros"]["longitud_minima"], configuracion["parametros"]["longitud_maxima"]), (5, 5))
+        self.assertEqual(configuracion["precision"], configuracion["ranking"][0]["precision"])
+
+
+if __name__ == '__main__':
+    ruta_report = os.path.join(os.path.dirname(__file__), "reports")
+    unittest.main(
+        testRunner=HtmlTestRunner.HTMLTestRunner(
+            output=ruta_report,
+            report_title='Resultados_Test_Ajuste_Captcha',
+            combine_reports=True,
+            add_timestamp=True,
+            verbosity=2
+        )
+    )
@@ -0,0 +1,160 @@
+"""
+Módulo de pruebas unitarias para `src/batch.py`.
+
+Verifica la lectura, validación y ejecución en paralelo del modo por lotes
+sin abrir navegadores (se inyecta una función de consulta simulada).
+
+Casos principales:
+    - Lectura de archivos CSV y JSONL.
+    - Validación y normalización de filas (cédula, día, mes y año).
+    - Rechazo de filas inválidas antes de ejecutar consultas.
+    - Ejecución paralela con entrega de todos los resultados, con las esperas y
+      los viajes al WebDriver de cada consulta en su fila.
+    - Consultas con `error` (PDF sin parsear o sin guardar) se marcan "falló".
+    - Reencolado de consultas que liberan su sesión (captcha manual vencido).
+    - Página de captchas manuales en un puerto libre si el indicado está ocupado.
+
+Recomendación:
+    Ejecutar con `python -m unittest test/test_batch.py -v`
+"""
+
+from src.batch import leer_filas, validar_fila, cargar_lote, ejecutar_lote, iniciar_servidor_manual
+from src.cola_manual import ColaCaptchaManual
+from datetime import datetime
+import os
+import json
+import socket
+import tempfile
+import threading
+import time
+import unittest
+import HtmlTestRunner
+
+
+class Test_Batch(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.nv_dir_temp = tempfile.TemporaryDirectory()
+
+        cls.csv_ruta = os.path.join(cls.nv_dir_temp.name, "lote.csv")
+        with open(cls.csv_ruta, "w", encoding="utf-8") as f:
+            f.write("cedula,dia,mes,año\n")
+            f.write("1111111111,5,marzo,2011\n")
+            f.write("12ab,01,enero,2010\n")
+            f.write("2222222222,31,febrero,2015\n")
+
+        cls.jsonl_ruta = os.path.join(cls.nv_dir_temp.name, "lote.jsonl")
+        with open(cls.jsonl_ruta, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"cedula": "3333333333", "dia": "12", "mes": "7", "anio": "2001"}) + "\n")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.nv_dir_temp.cleanup()
+
+    def test_leer_filas(self):
+        print("[Test] Validando lectura CSV y JSONL...")
+        self.assertEqual(len(list(leer_filas(self.csv_ruta))), 3, "No se leyeron todas las filas del CSV")
+        self.assertEqual(len(list(leer_filas(self.jsonl_ruta))), 1, "No se leyeron todas las filas del JSONL")
+
+    def test_validar_fila(self):
+        print("[Test] Validando normalización de filas...")
+        datos, error = validar_fila({"cedula": "1111111111", "dia": "5", "mes": "3", "year": "2011"})
+        self.assertIsNone(error)
+        self.assertEqual(datos["dia_expedicion_cedula"], "05")
+        self.assertEqual(datos["mes_expedicion_cedula"], "marzo")
+
+        _, error = validar_fila({"cedula": "1", "dia": "1", "mes": "enero", "año": str(datetime.today().year + 1)})
+        self.assertIsNotNone(error, "Se aceptó un año futuro")
+        _, error = validar_fila({"cedula": "1", "dia": "1", "mes": "enero"})
+        self.assertIsNotNone(error, "Se aceptó una fila sin año")
+
+    def test_cargar_lote(self):
+        print("[Test] Validando separación de filas válidas e inválidas...")
+        validas, invalidas = cargar_lote(self.csv_ruta)
+        self.assertEqual(len(validas), 1)
+        self.assertEqual([i["fila"] for i in invalidas], [2, 3])
+
+    def test_ejecutar_lote(self):
+        print("[Test] Validando ejecución paralela del lote...")
+        hilos = set()
+
+        def consulta_simulada(driver, numero_cedula, **kwargs):
+            hilos.add(threading.get_ident())
+            time.sleep(0.05)
+            if numero_cedula == "10000003":
+                return None
+            return {"db": "db", "json": numero_cedula, "viajes": 12,
+                    "esperas": [{"espera": "resultado_captcha", "resultado": "aceptado", "segundos": 0.2}]}
+
+        filas = [(i, {"numero_cedula": f"1000000{i}", "dia_expedicion_cedula": "01",
+                      "mes_expedicion_cedula": "enero", "year_expedicion_cedula": "2000"}) for i in range(1, 11)]
+        resultados = list(ejecutar_lote(filas, workers=3, consulta=consulta_simulada, fabrica_driver=lambda: None))
+
+        self.assertEqual(len(resultados), 10, "No se ejecutaron todas las consultas")
+        self.assertEqual(sum(r["resultado"] == "ok" for r in resultados), 9)
+        self.assertGreater(len(hilos), 1, "Las consultas no se ejecutaron en paralelo")
+        ok = next(r for r in resultados if r["resultado"] == "ok")
+        self.assertEqual(ok["esperas"][0]["espera"], "resultado_captcha", "Las esperas no llegaron a la fila")
+        self.assertEqual((ok["viajes"], set(ok["rutas"])), (12, {"db", "json"}))
+
+    def test_resultado_con_error(self):
+        print("[Test] Validando que un resultado con error no cuenta como exitoso...")
+        respuestas = {"10000001": {"error": "Pdf no contiene texto para gestionar"},
+                      "10000002": {"db": {"error": "disk I/O error"}, "json": "ruta.json"},
+                      "10000003": {"db": "db", "json": "ruta.json"}}
+        filas = [(i, {"numero_cedula": f"1000000{i}", "dia_expedicion_cedula": "01",
+                      "mes_expedicion_cedula": "enero", "year_expedicion_cedula": "2000"}) for i in range(1, 4)]
+        resultados = {r["fila"]: r for r in ejecutar_lote(filas, workers=2, fabrica_driver=lambda: None,
+                                                          consulta=lambda driver, numero_cedula, **kwargs: respuestas[numero_cedula])}
+        self.assertEqual((resultados[1]["resultado"], resultados[1]["error"]), ("falló", "Pdf no contiene texto para gestionar"))
+        self.assertEqual((resultados[2]["resultado"], resultados[2]["error"], resultados[2]["rutas"]), ("falló", "disk I/O error", None))
+        self.assertEqual(resultados[3]["resultado"], "ok")
+        self.assertNotIn("error", resultados[3])
+
+    def test_reencolar(self):
+        print("[Test] Validando reencolado de consultas que liberan su sesión...")
+        intentos = {}
+
+        def consulta_simulada(driver, numero_cedula, **kwargs):
+            intentos[numero_cedula] = intentos.get(numero_cedula, 0) + 1
+            if numero_cedula == "10000001" or (numero_cedula == "10000002" and intentos[numero_cedula] == 1):
+                return {"reencolar": True, "motivo": "captcha_manual_vencido"}
+            return {"db": "db", "json": numero_cedula}
+
+        filas = [(i, {"numero_cedula": f"1000000{i}", "dia_expedicion_cedula": "01",
+                      "mes_expedicion_cedula": "enero", "year_expedicion_cedula": "2000"}) for i in range(1, 4)]
+        resultados = {r["fila"]: r for r in ejecutar_lote(filas, workers=2, consulta=consulta_simulada,
+                                                          fabrica_driver=lambda: None, max_reencolados=1)}
+
+        self.assertEqual(len(resultados), 3)
+        self.assertEqual((resultados[1]["resultado"], intentos["10000001"]), ("reencolada", 2))
+        self.assertEqual((resultados[2]["resultado"], intentos["10000002"]), ("ok", 2))
+        self.assertEqual((resultados[3]["resultado"], intentos["10000003"]), ("ok", 1))
+
+    def test_servidor_manual_puerto_ocupado(self):
+        print("[Test] Validando la página de captchas manuales con el puerto ocupado...")
+        cola = ColaCaptchaManual(os.path.join(self.nv_dir_temp.name, "cola.sqlite"))
+        with socket.socket() as ocupado:
+            ocupado.bind(("127.0.0.1", 0))
+            ocupado.listen()
+            puerto = ocupado.getsockname()[1]
+            servidor = iniciar_servidor_manual(cola, puerto)
+            try:
+                self.assertNotIn(f":{puerto}/", servidor.url)
+            finally:
+                servidor.detener()
+                cola.cerrar()
+
+
+if __name__ == '__main__':
+    ruta_report = os.path.join(os.path.dirname(__file__), "reports")
+    unittest.main(
+        testRunner=HtmlTestRunner.HTMLTestRunner(
+            output=ruta_report,
+            report_title='Resultados_Test_Batch',
+            combine_reports=True,
+            add_timestamp=True,
+            verbosity=2
+        )
+    )
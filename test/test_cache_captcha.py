@@ -0,0 +1,171 @@
+"""
+Módulo de pruebas unitarias para `src/cache_captcha.py`.
+
+Verifica la huella perceptual de los captchas y la caché SQLite de respuestas
+aceptadas, sin navegador ni Tesseract instalados.
+
+Casos principales:
+    - Huella estable ante recompresión y distinta entre captchas diferentes.
+    - Registro solo de respuestas confirmadas y eliminación de las rechazadas.
+    - Desalojo LRU al superar la capacidad.
+    - Búsqueda de huellas parecidas por bandas indexadas (sin recorrer la tabla),
+      también en bases creadas antes de las bandas.
+    - Métricas de tasa de aciertos.
+    - `resolver_captcha` devuelve la respuesta de la caché sin OCR.
+
+Recomendación:
+    Ejecutar con `python -m unittest test/test_cache_captcha.py -v`
+"""
+
+from PIL import Image
+from src.cache_captcha import CacheCaptcha, huella_perceptual, distancia_hamming, DISTANCIA_MAXIMA, BANDAS_HUELLA
+from src import cache_captcha
+from unittest import mock
+from src.servidor_simulado import generar_imagen_captcha
+from src.orc import bytes_a_gris, resolver_captcha
+from src import orc
+from test.test_orc import DriverSimulado
+import base64
+import io
+import os
+import random
+import sqlite3
+import tempfile
+import unittest
+import HtmlTestRunner
+
+
+class Test_Cache_Captcha(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        rng = random.Random(3)
+        cls.captchas = [generar_imagen_captcha(dificultad="media", rng=rng) for _ in range(40)]
+        cls.grises = [bytes_a_gris(png) for _, png in cls.captchas]
+
+    def setUp(self):
+        self.nv_dir_temp = tempfile.TemporaryDirectory()
+        self.cache = CacheCaptcha(os.path.join(self.nv_dir_temp.name, "cache.sqlite"), capacidad=3)
+
+    def tearDown(self):
+        self.cache.cerrar()
+        self.nv_dir_temp.cleanup()
+
+    def test_huella_perceptual(self):
+        print("[Test] Validando huella perceptual...")
+        _, png = self.captchas[0]
+        buffer = io.BytesIO()
+        Image.open(io.BytesIO(png)).convert("RGB").save(buffer, format="JPEG", quality=95)
+        huella = huella_perceptual(self.grises[0])
+        self.assertLessEqual(distancia_hamming(huella, huella_perceptual(bytes_a_gris(buffer.getvalue()))), DISTANCIA_MAXIMA,
+                             "La recompresión cambió demasiado la huella")
+        huellas = [huella_perceptual(gris) for gris in self.grises]
+        distancias = [distancia_hamming(a, b) for i, a in enumerate(huellas) for b in huellas[:i]]
+        self.assertGreater(min(distancias), DISTANCIA_MAXIMA, "Captchas distintos comparten huella")
+
+    def test_confirmar_y_rechazar(self):
+        print("[Test] Validando registro de respuestas aceptadas...")
+        texto, _ = self.captchas[0]
+        self.assertIsNone(self.cache.buscar(self.grises[0]))
+        self.cache.rechazar()
+        self.assertIsNone(self.cache.buscar(self.grises[0]), "Se guardó una respuesta rechazada")
+        self.cache.confirmar(texto)
+        self.assertEqual(self.cache.buscar(self.grises[0]), texto)
+
+        self.cache.rechazar()
+        self.assertIsNone(self.cache.buscar(self.grises[0]), "La respuesta rechazada sigue en la caché")
+        self.assertEqual(self.cache.metricas()["rechazadas"], 1)
+
+    def registrar_huellas(self, cache, huellas):
+        for i, huella in enumerate(huellas):
+            with mock.patch.object(cache_captcha, "huella_perceptual", return_value=huella):
+                cache.buscar(self.grises[0])
+            cache.confirmar(f"R{i}")
+
+    def buscar_huella(self, cache, huella):
+        with mock.patch.object(cache_captcha, "huella_perceptual", return_value=huella):
+            return cache.buscar(self.grises[0])
+
+    def test_busqueda_por_bandas(self):
+        print("[Test] Validando búsqueda de huellas parecidas por bandas...")
+        rng = random.Random(9)
+        huellas = [f"{rng.getrandbits(256):064x}" for _ in range(300)]
+        with CacheCaptcha(os.path.join(self.nv_dir_temp.name, "bandas.sqlite")) as cache:
+            self.registrar_huellas(cache, huellas)
+            # DISTANCIA_MAXIMA bits distintos, cada uno en una banda diferente
+            parecida = int(huellas[0], 16)
+            for banda in range(DISTANCIA_MAXIMA):
+                parecida ^= 1 << (banda * 256 // BANDAS_HUELLA)
+            parecida = f"{parecida:064x}"
+            self.assertEqual(distancia_hamming(parecida, huellas[0]), DISTANCIA_MAXIMA)
+            with mock.patch.object(cache_captcha, "distancia_hamming", wraps=distancia_hamming) as distancia:
+                self.assertEqual(self.buscar_huella(cache, parecida), "R0")
+                self.assertIsNone(self.buscar_huella(cache, f"{rng.getrandbits(256):064x}"))
+            self.assertLess(distancia.call_count, 10, "La búsqueda recorrió toda la tabla")
+
+    def test_bandas_en_base_anterior(self):
+        print("[Test] Validando bandas en una base creada sin ellas...")
+        ruta = os.path.join(self.nv_dir_temp.name, "vieja.sqlite")
+        huella = huella_perceptual(self.grises[0])
+        with sqlite3.connect(ruta) as conn:
+            conn.execute("CREATE TABLE captchas (huella TEXT PRIMARY KEY, respuesta TEXT NOT NULL, "
+                         "usos INTEGER NOT NULL DEFAULT 0, ultimo_uso REAL NOT NULL)")
+            conn.execute("INSERT INTO captchas (huella, respuesta, ultimo_uso) VALUES (?, 'AB12C', 0)", (huella,))
+        conn.close()
+        parecida = f"{int(huella, 16) ^ 1:064x}"
+        with CacheCaptcha(ruta) as cache:
+            self.assertEqual(self.buscar_huella(cache, parecida), "AB12C")
+
+    def test_desalojo_lru(self):
+        print("[Test] Validando desalojo LRU...")
+        for (texto, _), gris in list(zip(self.captchas, self.grises))[:3]:
+            self.cache.buscar(gris)
+            self.cache.confirmar(texto)
+        self.assertEqual(self.cache.buscar(self.grises[0]), self.captchas[0][0])
+        self.cache.confirmar(self.captchas[0][0])
+
+        self.cache.buscar(self.grises[3])
+        self.cache.confirmar(self.captchas[3][0])
+        self.assertEqual(self.cache.metricas()["entradas"], 3)
+        self.assertIsNone(self.cache.buscar(self.grises[1]), "No se desalojó la entrada menos usada")
+        self.assertEqual(self.cache.buscar(self.grises[0]), self.captchas[0][0])
+
+    def test_metricas(self):
+        print("[Test] Validando tasa de aciertos...")
+        texto, _ = self.captchas[0]
+        self.cache.buscar(self.grises[0])
+        self.cache.confirmar(texto)
+        self.cache.buscar(self.grises[0])
+        self.cache.buscar(self.grises[0])
+        self.cache.buscar(self.grises[1])
+        metricas = self.cache.metricas()
+        self.assertEqual((metricas["consultas"], metricas["aciertos"], metricas["fallos"]), (4, 2, 2))
+        self.assertEqual(metricas["tasa_aciertos"], 0.5)
+        self.assertEqual(metricas["registradas"], 1)
+
+    def test_resolver_captcha_desde_cache(self):
+        print("[Test] Validando que resolver_captcha omite el OCR con la caché...")
+        texto, png = self.captchas[0]
+        self.cache.buscar(self.grises[0])
+        self.cache.confirmar(texto)
+
+        leer_original = orc.leer_texto_captcha
+        orc.leer_texto_captcha = lambda *args, **kwargs: self.fail("Se ejecutó el OCR con la respuesta en caché")
+        try:
+            driver = DriverSimulado({"origen": "cache", "datos": base64.b64encode(png).decode()})
+            self.assertEqual(resolver_captcha(driver, cache=self.cache), texto)
+        finally:
+            orc.leer_texto_captcha = leer_original
+
+
+if __name__ == '__main__':
+    ruta_report = os.path.join(os.path.dirname(__file__), "reports")
+    unittest.main(
+        testRunner=HtmlTestRunner.HTMLTestRunner(
+            output=ruta_report,
+            report_title='Resultados_Test_Cache_Captcha',
+            combine_reports=True,
+            add_timestamp=True,
+            verbosity=2
+        )
+    )
@@ -0,0 +1,135 @@
+"""
+Módulo de pruebas unitarias para `src/cache_pdf.py`.
+
+Verifica la caché de certificados parseados indexada por SHA-256 del PDF y su
+uso desde `gestionar_pdf`.
+
+Casos principales:
+    - Aciertos y fallos con sus contadores.
+    - Invalidación de las entradas de otra versión del parser.
+    - Resultados con error no se guardan.
+    - `gestionar_pdf` devuelve el resultado guardado sin abrir el PDF (ruta,
+      bytes u objeto tipo archivo con el mismo contenido).
+    - Al subir `VERSION_PARSER`, el PDF se vuelve a parsear.
+    - El backend es parte de la clave: otro backend vuelve a parsear el PDF.
+    - Una base con el esquema anterior (sin backend) se descarta.
+    - Los procesos del reproceso no cargan Selenium al importar el parser.
+    - Las pruebas no escriben en la caché compartida de `data/`.
+
+Recomendación:
+    Ejecutar con `python -m unittest test/test_cache_pdf.py -v`
+"""
+
+from src.cache_pdf import CachePdf, huella_pdf, RUTA_CACHE_PDF
+from src.utils import DIR_DATA
+from src.create_pdf import crear_pdf_certificado_bytes
+from src import pdf_parser
+from unittest import mock
+import io
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import unittest
+import HtmlTestRunner
+
+
+class Test_Cache_Pdf(unittest.TestCase):
+
+    def setUp(self):
+        self.dir_temp = tempfile.TemporaryDirectory()
+        self.cache = CachePdf(os.path.join(self.dir_temp.name, "pdf_cache.sqlite"))
+        self.pdf = crear_pdf_certificado_bytes("7654321", "9 DE JULIO DE 2015", "TUNJA - BOYACA", "LUIS PEREZ")
+
+    def tearDown(self):
+        self.cache.cerrar()
+        self.dir_temp.cleanup()
+
+    def test_aciertos_y_fallos(self):
+        print("[Test] Validando aciertos, fallos y métricas...")
+        huella = huella_pdf(self.pdf)
+        self.assertEqual(len(huella), 64)
+        self.assertIsNone(self.cache.buscar(huella, 1))
+        self.cache.guardar(huella, 1, {"cedula_ciudadania": "7654321"})
+        self.assertEqual(self.cache.buscar(huella, 1), {"cedula_ciudadania": "7654321"})
+        metricas = self.cache.metricas()
+        self.assertEqual((metricas["consultas"], metricas["aciertos"], metricas["fallos"]), (2, 1, 1))
+        self.assertEqual((metricas["tasa_aciertos"], metricas["guardadas"], metricas["entradas"]), (0.5, 1, 1))
+
+    def test_version_y_errores(self):
+        print("[Test] Validando invalidación por versión y errores no guardados...")
+        self.cache.guardar("a" * 64, 1, {"cedula_ciudadania": "1"})
+        self.assertIsNone(self.cache.buscar("a" * 64, 2))
+        self.assertEqual(self.cache.metricas()["invalidadas"], 1)
+        self.cache.guardar("b" * 64, 2, {"error": "Pdf sin texto para lectura"})
+        self.assertIsNone(self.cache.buscar("b" * 64, 2))
+        self.assertEqual(self.cache.metricas()["entradas"], 1)
+
+    def test_gestionar_pdf_usa_cache(self):
+        print("[Test] Validando que gestionar_pdf no abre el PDF si está en la caché...")
+        ruta = os.path.join(self.dir_temp.name, "certificado.pdf")
+        with open(ruta, "wb") as f:
+            f.write(self.pdf)
+        datos = pdf_parser.gestionar_pdf(ruta, cache=self.cache)
+        self.assertEqual(datos["cedula_ciudadania"], "7654321")
+
+        with mock.patch.object(pdf_parser, "iterar_lineas_pdf", side_effect=AssertionError("se abrió el PDF")):
+            self.assertEqual(pdf_parser.gestionar_pdf(self.pdf, cache=self.cache), datos)
+            self.assertEqual(pdf_parser.gestionar_pdf(io.BytesIO(self.pdf), cache=self.cache), datos)
+        self.assertEqual(self.cache.metricas()["aciertos"], 2)
+
+        with mock.patch.object(pdf_parser, "VERSION_PARSER", pdf_parser.VERSION_PARSER + 1):
+            self.assertEqual(pdf_parser.gestionar_pdf(ruta, cache=self.cache), datos)
+        metricas = self.cache.metricas()
+        self.assertEqual((metricas["invalidadas"], metricas["guardadas"], metricas["entradas"]), (1, 2, 1))
+
+    def test_backend_en_la_clave(self):
+        print("[Test] Validando que la caché distingue el backend...")
+        datos = pdf_parser.gestionar_pdf(self.pdf, backend="pdfplumber", respaldo=None, cache=self.cache)
+        self.assertEqual(self.cache.buscar(huella_pdf(self.pdf), pdf_parser.VERSION_PARSER, "pdfplumber"), datos)
+        self.assertIsNone(self.cache.buscar(huella_pdf(self.pdf), pdf_parser.VERSION_PARSER, "pdfminer"))
+        with mock.patch.object(pdf_parser, "_leer_y_parsear", return_value={"cedula_ciudadania": "otro"}) as leer:
+            self.assertEqual(pdf_parser.gestionar_pdf(self.pdf, backend="pdfminer", respaldo=None, cache=self.cache),
+                             {"cedula_ciudadania": "otro"})
+            self.assertEqual(pdf_parser.gestionar_pdf(self.pdf, backend="pdfplumber", respaldo=None, cache=self.cache), datos)
+        self.assertEqual(leer.call_count, 1)
+        self.assertEqual(self.cache.metricas()["entradas"], 2)
+
+    def test_esquema_anterior(self):
+        print("[Test] Validando que se descarta una caché sin backend en la clave...")
+        ruta = os.path.join(self.dir_temp.name, "vieja.sqlite")
+        with sqlite3.connect(ruta) as conn:
+            conn.execute("CREATE TABLE certificados (huella TEXT PRIMARY KEY, version_parser TEXT NOT NULL, "
+                         "datos TEXT NOT NULL, guardado REAL NOT NULL)")
+            conn.execute("INSERT INTO certificados VALUES ('a', '3', '{}', 0)")
+        conn.close()
+        with CachePdf(ruta) as cache:
+            self.assertEqual(cache.metricas()["entradas"], 0)
+            cache.guardar("a", 3, {"cedula_ciudadania": "1"}, "pdfium")
+            self.assertEqual(cache.buscar("a", 3, "pdfium"), {"cedula_ciudadania": "1"})
+
+    def test_importar_sin_selenium(self):
+        print("[Test] Validando que el parser y el reproceso no cargan Selenium...")
+        codigo = ("import sys; import src.pdf_parser, src.cache_pdf, src.reprocesar_pdfs; "
+                  "print(sorted(m for m in ('selenium', 'webdriver_manager', 'src.configuration') if m in sys.modules))")
+        raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        salida = subprocess.run([sys.executable, "-c", codigo], cwd=raiz, capture_output=True, text=True, check=True).stdout
+        self.assertEqual(salida.strip().splitlines()[-1], "[]")
+
+    def test_pruebas_con_cache_temporal(self):
+        print("[Test] Validando que las pruebas no usan la caché compartida...")
+        self.assertNotEqual(os.path.dirname(os.path.abspath(RUTA_CACHE_PDF)), os.path.abspath(DIR_DATA))
+
+
+if __name__ == '__main__':
+    ruta_report = os.path.join(os.path.dirname(__file__), "reports")
+    unittest.main(
+        testRunner=HtmlTestRunner.HTMLTestRunner(
+            output=ruta_report,
+            report_title='Resultados_Test_Cache_Pdf',
+            combine_reports=True,
+            add_timestamp=True,
+            verbosity=2
+        )
+    )
@@ -0,0 +1,104 @@
+"""
+Módulo de pruebas unitarias para `src/clasificador_captcha.py`.
+
+Entrena el clasificador de plantillas con captchas sintéticos del servidor
+simulado y verifica segmentación, precisión, lotes y persistencia del modelo.
+
+Casos principales:
+    - Segmentación de la cantidad correcta de caracteres.
+    - Precisión del clasificador sobre captchas no vistos.
+    - Resolución por lotes idéntica a la individual.
+    - Guardado/carga del modelo y lectura del corpus etiquetado.
+    - Uso del clasificador como resolvedor registrado en `orc`.
+
+Recomendación:
+    Ejecutar con `python -m unittest test/test_clasificador_captcha.py -v`
+"""
+
+from src.clasificador_captcha import (binarizar, segmentar, entrenar, reconocer_lote, reconocer_captcha_plantillas,
+                                      guardar_modelo, cargar_modelo, leer_corpus, leer_gris)
+from src.servidor_simulado import generar_imagen_captcha
+from src.orc import bytes_a_gris, leer_texto_captcha, registrar_resolvedor
+from src import orc
+import os
+import random
+import tempfile
+import unittest
+import numpy as np
+import HtmlTestRunner
+
+
+def corpus_sintetico(cantidad, dificultad, semilla):
+    rng = random.Random(semilla)
+    for _ in range(cantidad):
+        texto, png = generar_imagen_captcha(dificultad=dificultad, rng=rng)
+        yield texto, bytes_a_gris(png)
+
+
+class Test_Clasificador_Captcha(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        muestras = list(corpus_sintetico(400, "facil", 1)) + list(corpus_sintetico(400, "media", 2))
+        cls.modelo = entrenar(muestras)
+        cls.prueba = list(corpus_sintetico(100, "facil", 99))
+
+    def test_segmentar(self):
+        print("[Test] Validando segmentación de caracteres...")
+        correctas = sum(1 for texto, gris in self.prueba if len(segmentar(binarizar(gris))) == len(texto))
+        self.assertGreaterEqual(correctas, 85, "La segmentación falla en demasiados captchas")
+        texto, gris = self.prueba[0]
+        self.assertEqual(len(segmentar(binarizar(gris), len(texto) + 1)), len(texto) + 1, "No se forzó la cantidad esperada")
+
+    def test_precision(self):
+        print("[Test] Validando precisión del clasificador...")
+        resultados = reconocer_lote([gris for _, gris in self.prueba], self.modelo)
+        aciertos = sum(1 for (texto, _), r in zip(self.prueba, resultados) if r["texto"] == texto)
+        self.assertGreaterEqual(aciertos, 80, f"Precisión insuficiente: {aciertos}/100")
+        self.assertTrue(all(0 <= r["confianza"] <= 100 for r in resultados))
+
+    def test_lote_igual_a_individual(self):
+        print("[Test] Validando resolución por lotes...")
+        imagenes = [gris for _, gris in self.prueba[:10]]
+        self.assertEqual(reconocer_lote(imagenes, self.modelo),
+                         [reconocer_captcha_plantillas(gris, self.modelo) for gris in imagenes])
+        self.assertEqual(reconocer_lote([], self.modelo), [])
+
+    def test_guardar_cargar_y_corpus(self):
+        print("[Test] Validando persistencia del modelo y lectura del corpus...")
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = guardar_modelo(self.modelo, os.path.join(directorio, "modelo.npz"))
+            cargado = cargar_modelo(ruta)
+            self.assertTrue(np.array_equal(cargado["plantillas"], self.modelo["plantillas"]))
+            self.assertIs(cargar_modelo(ruta), cargado, "El modelo no se cargó una sola vez")
+
+            for i, (texto, png) in enumerate(generar_imagen_captcha(rng=random.Random(i)) for i in range(3)):
+                with open(os.path.join(directorio, f"{texto}_{i:06d}.png"), "wb") as f:
+                    f.write(png)
+            corpus = list(leer_corpus(directorio))
+            self.assertEqual(len(corpus), 3, "El modelo .npz no debe leerse como imagen")
+            etiqueta, ruta_imagen = corpus[0]
+            self.assertTrue(etiqueta.isalnum() and etiqueta.isupper())
+            self.assertEqual(leer_gris(ruta_imagen).ndim, 2)
+
+    def test_resolvedor_registrado(self):
+        print("[Test] Validando el clasificador como resolvedor de `orc`...")
+        registrar_resolvedor("plantillas_prueba", lambda gris: reconocer_captcha_plantillas(gris, self.modelo))
+        self.addCleanup(orc.RESOLVEDORES_CAPTCHA.pop, "plantillas_prueba", None)
+        texto, gris = self.prueba[0]
+        self.assertIn(leer_texto_captcha(gris, resolvedor="plantillas_prueba", umbral_confianza=0), (texto, None))
+        with self.assertRaises(ValueError):
+            leer_texto_captcha(gris, resolvedor="inexistente")
+
+
+if __name__ == '__main__':
+    ruta_report = os.path.join(os.path.dirname(__file__), "reports")
+    unittest.main(
+        testRunner=HtmlTestRunner.HTMLTestRunner(
+            output=ruta_report,
+            report_title='Resultados_Test_Clasificador_Captcha',
+            combine_reports=True,
+            add_timestamp=True,
+            verbosity=2
+        )
+    )
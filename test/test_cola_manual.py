@@ -0,0 +1,120 @@
+"""
+Módulo de pruebas unitarias para `src/cola_manual.py`.
+
+Verifica la cola SQLite de captchas manuales y su página web local sin
+navegador: el trabajador espera en un hilo mientras la respuesta llega por HTTP.
+
+Casos principales:
+    - Respuesta recibida antes del plazo (despierta la espera).
+    - Vencimiento sin respuesta y rechazo de respuestas tardías.
+    - Página con los captchas pendientes, imagen y formulario de respuesta.
+    - Respuesta desde otro proceso (otra conexión a la misma base).
+    - Límite de esperas simultáneas (`max_esperas`).
+
+Recomendación:
+    Ejecutar con `python -m unittest test/test_cola_manual.py -v`
+"""
+
+from src.cola_manual import ColaCaptchaManual, ServidorCaptchaManual
+from concurrent.futures import ThreadPoolExecutor
+import os
+import requests
+import tempfile
+import time
+import unittest
+import HtmlTestRunner
+
+
+PNG = b"\x89PNG\r\n\x1a\nimagen"
+
+
+class Test_Cola_Manual(unittest.TestCase):
+
+    def setUp(self):
+        self.nv_dir_temp = tempfile.TemporaryDirectory()
+        self.ruta = os.path.join(self.nv_dir_temp.name, "cola.sqlite")
+        self.cola = ColaCaptchaManual(self.ruta, plazo=5)
+
+    def tearDown(self):
+        self.cola.cerrar()
+        self.nv_dir_temp.cleanup()
+
+    def test_respuesta_antes_del_plazo(self):
+        print("[Test] Validando respuesta manual antes del plazo...")
+        id_captcha = self.cola.encolar(PNG, {"cedula": "123"})
+        self.assertEqual([p["id"] for p in self.cola.pendientes()], [id_captcha])
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            espera = executor.submit(self.cola.esperar_respuesta, id_captcha)
+            time.sleep(0.1)
+            inicio = time.monotonic()
+            self.assertTrue(self.cola.responder(id_captcha, " AB12C "))
+            self.assertEqual(espera.result(timeout=5), "AB12C")
+            self.assertLess(time.monotonic() - inicio, 0.4, "La respuesta no despertó la espera")
+        self.assertEqual(self.cola.pendientes(), [])
+        self.assertFalse(self.cola.responder(id_captcha, "OTRA"), "Se aceptó una segunda respuesta")
+
+    def test_vencimiento(self):
+        print("[Test] Validando vencimiento sin respuesta...")
+        id_captcha = self.cola.encolar(PNG, plazo=0.3)
+        inicio = time.monotonic()
+        self.assertIsNone(self.cola.esperar_respuesta(id_captcha))
+        self.assertGreaterEqual(time.monotonic() - inicio, 0.25)
+        self.assertFalse(self.cola.responder(id_captcha, "AB12C"), "Se aceptó una respuesta tardía")
+        self.assertIsNone(self.cola.esperar_respuesta("no_existe"))
+
+    def test_pagina_web(self):
+        print("[Test] Validando la página de captchas pendientes...")
+        id_captcha = self.cola.encolar(PNG, {"cedula": "123"})
+        with ServidorCaptchaManual(self.cola, puerto=0) as servidor:
+            pagina = requests.get(servidor.url, timeout=5)
+            self.assertIn(id_captcha, pagina.text)
+            self.assertIn("cedula: 123", pagina.text)
+            self.assertEqual(requests.get(f"{servidor.url}imagen/{id_captcha}", timeout=5).content, PNG)
+
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                espera = executor.submit(self.cola.esperar_respuesta, id_captcha)
+                respuesta = requests.post(f"{servidor.url}responder", data={"id": id_captcha, "respuesta": "XY34Z"}, timeout=5)
+                self.assertEqual(respuesta.status_code, 200)
+                self.assertEqual(espera.result(timeout=5), "XY34Z")
+            repetida = requests.post(f"{servidor.url}responder", data={"id": id_captcha, "respuesta": "XY34Z"},
+                                     timeout=5, allow_redirects=False)
+            self.assertEqual(repetida.status_code, 409)
+
+    def test_respuesta_desde_otro_proceso(self):
+        print("[Test] Validando respuesta desde otra conexión a la cola...")
+        id_captcha = self.cola.encolar(PNG)
+        otra = ColaCaptchaManual(self.ruta)
+        try:
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                espera = executor.submit(self.cola.esperar_respuesta, id_captcha, 0.05)
+                time.sleep(0.1)
+                self.assertTrue(otra.responder(id_captcha, "QW12E"))
+                self.assertEqual(espera.result(timeout=5), "QW12E")
+        finally:
+            otra.cerrar()
+
+    def test_turnos_de_espera(self):
+        print("[Test] Validando el límite de esperas manuales simultáneas...")
+        cola = ColaCaptchaManual(self.ruta, max_esperas=2)
+        try:
+            self.assertTrue(cola.tomar_turno())
+            self.assertTrue(cola.tomar_turno())
+            self.assertFalse(cola.tomar_turno(), "Se admitió una espera por encima del límite")
+            cola.liberar_turno()
+            self.assertTrue(cola.tomar_turno())
+        finally:
+            cola.cerrar()
+        self.assertTrue(all(self.cola.tomar_turno() for _ in range(10)), "La cola sin límite rechazó una espera")
+
+
+if __name__ == '__main__':
+    ruta_report = os.path.join(os.path.dirname(__file__), "reports")
+    unittest.main(
+        testRunner=HtmlTestRunner.HTMLTestRunner(
+            output=ruta_report,
+            report_title='Resultados_Test_Cola_Manual',
+            combine_reports=True,
+            add_timestamp=True,
+            verbosity=2
+        )
+    )
@@ -0,0 +1,190 @@
+"""
+Módulo de pruebas unitarias para `src/configuration.py`.
+
+Verifica las utilidades de configuración del navegador que no requieren
+abrir Chrome.
+
+Casos principales:
+    - Construcción de patrones de bloqueo de recursos (lista blanca primero).
+    - Aplicación del bloqueo vía CDP con y sin soporte de lista blanca.
+    - Bloqueo por tipo de recurso (`Fetch`) de imágenes sin extensión, sin
+      bloquear el captcha de la lista blanca.
+    - Detección inmediata del PDF descargado (renombrado desde `.crdownload`).
+    - Exclusión de archivos previos y respeto del plazo máximo.
+    - Navegador sin carpeta de descargas en modo PDF solo en memoria.
+
+Recomendación:
+    Ejecutar con `python -m unittest test/test_configuration.py -v`
+"""
+
+from src.configuration import construir_patrones_bloqueo, configurar_bloqueo_recursos, esperar_descarga, esperar_obtener_documento, InterceptorRecursos
+from src import configuration, utils
+from unittest import mock
+import fnmatch
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+import unittest
+import HtmlTestRunner
+
+
+class ConexionCdpSimulada:
+    """
+    Conexión WebSocket con la pestaña: entrega los eventos de `eventos` y registra lo enviado.
+    """
+
+    def __init__(self, eventos):
+        self.eventos = queue.Queue()
+        for evento in eventos:
+            self.eventos.put(json.dumps(evento))
+        self.enviados = []
+
+    def send(self, mensaje):
+        self.enviados.append(json.loads(mensaje))
+
+    def recv(self):
+        mensaje = self.eventos.get()
+        if mensaje is None:
+            raise configuration.websocket.WebSocketConnectionClosedException("cerrada")
+        return mensaje
+
+    def close(self):
+        self.eventos.put(None)
+
+
+def peticion_pausada(id_peticion, url, tipo):
+    return {"method": "Fetch.requestPaused", "params": {"requestId": id_peticion, "resourceType": tipo,
+                                                         "request": {"url": url, "method": "GET"}}}
+
+
+class DriverCdpSimulado:
+    def __init__(self, soporta_lista_blanca=True):
+        self.soporta_lista_blanca = soporta_lista_blanca
+        self.comandos = []
+
+    def execute_cdp_cmd(self, comando, parametros):
+        if comando == "Network.setBlockedURLs" and "urlPatterns" in parametros and not self.soporta_lista_blanca:
+            raise Exception("Invalid parameters")
+        self.comandos.append((comando, parametros))
+
+
+class Test_Configuration(unittest.TestCase):
+
+    def test_crear_driver_sin_descargas(self):
+        print("[Test] Validando navegador sin carpeta de descargas...")
+        driver = DriverCdpSimulado()
+        with mock.patch.object(configuration.webdriver, "Chrome", return_value=driver) as chrome, \
+                mock.patch.object(configuration, "obtener_ruta_descarga") as ruta_descarga, \
+                mock.patch.object(configuration, "copiar_perfil_plantilla", return_value="perfil"), \
+                mock.patch.object(configuration, "resolver_chromedriver", return_value=None):
+            configuration.crear_driver(headless=True, bloquear_recursos=False, descargas=False)
+        ruta_descarga.assert_not_called()
+        self.assertIsNone(driver.download_dir)
+        self.assertNotIn("Page.setDownloadBehavior", [comando for comando, _ in driver.comandos])
+        prefs = chrome.call_args.kwargs["options"].experimental_options["prefs"]
+        self.assertNotIn("download.default_directory", prefs)
+
+    def test_patrones_bloqueo(self):
+        print("[Test] Validando patrones de bloqueo de recursos...")
+        patrones, bloqueados = construir_patrones_bloqueo(tipos=["Stylesheet"])
+        permitidos = [p for p in patrones if not p["block"]]
+
+        self.assertEqual(patrones[:len(permitidos)], permitidos, "La lista blanca no va primero")
+        self.assertIn("*.css", bloqueados)
+        self.assertNotIn("*.png", bloqueados, "Se bloqueó un tipo no solicitado")
+        self.assertTrue(set(utils.dominios_bloqueados) <= set(bloqueados))
+
+    def test_configurar_bloqueo_recursos(self):
+        print("[Test] Validando bloqueo de recursos vía CDP...")
+        driver = DriverCdpSimulado()
+        configurar_bloqueo_recursos(driver)
+        self.assertEqual(driver.comandos[0][0], "Network.enable")
+        self.assertIn("urlPatterns", driver.comandos[1][1])
+
+        driver_antiguo = DriverCdpSimulado(soporta_lista_blanca=False)
+        configurar_bloqueo_recursos(driver_antiguo)
+        self.assertIn("urls", driver_antiguo.comandos[-1][1], "No se usó el bloqueo por URL como respaldo")
+
+    def test_bloqueo_por_tipo_de_recurso(self):
+        print("[Test] Validando bloqueo de una imagen sin extensión por tipo de recurso...")
+        imagen = "http://local/recursos/imagen.ashx?id=3"
+        captcha = "http://local/BotDetectCaptcha.ashx?get=image&c=1"
+        _, bloqueados = construir_patrones_bloqueo()
+        self.assertFalse(any(fnmatch.fnmatchcase(imagen, p) for p in bloqueados), "La imagen ya se bloqueaba por URL")
+
+        conexion = ConexionCdpSimulada([peticion_pausada("1", imagen, "Image"), peticion_pausada("2", captcha, "Image")])
+        driver = DriverCdpSimulado()
+        driver.capabilities = {"goog:chromeOptions": {"debuggerAddress": "localhost:9222"}}
+        with mock.patch.object(configuration, "_url_websocket_pestana", return_value="ws://localhost:9222/devtools/page/1"), \
+                mock.patch.object(configuration.websocket, "create_connection", return_value=conexion):
+            interceptor = configurar_bloqueo_recursos(driver)
+        self.assertIsInstance(interceptor, InterceptorRecursos)
+        self.assertIs(driver.interceptor_recursos, interceptor)
+
+        limite = time.monotonic() + 2
+        while len(conexion.enviados) < 3 and time.monotonic() < limite:
+            time.sleep(0.01)
+        interceptor.cerrar()
+
+        habilitar, *respuestas = conexion.enviados
+        self.assertEqual(habilitar["method"], "Fetch.enable")
+        self.assertEqual({p["resourceType"] for p in habilitar["params"]["patterns"]}, set(utils.tipos_recurso_bloqueados))
+        self.assertEqual([(r["method"], r["params"]["requestId"]) for r in respuestas],
+                         [("Fetch.failRequest", "1"), ("Fetch.continueRequest", "2")],
+                         "La imagen sin extensión no se bloqueó o el captcha no continuó")
+        self.assertEqual(respuestas[0]["params"]["errorReason"], "BlockedByClient")
+        self.assertEqual(interceptor.bloqueados, 1)
+        self.assertFalse(interceptor._hilo.is_alive(), "El hilo del interceptor sigue activo tras cerrar")
+
+    def test_bloqueo_por_tipo_no_disponible(self):
+        print("[Test] Validando que sin conexión con la pestaña queda el bloqueo por URL...")
+        driver = DriverCdpSimulado()
+        driver.capabilities = {}
+        self.assertIsNone(configurar_bloqueo_recursos(driver))
+        self.assertIsNone(driver.interceptor_recursos)
+        self.assertEqual([c for c, _ in driver.comandos], ["Network.enable", "Network.setBlockedURLs"])
+
+    def test_esperar_descarga_por_eventos(self):
+        print("[Test] Validando detección de descarga por eventos...")
+        with tempfile.TemporaryDirectory() as carpeta:
+            open(os.path.join(carpeta, "anterior.pdf"), "w").close()
+            parcial = os.path.join(carpeta, "certificado.pdf.crdownload")
+
+            def simular_descarga():
+                with open(parcial, "w") as f:
+                    f.write("%PDF-1.4")
+                time.sleep(0.3)
+                os.rename(parcial, os.path.join(carpeta, "certificado.pdf"))
+
+            hilo = threading.Thread(target=simular_descarga)
+            hilo.start()
+            resultado = esperar_descarga(carpeta, plazo=5, ignorar={"anterior.pdf"})
+            hilo.join()
+
+            self.assertEqual(os.path.basename(resultado["ruta"]), "certificado.pdf", "No se devolvió el PDF de esta consulta")
+            self.assertLess(resultado["latencia"], 1.0, "La detección tardó demasiado")
+
+    def test_esperar_descarga_plazo(self):
+        print("[Test] Validando plazo máximo de espera...")
+        with tempfile.TemporaryDirectory() as carpeta:
+            open(os.path.join(carpeta, "anterior.pdf"), "w").close()
+            inicio = time.perf_counter()
+            ruta = esperar_obtener_documento(carpeta, plazo=0.3, ignorar={"anterior.pdf"})
+            self.assertIsNone(ruta, "Se devolvió un PDF que no corresponde a la consulta")
+            self.assertLess(time.perf_counter() - inicio, 1.5, "No se respetó el plazo")
+
+
+if __name__ == '__main__':
+    ruta_report = os.path.join(os.path.dirname(__file__), "reports")
+    unittest.main(
+        testRunner=HtmlTestRunner.HTMLTestRunner(
+            output=ruta_report,
+            report_title='Resultados_Test_Configuration',
+            combine_reports=True,
+            add_timestamp=True,
+            verbosity=2
+        )
+    )
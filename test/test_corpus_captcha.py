@@ -0,0 +1,104 @@
+"""
+Módulo de pruebas unitarias para `src/corpus_captcha.py`.
+
+Verifica la generación e importación del corpus etiquetado y la evaluación de
+un resolvedor en el pool de procesos.
+
+Casos principales:
+    - Generación reproducible con nombres `<RESPUESTA>_<número>.png`.
+    - Importación de capturas desde un CSV `archivo,respuesta`.
+    - Distancia de edición para el error por carácter.
+    - Reporte de evaluación con precisión y latencias p50/p95/p99, con las
+      respuestas incorrectas contadas aparte de las excepciones del resolvedor.
+
+Recomendación:
+    Ejecutar con `python -m unittest test/test_corpus_captcha.py -v`
+"""
+
+from src.corpus_captcha import generar_corpus, importar_capturas, distancia_edicion, evaluar_resolvedor
+from src.clasificador_captcha import leer_corpus, leer_gris, entrenar, guardar_modelo
+import csv
+import os
+import tempfile
+import unittest
+import HtmlTestRunner
+
+
+class Test_Corpus_Captcha(unittest.TestCase):
+
+    def setUp(self):
+        self.nv_dir_temp = tempfile.TemporaryDirectory()
+        self.corpus = os.path.join(self.nv_dir_temp.name, "corpus")
+
+    def tearDown(self):
+        self.nv_dir_temp.cleanup()
+
+    def test_generar_corpus(self):
+        print("[Test] Validando generación del corpus...")
+        self.assertEqual(generar_corpus(self.corpus, 20, ["facil", "media"], semilla=3), 20)
+        corpus = list(leer_corpus(self.corpus))
+        self.assertEqual(len(corpus), 20)
+        self.assertTrue(all(etiqueta.isalnum() for etiqueta, _ in corpus))
+
+        otro = os.path.join(self.nv_dir_temp.name, "otro")
+        generar_corpus(otro, 20, ["facil", "media"], semilla=3)
+        self.assertEqual(sorted(os.listdir(self.corpus)), sorted(os.listdir(otro)), "El corpus no es reproducible")
+
+        generar_corpus(self.corpus, 5, semilla=4)
+        self.assertEqual(len(list(leer_corpus(self.corpus))), 25, "Se sobrescribieron imágenes existentes")
+
+    def test_importar_capturas(self):
+        print("[Test] Validando importación de capturas etiquetadas...")
+        origen = os.path.join(self.nv_dir_temp.name, "capturas")
+        generar_corpus(origen, 2, semilla=1)
+        archivos = sorted(os.listdir(origen))
+        etiquetas = os.path.join(origen, "etiquetas.csv")
+        with open(etiquetas, "w", newline="", encoding="utf-8") as f:
+            escritor = csv.writer(f)
+            escritor.writerow(["archivo", "respuesta"])
+            escritor.writerow([archivos[0], "ab12c"])
+            escritor.writerow([archivos[1], ""])
+            escritor.writerow(["no_existe.png", "XYZ12"])
+        self.assertEqual(importar_capturas(etiquetas, self.corpus), {"importadas": 1, "omitidas": 2})
+        self.assertEqual([etiqueta for etiqueta, _ in leer_corpus(self.corpus)], ["AB12C"])
+
+    def test_distancia_edicion(self):
+        print("[Test] Validando distancia de edición...")
+        self.assertEqual(distancia_edicion("AB12C", "AB12C"), 0)
+        self.assertEqual(distancia_edicion("AB12C", "A812C"), 1)
+        self.assertEqual(distancia_edicion("AB12", "AB12C"), 1)
+        self.assertEqual(distancia_edicion("", "ABC"), 3)
+
+    def test_evaluar_resolvedor(self):
+        print("[Test] Validando evaluación del resolvedor en el pool de procesos...")
+        generar_corpus(self.corpus, 300, "facil", semilla=7)
+        corpus = list(leer_corpus(self.corpus))
+        modelo = guardar_modelo(entrenar((etiqueta, leer_gris(ruta)) for etiqueta, ruta in corpus[:250]),
+                                os.path.join(self.nv_dir_temp.name, "modelo.npz"))
+
+        with open(os.path.join(self.corpus, "ABCDE_999999.png"), "wb") as f:
+            f.write(b"no es una imagen")
+
+        reporte = evaluar_resolvedor(self.corpus, "plantillas", workers=2, modelo=modelo)
+        self.assertEqual(reporte["captchas_totales"], 301)
+        self.assertEqual(reporte["captchas_con_excepcion"], 1, "La imagen dañada no se contó como excepción")
+        self.assertEqual(reporte["captchas_resueltos"] + reporte["captchas_incorrectos"], 300)
+        self.assertGreaterEqual(reporte["precision_sin_excepciones"], reporte["precision"])
+        self.assertEqual(len(reporte["detalles"]), 301)
+        self.assertGreater(reporte["precision"], 0.5)
+        self.assertLessEqual(reporte["latencia_ms"]["p50"], reporte["latencia_ms"]["p99"])
+        for clave in ("fecha", "modo", "tiempo_total_segundos", "error_por_caracter", "precision_enviados"):
+            self.assertIn(clave, reporte)
+
+
+if __name__ == '__main__':
+    ruta_report = os.path.join(os.path.dirname(__file__), "reports")
+    unittest.main(
+        testRunner=HtmlTestRunner.HTMLTestRunner(
+            output=ruta_report,
+            report_title='Resultados_Test_Corpus_Captcha',
+            combine_reports=True,
+            add_timestamp=True,
+            verbosity=2
+        )
+    )
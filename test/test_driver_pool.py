@@ -0,0 +1,177 @@
+"""
+Módulo de pruebas unitarias para `src/driver_pool.py`.
+
+Verifica el ciclo de vida de los navegadores del pool sin abrir Chrome
+(se inyecta una fábrica de drivers simulados).
+
+Casos principales:
+    - Reutilización de navegadores calientes entre préstamos.
+    - Carpeta de descargas distinta para cada préstamo, o ninguna en modo solo memoria.
+    - Reciclaje del navegador después de N usos.
+    - Descarte de navegadores que no responden.
+    - Espera de un cupo libre cuando todos los navegadores están prestados.
+    - Cierre del navegador si falla la preparación del préstamo.
+    - Cierre de todos los navegadores al cerrar el pool.
+
+Recomendación:
+    Ejecutar con `python -m unittest test/test_driver_pool.py -v`
+"""
+
+from src.driver_pool import PoolDrivers
+import itertools
+import os
+import threading
+import time
+import unittest
+import HtmlTestRunner
+
+
+class DriverSimulado:
+    """
+    Driver mínimo que imita la interfaz de Selenium usada por el pool.
+    """
+    contador = itertools.count(1)
+
+    def __init__(self):
+        self.id = next(self.contador)
+        self.sano = True
+        self.cerrado = False
+        self.download_dir = None
+        self.comandos_cdp = []
+        self.window_handles = ["principal"]
+        self.switch_to = self
+
+    @property
+    def alert(self):
+        raise Exception("Sin alerta")
+
+    def window(self, ventana):
+        pass
+
+    def execute_script(self, script):
+        if not self.sano:
+            raise Exception("Sesión muerta")
+        return 1
+
+    def execute_cdp_cmd(self, comando, parametros):
+        self.comandos_cdp.append(comando)
+
+    def get(self, url):
+        pass
+
+    def quit(self):
+        self.cerrado = True
+
+
+class Test_Driver_Pool(unittest.TestCase):
+
+    def setUp(self):
+        self.rutas = (f"descarga_{i}" for i in itertools.count(1))
+        self.creados = []
+
+        def fabrica():
+            driver = DriverSimulado()
+            self.creados.append(driver)
+            return driver
+
+        self.pool = PoolDrivers(tamano=2, max_usos=3, fabrica_driver=fabrica, fabrica_ruta_descarga=lambda: next(self.rutas))
+
+    def tearDown(self):
+        self.pool.cerrar()
+
+    def test_reutiliza_driver(self):
+        print("[Test] Validando reutilización de navegadores...")
+        with self.pool.prestar() as primero:
+            pass
+        with self.pool.prestar() as segundo:
+            self.assertIs(primero, segundo, "El navegador no se reutilizó")
+            self.assertIn("Network.clearBrowserCookies", segundo.comandos_cdp, "No se limpió el estado")
+        self.assertEqual(len(self.creados), 1)
+
+    def test_carpeta_descarga_por_prestamo(self):
+        print("[Test] Validando carpeta de descargas por préstamo...")
+        carpetas = []
+        for _ in range(2):
+            with self.pool.prestar() as driver:
+                carpetas.append(driver.download_dir)
+        self.assertEqual(len(set(carpetas)), 2, "Los préstamos comparten carpeta de descargas")
+
+    def test_sin_carpeta_descarga(self):
+        print("[Test] Validando préstamos sin carpeta de descargas...")
+        pool = PoolDrivers(tamano=1, fabrica_driver=DriverSimulado, fabrica_ruta_descarga=self.fail, descargas=False)
+        try:
+            for _ in range(2):
+                with pool.prestar() as driver:
+                    self.assertIsNone(driver.download_dir)
+            self.assertNotIn("Page.setDownloadBehavior", driver.comandos_cdp)
+            self.assertIn("Network.clearBrowserCookies", driver.comandos_cdp, "No se limpió el estado")
+        finally:
+            pool.cerrar()
+
+    def test_recicla_driver(self):
+        print("[Test] Validando reciclaje tras max_usos...")
+        for _ in range(4):
+            with self.pool.prestar():
+                pass
+        self.assertEqual(len(self.creados), 2, "No se recicló el navegador")
+        self.assertTrue(self.creados[0].cerrado, "El navegador reciclado no se cerró")
+
+    def test_descarta_driver_no_sano(self):
+        print("[Test] Validando descarte de navegadores sin respuesta...")
+        with self.pool.prestar() as driver:
+            driver.sano = False
+        with self.pool.prestar() as nuevo:
+            self.assertIsNot(driver, nuevo)
+        self.assertTrue(driver.cerrado)
+
+    def test_limite_y_cierre(self):
+        print("[Test] Validando límite de navegadores y cierre...")
+        d1 = self.pool.adquirir()
+        d2 = self.pool.adquirir()
+        with self.assertRaises(TimeoutError):
+            self.pool.adquirir(timeout=0.05)
+        self.pool.liberar(d1)
+        self.pool.liberar(d2)
+        self.pool.cerrar()
+        self.assertTrue(all(d.cerrado for d in self.creados), "No se cerraron todos los navegadores")
+
+    def test_espera_cupo_libre(self):
+        print("[Test] Validando que un préstamo sin timeout espera un cupo libre...")
+        d1 = self.pool.adquirir()
+        d2 = self.pool.adquirir()
+        liberador = threading.Timer(0.3, self.pool.liberar, args=(d1,))
+        liberador.start()
+        inicio = time.perf_counter()
+        with self.pool.prestar() as driver:
+            self.assertGreaterEqual(time.perf_counter() - inicio, 0.25, "El préstamo no esperó el cupo")
+            self.assertIs(driver, d1)
+        liberador.join()
+        self.pool.liberar(d2)
+
+    def test_cierra_driver_si_falla_preparacion(self):
+        print("[Test] Validando cierre del navegador si falla la preparación...")
+        with self.pool.prestar():
+            pass
+
+        def fallar(comando, parametros):
+            raise Exception("CDP sin respuesta")
+
+        self.creados[0].execute_cdp_cmd = fallar
+        with self.assertRaises(Exception):
+            self.pool.adquirir()
+        self.assertTrue(self.creados[0].cerrado, "El navegador a medio preparar no se cerró")
+        with self.pool.prestar(timeout=0.05) as driver:
+            self.assertIsNot(driver, self.creados[0], "No se devolvió el cupo")
+
+
+if __name__ == '__main__':
+    ruta_report = os.path.join(os.path.dirname(__file__), "reports")
+    unittest.main(
+        testRunner=HtmlTestRunner.HTMLTestRunner(
+            output=ruta_report,
+            report_title='Resultados_Test_Driver_Pool',
+            combine_reports=True,
+            add_timestamp=True,
+            verbosity=2
+        )
+    )
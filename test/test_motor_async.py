@@ -0,0 +1,113 @@
+"""
+Módulo de pruebas unitarias para `src/motor_async.py`.
+
+Levanta un servidor aiohttp local que responde como `Datos.aspx` y verifica
+el motor asíncrono de extremo a extremo, sin red ni navegador.
+
+Casos principales:
+    - Consulta completa asíncrona (formulario, captcha, postback y PDF).
+    - Límite de consultas simultáneas por host.
+    - Entrega de todos los resultados de un lote.
+    - El motor asíncrono no carga Selenium ni `src.configuration`.
+
+Recomendación:
+    Ejecutar con `python -m unittest test/test_motor_async.py -v`
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from aiohttp import web
+from src.motor_async import MotorAsync
+from src.create_pdf import crear_pdf
+from test.test_motor_http import FORMULARIO_HTML, CONFIRMACION_HTML
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+import HtmlTestRunner
+
+
+class Test_Motor_Async(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.nv_dir_temp = tempfile.TemporaryDirectory()
+        with open(crear_pdf(cls.nv_dir_temp.name), "rb") as f:
+            cls.pdf_bytes = f.read()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.nv_dir_temp.cleanup()
+
+    async def _levantar_servidor(self, estado):
+        async def formulario(request):
+            estado["en_vuelo"] += 1
+            estado["max_en_vuelo"] = max(estado["max_en_vuelo"], estado["en_vuelo"])
+            await asyncio.sleep(0.02)
+            estado["en_vuelo"] -= 1
+            return web.Response(text=FORMULARIO_HTML.replace("{script}", ""), content_type="text/html")
+
+        async def captcha(request):
+            return web.Response(body=b"\x89PNG imagen", content_type="image/png")
+
+        async def postback(request):
+            datos = await request.post()
+            if datos.get("ctl00$ContentPlaceHolder1$Button1") == "Generar Certificado":
+                return web.Response(body=self.pdf_bytes, content_type="application/pdf")
+            return web.Response(text=CONFIRMACION_HTML, content_type="text/html")
+
+        app = web.Application()
+        app.router.add_get("/Datos.aspx", formulario)
+        app.router.add_get("/captcha.ashx", captcha)
+        app.router.add_post("/Datos.aspx", postback)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        sitio = web.TCPSite(runner, "127.0.0.1", 0)
+        await sitio.start()
+        puerto = sitio._server.sockets[0].getsockname()[1]
+        return runner, f"http://127.0.0.1:{puerto}/Datos.aspx"
+
+    def test_consulta_lote_async(self):
+        print("[Test] Validando lote asíncrono con límite por host...")
+
+        async def ejecutar():
+            estado = {"en_vuelo": 0, "max_en_vuelo": 0}
+            runner, url = await self._levantar_servidor(estado)
+            filas = [(i, {"numero_cedula": f"100000{i:04d}", "dia_expedicion_cedula": "02",
+                          "mes_expedicion_cedula": "marzo", "year_expedicion_cedula": "2011"}) for i in range(1, 13)]
+            try:
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    async with MotorAsync(max_concurrencia=10, max_por_host=3, executor=executor,
+                                          resolver=lambda imagen: "ABCD") as motor:
+                        resultados = [r async for r in motor.consultar_lote(filas, url=url, result_dir=self.nv_dir_temp.name)]
+            finally:
+                await runner.cleanup()
+            return resultados, estado
+
+        resultados, estado = asyncio.run(ejecutar())
+        self.assertEqual(len(resultados), 12, "No se entregaron todos los resultados")
+        self.assertTrue(all(r["resultado"] == "ok" for r in resultados), "Hubo consultas fallidas")
+        self.assertLessEqual(estado["max_en_vuelo"], 3, "Se superó el límite de consultas por host")
+        self.assertGreater(estado["max_en_vuelo"], 1, "Las consultas no se ejecutaron concurrentemente")
+
+    def test_importar_sin_selenium(self):
+        print("[Test] Validando que el motor asíncrono no carga Selenium...")
+        codigo = ("import sys; import src.motor_async; "
+                  "print(sorted(m for m in ('selenium', 'webdriver_manager', 'src.configuration') if m in sys.modules))")
+        raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        salida = subprocess.run([sys.executable, "-c", codigo], cwd=raiz, capture_output=True, text=True, check=True).stdout
+        self.assertEqual(salida.strip().splitlines()[-1], "[]")
+
+
+if __name__ == '__main__':
+    ruta_report = os.path.join(os.path.dirname(__file__), "reports")
+    unittest.main(
+        testRunner=HtmlTestRunner.HTMLTestRunner(
+            output=ruta_report,
+            report_title='Resultados_Test_Motor_Async',
+            combine_reports=True,
+            add_timestamp=True,
+            verbosity=2
+        )
+    )
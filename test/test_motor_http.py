@@ -0,0 +1,163 @@
+"""
+Módulo de pruebas unitarias para `src/motor_http.py`.
+
+Verifica el análisis del formulario ASP.NET y el flujo de postback del motor
+HTTP usando una sesión simulada (sin red ni navegador).
+
+Casos principales:
+    - Extracción de campos ocultos, selects, botones, captcha y alertas.
+    - Construcción del POST "Continuar" con los valores de las opciones.
+    - Reintento tras captcha incorrecto y descarga del PDF en memoria.
+    - Un PDF que no se puede parsear no se guarda como resultado.
+    - El motor HTTP no carga Selenium ni `src.configuration`.
+
+Recomendación:
+    Ejecutar con `python -m unittest test/test_motor_http.py -v`
+"""
+
+from src.motor_http import analizar_formulario, construir_datos_consulta, construir_datos_generar, consultar_certificado_cedula_http, procesar_pdf_en_memoria
+from src.create_pdf import crear_pdf
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+import HtmlTestRunner
+
+
+FORMULARIO_HTML = """
+<html><body>
+<form method="post" action="./Datos.aspx" id="form1">
+<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="vs&amp;1" />
+<input type="hidden" name="__EVENTVALIDATION" id="__EVENTVALIDATION" value="ev1" />
+<input name="ctl00$ContentPlaceHolder1$TextBox1" type="text" id="ContentPlaceHolder1_TextBox1" />
+<select name="ctl00$ContentPlaceHolder1$DropDownList1" id="ContentPlaceHolder1_DropDownList1">
+    <option value="01">01</option><option value="02">02</option>
+</select>
+<select name="ctl00$ContentPlaceHolder1$DropDownList2" id="ContentPlaceHolder1_DropDownList2">
+    <option value="1">Enero</option><option value="3">Marzo</option>
+</select>
+<select name="ctl00$ContentPlaceHolder1$DropDownList3" id="ContentPlaceHolder1_DropDownList3">
+    <option value="2011">2011</option>
+</select>
+<img id="datos_contentplaceholder1_captcha1_CaptchaImage" src="captcha.ashx?c=1" />
+<input name="ctl00$ContentPlaceHolder1$TextBox2" type="text" id="ContentPlaceHolder1_TextBox2" />
+<input type="submit" name="ctl00$ContentPlaceHolder1$Button1" value="Continuar" id="ContentPlaceHolder1_Button1" />
+</form>
+{script}
+</body></html>
+"""
+
+CONFIRMACION_HTML = """
+<form method="post" action="./Datos.aspx">
+<input type="hidden" name="__VIEWSTATE" value="vs2" />
+<span>La certificación se expedira para el numero de cédula 1111111111</span>
+<input type="submit" name="ctl00$ContentPlaceHolder1$Button1" value="Generar Certificado" id="ContentPlaceHolder1_Button1" />
+</form>
+"""
+
+
+class RespuestaSimulada:
+    def __init__(self, contenido, url="http://local/Datos.aspx"):
+        self.content = contenido if isinstance(contenido, bytes) else contenido.encode("utf-8")
+        self.text = self.content.decode("utf-8", errors="ignore")
+        self.url = url
+        self.headers = {}
+
+    def raise_for_status(self):
+        pass
+
+
+class SesionSimulada:
+    """
+    Sesión que responde como Datos.aspx: el primer código enviado es incorrecto.
+    """
+
+    def __init__(self, pdf_bytes):
+        self.pdf_bytes = pdf_bytes
+        self.posts = []
+
+    def get(self, url, timeout=None):
+        if "captcha" in url:
+            return RespuestaSimulada(b"\x89PNG imagen")
+        return RespuestaSimulada(FORMULARIO_HTML.replace("{script}", ""))
+
+    def post(self, url, data=None, timeout=None):
+        self.posts.append(data)
+        if data.get("ctl00$ContentPlaceHolder1$Button1") == "Generar Certificado":
+            return RespuestaSimulada(self.pdf_bytes)
+        if len(self.posts) == 1:
+            return RespuestaSimulada(FORMULARIO_HTML.replace("{script}", "<script>alert('El código no es válido');</script>"))
+        return RespuestaSimulada(CONFIRMACION_HTML)
+
+
+class Test_Motor_Http(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.nv_dir_temp = tempfile.TemporaryDirectory()
+        with open(crear_pdf(cls.nv_dir_temp.name), "rb") as f:
+            cls.pdf_bytes = f.read()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.nv_dir_temp.cleanup()
+
+    def test_analizar_formulario(self):
+        print("[Test] Validando análisis del formulario ASP.NET...")
+        formulario = analizar_formulario(FORMULARIO_HTML.replace("{script}", "<script>alert('Código incorrecto')</script>"))
+        self.assertEqual(formulario["campos"]["__VIEWSTATE"], "vs&1", "No se decodificó el __VIEWSTATE")
+        self.assertEqual(formulario["captcha_src"], "captcha.ashx?c=1")
+        self.assertEqual(formulario["alerta"], "Código incorrecto")
+        self.assertIn("Continuar", formulario["botones"])
+        self.assertEqual(len(formulario["selects"]["ContentPlaceHolder1_DropDownList2"]["opciones"]), 2)
+
+    def test_construir_datos(self):
+        print("[Test] Validando construcción de los POST...")
+        formulario = analizar_formulario(FORMULARIO_HTML.replace("{script}", ""))
+        datos = construir_datos_consulta(formulario, "1111111111", "02", "marzo", "2011", "ABCD")
+        self.assertEqual(datos["ctl00$ContentPlaceHolder1$DropDownList2"], "3", "No se tradujo el mes al valor de la opción")
+        self.assertEqual(datos["ctl00$ContentPlaceHolder1$TextBox2"], "ABCD")
+        self.assertEqual(datos["ctl00$ContentPlaceHolder1$Button1"], "Continuar")
+        self.assertEqual(datos["__EVENTVALIDATION"], "ev1")
+
+        self.assertIsNone(construir_datos_generar(formulario))
+        generar = construir_datos_generar(analizar_formulario(CONFIRMACION_HTML))
+        self.assertEqual(generar["ctl00$ContentPlaceHolder1$Button1"], "Generar Certificado")
+
+    def test_consulta_http_completa(self):
+        print("[Test] Validando flujo HTTP completo con reintento de captcha...")
+        sesion = SesionSimulada(self.pdf_bytes)
+        resultado = consultar_certificado_cedula_http("1111111111", "02", "marzo", "2011", sesion=sesion,
+                                                      url="http://local/Datos.aspx", resolver=lambda imagen: "ABCD",
+                                                      result_dir=self.nv_dir_temp.name)
+        self.assertIsInstance(resultado, dict, "No se obtuvo el resultado de almacenamiento")
+        self.assertTrue(os.path.exists(resultado["json"]), "No se guardó el json")
+        self.assertEqual(len(sesion.posts), 3, "No se reintentó tras el captcha incorrecto")
+
+    def test_pdf_sin_parsear(self):
+        print("[Test] Validando que un PDF ilegible no se guarda...")
+        with tempfile.TemporaryDirectory() as result_dir:
+            self.assertIsNone(procesar_pdf_en_memoria(b"%PDF-1.4 roto", "1111111111", result_dir=result_dir))
+            self.assertEqual(os.listdir(result_dir), [], "Se guardó un resultado con error")
+
+    def test_importar_sin_selenium(self):
+        print("[Test] Validando que el motor HTTP no carga Selenium...")
+        codigo = ("import sys; import src.motor_http; "
+                  "print(sorted(m for m in ('selenium', 'webdriver_manager', 'src.configuration') if m in sys.modules))")
+        raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        salida = subprocess.run([sys.executable, "-c", codigo], cwd=raiz, capture_output=True, text=True, check=True).stdout
+        self.assertEqual(salida.strip().splitlines()[-1], "[]")
+
+
+if __name__ == '__main__':
+    ruta_report = os.path.join(os.path.dirname(__file__), "reports")
+    unittest.main(
+        testRunner=HtmlTestRunner.HTMLTestRunner(
+            output=ruta_report,
+            report_title='Resultados_Test_Motor_Http',
+            combine_reports=True,
+            add_timestamp=True,
+            verbosity=2
+        )
+    )
@@ -0,0 +1,205 @@
+"""
+Módulo de pruebas unitarias para `src/orc.py`.
+
+Verifica la obtención de la imagen del captcha y su decodificación, sin
+navegador ni Tesseract instalados.
+
+Casos principales:
+    - Decodificación directa de bytes a escala de grises (idéntica a Pillow).
+    - Lectura de la imagen original desde la página (caché / canvas).
+    - Uso de la captura de pantalla como último recurso.
+    - Selección del motor de OCR (tesserocr solo si está instalado con su idioma).
+    - Variantes de preprocesamiento (con pytesseract se votan fijo, Otsu y
+      adaptativo, leídas en paralelo), enderezado y votación por confianza sin
+      contar lecturas vacías.
+    - Importación de los módulos de OCR sin cargar Selenium.
+
+Recomendación:
+    Ejecutar con `python -m unittest test/test_orc.py -v`
+"""
+
+from PIL import Image, ImageOps
+from src.orc import bytes_a_gris, obtener_bytes_captcha, ocr_texto, leer_texto_captcha, generar_variantes, enderezar, votar_lecturas, VARIANTES_CAPTCHA
+from src import orc
+from unittest import mock
+from src.servidor_simulado import generar_imagen_captcha
+import base64
+import io
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import unittest
+import cv2
+import numpy as np
+import HtmlTestRunner
+
+
+class ElementoSimulado:
+    def __init__(self, png):
+        self.screenshot_as_png = png
+
+
+class DriverSimulado:
+    """
+    Driver que responde al script de captura con la respuesta indicada.
+    """
+
+    def __init__(self, respuesta, captura=b"captura"):
+        self.respuesta = respuesta
+        self.captura = captura
+
+    def set_script_timeout(self, plazo):
+        pass
+
+    def execute_async_script(self, script, *args):
+        if isinstance(self.respuesta, Exception):
+            raise self.respuesta
+        return self.respuesta
+
+    def find_element(self, by, valor):
+        return ElementoSimulado(self.captura)
+
+
+class Test_Orc(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        _, cls.png = generar_imagen_captcha("AB12C", dificultad="dificil", rng=random.Random(5))
+
+    def test_bytes_a_gris(self):
+        print("[Test] Validando decodificación directa a escala de grises...")
+        gris = bytes_a_gris(self.png)
+        esperado = np.array(ImageOps.grayscale(Image.open(io.BytesIO(self.png))))
+        self.assertEqual(gris.dtype, np.uint8)
+        self.assertEqual(gris.shape, esperado.shape)
+        self.assertLessEqual(int(np.abs(gris.astype(int) - esperado.astype(int)).max()), 1, "La conversión difiere de Pillow")
+
+        buffer = io.BytesIO()
+        Image.open(io.BytesIO(self.png)).save(buffer, format="GIF")
+        self.assertEqual(bytes_a_gris(buffer.getvalue()).shape, esperado.shape, "No se decodificó el GIF")
+
+    def test_obtener_bytes_desde_pagina(self):
+        print("[Test] Validando lectura de la imagen original desde la página...")
+        driver = DriverSimulado({"origen": "cache", "datos": base64.b64encode(self.png).decode()})
+        imagen, origen = obtener_bytes_captcha(driver)
+        self.assertEqual(origen, "cache")
+        self.assertEqual(imagen, self.png, "No se obtuvieron los bytes originales")
+
+    def test_obtener_bytes_respaldo_captura(self):
+        print("[Test] Validando respaldo con captura de pantalla...")
+        for respuesta in ({"error": "La imagen del captcha no está cargada"}, RuntimeError("script timeout")):
+            imagen, origen = obtener_bytes_captcha(DriverSimulado(respuesta, captura=self.png))
+            self.assertEqual(origen, "captura")
+            self.assertEqual(imagen, self.png)
+
+    def test_generar_variantes(self):
+        print("[Test] Validando variantes de preprocesamiento...")
+        gris = bytes_a_gris(self.png)
+        variantes = generar_variantes(gris, VARIANTES_CAPTCHA)
+        self.assertEqual(tuple(variantes), VARIANTES_CAPTCHA)
+        for nombre, binaria in variantes.items():
+            self.assertEqual(binaria.shape, gris.shape, f"Tamaño incorrecto en {nombre}")
+            self.assertTrue(set(np.unique(binaria)) <= {0, 255}, f"La variante {nombre} no es binaria")
+        fijo = generar_variantes(gris, ["fijo"])["fijo"]
+        _, esperado = cv2.threshold(gris, 150, 255, cv2.THRESH_BINARY)
+        self.assertTrue(np.array_equal(fijo, esperado), "La variante fija no coincide con el umbral original")
+        with self.assertRaises(ValueError):
+            generar_variantes(gris, ["otra"])
+
+    def test_enderezar(self):
+        print("[Test] Validando corrección de inclinación...")
+        imagen = np.full((60, 200), 255, np.uint8)
+        imagen[25:35, 20:180] = 0
+        matriz = cv2.getRotationMatrix2D((100, 30), 8, 1.0)
+        inclinada = cv2.warpAffine(imagen, matriz, (200, 60), borderValue=255)
+        enderezada = enderezar(inclinada)
+        filas_oscuras = lambda img: int(np.count_nonzero((img < 128).any(axis=1)))
+        self.assertLess(filas_oscuras(enderezada), filas_oscuras(inclinada), "No se corrigió la inclinación")
+
+    def test_votar_lecturas(self):
+        print("[Test] Validando votación ponderada por confianza...")
+        texto, confianza = votar_lecturas([("AB12", [90, 90, 90, 90]), ("AB1Z", [90, 90, 90, 40]),
+                                           ("A812", [80, 30, 80, 80]), ("AB", [99, 99])])
+        self.assertEqual(texto, "AB12")
+        self.assertAlmostEqual(confianza, (90 + 80) / 4)
+        self.assertEqual(votar_lecturas([("", []), ("", [])]), ("", 0.0))
+        self.assertEqual(votar_lecturas([("AB12", [90, 90, 90, 90]), ("", []), ("", [])]), ("AB12", 90.0),
+                         "Las lecturas vacías bajaron la confianza")
+
+    def test_variantes_por_motor(self):
+        print("[Test] Validando variantes leídas por defecto con cada motor...")
+        gris = bytes_a_gris(self.png)
+        for motor, esperadas in orc.VARIANTES_POR_MOTOR.items():
+            with mock.patch.object(orc, "ocr_con_confianza", return_value=("AB12", [90.0] * 4)) as ocr:
+                resultado = orc.reconocer_captcha(gris, motor=motor)
+            self.assertEqual(tuple(resultado["lecturas"]), tuple(esperadas))
+            self.assertEqual(ocr.call_count, len(esperadas))
+        with mock.patch.object(orc, "ocr_con_confianza", return_value=("AB12", [90.0] * 4)):
+            self.assertEqual(len(orc.reconocer_captcha(gris, motor="pytesseract", variantes=VARIANTES_CAPTCHA)["lecturas"]),
+                             len(VARIANTES_CAPTCHA), "No se respetaron las variantes indicadas")
+
+    def test_votacion_por_defecto(self):
+        print("[Test] Validando que el camino por defecto vota entre varias variantes en paralelo...")
+        gris = bytes_a_gris(self.png)
+        hilos = set()
+        llamadas = []
+        lock = threading.Lock()
+
+        def ocr_simulado(binaria, motor, psm):
+            with lock:
+                hilos.add(threading.get_ident())
+                llamadas.append(binaria)
+                # La primera lectura es distinta y pierde la votación frente a las demás
+                texto = "AB1Z" if len(llamadas) == 1 else "AB12"
+            time.sleep(0.2)
+            return texto, [90.0] * 4
+
+        with mock.patch.object(orc, "MOTOR_OCR", "pytesseract"), \
+                mock.patch.object(orc, "ocr_con_confianza", side_effect=ocr_simulado):
+            inicio = time.monotonic()
+            resultado = orc.reconocer_captcha(gris)
+            duracion = time.monotonic() - inicio
+        self.assertGreaterEqual(len(resultado["lecturas"]), 2, "El camino por defecto no vota entre variantes")
+        self.assertTrue({"otsu", "adaptativo"} <= set(resultado["lecturas"]))
+        self.assertEqual(resultado["texto"], "AB12")
+        if (os.cpu_count() or 1) > 1:
+            self.assertLess(duracion, 0.2 * len(resultado["lecturas"]), "Las variantes no se leyeron en paralelo")
+            self.assertGreater(len(hilos), 1)
+
+    def test_importar_sin_selenium(self):
+        print("[Test] Validando que los módulos de OCR no cargan Selenium...")
+        codigo = ("import sys; import src.orc, src.cache_captcha, src.cola_manual, src.clasificador_captcha, src.servicio_ocr; "
+                  "print(sorted(m for m in ('selenium', 'webdriver_manager', 'src.configuration') if m in sys.modules))")
+        raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        salida = subprocess.run([sys.executable, "-c", codigo], cwd=raiz, capture_output=True, text=True, check=True).stdout
+        self.assertEqual(salida.strip().splitlines()[-1], "[]")
+
+    def test_motor_desconocido(self):
+        print("[Test] Validando selección de motor de OCR...")
+        with self.assertRaises(ValueError):
+            ocr_texto(bytes_a_gris(self.png), motor="otro")
+
+    @unittest.skipUnless(orc.tesserocr is not None and "eng" in (orc.tesserocr.get_languages()[1] if orc.tesserocr else []),
+                         "tesserocr o su idioma 'eng' no están instalados")
+    def test_motor_tesserocr(self):
+        print("[Test] Validando motor tesserocr en el mismo proceso...")
+        _, png = generar_imagen_captcha("HX47K", dificultad="facil", rng=random.Random(11))
+        texto = leer_texto_captcha(bytes_a_gris(png), motor="tesserocr", umbral_confianza=0)
+        self.assertEqual(texto, "HX47K", "tesserocr no leyó el captcha fácil")
+        self.assertIs(orc._api_tesseract(), orc._api_tesseract(), "No se reutilizó la instancia del hilo")
+
+
+if __name__ == '__main__':
+    ruta_report = os.path.join(os.path.dirname(__file__), "reports")
+    unittest.main(
+        testRunner=HtmlTestRunner.HTMLTestRunner(
+            output=ruta_report,
+            report_title='Resultados_Test_Orc',
+            combine_reports=True,
+            add_timestamp=True,
+            verbosity=2
+        )
+    )
@@ -74,7 +74,7 @@ class Test_Parallel(unittest.TestCase):
             return {
                 "id_prueba": id_prueba,
                 "cedula": cedula,
-                "resultado": 'ok' if resultado else 'falló',
+                "resultado": 'ok' if resultado and "error" not in resultado and not resultado.get("reencolar") else 'falló',
                 "tiempo": duracion
             }
 
@@ -9,14 +9,25 @@ Casos principales:
     - Detección y manejo de PDFs vacíos o ilegibles.
     - Parseo de información clave: número de cédula, nombre, fecha, lugar y estado.
     - Validación del formato final de los datos obtenidos.
+    - Procesamiento de PDFs recibidos en memoria (`BytesIO` o `bytes`).
+    - Lectura por flujo: mismo resultado que el texto completo y sin leer las
+      páginas posteriores a la que completa los campos.
+    - Backends de extracción (pdfium, pdfminer, pdfplumber) con el mismo resultado,
+      respaldo con pdfplumber cuando faltan campos y lectura concurrente con pdfium.
+    - Etiquetas con variantes de tildes, mayúsculas y espacios; normalización de
+      cédula, fecha ISO y lugar; estado de validación por campo.
 
 Recomendación:
     Ejecutar con `python -m unittest test/test_pdf_extraccion.py -v`
 """
 
-from src.pdf_parser import gestionar_pdf,parsear_documento_pdf,leer_documento_pdf
-from src.create_pdf import crear_pdf, crear_pdf_vacio
+from src.pdf_parser import gestionar_pdf,parsear_documento_pdf,leer_documento_pdf,iterar_lineas_pdf,parsear_lineas_pdf,registrar_backend_pdf,BACKENDS_PDF
+from concurrent.futures import ThreadPoolExecutor
+from src.create_pdf import crear_pdf, crear_pdf_vacio, crear_pdf_certificado_bytes
+from unittest import mock
+import io
 import os
+import pdfplumber
 import HtmlTestRunner
 import tempfile
 import unittest
@@ -73,7 +84,108 @@ class Test_Pdf_Extraccion(unittest.TestCase):
         self.assertIn("estado_cedula", self.result,"No se tiene el estado del documento")
         self.assertEqual(self.result["estado_cedula"],'Vigente', "No esta vigente")
         self.assertTrue(self.result["cedula_ciudadania"].isdigit(), "Error, No es contiene solo digitos")
-        self.assertIn("-",self.result.get("fecha_expedida"))
+        self.assertEqual(self.result.get("fecha_expedida"), "2020-12-31")
+
+    def test_gestionar_pdf_en_memoria(self):
+        print("[Test]... Validando gestionar pdf desde memoria")
+
+        with open(self.pdf_ruta, "rb") as f:
+            self.result_memoria = gestionar_pdf(io.BytesIO(f.read()))
+
+        self.assertEqual(self.result_memoria, gestionar_pdf(self.pdf_ruta), "El resultado en memoria difiere del de disco")
+
+    def test_gestionar_pdf_bytes(self):
+        print("[Test]... Validando gestionar pdf desde bytes")
+
+        with open(self.pdf_ruta, "rb") as f:
+            self.assertEqual(gestionar_pdf(f.read()), gestionar_pdf(self.pdf_ruta), "El resultado desde bytes difiere del de disco")
+
+    def test_flujo_igual_a_texto_completo(self):
+        print("[Test]... Validando lectura por flujo frente al texto completo")
+
+        datos, leidas = parsear_lineas_pdf(iterar_lineas_pdf(self.pdf_ruta))
+        self.assertEqual(datos, parsear_documento_pdf(leer_documento_pdf(self.pdf_ruta)))
+        self.assertGreater(leidas, 0)
+
+    def test_flujo_termina_en_primera_pagina(self):
+        print("[Test]... Validando que la lectura por flujo no lee páginas de más")
+
+        pdf = crear_pdf_certificado_bytes("1234567", "5 DE MAYO DE 2010", "CALI - VALLE", "ANA ROJAS", paginas_extra=3)
+        lineas_totales = len(leer_documento_pdf(pdf).splitlines())
+
+        extraer_original = pdfplumber.page.Page.extract_text
+        paginas_extraidas = []
+        def extraer_contando(pagina, *args, **kwargs):
+            paginas_extraidas.append(pagina.page_number)
+            return extraer_original(pagina, *args, **kwargs)
+
+        with mock.patch.object(pdfplumber.page.Page, "extract_text", extraer_contando):
+            datos, leidas = parsear_lineas_pdf(iterar_lineas_pdf(pdf, "pdfplumber"))
+        self.assertEqual(datos["cedula_ciudadania"], "1234567")
+        self.assertEqual(datos["estado_cedula"], "Vigente")
+        self.assertLess(leidas, lineas_totales)
+        self.assertEqual(paginas_extraidas, [1], "Se extrajeron páginas después de completar los campos")
+
+    def test_backends_mismo_resultado(self):
+        print("[Test]... Validando que todos los backends extraen los mismos campos")
+
+        esperado = gestionar_pdf(self.pdf_ruta, backend="pdfplumber", respaldo=None, cache=False)
+        for backend in ("pdfium", "pdfminer"):
+            with self.subTest(backend=backend):
+                self.assertEqual(gestionar_pdf(self.pdf_ruta, backend=backend, respaldo=None, cache=False), esperado)
+
+    def test_respaldo_con_campos_vacios(self):
+        print("[Test]... Validando respaldo con pdfplumber cuando faltan campos")
+
+        def sin_estado(pdf_origen):
+            for linea in BACKENDS_PDF["pdfium"](pdf_origen):
+                if not linea.lower().startswith("estado"):
+                    yield linea
+        registrar_backend_pdf("sin_estado_prueba", sin_estado)
+        try:
+            self.assertIsNone(gestionar_pdf(self.pdf_ruta, backend="sin_estado_prueba", respaldo=None, cache=False)["estado_cedula"])
+            with open(self.pdf_ruta, "rb") as f:
+                datos = gestionar_pdf(io.BytesIO(f.read()), backend="sin_estado_prueba", cache=False)
+            self.assertEqual(datos["estado_cedula"], "Vigente")
+        finally:
+            BACKENDS_PDF.pop("sin_estado_prueba")
+
+    def test_pdfium_entre_hilos(self):
+        print("[Test]... Validando lectura concurrente con pdfium")
+
+        pdfs = [crear_pdf_certificado_bytes(str(1000 + i), "5 DE MAYO DE 2010", "CALI - VALLE", "ANA ROJAS") for i in range(12)]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            resultados = list(executor.map(lambda pdf: gestionar_pdf(pdf, backend="pdfium", respaldo=None, cache=False), pdfs))
+        self.assertEqual([r["cedula_ciudadania"] for r in resultados], [str(1000 + i) for i in range(12)])
+
+    def test_parser_variantes_etiquetas(self):
+        print("[Test]... Validando etiquetas sin tildes, en mayúsculas y con espacios")
+
+        texto = ("CEDULA DE  CIUDADANIA :  1.234.567\n"
+                 "fecha de expedicion:5 de Setiembre del 2010\n"
+                 "  Lugar de Expedición: SAN ANDRÉS DE TUMACO-NARIÑO\n"
+                 "A NOMBRE DE:  ANA   ROJAS\n"
+                 "Estado : VIGENTE\n")
+        datos = parsear_documento_pdf(texto)
+        self.assertEqual(datos["cedula_ciudadania"], "1234567")
+        self.assertEqual(datos["fecha_expedida"], "2010-09-05")
+        self.assertEqual((datos["municipio_expedida"], datos["departamento_expedida"]), ("San Andrés de Tumaco", "Nariño"))
+        self.assertEqual(datos["nombre_ciudadano"], "Ana Rojas")
+        self.assertEqual(datos["estado_cedula"], "Vigente")
+        self.assertEqual(set(datos["validacion"].values()), {"ok"})
+
+    def test_parser_validacion_por_campo(self):
+        print("[Test]... Validando estado de validación de campos faltantes o inválidos")
+
+        datos = parsear_documento_pdf("Cédula de Ciudadanía: 12AB\n"
+                                      "Fecha de Expedición: 31 DE FEBRERO DE 2020\n"
+                                      "Lugar de Expedición: BOGOTA D.C.\n")
+        self.assertEqual(datos["municipio_expedida"], "Bogota D.C.")
+        self.assertIsNone(datos["departamento_expedida"])
+        self.assertEqual(datos["fecha_expedida"], "31 DE FEBRERO DE 2020")
+        self.assertEqual(datos["validacion"], {"cedula_ciudadania": "invalido", "nombre_ciudadano": "faltante",
+                                               "fecha_expedida": "invalido", "municipio_expedida": "ok",
+                                               "departamento_expedida": "faltante", "estado_cedula": "faltante"})
 
     def  test_pdf_vacio(self):
         print("[Test]... Validando vacio")
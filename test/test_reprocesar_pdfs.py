@@ -0,0 +1,112 @@
+"""
+Módulo de pruebas unitarias para `src/reprocesar_pdfs.py`.
+
+Genera un árbol de carpetas `session__*` con certificados de prueba, PDFs sin
+texto y archivos dañados, y lo reprocesa con el pool de procesos.
+
+Casos principales:
+    - Recorrido recursivo y perezoso de las carpetas, en orden estable.
+    - Resultados guardados en SQLite por lotes, con conteo de fallidos e incompletos.
+    - Reanudación: los PDFs ya guardados en la corrida se omiten.
+    - Reintento de fallidos y reinicio de la corrida.
+
+Recomendación:
+    Ejecutar con `python -m unittest test/test_reprocesar_pdfs.py -v`
+"""
+
+from src.reprocesar_pdfs import iterar_pdfs, reprocesar
+from src.storage import guardar_lote_reproceso
+from src.create_pdf import crear_pdf_certificado_bytes, crear_pdf_vacio
+import json
+import os
+import sqlite3
+import tempfile
+import types
+import unittest
+import HtmlTestRunner
+
+
+class Test_Reprocesar_Pdfs(unittest.TestCase):
+
+    def setUp(self):
+        self.dir_temp = tempfile.TemporaryDirectory()
+        self.raiz = os.path.join(self.dir_temp.name, "pdfs")
+        self.db_path = os.path.join(self.dir_temp.name, "reproceso.db")
+        self.buenos = []
+        for sesion, cantidad in (("session__a", 3), ("session__b", 2)):
+            carpeta = os.path.join(self.raiz, sesion)
+            os.makedirs(os.path.join(carpeta, "anidada"), exist_ok=True)
+            for i in range(cantidad):
+                ruta = os.path.join(carpeta, "anidada" if i == 0 else "", f"certificado_{sesion}_{i}.pdf")
+                with open(ruta, "wb") as f:
+                    f.write(crear_pdf_certificado_bytes(f"{len(self.buenos) + 100}", "5 DE MAYO DE 2010", "CALI - VALLE", "ANA ROJAS"))
+                self.buenos.append(ruta)
+        self.vacio = crear_pdf_vacio(os.path.join(self.raiz, "session__b"))
+        self.danado = os.path.join(self.raiz, "session__b", "danado.pdf")
+        with open(self.danado, "wb") as f:
+            f.write(b"esto no es un pdf")
+        with open(os.path.join(self.raiz, "session__a", "notas.txt"), "w") as f:
+            f.write("no es pdf")
+
+    def tearDown(self):
+        self.dir_temp.cleanup()
+
+    def filas(self, corrida="reproceso"):
+        conn = sqlite3.connect(self.db_path)
+        filas = conn.execute("SELECT ruta_pdf, cedula, fecha_expedida, validacion, error FROM reproceso_pdf WHERE corrida = ?",
+                             (corrida,)).fetchall()
+        conn.close()
+        return {ruta: fila for ruta, *fila in filas}
+
+    def test_recorrido_perezoso(self):
+        print("[Test] Validando recorrido recursivo y perezoso...")
+        rutas = iterar_pdfs(self.raiz)
+        self.assertIsInstance(rutas, types.GeneratorType)
+        rutas = list(rutas)
+        self.assertEqual(set(rutas), set(self.buenos) | {self.vacio, self.danado})
+        self.assertEqual(rutas, list(iterar_pdfs(self.raiz)), "El orden del recorrido no es estable")
+
+    def test_reproceso_y_reanudacion(self):
+        print("[Test] Validando reproceso en el pool, guardado por lotes y reanudación...")
+        resumen = reprocesar(self.raiz, db_path=self.db_path, workers=2, tamano_lote=2)
+        self.assertEqual(resumen["procesados"], 7)
+        self.assertEqual(resumen["fallidos"], 2)
+        self.assertEqual({error["ruta"] for error in resumen["errores"]}, {self.vacio, self.danado})
+        self.assertGreater(resumen["pdfs_por_segundo"], 0)
+
+        filas = self.filas()
+        self.assertEqual(len(filas), 7)
+        cedula, fecha, validacion, error = filas[self.buenos[0]]
+        self.assertEqual((cedula, fecha, error), ("100", "2010-05-05", None))
+        self.assertEqual(set(json.loads(validacion).values()), {"ok"})
+        self.assertIsNotNone(filas[self.danado][3])
+
+        resumen = reprocesar(self.raiz, db_path=self.db_path, workers=2)
+        self.assertEqual((resumen["procesados"], resumen["omitidos"]), (0, 7))
+
+        resumen = reprocesar(self.raiz, db_path=self.db_path, workers=2, reintentar_fallidos=True)
+        self.assertEqual((resumen["procesados"], resumen["omitidos"]), (2, 5))
+
+        resumen = reprocesar(self.raiz, db_path=self.db_path, workers=2, reiniciar=True)
+        self.assertEqual((resumen["procesados"], resumen["omitidos"]), (7, 0))
+
+    def test_reanudar_corrida_interrumpida(self):
+        print("[Test] Validando reanudación tras una interrupción...")
+        guardar_lote_reproceso(self.db_path, "v2", [(ruta, {"cedula_ciudadania": "x"}) for ruta in self.buenos[:3]])
+        resumen = reprocesar(self.raiz, db_path=self.db_path, corrida="v2", workers=1)
+        self.assertEqual((resumen["procesados"], resumen["omitidos"]), (4, 3))
+        self.assertEqual(len(self.filas("v2")), 7)
+        self.assertEqual(self.filas(), {}, "La corrida por defecto no debe verse afectada")
+
+
+if __name__ == '__main__':
+    ruta_report = os.path.join(os.path.dirname(__file__), "reports")
+    unittest.main(
+        testRunner=HtmlTestRunner.HTMLTestRunner(
+            output=ruta_report,
+            report_title='Resultados_Test_Reprocesar_Pdfs',
+            combine_reports=True,
+            add_timestamp=True,
+            verbosity=2
+        )
+    )
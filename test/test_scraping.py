@@ -0,0 +1,279 @@
+"""
+Módulo de pruebas unitarias para las esperas del envío del captcha en `src/scraping.py`.
+
+Usa un driver simulado cuyo estado (alerta, botón "Generar Certificado" o
+imagen del captcha) cambia después de un retardo, sin navegador real.
+
+Casos principales:
+    - Detección de la alerta de captcha incorrecto (y su aceptación).
+    - Detección del botón "Generar Certificado" visible.
+    - Detección de un captcha nuevo sin alerta.
+    - Plazo agotado sin desenlace.
+    - Cada espera termina en cuanto ocurre el desenlace (sin pausas fijas).
+    - Formulario completado en un solo viaje al WebDriver (frente a los
+      `find_element`/`Select` clásicos), contado con `contar_viajes`.
+    - Consulta completa: una respuesta manual incorrecta libera la sesión de
+      inmediato y un envío sin desenlace solo espera el botón un plazo corto.
+    - Las consultas fallidas devuelven `error` con sus esperas y viajes.
+
+Recomendación:
+    Ejecutar con `python -m unittest test/test_scraping.py -v`
+"""
+
+from selenium.common.exceptions import NoAlertPresentException, NoSuchElementException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.errorhandler import ErrorHandler
+from selenium.webdriver.remote.locator_converter import LocatorConverter
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.remote.webelement import WebElement
+from selenium.webdriver.support.ui import Select
+from src.configuration import contar_viajes
+from src.scraping import esperar_resultado_captcha, enviar_captcha, llenar_formulario, SCRIPT_LLENAR_FORMULARIO
+from src import scraping, utils
+from unittest import mock
+import os
+import time
+import unittest
+import HtmlTestRunner
+
+
+class AlertaSimulada:
+    def __init__(self, driver, texto):
+        self.driver = driver
+        self.text = texto
+
+    def accept(self):
+        self.driver.alerta_aceptada = True
+        self.driver.desenlace = None
+
+
+class ElementoSimulado:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def is_displayed(self):
+        return True
+
+    def get_attribute(self, nombre):
+        return self.driver.src_actual() if nombre == "src" else None
+
+    def clear(self):
+        pass
+
+    def send_keys(self, texto):
+        self.driver.escrito = texto
+
+    def click(self):
+        self.driver.enviado_en = time.monotonic()
+
+
+class SwitchTo:
+    def __init__(self, driver):
+        self.driver = driver
+
+    @property
+    def alert(self):
+        if self.driver.ocurrio("alerta"):
+            return AlertaSimulada(self.driver, " Código incorrecto ")
+        raise NoAlertPresentException()
+
+
+class DriverSimulado:
+    """
+    Driver en el que `desenlace` ("alerta", "aceptado" o "recargado") ocurre `retardo` segundos después del clic.
+    """
+
+    def __init__(self, desenlace=None, retardo=0.2):
+        self.desenlace = desenlace
+        self.retardo = retardo
+        self.enviado_en = time.monotonic()
+        self.alerta_aceptada = False
+        self.escrito = None
+        self.switch_to = SwitchTo(self)
+
+    def ocurrio(self, desenlace):
+        return self.desenlace == desenlace and time.monotonic() - self.enviado_en >= self.retardo
+
+    def src_actual(self):
+        return "captcha?id=2" if self.ocurrio("recargado") else "captcha?id=1"
+
+    def find_elements(self, by, valor):
+        if valor == utils.xpath_boton_generar_certificado and self.ocurrio("aceptado"):
+            return [ElementoSimulado(self)]
+        return []
+
+    def find_element(self, by, valor):
+        if valor in (utils.id_campo_captcha, utils.id_campo_codigo, utils.xpath_boton_continuar):
+            return ElementoSimulado(self)
+        raise NoSuchElementException(valor)
+
+
+CLAVE_ELEMENTO = "element-6066-11e4-a52e-4f735466cecf"
+
+
+class EjecutorSimulado:
+    """
+    Sustituye a la conexión HTTP con ChromeDriver: responde cada comando sin navegador.
+    """
+
+    def __init__(self, faltantes=()):
+        self.faltantes = list(faltantes)
+        self.scripts = []
+
+    def execute(self, comando, params):
+        if comando == "w3cExecuteScript":
+            self.scripts.append(params)
+            return {"value": self.faltantes if params["script"] == SCRIPT_LLENAR_FORMULARIO else None}
+        return {"value": {
+            "findElement": {CLAVE_ELEMENTO: "e1"},
+            "findChildElements": [{CLAVE_ELEMENTO: "o1"}],
+            "getElementTagName": "select",
+            "isElementEnabled": True,
+            "isElementSelected": False,
+        }.get(comando)}
+
+
+def webdriver_simulado(ejecutor):
+    """
+    WebDriver real de Selenium (sin sesión) conectado a `ejecutor`.
+    """
+    driver = object.__new__(WebDriver)
+    driver.command_executor = ejecutor
+    driver.error_handler = ErrorHandler()
+    driver.session_id = "sesion-simulada"
+    driver.locator_converter = LocatorConverter()
+    driver._web_element_cls = WebElement
+    driver._is_remote = False
+    return driver
+
+
+class Test_Scraping_Formulario(unittest.TestCase):
+
+    def test_un_solo_viaje(self):
+        print("[Test] Validando el formulario en un solo viaje al WebDriver...")
+        driver = webdriver_simulado(EjecutorSimulado())
+
+        viajes = contar_viajes(driver)
+        cedula = driver.find_element(By.ID, utils.id_campo_cedula)
+        cedula.clear()
+        cedula.send_keys("123456")
+        Select(driver.find_element(By.ID, utils.id_select_campo_dia)).select_by_value("05")
+        Select(driver.find_element(By.ID, utils.id_select_campo_mes)).select_by_visible_text("Marzo")
+        Select(driver.find_element(By.ID, utils.id_select_campo_year)).select_by_value("2010")
+        viajes_clasicos = sum(viajes.values())
+
+        viajes = contar_viajes(driver)
+        self.assertEqual(llenar_formulario(driver, "123456", "05", "marzo", "2010"), [])
+        self.assertEqual(dict(viajes), {"w3cExecuteScript": 1})
+        self.assertGreater(viajes_clasicos, 10)
+
+        cedula_arg, valor, selects = driver.command_executor.scripts[-1]["args"]
+        self.assertEqual((cedula_arg, valor), (utils.id_campo_cedula, "123456"))
+        self.assertEqual(selects, [[utils.id_select_campo_dia, "05", False],
+                                   [utils.id_select_campo_mes, "Marzo", True],
+                                   [utils.id_select_campo_year, "2010", False]])
+
+    def test_campos_faltantes(self):
+        print("[Test] Validando campos no encontrados por el script...")
+        driver = webdriver_simulado(EjecutorSimulado(faltantes=[utils.id_select_campo_year]))
+        self.assertEqual(llenar_formulario(driver, "1", "01", "enero", "1900"), [utils.id_select_campo_year])
+
+    def test_contador_se_reinicia(self):
+        print("[Test] Validando que el contador se instala una vez y se reinicia...")
+        driver = webdriver_simulado(EjecutorSimulado())
+        primero = contar_viajes(driver)
+        driver.find_element(By.ID, utils.id_campo_cedula)
+        segundo = contar_viajes(driver)
+        driver.find_element(By.ID, utils.id_campo_cedula)
+        self.assertIs(primero, segundo)
+        self.assertEqual(dict(segundo), {"findElement": 1})
+
+
+class Test_Scraping_Esperas(unittest.TestCase):
+
+    def test_alerta(self):
+        print("[Test] Validando detección de la alerta de captcha incorrecto...")
+        driver = DriverSimulado("alerta")
+        espera = esperar_resultado_captcha(driver, "captcha?id=1", plazo=2)
+        self.assertEqual((espera["resultado"], espera["mensaje"]), ("alerta", "Código incorrecto"))
+        self.assertTrue(driver.alerta_aceptada)
+        self.assertLess(espera["latencia"], 1.0)
+
+    def test_aceptado(self):
+        print("[Test] Validando detección del botón 'Generar Certificado'...")
+        espera = enviar_captcha(DriverSimulado("aceptado", retardo=0.3), "AB12C", plazo=2)
+        self.assertEqual(espera["resultado"], "aceptado")
+        self.assertGreaterEqual(espera["latencia"], 0.3)
+        self.assertLess(espera["latencia"], 1.0, "La espera no terminó en cuanto apareció el botón")
+
+    def test_recargado(self):
+        print("[Test] Validando detección de un captcha nuevo sin alerta...")
+        driver = DriverSimulado("recargado")
+        espera = enviar_captcha(driver, "AB12C", plazo=2)
+        self.assertEqual(espera["resultado"], "recargado")
+        self.assertEqual(driver.escrito, "AB12C")
+
+    def test_tiempo_agotado(self):
+        print("[Test] Validando plazo agotado...")
+        espera = esperar_resultado_captcha(DriverSimulado(), "captcha?id=1", plazo=0.3)
+        self.assertEqual(espera["resultado"], "tiempo_agotado")
+        self.assertGreaterEqual(espera["latencia"], 0.3)
+
+
+def envio(resultado, mensaje=None):
+    return {"resultado": resultado, "mensaje": mensaje, "latencia": 0.01}
+
+
+class Test_Scraping_Consulta(unittest.TestCase):
+    """
+    `consultar_certificado_cedula` con el navegador, el OCR y el envío del captcha simulados.
+    """
+
+    def consultar(self, envios, **kwargs):
+        with mock.patch.object(scraping, "abrir_enlace"), \
+                mock.patch.object(scraping, "cerrar_driver"), \
+                mock.patch.object(scraping, "contar_viajes", return_value={"findElement": 3}), \
+                mock.patch.object(scraping, "llenar_formulario_y_leer_captcha", return_value="ABCD"), \
+                mock.patch.object(scraping, "resolver_captcha", return_value="ABCD"), \
+                mock.patch.object(scraping, "recargar_captcha", return_value=True), \
+                mock.patch.object(scraping, "obtener_bytes_captcha", return_value=(b"png", "cache")), \
+                mock.patch.object(scraping, "enviar_captcha", side_effect=envios):
+            inicio = time.monotonic()
+            resultado = scraping.consultar_certificado_cedula(DriverSimulado(), "123456", "05", "marzo", "2010",
+                                                              cache_captcha=False, formulario_rapido=True, **kwargs)
+            return resultado, time.monotonic() - inicio
+
+    def test_respuesta_manual_incorrecta(self):
+        print("[Test] Validando que una respuesta manual incorrecta libera la sesión sin esperar el botón...")
+        cola = mock.Mock()
+        cola.tomar_turno.return_value = True
+        cola.encolar.return_value = "id1"
+        cola.esperar_respuesta.return_value = "WXYZ"
+        resultado, duracion = self.consultar([envio("alerta", "Código incorrecto")] * 3, cola_manual=cola)
+        self.assertEqual((resultado["reencolar"], resultado["motivo"]), (True, "captcha_manual_incorrecto"))
+        self.assertEqual([e["espera"] for e in resultado["esperas"]].count("resultado_captcha"), 3)
+        self.assertLess(duracion, 2.0, "Se esperó el botón tras una respuesta manual incorrecta")
+        cola.liberar_turno.assert_called_once()
+
+    def test_envio_sin_desenlace(self):
+        print("[Test] Validando la espera corta del botón cuando el envío no tuvo desenlace...")
+        with mock.patch.object(scraping, "PLAZO_CONFIRMAR_CAPTCHA", 0.3):
+            resultado, duracion = self.consultar([envio("tiempo_agotado")])
+        self.assertIn("error", resultado)
+        self.assertLess(duracion, 2.0, "Se usó el plazo completo de 'Generar Certificado'")
+        self.assertEqual([e["espera"] for e in resultado["esperas"]], ["resultado_captcha", "boton_generar"])
+        self.assertEqual(resultado["esperas"][-1]["resultado"], "tiempo_agotado")
+        self.assertEqual(resultado["viajes"], 3)
+
+
+if __name__ == '__main__':
+    ruta_report = os.path.join(os.path.dirname(__file__), "reports")
+    unittest.main(
+        testRunner=HtmlTestRunner.HTMLTestRunner(
+            output=ruta_report,
+            report_title='Resultados_Test_Scraping',
+            combine_reports=True,
+            add_timestamp=True,
+            verbosity=2
+        )
+    )
@@ -0,0 +1,106 @@
+"""
+Módulo de pruebas unitarias para `src/servicio_ocr.py`.
+
+Verifica que el servicio de OCR compartido junte en lotes los captchas que
+envían varios hilos y entregue a cada uno su resultado.
+
+Casos principales:
+    - Resultados correctos para cada trabajador con imágenes enviadas en paralelo.
+    - Agrupación de imágenes de distintos trabajadores en un mismo lote.
+    - Resolución en el pool de procesos (forkserver) con la versión por lotes de
+      un resolvedor registrado en tiempo de ejecución.
+    - Propagación de errores del resolvedor a los futuros.
+    - Rechazo de envíos con el servicio cerrado.
+
+Recomendación:
+    Ejecutar con `python -m unittest test/test_servicio_ocr.py -v`
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from src.servicio_ocr import ServicioOCR
+from src import orc
+import os
+import unittest
+import numpy as np
+import HtmlTestRunner
+
+
+def imagen(valor):
+    return np.full((10, 10), valor, np.uint8)
+
+
+def eco(gris):
+    return {"texto": f"AB{int(gris[0, 0]):03d}", "confianza": 100}
+
+
+llamadas_lote = []
+
+def eco_lote(imagenes):
+    llamadas_lote.append(len(imagenes))
+    return [eco(gris) for gris in imagenes]
+
+
+def fallar(gris):
+    raise RuntimeError("resolvedor roto")
+
+
+def setUpModule():
+    orc.registrar_resolvedor("eco_prueba", eco, lote=eco_lote)
+    orc.registrar_resolvedor("falla_prueba", fallar)
+
+
+def tearDownModule():
+    for nombre in ("eco_prueba", "falla_prueba"):
+        orc.RESOLVEDORES_CAPTCHA.pop(nombre, None)
+        orc.RESOLVEDORES_LOTE.pop(nombre, None)
+
+
+class Test_Servicio_Ocr(unittest.TestCase):
+
+    def setUp(self):
+        llamadas_lote.clear()
+
+    def test_resultados_por_trabajador(self):
+        print("[Test] Validando resultados entregados a cada trabajador...")
+        with ServicioOCR(resolvedor="eco_prueba", procesos=False, espera_lote=0.05) as servicio:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                resultados = list(executor.map(lambda v: servicio.resolver(imagen(v)), range(40)))
+            metricas = servicio.metricas()
+        self.assertEqual(resultados, [f"AB{v:03d}" for v in range(40)])
+        self.assertEqual(metricas["imagenes"], 40)
+        self.assertLess(metricas["lotes"], 40, "Las imágenes no se agruparon en lotes")
+        self.assertEqual(sum(llamadas_lote), 40)
+        self.assertLessEqual(metricas["lote_maximo"], servicio.tamano_lote)
+
+    def test_umbral_y_forma(self):
+        print("[Test] Validando filtro de confianza del servicio...")
+        with ServicioOCR(resolvedor="eco_prueba", procesos=False, umbral_confianza=101) as servicio:
+            self.assertIsNone(servicio.resolver(imagen(7)))
+
+    def test_pool_de_procesos(self):
+        print("[Test] Validando resolución en el pool de procesos...")
+        with ServicioOCR(workers=2, resolvedor="eco_prueba", espera_lote=0.05) as servicio:
+            futuros = [servicio.enviar(imagen(v)) for v in range(20)]
+            self.assertEqual([f.result(timeout=30) for f in futuros], [f"AB{v:03d}" for v in range(20)])
+            self.assertLess(servicio.metricas()["lotes"], 20)
+
+    def test_error_del_resolvedor(self):
+        print("[Test] Validando propagación de errores...")
+        with ServicioOCR(resolvedor="falla_prueba", procesos=False) as servicio:
+            with self.assertRaises(RuntimeError):
+                servicio.resolver(imagen(1))
+        with self.assertRaises(RuntimeError):
+            servicio.enviar(imagen(1))
+
+
+if __name__ == '__main__':
+    ruta_report = os.path.join(os.path.dirname(__file__), "reports")
+    unittest.main(
+        testRunner=HtmlTestRunner.HTMLTestRunner(
+            output=ruta_report,
+            report_title='Resultados_Test_Servicio_Ocr',
+            combine_reports=True,
+            add_timestamp=True,
+            verbosity=2
+        )
+    )
@@ -0,0 +1,172 @@
+"""
+Módulo de pruebas unitarias para `src/servidor_simulado.py`.
+
+Levanta el servidor simulado en un puerto libre y ejecuta contra él el motor
+HTTP real, sin red externa ni navegador.
+
+Casos principales:
+    - Generación de captchas con respuesta conocida.
+    - Consulta completa usando el oráculo del simulador como resolvedor.
+    - Alerta de JavaScript cuando el código del captcha es incorrecto, conservando
+      la cédula y la fecha enviadas.
+    - Rechazo de postbacks con `__VIEWSTATE` inválido.
+    - Descarte de sesiones por límite de cantidad y por tiempo sin uso.
+
+Recomendación:
+    Ejecutar con `python -m unittest test/test_servidor_simulado.py -v`
+"""
+
+from src.servidor_simulado import ServidorSimulado, SimuladorRegistraduria, generar_imagen_captcha, NIVELES_DIFICULTAD, MENSAJE_CAPTCHA_INCORRECTO
+from unittest import mock
+from src.motor_http import analizar_formulario, consultar_certificado_cedula_http
+from src.pdf_parser import gestionar_pdf
+from src import utils
+import io
+import os
+import random
+import re
+import tempfile
+import unittest
+import requests
+import HtmlTestRunner
+
+
+class Test_Servidor_Simulado(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.nv_dir_temp = tempfile.TemporaryDirectory()
+        cls.servidor = ServidorSimulado(dificultad="media", semilla=7).iniciar()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.servidor.detener()
+        cls.nv_dir_temp.cleanup()
+
+    def test_generar_captcha(self):
+        print("[Test] Validando generación de captchas con respuesta conocida...")
+        for dificultad, nivel in NIVELES_DIFICULTAD.items():
+            texto, imagen = generar_imagen_captcha(dificultad=dificultad, rng=random.Random(1))
+            self.assertTrue(imagen.startswith(b"\x89PNG"), "La imagen no es PNG")
+            self.assertTrue(nivel["longitud"][0] <= len(texto) <= nivel["longitud"][1])
+        self.assertEqual(generar_imagen_captcha("AB12", rng=random.Random(3)),
+                         generar_imagen_captcha("AB12", rng=random.Random(3)), "El generador no es reproducible")
+
+    def test_sesiones_acotadas(self):
+        print("[Test] Validando descarte de sesiones antiguas...")
+        simulador = SimuladorRegistraduria(max_sesiones=3, ttl_sesion=60)
+        ids = [simulador.obtener_sesion(None)[0] for _ in range(3)]
+        self.assertEqual(simulador.obtener_sesion(ids[0])[0], ids[0], "La sesión existente no se reutilizó")
+        simulador.obtener_sesion(None)
+        self.assertEqual(len(simulador.sesiones), 3)
+        self.assertNotIn(ids[1], simulador.sesiones, "No se descartó la sesión usada hace más tiempo")
+        self.assertIn(ids[0], simulador.sesiones)
+
+        with mock.patch("src.servidor_simulado.time.monotonic", return_value=simulador.sesiones[ids[0]]["ultimo_uso"] + 61):
+            nueva, _ = simulador.obtener_sesion(ids[0])
+        self.assertNotEqual(nueva, ids[0], "La sesión vencida se reutilizó")
+        self.assertEqual(list(simulador.sesiones), [nueva])
+
+    def test_pagina_mismos_ids(self):
+        print("[Test] Validando IDs de la página simulada...")
+        formulario = analizar_formulario(requests.get(self.servidor.url, timeout=5).text)
+        for id_elemento in (utils.id_campo_cedula, utils.id_campo_codigo, utils.id_boton_principal):
+            self.assertIn(id_elemento, formulario["ids"], f"Falta el elemento {id_elemento}")
+        for id_select in (utils.id_select_campo_dia, utils.id_select_campo_mes, utils.id_select_campo_year):
+            self.assertIn(id_select, formulario["selects"], f"Falta el select {id_select}")
+        self.assertIsNotNone(formulario["captcha_src"], "Falta la imagen del captcha")
+
+    def test_consulta_completa_con_oraculo(self):
+        print("[Test] Validando consulta HTTP completa contra el servidor simulado...")
+        resultado = consultar_certificado_cedula_http("1234567890", "05", "marzo", "2011", url=self.servidor.url,
+                                                      resolver=self.servidor.simulador.respuesta_para_imagen,
+                                                      result_dir=self.nv_dir_temp.name)
+        self.assertIsInstance(resultado, dict, "No se obtuvo el resultado de almacenamiento")
+        self.assertTrue(os.path.exists(resultado["json"]), "No se guardó el json")
+
+    def test_captcha_incorrecto_muestra_alerta(self):
+        print("[Test] Validando alerta por captcha incorrecto...")
+        antes = self.servidor.simulador.metricas["captchas_incorrectos"]
+        resultado = consultar_certificado_cedula_http("1234567890", "05", "marzo", "2011", url=self.servidor.url,
+                                                      resolver=lambda imagen: "ZZZZZ", max_intentos=2,
+                                                      result_dir=self.nv_dir_temp.name)
+        self.assertIsNone(resultado, "La consulta no debió completarse")
+        self.assertEqual(self.servidor.simulador.metricas["captchas_incorrectos"] - antes, 2)
+
+        sesion = requests.Session()
+        formulario = analizar_formulario(sesion.get(self.servidor.url, timeout=5).text)
+        datos = dict(formulario["campos"], **{"ctl00$ContentPlaceHolder1$TextBox2": "ZZZZZ",
+                                              "ctl00$ContentPlaceHolder1$Button1": utils.valor_boton_continuar})
+        respuesta = sesion.post(self.servidor.url, data=datos, timeout=5)
+        self.assertEqual(analizar_formulario(respuesta.text)["alerta"], MENSAJE_CAPTCHA_INCORRECTO)
+
+    def test_postback_conserva_fecha(self):
+        print("[Test] Validando que la fecha enviada se conserva tras un captcha incorrecto...")
+        sesion = requests.Session()
+        formulario = analizar_formulario(sesion.get(self.servidor.url, timeout=5).text)
+        datos = dict(formulario["campos"], **{"ctl00$ContentPlaceHolder1$TextBox1": "1234567890",
+                                              "ctl00$ContentPlaceHolder1$DropDownList1": "05",
+                                              "ctl00$ContentPlaceHolder1$DropDownList2": "3",
+                                              "ctl00$ContentPlaceHolder1$DropDownList3": "2011",
+                                              "ctl00$ContentPlaceHolder1$TextBox2": "ZZZZZ",
+                                              "ctl00$ContentPlaceHolder1$Button1": utils.valor_boton_continuar})
+        pagina = sesion.post(self.servidor.url, data=datos, timeout=5).text
+        seleccionadas = {id_select: re.findall(r'<option value="([^"]*)" selected>', select)
+                         for id_select, select in re.findall(r'<select [^>]*id="([^"]+)">(.*?)</select>', pagina)}
+        self.assertEqual(seleccionadas, {utils.id_select_campo_dia: ["05"], utils.id_select_campo_mes: ["3"],
+                                         utils.id_select_campo_year: ["2011"]})
+        self.assertIn('value="1234567890"', pagina)
+
+        # Un reintento con la página devuelta (sin volver a elegir la fecha) emite el certificado con la fecha enviada
+        formulario = analizar_formulario(pagina)
+        imagen = sesion.get(requests.compat.urljoin(self.servidor.url, formulario["captcha_src"]), timeout=5).content
+        reintento = dict(formulario["campos"])
+        for id_select, valores in seleccionadas.items():
+            reintento[formulario["selects"][id_select]["name"]] = valores[0]
+        reintento.update({"ctl00$ContentPlaceHolder1$TextBox2": self.servidor.simulador.respuesta_para_imagen(imagen),
+                          "ctl00$ContentPlaceHolder1$Button1": utils.valor_boton_continuar})
+        confirmacion = analizar_formulario(sesion.post(self.servidor.url, data=reintento, timeout=5).text)
+        respuesta = sesion.post(self.servidor.url, timeout=5,
+                                data=dict(confirmacion["campos"], **{"ctl00$ContentPlaceHolder1$Button1": utils.valor_boton_generar_certificado}))
+        self.assertEqual(gestionar_pdf(io.BytesIO(respuesta.content))["fecha_expedida"], "2011-03-05")
+
+    def test_certificado_pdf(self):
+        print("[Test] Validando certificado PDF generado por el servidor...")
+        sesion = requests.Session()
+        formulario = analizar_formulario(sesion.get(self.servidor.url, timeout=5).text)
+        imagen = sesion.get(requests.compat.urljoin(self.servidor.url, formulario["captcha_src"]), timeout=5).content
+        datos = dict(formulario["campos"], **{"ctl00$ContentPlaceHolder1$TextBox1": "1234567890",
+                                              "ctl00$ContentPlaceHolder1$DropDownList1": "05",
+                                              "ctl00$ContentPlaceHolder1$DropDownList2": "3",
+                                              "ctl00$ContentPlaceHolder1$DropDownList3": "2011",
+                                              "ctl00$ContentPlaceHolder1$TextBox2": self.servidor.simulador.respuesta_para_imagen(imagen),
+                                              "ctl00$ContentPlaceHolder1$Button1": utils.valor_boton_continuar})
+        confirmacion = analizar_formulario(sesion.post(self.servidor.url, data=datos, timeout=5).text)
+        self.assertIn(utils.valor_boton_generar_certificado, confirmacion["botones"])
+
+        datos = dict(confirmacion["campos"], **{"ctl00$ContentPlaceHolder1$Button1": utils.valor_boton_generar_certificado})
+        respuesta = sesion.post(self.servidor.url, data=datos, timeout=5)
+        self.assertEqual(respuesta.headers["Content-Type"], "application/pdf")
+        informacion = gestionar_pdf(io.BytesIO(respuesta.content))
+        self.assertEqual(informacion["cedula_ciudadania"].replace(".", ""), "1234567890")
+        self.assertEqual(informacion["fecha_expedida"], "2011-03-05")
+
+    def test_viewstate_invalido(self):
+        print("[Test] Validando rechazo de __VIEWSTATE inválido...")
+        sesion = requests.Session()
+        sesion.get(self.servidor.url, timeout=5)
+        respuesta = sesion.post(self.servidor.url, data={"__VIEWSTATE": "otro", "ctl00$ContentPlaceHolder1$Button1": "Continuar"}, timeout=5)
+        self.assertEqual(respuesta.status_code, 400)
+
+
+if __name__ == '__main__':
+    ruta_report = os.path.join(os.path.dirname(__file__), "reports")
+    unittest.main(
+        testRunner=HtmlTestRunner.HTMLTestRunner(
+            output=ruta_report,
+            report_title='Resultados_Test_Servidor_Simulado',
+            combine_reports=True,
+            add_timestamp=True,
+            verbosity=2
+        )
+    )
@@ -9,13 +9,14 @@ Casos principales:
     - Creación y estructura de la base de datos `informacion.db`.
     - Inserción de registros válidos en SQLite.
     - Generación correcta de archivos JSON con contenido coherente.
+    - Archivado de certificados PDF recibidos en memoria.
     - Manejo de excepciones ante datos incompletos o errores de escritura.
 
 Recomendación:
     Ejecutar con `python -m unittest test/test_storage.py -v`
 """
 
-from src.storage import guardar_informacion_extraida, gestionar_json, gestionar_base_de_datos
+from src.storage import guardar_informacion_extraida, gestionar_json, gestionar_base_de_datos, guardar_pdf
 import os
 import tempfile
 import json
@@ -85,6 +86,14 @@ class Test_Storage_Pdf(unittest.TestCase):
         self.assertIn("db",resultado_final,"No se tiene la ruta del archivo db")
         self.assertIn("json",resultado_final,"No se tiene la ruta del archivo json")
 
+    def test_guardar_pdf(self):
+        print("[Test] Validando archivado de PDF en memoria...")
+        pdf_result = guardar_pdf(b"%PDF-1.4 prueba", os.path.join(self.nv_dir_temp.name, "pdfs"), "1111111111")
+        self.assertTrue(os.path.exists(pdf_result), "No existe el archivo pdf")
+        self.assertIn("1111111111", os.path.basename(pdf_result))
+        with open(pdf_result, "rb") as f:
+            self.assertEqual(f.read(), b"%PDF-1.4 prueba", "El contenido archivado no coincide")
+
     def test_error_guardar_informacion(self):
         print("[Test] Validando manejo de error en guardar_informacion_extraida...")
         data_inc=None